@@ -0,0 +1,33 @@
+"""add_messages_conversation_created_index
+
+Revision ID: 5c7d9e2f4a61
+Revises: 281733ab5ed1
+Create Date: 2026-10-18 12:00:00.000000+00:00
+
+Sohbet geçmişi son N mesaj sorgusu (ORDER BY created_at DESC, id DESC LIMIT N)
+ve keyset sayfalama için messages üzerinde bileşik indeks.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# Revision identifiers, used by Alembic.
+revision: str = '5c7d9e2f4a61'
+down_revision: Union[str, None] = '281733ab5ed1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create (conversation_id, created_at, id) index on messages."""
+    op.create_index(
+        'ix_messages_conversation_created',
+        'messages',
+        ['conversation_id', 'created_at', 'id'],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Drop the composite messages index."""
+    op.drop_index('ix_messages_conversation_created', 'messages', if_exists=True)
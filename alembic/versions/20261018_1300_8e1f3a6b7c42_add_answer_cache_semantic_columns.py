@@ -0,0 +1,43 @@
+"""add_answer_cache_semantic_columns
+
+Revision ID: 8e1f3a6b7c42
+Revises: 5c7d9e2f4a61
+Create Date: 2026-10-18 13:00:00.000000+00:00
+
+Semantik yanıt önbelleği: persona kapsamı, soru embedding'i ve replay
+metadata'sı için answer_cache kolonları; kapsam içi aday taraması için
+(user_id, persona, expires_at) indeksi.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision: str = '8e1f3a6b7c42'
+down_revision: Union[str, None] = '5c7d9e2f4a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add persona/embedding/extra_metadata columns and scope index to answer_cache."""
+    with op.batch_alter_table('answer_cache') as batch_op:
+        batch_op.add_column(sa.Column('persona', sa.String(length=64), nullable=False, server_default='standard'))
+        batch_op.add_column(sa.Column('embedding', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('extra_metadata', sa.JSON(), nullable=True))
+    op.create_index(
+        'ix_answer_cache_user_persona_expires',
+        'answer_cache',
+        ['user_id', 'persona', 'expires_at'],
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Drop the answer_cache scope index and semantic columns."""
+    op.drop_index('ix_answer_cache_user_persona_expires', 'answer_cache', if_exists=True)
+    with op.batch_alter_table('answer_cache') as batch_op:
+        batch_op.drop_column('extra_metadata')
+        batch_op.drop_column('embedding')
+        batch_op.drop_column('persona')
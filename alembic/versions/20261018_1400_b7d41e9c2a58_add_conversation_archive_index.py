@@ -0,0 +1,44 @@
+"""add_conversation_archive_index
+
+Revision ID: b7d41e9c2a58
+Revises: 8e1f3a6b7c42
+Create Date: 2026-10-18 14:00:00.000000+00:00
+
+Sohbet arşivi araması: conversations.message_count (denormalize, mevcut
+mesajlardan doldurulur) ve başlık/özet/entity FTS5 indeksi (SQLite; tablo +
+trigger DDL'i create_all fallback'iyle ortak: app.memory.archive_index).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Revision identifiers, used by Alembic.
+revision: str = 'b7d41e9c2a58'
+down_revision: Union[str, None] = '8e1f3a6b7c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add conversations.message_count and build the archive FTS index."""
+    from app.memory.archive_index import ensure_archive_index
+
+    with op.batch_alter_table('conversations') as batch_op:
+        batch_op.add_column(sa.Column('message_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        "UPDATE conversations SET message_count = "
+        "(SELECT COUNT(*) FROM messages WHERE messages.conversation_id = conversations.id)"
+    )
+    ensure_archive_index(op.get_bind())
+
+
+def downgrade() -> None:
+    """Drop the archive FTS index and conversations.message_count."""
+    from app.memory.archive_index import ARCHIVE_INDEX_DROP
+
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in ARCHIVE_INDEX_DROP:
+            op.execute(statement)
+    with op.batch_alter_table('conversations') as batch_op:
+        batch_op.drop_column('message_count')
@@ -410,3 +410,19 @@ async def admin_orch_snapshot(
         "telemetry": snapshot_obj.get('telemetry', {}),
         "snapshot": snapshot_obj.get('snapshot', {}),
     }
+
+
+# -------------------------------------------------------------------
+# 8) Resilience (anahtarlar, bütçeler, devre kesiciler)
+# -------------------------------------------------------------------
+@router.get('/resilience/status')
+async def admin_resilience_status(
+    current_admin: User = Depends(get_current_admin_user),
+):
+    """
+    Anahtar sağlığı, günlük bütçeler ve devre kesicilerin tek tutarlı özeti.
+    Redis deposunda tüm worker'ların ortak durumunu gösterir.
+    """
+    from app.core.resilience import status_snapshot
+
+    return {"ok": True, **(await status_snapshot())}
@@ -6,7 +6,7 @@ import traceback
 from datetime import datetime
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
@@ -16,13 +16,13 @@ from app.core.logger import get_logger
 from app.core.models import User
 from app.core.usage_limiter import limiter
 from app.memory.conversation import (
-    append_message as conv_append,
     create_conversation as conv_create,
     delete_conversation as conv_delete,
     list_conversations as conv_list,
-    load_messages as conv_load_messages,
-    update_message as conv_update
+    load_messages_async as conv_load_messages,
+    load_messages_page_async as conv_load_page,
 )
+from app.memory.message_journal import message_journal
 from app.services.brain.engine import brain_engine
 from app.schemas.chat import ChatRequest, StyleProfile
 
@@ -121,8 +121,7 @@ async def chat(payload: ChatRequest, user: User = Depends(get_current_active_use
         # 1. Establish IDs immediately (conversation already created above)
         try:
             # Add user message
-            await asyncio.to_thread(
-                conv_append, 
+            await message_journal.append(
                 username=username, 
                 conv_id=local_conv_id, 
                 role="user", 
@@ -150,7 +149,7 @@ async def chat(payload: ChatRequest, user: User = Depends(get_current_active_use
             )
             initial_meta["status"] = "streaming"
             
-            assistant_msg_obj = await asyncio.to_thread(conv_append, username=username, conv_id=local_conv_id, role="bot", text="", extra_metadata=initial_meta)
+            assistant_msg_obj = await message_journal.append(username=username, conv_id=local_conv_id, role="bot", text="", extra_metadata=initial_meta)
             assistant_msg_id = assistant_msg_obj.id
             
             # HANDSHAKE: Send real IDs to frontend immediately
@@ -176,7 +175,7 @@ async def chat(payload: ChatRequest, user: User = Depends(get_current_active_use
                         if isinstance(out, dict) and out.get("job_id"):
                             stream_metadata.update({"type": "image", "status": "queued", "job_id": out.get("job_id")})
                             # Intermediate update for image job persistence
-                            await asyncio.to_thread(conv_update, assistant_msg_id, None, {**initial_meta, **stream_metadata})
+                            message_journal.update(assistant_msg_id, None, {**initial_meta, **stream_metadata})
                 elif event_type == "thought":
                     reasoning_log.append({**event, "timestamp": int(datetime.now().timestamp() * 1000)})
                 elif event_type == "sources":
@@ -202,7 +201,7 @@ async def chat(payload: ChatRequest, user: User = Depends(get_current_active_use
                     if not content_to_save and not stream_metadata.get("job_id"):
                          logger.warning(f"[CHAT_FINAL_SYNC] Uyarı: İçerik boş! (Hata oluşmuş olabilir)")
 
-                    await asyncio.to_thread(conv_update, assistant_msg_id, content_to_save, final_meta)
+                    message_journal.update(assistant_msg_id, content_to_save, final_meta)
                 except Exception as fe:
                     logger.error(f"[FINAL_ERR] Veritabanı kayıt hatası: {fe}")
 
@@ -218,8 +217,22 @@ async def get_conversations(user: User = Depends(get_current_active_user)):
     return [ConversationSummaryOut(id=c.id, title=c.title, created_at=c.created_at, updated_at=c.updated_at) for c in convs]
 
 @router.get("/conversations/{conversation_id}", response_model=list[MessageOut])
-async def get_conversation_endpoint(conversation_id: str, user: User = Depends(get_current_active_user)):
-    messages = await asyncio.to_thread(conv_load_messages, username=user.username, conv_id=conversation_id)
+async def get_conversation_endpoint(
+    conversation_id: str,
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=500),
+    before: int | None = Query(None, description="Keyset imleci: bu mesaj ID'sinden eski mesajlar"),
+    user: User = Depends(get_current_active_user),
+):
+    if limit is None and before is None:
+        messages = await conv_load_messages(username=user.username, conv_id=conversation_id)
+    else:
+        # Sayfalı görünüm: son `limit` mesaj; daha eskisi varsa imleç X-Next-Before header'ında
+        messages, next_before = await conv_load_page(
+            username=user.username, conv_id=conversation_id, limit=limit or 50, before_id=before
+        )
+        if next_before is not None:
+            response.headers["X-Next-Before"] = str(next_before)
     return [MessageOut(id=m.id, role=m.role, text=m.content, time=m.created_at, extra_metadata=m.extra_metadata) for m in messages]
 
 @router.delete("/conversations/{conversation_id}")
@@ -1,6 +1,7 @@
+import uuid
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Response, UploadFile
 
 from app.auth.dependencies import get_current_active_user
 from app.core.logger import get_logger
@@ -21,6 +22,7 @@ UPLOAD_ROOT.mkdir(parents=True, exist_ok=True)
 async def upload_document(
     file: UploadFile = File(...),
     conversation_id: str | None = Form(None),
+    upload_id: str | None = Form(None),
     user: User = Depends(get_current_active_user),
 ):
     if not file.filename:
@@ -62,22 +64,27 @@ async def upload_document(
     # --- DOCUMENT FLOW (RAG SERVICE) ---
     # Artık tüm logic (extraction, chunking, v1/v2 decision) servis içinde
     chunks_count = 0
+    # Aynı kullanıcının aynı dosyayı aynı upload_id ile tekrar yüklemesi, yarım kalan
+    # ingestion'ı kaldığı sayfadan sürdürür (upload_id kullanıcı kapsamındadır)
+    upload_id = upload_id or str(uuid.uuid4())
     try:
         # Dosya tipine göre işle
         if ext == "pdf":
-            chunks_count = rag_service.add_file(
+            chunks_count = await rag_service.add_file_async(
                 file_path=dest_path,
                 filename=filename,
                 owner=user.username,
                 scope="user",
-                conversation_id=conversation_id
+                conversation_id=conversation_id,
+                upload_id=upload_id,
+                notify_username=user.username,
             )
             
             # Background summary processing for large docs
             if chunks_count > 50:  # ~100+ pages
                 try:
                     await rag_v2_summary_processor.queue_summary_job(
-                        upload_id=dest_path.stem,  # Use filename as upload_id
+                        upload_id=upload_id,
                         filename=filename,
                         owner=user.username,
                         file_path=str(dest_path),
@@ -88,7 +95,7 @@ async def upload_document(
                     # Non-critical - don't fail upload if summary job fails
                     logger.warning(f"[Documents] Failed to queue summary job: {e}")
         else: # For other document types like TXT
-            chunks_count = rag_service.add_file(
+            chunks_count = await rag_service.add_file_async(
                 file_path=dest_path, filename=filename, owner=user.username, scope="user", conversation_id=conversation_id
             )
     except Exception as e:
@@ -103,15 +110,22 @@ async def upload_document(
         "ok": True,
         "filename": filename,
         "chunks": chunks_count,
+        "upload_id": upload_id,
         "rag_v2_indexed": True,  # rag_service varsayılan olarak v2 kullanıyor
         "rag_v2_chunks": chunks_count,
     }
 
 
 @router.get("/documents")
-async def list_user_documents(user: User = Depends(get_current_active_user)):
-    """Kullanıcının yüklediği dokümanları listeler."""
-    return rag_service.list_user_documents(owner=user.username)
+async def list_user_documents(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    user: User = Depends(get_current_active_user),
+):
+    """Kullanıcının yüklediği dokümanları listeler (sayfalı; toplam X-Total-Count header'ında)."""
+    response.headers["X-Total-Count"] = str(rag_service.count_user_documents(owner=user.username))
+    return rag_service.list_user_documents(owner=user.username, limit=limit, offset=offset)
 
 
 @router.delete("/documents/{filename}")
@@ -8,7 +8,7 @@ from typing import Any, Optional, TYPE_CHECKING
 from datetime import datetime
 from uuid import uuid4
 
-from sqlalchemy import JSON, Column, Text
+from sqlalchemy import JSON, Column, Index, LargeBinary, Text
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -30,6 +30,9 @@ class Conversation(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow, index=True)
 
+    # Denormalize mesaj sayısı (mesaj eklenirken artırılır; arşiv araması COUNT(*) yapmaz)
+    message_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
     # İlişkiler
     user: Optional["User"] = Relationship(back_populates="conversations")
     preset: Optional["ModelPreset"] = Relationship(back_populates="conversations")
@@ -46,6 +49,8 @@ class Message(SQLModel, table=True):
     Sohbet mesajları.
     """
     __tablename__ = "messages"
+    # Son N mesaj / keyset sayfalama: ORDER BY created_at DESC, id DESC LIMIT N
+    __table_args__ = (Index("ix_messages_conversation_created", "conversation_id", "created_at", "id"),)
 
     id: int | None = Field(default=None, primary_key=True)
     conversation_id: str = Field(foreign_key="conversations.id", index=True)
@@ -111,8 +116,14 @@ class Feedback(SQLModel, table=True):
 class AnswerCache(SQLModel, table=True):
     """
     AI yanıt önbelleği.
+
+    Kapsam (user_id, persona) başına exact (cache_key) ve embedding
+    benzerliği ile aranır; bkz. app.services.brain.answer_cache.
     """
     __tablename__ = "answer_cache"
+    __table_args__ = (
+        Index("ix_answer_cache_user_persona_expires", "user_id", "persona", "expires_at"),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="users.id", index=True)
@@ -122,6 +133,11 @@ class AnswerCache(SQLModel, table=True):
     answer: str = Field(sa_column=Column(Text))
 
     engine: str = Field(max_length=32)
+    persona: str = Field(default="standard", max_length=64)
+    # float32 soru embedding'i (semantik eşleşme); embedder yoksa None
+    embedding: bytes | None = Field(default=None, sa_column=Column(LargeBinary, nullable=True))
+    # Replay için intent ve kaynaklar
+    extra_metadata: dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
     expires_at: datetime | None = Field(default=None, index=True)
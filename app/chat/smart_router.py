@@ -276,11 +276,23 @@ class SmartRouter:
         self._local_explicit = [re.compile(p) for p in LOCAL_EXPLICIT_PATTERNS]
         self._local_content = [re.compile(p) for p in LOCAL_CONTENT_PATTERNS]
         self._nsfw_image = [re.compile(p) for p in NSFW_IMAGE_PATTERNS]
+        self._intent_cache = None
 
     # -------------------------------------------------------------------------
     # LAZY IMPORTS
     # -------------------------------------------------------------------------
 
+    def _get_intent_cache(self):
+        """LLM niyet sonuçları için paylaşımlı önbellek (lazy)."""
+        if self._intent_cache is None:
+            from app.config import get_settings
+            from app.core.classification_cache import ClassificationCache
+
+            self._intent_cache = ClassificationCache(
+                "router_intent", ttl_seconds=get_settings().ROUTER_INTENT_CACHE_TTL_SECONDS
+            )
+        return self._intent_cache
+
     def _get_permission_helpers(self):
         """Permission helper'ları lazy import."""
         from app.auth.permissions import (
@@ -578,6 +590,9 @@ class SmartRouter:
             This method is async and will be integrated in Phase 2
             when the async pipeline is implemented. For Phase 1,
             route() uses _detect_intent_regex() only.
+
+            Sonuçlar mesaj bazında önbelleğe alınır (LRU+TTL, Redis);
+            eşzamanlı aynı mesajlar tek sınıflandırma çağrısını paylaşır.
         """
         import asyncio
 
@@ -587,16 +602,21 @@ class SmartRouter:
         if config_service:
             timeout_ms = config_service.get("orchestrator.intent.timeout_ms", 800)
 
-        timeout_ms / 1000.0
-
-        try:
+        async def classify() -> dict[str, Any]:
             # TODO Phase 2: Implement actual LLM call with Scout model
             # For now, this is a stub that simulates the interface
             await asyncio.sleep(0.01)  # Simulate minimal async work
 
             # Stub: Fall back to regex for now
-            intent_result = self._detect_intent_regex(message)
-            return (intent_result, None)
+            return self._detect_intent_regex(message)
+
+        try:
+            cache = self._get_intent_cache()
+            intent_result = await asyncio.wait_for(
+                cache.get_or_compute(cache.key(message.strip()), classify), timeout=timeout_ms / 1000.0
+            )
+            # Önbellekteki dict paylaşılır; çağırana kopya
+            return ({**intent_result, "signals": dict(intent_result["signals"])}, None)
 
         except TimeoutError:
             return (None, "INTENT_LLM_TIMEOUT")
@@ -145,6 +145,14 @@ class Settings(BaseSettings):
         default=50,
         description="Neo4j bağlantı havuzu boyutu"
     )
+    USER_FACT_CACHE_TTL_SECONDS: int = Field(
+        default=300,
+        description="Kullanıcı kimlik bloğu (graph) önbellek süresi; save/forget_fact anında geçersiz kılar"
+    )
+    USER_FACT_CACHE_MAX_USERS: int = Field(
+        default=2000,
+        description="Kimlik bloğu önbelleğinde tutulan maksimum kullanıcı (LRU)"
+    )
 
     # ═════════════════════════════════════════════════════════════════════════
     # 6. QDRANT (VECTOR MEMORY)
@@ -206,6 +214,26 @@ class Settings(BaseSettings):
         default=None,
         description="Veritabanı bağlantı URL'si (boşsa sqlite:///data/app.db kullanılır)"
     )
+    DB_POOL_SIZE: int = Field(
+        default=5,
+        description="Async engine bağlantı havuzu boyutu (aiosqlite/asyncpg)"
+    )
+    DB_MAX_OVERFLOW: int = Field(
+        default=10,
+        description="Havuz dolunca açılabilecek ek bağlantı sayısı"
+    )
+    DB_POOL_TIMEOUT: float = Field(
+        default=30.0,
+        description="Havuzdan bağlantı bekleme süresi (saniye)"
+    )
+    MESSAGE_JOURNAL_FLUSH_MS: int = Field(
+        default=5,
+        description="Mesaj journal'ının toplu yazım aralığı (ms)"
+    )
+    MESSAGE_JOURNAL_MAX_BATCH: int = Field(
+        default=100,
+        description="Aralık dolmadan flush tetikleyen kayıt sayısı"
+    )
     CHROMA_PERSIST_DIR: str = Field(
         default="data/chroma_db",
         description="[DEPRECATED] ChromaDB dizini"
@@ -269,6 +297,18 @@ class Settings(BaseSettings):
         },
         description="Model fallback zincirleri (hata durumunda sırasıyla denenir)"
     )
+    LLM_TTFT_DEADLINES: dict[str, float] = Field(
+        default={"default": 8.0},
+        description="Rol bazlı ilk token süre sınırı (saniye, 0 = sınırsız); aşılınca zincirdeki sonraki modele geçilir"
+    )
+    LLM_STREAM_HEDGING_ENABLED: bool = Field(
+        default=True,
+        description="TTFT aşıldığında yavaş stream iptal edilmeden sonraki model paralel başlatılsın mı? (ilk token veren kazanır)"
+    )
+    LLM_STREAM_FIRST_TOKEN_TIMEOUT: float = Field(
+        default=60.0,
+        description="Zincirde geçilecek model kalmadığında son stream'in ilk token için sert süre sınırı (saniye, 0 = sınırsız)"
+    )
 
     # ═════════════════════════════════════════════════════════════════════════
     # 12. OLLAMA (Yerel LLM)
@@ -347,6 +387,162 @@ class Settings(BaseSettings):
         description="İzin verilen origin'ler (virgülle ayrılmış)"
     )
 
+    # ═════════════════════════════════════════════════════════════════════════
+    # 17. RAG v2 INGESTION (Belge İşleme Hattı)
+    # ═════════════════════════════════════════════════════════════════════════
+
+    RAG_INGEST_WORKERS: int = Field(
+        default=4,
+        description="PDF sayfa çıkarımı için süreç havuzu boyutu (1 = süreç içi)"
+    )
+    RAG_INGEST_PAGES_PER_TASK: int = Field(
+        default=25,
+        description="Her çıkarım görevine verilen sayfa bloğu boyutu"
+    )
+    RAG_INGEST_BATCH_CHUNKS: int = Field(
+        default=256,
+        description="Chroma/FTS yazımlarında tek transaction'a toplanan chunk sayısı"
+    )
+
+    # ═════════════════════════════════════════════════════════════════════════
+    # 18. RAG v2 RERANKING (Deep Mode Yeniden Sıralama)
+    # ═════════════════════════════════════════════════════════════════════════
+
+    RAG_RERANKER: str = Field(
+        default="cascade",
+        description="Deep mode reranker: local (CPU), llm (Groq) veya cascade (local, düşük güvende llm)"
+    )
+    RAG_RERANK_LATENCY_BUDGET_MS: int = Field(
+        default=50,
+        description="Yerel reranker için süre bütçesi (ms); aşılırsa kalan adaylar sırası korunarak eklenir"
+    )
+    RAG_RERANK_MIN_CONFIDENCE: float = Field(
+        default=0.55,
+        description="Cascade modunda LLM reranker'a düşmek için yerel güven eşiği (0-1)"
+    )
+
+    # ═════════════════════════════════════════════════════════════════════════
+    # 19. YANIT ÖNBELLEĞİ (Semantic Answer Cache)
+    # ═════════════════════════════════════════════════════════════════════════
+
+    ANSWER_CACHE_ENABLED: bool = Field(
+        default=True,
+        description="Tekrarlanan genel sorular için yanıt önbelleği aktif mi?"
+    )
+    ANSWER_CACHE_TTL_SECONDS: int = Field(
+        default=86400,
+        description="Genel bilgi yanıtlarının önbellekte kalma süresi (saniye)"
+    )
+    ANSWER_CACHE_VOLATILE_TTL_SECONDS: int = Field(
+        default=600,
+        description="Web aramasına dayanan (kur, hava durumu, haber) yanıtların süresi (saniye)"
+    )
+    ANSWER_CACHE_SIMILARITY: float = Field(
+        default=0.95,
+        description="Semantik eşleşme için minimum kosinüs benzerliği (0-1)"
+    )
+    ANSWER_CACHE_SCAN_LIMIT: int = Field(
+        default=200,
+        description="Semantik aramada kapsam başına taranan en yeni kayıt sayısı"
+    )
+
+    # ═════════════════════════════════════════════════════════════════════════
+    # 20. SINIFLANDIRMA ÖNBELLEĞİ (Intent / Semantic / Router)
+    # ═════════════════════════════════════════════════════════════════════════
+
+    INTENT_CACHE_MAX_ENTRIES: int = Field(
+        default=2048,
+        description="Sınıflandırma önbelleği başına süreç içi maksimum kayıt (LRU)"
+    )
+    INTENT_CACHE_REDIS_ENABLED: bool = Field(
+        default=True,
+        description="Sınıflandırma sonuçları Redis üzerinden süreçler arası paylaşılsın mı?"
+    )
+    SEMANTIC_CACHE_TTL_SECONDS: int = Field(
+        default=600,
+        description="Semantik mesaj analizi sonuçlarının önbellek süresi (saniye)"
+    )
+    ROUTER_INTENT_CACHE_TTL_SECONDS: int = Field(
+        default=300,
+        description="SmartRouter LLM niyet sonuçlarının önbellek süresi (saniye)"
+    )
+
+    # ═════════════════════════════════════════════════════════════════════════
+    # 21. HAFIZA ERİŞİM GÜNLÜĞÜ (last_accessed write-behind)
+    # ═════════════════════════════════════════════════════════════════════════
+
+    MEMORY_ACCESS_FLUSH_SECONDS: float = Field(
+        default=30.0,
+        description="Biriken hafıza erişimlerinin ChromaDB'ye toplu yazılma aralığı (saniye)"
+    )
+    MEMORY_ACCESS_MAX_BATCH: int = Field(
+        default=500,
+        description="Tek ChromaDB update çağrısındaki maksimum hafıza sayısı"
+    )
+
+    # ═════════════════════════════════════════════════════════════════════════
+    # 22. LLM HTTP İSTEMCİ HAVUZU (Provider client registry)
+    # ═════════════════════════════════════════════════════════════════════════
+
+    LLM_HTTP2_ENABLED: bool = Field(
+        default=True,
+        description="LLM sağlayıcı istemcileri HTTP/2 kullansın mı? (h2 paketi gerekir)"
+    )
+    LLM_HTTP_MAX_CONNECTIONS: int = Field(
+        default=100,
+        description="Sağlayıcı başına paylaşılan HTTP havuzundaki maksimum bağlantı"
+    )
+    LLM_HTTP_KEEPALIVE_SECONDS: float = Field(
+        default=60.0,
+        description="Boştaki keep-alive bağlantının kapatılmadan önce bekleyeceği süre (saniye)"
+    )
+
+    # ═════════════════════════════════════════════════════════════════════════
+    # 23. LLM ANAHTAR ZAMANLAYICI (Key başına RPM/TPM token bucket)
+    # ═════════════════════════════════════════════════════════════════════════
+
+    LLM_KEY_LIMITS_FILE: str = Field(
+        default="scripts/groq_models.json",
+        description="Model bazlı TPM limitlerinin okunduğu Groq model raporu (JSON, test_results[].tpm_limit)"
+    )
+    LLM_KEY_RPM_LIMIT: int = Field(
+        default=30,
+        description="Groq anahtarı başına dakikalık istek limiti (model başına)"
+    )
+    LLM_KEY_DEFAULT_TPM: int = Field(
+        default=6000,
+        description="Limit dosyasında olmayan Groq modelleri için dakikalık token limiti"
+    )
+    LLM_KEY_CAPACITY_FACTOR: float = Field(
+        default=0.9,
+        description="Bucket kapasitesi = limit x bu oran (tahmin hatasına karşı pay)"
+    )
+
+    # ═════════════════════════════════════════════════════════════════════════
+    # 24. RESILIENCE ÇEKİRDEĞİ (Anahtar / bütçe / devre kesici ortak durumu)
+    # ═════════════════════════════════════════════════════════════════════════
+
+    RESILIENCE_STATE_BACKEND: str = Field(
+        default="memory",
+        description="Ortak durum deposu: memory (tek süreç) | redis (çoklu worker, REDIS_URL kullanılır)"
+    )
+    RESILIENCE_REDIS_PREFIX: str = Field(
+        default="mami:resilience",
+        description="Redis durum anahtarlarının öneki"
+    )
+    RESILIENCE_SYNC_INTERVAL: float = Field(
+        default=2.0,
+        description="Redis ile senkronizasyon aralığı (saniye); yerel kopya bu sıklıkla tazelenir"
+    )
+    RESILIENCE_CIRCUIT_FAIL_THRESHOLD: int = Field(
+        default=5,
+        description="Devre kesicinin açılması için ardışık hata sayısı"
+    )
+    RESILIENCE_CIRCUIT_RESET_TIMEOUT: int = Field(
+        default=60,
+        description="Açık devrenin yarı açık (deneme) durumuna geçmeden önce beklediği süre (saniye)"
+    )
+
     # ═════════════════════════════════════════════════════════════════════════
     # PYDANTIC CONFIGURATION
     # ═════════════════════════════════════════════════════════════════════════
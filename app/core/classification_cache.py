@@ -0,0 +1,324 @@
+"""
+Mami AI - Classification Cache
+==============================
+
+LLM tabanlı sınıflandırıcılar (görsel niyet, semantik analiz, router niyeti)
+için sınırlı, paylaşımlı sonuç önbelleği.
+
+Katmanlar:
+    1. Süreç içi LRU + TTL (maxsize aşılınca en eski kayıt düşer, süresi
+       dolan kayıt okunurken düşer)
+    2. Redis (süreçler/worker'lar arası paylaşım, aynı TTL ile SETEX)
+
+Single-flight: aynı anahtar için sürmekte olan bir hesaplama varsa yeni
+çağıranlar ikinci bir LLM çağrısı yapmaz, ilk çağrının sonucunu bekler
+(async yolda Future, sync yolda threading.Event).
+
+Kurallar:
+    - None sonuçlar ve compute hataları saklanmaz (bir sonraki istek yeniden dener)
+    - shareable(value) False ise sonuç (timeout/parse fallback'leri) Redis'e
+      yazılmaz, yerel katmanda yalnızca FALLBACK_TTL_SECONDS kadar tutulur;
+      geçici bir hata sorguyu tüm TTL boyunca yanlış etiketlemez
+
+Kullanım:
+    cache = ClassificationCache("semantic", ttl_seconds=600,
+                                dumps=lambda v: v.model_dump_json(),
+                                loads=SemanticAnalysis.model_validate_json)
+    result = await cache.get_or_compute(cache.key(message), lambda: _classify(message))
+
+Metrikler: mami_classification_cache_lookups_total{cache,result},
+mami_classification_cache_evictions_total{cache,reason}
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REDIS_PREFIX = "clscache"
+SYNC_REDIS_TIMEOUT_S = 0.05
+SYNC_REDIS_RETRY_S = 30.0
+# Paylaşılmayan (fallback) sonuçların yerel ömrü
+FALLBACK_TTL_SECONDS = 30.0
+
+_sync_redis_lock = threading.Lock()
+_sync_redis_client: Any = None
+_sync_redis_retry_at = 0.0
+
+
+def _get_sync_redis() -> Any:
+    """Sync yol için kısa timeout'lu Redis istemcisi; erişilemezse bir süre denenmez."""
+    global _sync_redis_client, _sync_redis_retry_at
+    if _sync_redis_client is not None:
+        return _sync_redis_client
+    if time.monotonic() < _sync_redis_retry_at:
+        return None
+    with _sync_redis_lock:
+        if _sync_redis_client is not None:
+            return _sync_redis_client
+        try:
+            import redis
+
+            from app.config import get_settings
+
+            client = redis.from_url(
+                get_settings().REDIS_URL,
+                decode_responses=True,
+                socket_timeout=SYNC_REDIS_TIMEOUT_S,
+                socket_connect_timeout=SYNC_REDIS_TIMEOUT_S,
+            )
+            client.ping()
+            _sync_redis_client = client
+        except Exception as e:
+            logger.debug(f"[ClsCache] Sync Redis unavailable: {e}")
+            _sync_redis_retry_at = time.monotonic() + SYNC_REDIS_RETRY_S
+        return _sync_redis_client
+
+
+def _reset_sync_redis() -> None:
+    global _sync_redis_client, _sync_redis_retry_at
+    _sync_redis_client = None
+    _sync_redis_retry_at = time.monotonic() + SYNC_REDIS_RETRY_S
+
+
+class ClassificationCache:
+    """LRU + TTL yerel katman, Redis ikinci katman ve single-flight."""
+
+    def __init__(
+        self,
+        name: str,
+        ttl_seconds: float,
+        maxsize: Optional[int] = None,
+        dumps: Callable[[Any], str] = json.dumps,
+        loads: Callable[[str], Any] = json.loads,
+        shareable: Optional[Callable[[Any], bool]] = None,
+        use_redis: Optional[bool] = None,
+    ):
+        from app.config import get_settings
+
+        settings = get_settings()
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize or settings.INTENT_CACHE_MAX_ENTRIES
+        self.use_redis = settings.INTENT_CACHE_REDIS_ENABLED if use_redis is None else use_redis
+        self._dumps = dumps
+        self._loads = loads
+        self._shareable = shareable
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._inflight_sync: Dict[str, threading.Event] = {}
+
+    # --- Anahtar ---
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        raw = "|".join(str(p) for p in parts)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _redis_key(self, key: str) -> str:
+        return f"{REDIS_PREFIX}:{self.name}:{key}"
+
+    # --- Yerel katman ---
+
+    def __contains__(self, key: str) -> bool:
+        return self.get_local(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_local(self, key: str) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if now >= expires:
+                del self._entries[key]
+                expired = True
+            else:
+                self._entries.move_to_end(key)
+                expired = False
+        if expired:
+            self._count_eviction("expired")
+            return None
+        return value
+
+    def put_local(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self._count_eviction("capacity", evicted)
+
+    # --- Async yol ---
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Yerel → Redis → (single-flight) compute. Hesaplama hatası tüm bekleyenlere iletilir."""
+        value = self.get_local(key)
+        if value is not None:
+            self._count("hit_memory")
+            return value
+
+        loop = asyncio.get_running_loop()
+        pending = self._inflight.get(key)
+        if pending is not None and pending.get_loop() is loop:
+            self._count("coalesced")
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Sahip iptal edildiyse (istemci koptu) bekleyen kendisi hesaplar
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return await self.get_or_compute(key, compute)
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._get_remote(key)
+            if value is not None:
+                self._count("hit_redis")
+                self.put_local(key, value)
+            else:
+                self._count("miss")
+                value = await compute()
+                if self._store_local(key, value):
+                    await self._put_remote(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # bekleyen yoksa "never retrieved" uyarısını bastır
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def _get_remote(self, key: str) -> Any:
+        if not self.use_redis:
+            return None
+        try:
+            from app.core.redis_client import get_redis
+
+            client = await get_redis()
+            if client is None:
+                return None
+            raw = await client.get(self._redis_key(key))
+            return self._loads(raw) if raw else None
+        except Exception as e:
+            logger.debug(f"[ClsCache] {self.name} Redis read failed: {e}")
+            return None
+
+    def _store_local(self, key: str, value: Any) -> bool:
+        """Hesaplanan sonucu yerel katmana yazar; Redis'e de yazılacaksa True."""
+        if value is None:
+            return False
+        if self._shareable and not self._shareable(value):
+            self.put_local(key, value, min(self.ttl_seconds, FALLBACK_TTL_SECONDS))
+            return False
+        self.put_local(key, value)
+        return True
+
+    async def _put_remote(self, key: str, value: Any) -> None:
+        if not self.use_redis:
+            return
+        try:
+            from app.core.redis_client import get_redis
+
+            client = await get_redis()
+            if client is not None:
+                await client.setex(self._redis_key(key), int(self.ttl_seconds), self._dumps(value))
+        except Exception as e:
+            logger.debug(f"[ClsCache] {self.name} Redis write failed: {e}")
+
+    # --- Sync yol ---
+
+    def get_or_compute_sync(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Sync sınıflandırıcılar için aynı akış (thread'ler arası single-flight)."""
+        while True:
+            value = self.get_local(key)
+            if value is not None:
+                self._count("hit_memory")
+                return value
+            with self._lock:
+                event = self._inflight_sync.get(key)
+                owner = event is None
+                if owner:
+                    event = self._inflight_sync[key] = threading.Event()
+            if owner:
+                break
+            self._count("coalesced")
+            event.wait()
+            value = self.get_local(key)
+            if value is not None:
+                return value
+            # Sahip hata aldı ya da sonuç saklanmadı: sıradaki deneme
+
+        try:
+            value = self._get_remote_sync(key)
+            if value is not None:
+                self._count("hit_redis")
+                self.put_local(key, value)
+                return value
+            self._count("miss")
+            value = compute()
+            if self._store_local(key, value):
+                self._put_remote_sync(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight_sync.pop(key, None)
+            event.set()
+
+    def _get_remote_sync(self, key: str) -> Any:
+        client = _get_sync_redis() if self.use_redis else None
+        if client is None:
+            return None
+        try:
+            raw = client.get(self._redis_key(key))
+            return self._loads(raw) if raw else None
+        except Exception as e:
+            logger.debug(f"[ClsCache] {self.name} sync Redis read failed: {e}")
+            _reset_sync_redis()
+            return None
+
+    def _put_remote_sync(self, key: str, value: Any) -> None:
+        client = _get_sync_redis() if self.use_redis else None
+        if client is None:
+            return
+        try:
+            client.setex(self._redis_key(key), int(self.ttl_seconds), self._dumps(value))
+        except Exception as e:
+            logger.debug(f"[ClsCache] {self.name} sync Redis write failed: {e}")
+            _reset_sync_redis()
+
+    # --- Metrikler ---
+
+    def _count(self, result: str) -> None:
+        from app.core.metrics import classification_cache_lookups_counter
+
+        classification_cache_lookups_counter.labels(cache=self.name, result=result).inc()
+
+    def _count_eviction(self, reason: str, amount: int = 1) -> None:
+        from app.core.metrics import classification_cache_evictions_counter
+
+        classification_cache_evictions_counter.labels(cache=self.name, reason=reason).inc(amount)
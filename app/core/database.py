@@ -7,18 +7,24 @@ Bu modül, uygulamanın veritabanı bağlantılarını yönetir:
 - ChromaDB: Vektör veritabanı (semantik hafıza, RAG dokümanları)
 
 Kullanım:
-    from app.core.database import get_session, get_chroma_client
+    from app.core.database import get_async_session, get_session, get_chroma_client
 
     # SQLite oturumu
     with get_session() as session:
         user = session.get(User, user_id)
 
+    # Async oturum (request handler'lar; event loop'u bloklamaz)
+    async with get_async_session() as session:
+        user = await session.get(User, user_id)
+
     # ChromaDB istemcisi
     client = get_chroma_client()
     collection = client.get_collection("memories")
 
 Mimari:
     - Singleton pattern ile tek bir engine/client örneği
+    - Sync engine (migration, script, eski kod) + havuzlu async engine
+      (aiosqlite / asyncpg) aynı veritabanını paylaşır
     - Lazy loading (ilk kullanımda başlatma)
     - Context manager ile otomatik kaynak yönetimi
 """
@@ -32,15 +38,17 @@ import logging
 # "capture() takes 1 positional argument but 3 were given" hatalarını önlemek
 # için telemetry'yi import öncesi kapatıyoruz.
 import os
-from collections.abc import Generator
-from contextlib import contextmanager
+from collections.abc import AsyncGenerator, Generator
+from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 # SQLModel ve SQLAlchemy imports
 from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 os.environ.setdefault("ANONYMIZED_TELEMETRY", "False")
 os.environ.setdefault("CHROMA_TELEMETRY_IMPLEMENTATION", "none")
@@ -67,6 +75,7 @@ logger = logging.getLogger(__name__)
 # GLOBAL DEĞİŞKENLER (SINGLETON INSTANCES)
 # =============================================================================
 _engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
 _chroma_client: object | None = None
 
 # =============================================================================
@@ -131,6 +140,17 @@ def get_db_url() -> str:
 # =============================================================================
 
 
+def _set_sqlite_pragma(dbapi_connection, _connection_record):
+    """Her yeni bağlantıda SQLite optimizasyonlarını uygula (sync ve async engine)."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")  # Performans: Write-Ahead Logging
+    cursor.execute("PRAGMA foreign_keys=ON")  # Bütünlük: Foreign key kontrolü
+    cursor.execute("PRAGMA busy_timeout=30000")  # 30s lock timeout (milliseconds)
+    cursor.execute("PRAGMA synchronous=NORMAL")  # Performance vs safety balance
+    cursor.execute("PRAGMA cache_size=-64000")  # 64MB cache
+    cursor.close()
+
+
 def _init_sqlite_engine() -> Engine:
     """
     SQLite engine'i oluşturur ve yapılandırır.
@@ -162,16 +182,7 @@ def _init_sqlite_engine() -> Engine:
     )
 
     # SQLite PRAGMA ayarları (her bağlantıda çalışır)
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, _connection_record):
-        """Her yeni bağlantıda SQLite optimizasyonlarını uygula."""
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA journal_mode=WAL")  # Performans: Write-Ahead Logging
-        cursor.execute("PRAGMA foreign_keys=ON")  # Bütünlük: Foreign key kontrolü
-        cursor.execute("PRAGMA busy_timeout=30000")  # 30s lock timeout (milliseconds)
-        cursor.execute("PRAGMA synchronous=NORMAL")  # Performance vs safety balance
-        cursor.execute("PRAGMA cache_size=-64000")  # 64MB cache
-        cursor.close()
+    event.listen(engine, "connect", _set_sqlite_pragma)
 
     logger.info(f"[DB] SQLite engine başlatıldı (StaticPool + optimizations): {db_url}")
     return engine
@@ -234,6 +245,15 @@ def create_db_and_tables() -> None:
 
     engine = get_engine()
     SQLModel.metadata.create_all(engine)
+
+    # Sohbet arşivi FTS indeksi (tablo + trigger'lar; migration'daki DDL ile aynı)
+    try:
+        from app.memory.archive_index import ensure_archive_index
+
+        with engine.begin() as conn:
+            ensure_archive_index(conn)
+    except Exception as e:
+        logger.warning(f"[DB] Arşiv indeksi kurulamadı: {e}")
     logger.info("[DB] Tablolar oluşturuldu/kontrol edildi")
 
 
@@ -308,6 +328,101 @@ def get_session() -> Generator[Session, None, None]:
         yield session
 
 
+# =============================================================================
+# ASYNC VERİTABANI (aiosqlite / asyncpg)
+# =============================================================================
+
+
+def get_async_db_url() -> str:
+    """
+    get_db_url() adresinin async sürücülü karşılığı.
+
+    sqlite:///...          -> sqlite+aiosqlite:///...
+    postgresql://...       -> postgresql+asyncpg://...
+    (Sürücü zaten belirtilmişse olduğu gibi bırakılır.)
+    """
+    url = get_db_url()
+    scheme, sep, rest = url.partition("://")
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if scheme in ("postgres", "postgresql") or scheme.startswith("postgresql+psycopg"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
+def _init_async_engine() -> AsyncEngine:
+    """
+    Havuzlu async engine'i oluşturur.
+
+    Sync engine'in aksine tek bir StaticPool bağlantısı yerine sınırlı bir
+    havuz kullanır: SQLite WAL modunda okuyucular paralel çalışır, yazarlar
+    busy_timeout ile sıraya girer; Postgres'te her bağlantı bağımsızdır.
+    """
+    settings = _get_settings()
+    db_url = get_async_db_url()
+    pool_size = settings.DB_POOL_SIZE if settings else 5
+    max_overflow = settings.DB_MAX_OVERFLOW if settings else 10
+    pool_timeout = settings.DB_POOL_TIMEOUT if settings else 30.0
+
+    if db_url.startswith("sqlite"):
+        engine = create_async_engine(
+            db_url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            connect_args={"timeout": 30.0},
+            echo=False,
+        )
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragma)
+    else:
+        engine = create_async_engine(
+            db_url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_pre_ping=True,
+            echo=False,
+        )
+
+    logger.info(f"[DB] Async engine başlatıldı (pool={pool_size}+{max_overflow}): {engine.url.render_as_string()}")
+    return engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """Global async engine'i döndürür (Singleton)."""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = _init_async_engine()
+    return _async_engine
+
+
+@asynccontextmanager
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async veritabanı oturumu sağlayan context manager.
+
+    Kullanım:
+        async with get_async_session() as session:
+            result = await session.exec(select(Message).where(...))
+            session.add(new_item)
+            await session.commit()
+
+    Note:
+        expire_on_commit=False: commit sonrası döndürülen nesneler
+        oturum kapandıktan sonra da (lazy load olmadan) okunabilir.
+    """
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
+
+async def dispose_async_engine() -> None:
+    """Async havuzdaki bağlantıları kapatır (app shutdown)."""
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
 # =============================================================================
 # CHROMADB VEKTÖR VERİTABANI
 # =============================================================================
@@ -0,0 +1,305 @@
+"""
+Mami AI - Embedding Cache
+=========================
+
+İçerik adresli (content-hash) embedding cache: aynı metin aynı model ile
+bir kez embed edilir.
+
+Katmanlar:
+    1. Süreç içi LRU (küçük, sıcak metinler: tekrarlanan sorgular, kullanıcı gerçekleri)
+    2. Kalıcı SQLite dosyası (data/embedding_cache.db, WAL) — yeniden başlatmalarda korunur.
+       Sınırlıdır: MAX_AGE_SECONDS boyunca kullanılmayan vektörler silinir,
+       satır sayısı MAX_ENTRIES'i aşarsa en uzun süredir kullanılmayanlar düşer (LRU).
+
+Anahtar: sha256(model | dimension | text). Model ya da boyut değişirse eski
+vektörler otomatik olarak ıskalanır. Vektörler JSON yerine packed float32
+(little-endian) BLOB olarak saklanır.
+
+Kullanım:
+    cache = get_embedding_cache("models/text-embedding-004", 768)
+    hits = cache.get_many(texts)            # [vector | None, ...]
+    cache.put_many(missed_texts, vectors)
+
+Not: Redis istemcisi decode_responses=True ile açıldığı için binary vektörler
+için yerel SQLite katmanı kullanılır.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.path.join("data", "embedding_cache.db")
+LRU_SIZE = 2048
+MAX_ENTRIES = 200_000  # Kalıcı katman satır sınırı (768 boyut ≈ 3 KB/satır)
+MAX_AGE_SECONDS = 30 * 24 * 3600  # Bu süre okunmayan vektörler silinir
+PRUNE_INTERVAL = 600  # Yazımlar sırasında budama en fazla bu sıklıkta çalışır
+TOUCH_INTERVAL = 3600  # accessed_at her okumada değil, bu süreden eskiyse güncellenir
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    key BLOB PRIMARY KEY,
+    model TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL DEFAULT 0
+) WITHOUT ROWID
+"""
+_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_embedding_cache_accessed ON embedding_cache (accessed_at)"
+_UPSERT_SQL = (
+    "INSERT OR REPLACE INTO embedding_cache (key, model, dim, vector, created_at, accessed_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_PRUNE_AGE_SQL = "DELETE FROM embedding_cache WHERE accessed_at < ?"
+_PRUNE_LRU_SQL = """
+DELETE FROM embedding_cache WHERE key IN (
+    SELECT key FROM embedding_cache ORDER BY accessed_at LIMIT ?
+)
+"""
+
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    """float32 little-endian bytes."""
+    arr = array("f", vector)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def unpack_vector(blob: bytes) -> List[float]:
+    arr = array("f")
+    arr.frombytes(blob)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr.tolist()
+
+
+class _EmbeddingStore:
+    """Kalıcı katman: tek SQLite dosyası, thread başına değil tek bağlantı + kilit."""
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        max_entries: int = MAX_ENTRIES,
+        max_age: float = MAX_AGE_SECONDS,
+        clock=time.time,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA_SQL)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embedding_cache)")}
+        if "accessed_at" not in columns:
+            # accessed_at öncesi dosya: son kullanım bilinmediği için oluşturulma zamanı alınır
+            self._conn.execute("ALTER TABLE embedding_cache ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE embedding_cache SET accessed_at = created_at")
+        self._conn.execute(_INDEX_SQL)
+        self._conn.commit()
+        self._last_prune = float("-inf")
+        self.prune()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, bytes]:
+        if not keys:
+            return {}
+        found: Dict[bytes, bytes] = {}
+        now = self._clock()
+        stale: List[bytes] = []
+        with self._lock:
+            # SQLite parametre limiti altında kal
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector, accessed_at FROM embedding_cache WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, vector, accessed_at in rows:
+                    found[key] = vector
+                    if now - accessed_at >= TOUCH_INTERVAL:
+                        stale.append(key)
+            if stale:
+                # LRU sırası için son kullanım; okuma başına yazım olmasın diye seyrek güncellenir
+                self._conn.executemany(
+                    "UPDATE embedding_cache SET accessed_at = ? WHERE key = ?", [(now, key) for key in stale]
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, rows: List[Tuple[bytes, str, int, bytes]]) -> None:
+        if not rows:
+            return
+        now = self._clock()
+        with self._lock:
+            self._conn.executemany(_UPSERT_SQL, [(k, m, d, v, now, now) for k, m, d, v in rows])
+            self._conn.commit()
+        if now - self._last_prune >= PRUNE_INTERVAL:
+            self.prune()
+
+    def prune(self) -> int:
+        """Süresi dolan ve MAX_ENTRIES üzerindeki en eski kullanılmış satırları siler."""
+        now = self._clock()
+        with self._lock:
+            self._last_prune = now
+            removed = self._conn.execute(_PRUNE_AGE_SQL, (now - self.max_age,)).rowcount
+            overflow = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                removed += self._conn.execute(_PRUNE_LRU_SQL, (overflow,)).rowcount
+            self._conn.commit()
+        if removed:
+            logger.info(f"[EmbeddingCache] Pruned {removed} persistent entries")
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """Belirli bir (model, dimension) için LRU + kalıcı katman."""
+
+    def __init__(self, model: str, dimension: int, store: Optional[_EmbeddingStore] = None, lru_size: int = LRU_SIZE):
+        self.model = model
+        self.dimension = dimension
+        self.lru_size = lru_size
+        self._store = store
+        self._lru: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._lru_lock = threading.Lock()
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model}|{self.dimension}|{text}".encode("utf-8")).digest()
+
+    def _get_store(self) -> Optional[_EmbeddingStore]:
+        if self._store is None:
+            try:
+                self._store = get_embedding_store()
+            except Exception as e:
+                logger.warning(f"[EmbeddingCache] Persistent tier unavailable: {e}")
+        return self._store
+
+    def _remember(self, key: bytes, vector: List[float]) -> None:
+        with self._lru_lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Her metin için cache'teki vektör ya da None (sırayı korur)."""
+        from app.core.metrics import embedding_cache_hits_counter, embedding_cache_misses_counter
+
+        keys = [self._key(t) for t in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[bytes, List[int]] = {}
+        memory_hits = 0
+        with self._lru_lock:
+            for i, key in enumerate(keys):
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    results[i] = vector
+                    memory_hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+
+        disk_hits = 0
+        store = self._get_store() if missing else None
+        if store is not None:
+            try:
+                for key, blob in store.get_many(list(missing)).items():
+                    vector = unpack_vector(blob)
+                    if len(vector) != self.dimension:
+                        continue
+                    self._remember(key, vector)
+                    for i in missing.pop(key):
+                        results[i] = vector
+                        disk_hits += 1
+            except Exception as e:
+                logger.warning(f"[EmbeddingCache] Persistent lookup failed: {e}")
+
+        misses = sum(len(v) for v in missing.values())
+        if memory_hits:
+            embedding_cache_hits_counter.labels(model=self.model, tier="memory").inc(memory_hits)
+        if disk_hits:
+            embedding_cache_hits_counter.labels(model=self.model, tier="disk").inc(disk_hits)
+        if misses:
+            embedding_cache_misses_counter.labels(model=self.model).inc(misses)
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Geçerli boyuttaki sıfır olmayan vektörleri iki katmana yazar (hata vektörleri saklanmaz)."""
+        rows = []
+        for text, vector in zip(texts, vectors, strict=True):
+            if vector is None or len(vector) != self.dimension or not any(vector):
+                continue
+            key = self._key(text)
+            vector = [float(x) for x in vector]
+            self._remember(key, vector)
+            rows.append((key, self.model, self.dimension, pack_vector(vector)))
+
+        store = self._get_store() if rows else None
+        if store is not None:
+            try:
+                store.put_many(rows)
+            except Exception as e:
+                logger.warning(f"[EmbeddingCache] Persistent write failed: {e}")
+
+    async def aget_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Event loop'u bloklamadan get_many (SQLite okuması worker thread'de)."""
+        return await asyncio.to_thread(self.get_many, texts)
+
+    async def aput_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        await asyncio.to_thread(self.put_many, texts, vectors)
+
+
+# =============================================================================
+# SINGLETONS
+# =============================================================================
+
+_store: Optional[_EmbeddingStore] = None
+_caches: Dict[Tuple[str, int], EmbeddingCache] = {}
+_lock = threading.Lock()
+
+
+def get_embedding_store() -> _EmbeddingStore:
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = _EmbeddingStore(DB_PATH)
+    return _store
+
+
+def get_embedding_cache(model: str, dimension: int) -> EmbeddingCache:
+    """Process-wide cache for a (model, dimension) pair."""
+    key = (model, dimension)
+    cache = _caches.get(key)
+    if cache is None:
+        with _lock:
+            cache = _caches.setdefault(key, EmbeddingCache(model, dimension))
+    return cache
+
+
+def close_embedding_cache() -> None:
+    """SQLite bağlantısını kapat (app shutdown)."""
+    global _store
+    with _lock:
+        if _store is not None:
+            _store.close()
+            _store = None
+        for cache in _caches.values():
+            cache._store = None
@@ -2,13 +2,32 @@
 LLM provider adapter registry.
 
 Currently only Groq is wired; adapter signature aligns with LLMGenerator expectations.
+Provider instances come from the shared client registry (one pooled client per key).
+Provider-reported token usage is returned as Resp.usage, or yielded as the final
+TokenUsage item of a stream (LLMGenerator consumes it, callers never see it).
 """
 from __future__ import annotations
 
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, AsyncIterator, Optional
 
-from app.providers.llm.groq import GroqProvider
+from app.providers.llm.registry import get_provider
 from app.core.llm.generator import LLMRequest
+from app.core.llm.tokens import TokenUsage
+
+
+class Resp:
+    def __init__(self, text: str, model: str, usage: TokenUsage):
+        self.text = text
+        self.model = model
+        self.usage = usage
+        self.tokens = usage.total
+
+
+async def _with_usage(stream: AsyncIterator[str], usage: TokenUsage) -> AsyncGenerator[str | TokenUsage, None]:
+    async for chunk in stream:
+        yield chunk
+    if usage.reported:
+        yield usage
 
 
 async def groq_adapter(
@@ -17,7 +36,7 @@ async def groq_adapter(
     request: LLMRequest,
     stream: bool = False,
 ) -> AsyncGenerator[str, None] | object:
-    provider = GroqProvider(api_key=api_key)
+    provider = get_provider("groq", api_key)
 
     system_prompt = (request.metadata or {}).get("system_prompt")
     messages = request.messages or []
@@ -27,15 +46,17 @@ async def groq_adapter(
     prompt_for_call = base_prompt or ""
     append_user = bool(prompt_for_call)
 
+    usage = TokenUsage()
     if stream:
-        return provider.generate_stream(
+        return _with_usage(provider.generate_stream(
             prompt=prompt_for_call,
             system_prompt=system_prompt,
             messages=messages if append_user else messages,
             model=model_id,
             temperature=request.temperature,
-            max_tokens=request.max_tokens
-        )
+            max_tokens=request.max_tokens,
+            usage=usage
+        ), usage)
 
     result_text = await provider.generate(
         prompt=prompt_for_call,
@@ -43,16 +64,11 @@ async def groq_adapter(
         messages=messages if append_user else messages,
         model=model_id,
         temperature=request.temperature,
-        max_tokens=request.max_tokens
+        max_tokens=request.max_tokens,
+        usage=usage
     )
 
-    class Resp:
-        def __init__(self, text: str, model: str):
-            self.text = text
-            self.model = model
-            self.tokens = 0
-
-    return Resp(result_text, model_id)
+    return Resp(result_text, model_id, usage)
 
 
 async def gemini_adapter(
@@ -61,8 +77,7 @@ async def gemini_adapter(
     request: LLMRequest,
     stream: bool = False,
 ) -> AsyncGenerator[str, None] | object:
-    from app.providers.llm.gemini import GeminiProvider
-    provider = GeminiProvider(api_key=api_key)
+    provider = get_provider("gemini", api_key)
 
     messages = request.messages or []
     prompt = request.prompt or ""
@@ -70,18 +85,17 @@ async def gemini_adapter(
     system_prompt = metadata.get("system_prompt")
     temperature = request.temperature or 0.1
 
+    usage = TokenUsage()
     if stream:
-        async def _stream_wrapper():
-            async for chunk in provider.generate_stream(
-                prompt=prompt,
-                messages=messages,
-                model=model_id,
-                system_prompt=system_prompt,
-                temperature=temperature,
-                max_tokens=request.max_tokens
-            ):
-                yield chunk
-        return _stream_wrapper()
+        return _with_usage(provider.generate_stream(
+            prompt=prompt,
+            messages=messages,
+            model=model_id,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_tokens=request.max_tokens,
+            usage=usage
+        ), usage)
 
     response_text = await provider.generate(
         prompt=prompt,
@@ -89,13 +103,8 @@ async def gemini_adapter(
         model=model_id,
         system_prompt=system_prompt,
         temperature=temperature,
-        max_tokens=request.max_tokens
+        max_tokens=request.max_tokens,
+        usage=usage
     )
 
-    class Resp:
-        def __init__(self, text: str, model: str):
-            self.text = text
-            self.model = model
-            self.tokens = 0
-
-    return Resp(response_text, model_id)
+    return Resp(response_text, model_id, usage)
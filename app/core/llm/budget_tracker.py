@@ -1,6 +1,17 @@
 """
 Budget tracker for LLM usage (request/token counters with simple thresholds).
 Derived from standalone_router/Atlas/budget_tracker.py, simplified for shared use.
+
+Admission is predictive: check_budget takes the estimated tokens of the
+request (prompt estimate + expected completion) and rejects it when that
+would cross the model's daily (TPD) budget, so LLMGenerator can route to
+the next chain entry before a 429. Per-key minute limits (RPM/TPM) are
+shaped by app.core.llm.key_scheduler.
+
+Daily counters live in the resilience state backend (namespace
+budget:<date>, fields <model>:requests / <model>:tokens), so with the Redis
+backend every worker enforces the same budget and it survives restarts.
+Alerts and the completion-size average stay per process.
 """
 from __future__ import annotations
 
@@ -8,7 +19,10 @@ import threading
 from dataclasses import dataclass, field
 from datetime import date, datetime
 from enum import Enum
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+# Günlük sayaç namespace'leri ertesi gün de okunabilsin diye iki gün tutulur
+USAGE_TTL_SECONDS = 2 * 24 * 3600
 
 
 class AlertLevel(Enum):
@@ -54,6 +68,7 @@ class BudgetTracker:
         "meta-llama/llama-4-maverick-17b-128e-instruct": ModelLimits(rpd=4000, tpd=1_000_000),
     }
     FALLBACK_LIMITS = ModelLimits(rpd=1000, tpd=500_000)
+    COMPLETION_EWMA_ALPHA = 0.2
     THRESHOLD_WARNING = 0.80
     THRESHOLD_CRITICAL = 0.90
     THRESHOLD_EXCEEDED = 1.00
@@ -72,18 +87,15 @@ class BudgetTracker:
     def __init__(self):
         if getattr(self, "_initialized", False):
             return
-        self._usage: Dict[str, UsageRecord] = {}
-        self._key_usage: Dict[str, UsageRecord] = {}
         self._alerts: List[BudgetAlert] = []
         self._last_reset_date: date = date.today()
         self._custom_limits: Dict[str, ModelLimits] = {}
+        self._avg_completion: Dict[str, float] = {}
         self._initialized = True
 
     def _check_and_reset(self) -> None:
         today = date.today()
         if today > self._last_reset_date:
-            self._usage.clear()
-            self._key_usage.clear()
             self._alerts.clear()
             self._last_reset_date = today
 
@@ -95,41 +107,99 @@ class BudgetTracker:
     def set_custom_limits(self, model_id: str, rpd: int, tpd: int) -> None:
         self._custom_limits[model_id] = ModelLimits(rpd=rpd, tpd=tpd)
 
-    def check_budget(self, model_id: str) -> Tuple[bool, Optional[str]]:
+    def check_budget(self, model_id: str, estimated_tokens: int = 0) -> Tuple[bool, Optional[str]]:
+        """Admission check; rejects when estimated_tokens would cross the daily token budget."""
         self._check_and_reset()
         limits = self.get_limits(model_id)
-        usage = self._usage.get(model_id, UsageRecord())
+        usage = self.get_usage(model_id)
         if usage.requests >= limits.rpd:
+            _count_rejection(model_id, "rpd")
             return False, f"Request budget exceeded for {model_id} ({usage.requests}/{limits.rpd})"
-        if usage.tokens >= limits.tpd:
-            return False, f"Token budget exceeded for {model_id} ({usage.tokens}/{limits.tpd})"
+        if usage.tokens >= limits.tpd or usage.tokens + estimated_tokens > limits.tpd:
+            _count_rejection(model_id, "tpd")
+            return False, f"Token budget exceeded for {model_id} ({usage.tokens}+{estimated_tokens}/{limits.tpd})"
         return True, None
 
-    def record_usage(self, model_id: str, tokens: int = 0, key_prefix: Optional[str] = None) -> List[BudgetAlert]:
+    def expected_completion_tokens(self, model_id: str, max_tokens: Optional[int] = None) -> int:
+        """Observed average completion size, capped by max_tokens (max_tokens when unseen)."""
+        average = self._avg_completion.get(model_id)
+        if average is None:
+            return max_tokens or 0
+        return int(min(average, max_tokens) if max_tokens else average)
+
+    def record_usage(
+        self,
+        model_id: str,
+        tokens: int = 0,
+        key_prefix: Optional[str] = None,
+        completion_tokens: Optional[int] = None,
+    ) -> List[BudgetAlert]:
         self._check_and_reset()
-        if model_id not in self._usage:
-            self._usage[model_id] = UsageRecord()
-        self._usage[model_id].requests += 1
-        self._usage[model_id].tokens += tokens
-        self._usage[model_id].last_updated = datetime.now()
+        state = _state()
+        namespace = self._namespace()
+        state.incr(namespace, f"{model_id}:requests", 1, ttl=USAGE_TTL_SECONDS)
+        if tokens:
+            state.incr(namespace, f"{model_id}:tokens", tokens, ttl=USAGE_TTL_SECONDS)
 
         if key_prefix:
-            if key_prefix not in self._key_usage:
-                self._key_usage[key_prefix] = UsageRecord()
-            self._key_usage[key_prefix].requests += 1
-            self._key_usage[key_prefix].tokens += tokens
-            self._key_usage[key_prefix].last_updated = datetime.now()
+            key_namespace = self._namespace("budget_keys")
+            state.incr(key_namespace, f"{key_prefix}:requests", 1, ttl=USAGE_TTL_SECONDS)
+            if tokens:
+                state.incr(key_namespace, f"{key_prefix}:tokens", tokens, ttl=USAGE_TTL_SECONDS)
+
+        if completion_tokens is not None:
+            previous = self._avg_completion.get(model_id)
+            self._avg_completion[model_id] = (
+                float(completion_tokens) if previous is None
+                else previous + self.COMPLETION_EWMA_ALPHA * (completion_tokens - previous)
+            )
 
         return self._check_thresholds(model_id)
 
     def get_usage(self, model_id: str) -> UsageRecord:
         self._check_and_reset()
-        return self._usage.get(model_id, UsageRecord())
+        state = _state()
+        namespace = self._namespace()
+        return UsageRecord(
+            requests=int(state.get(namespace, f"{model_id}:requests")),
+            tokens=int(state.get(namespace, f"{model_id}:tokens")),
+        )
+
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """Today's usage of every model against its limits (admin status)."""
+        self._check_and_reset()
+        usage: Dict[str, Dict[str, int]] = {}
+        for field_name, value in _state().get_all(self._namespace()).items():
+            model_id, _, metric = field_name.rpartition(":")
+            usage.setdefault(model_id, {})[metric] = int(value)
+        models = {}
+        for model_id, counters in sorted(usage.items()):
+            limits = self.get_limits(model_id)
+            requests, tokens = counters.get("requests", 0), counters.get("tokens", 0)
+            used = max(requests / limits.rpd if limits.rpd else 0, tokens / limits.tpd if limits.tpd else 0)
+            models[model_id] = {
+                "requests": requests,
+                "rpd": limits.rpd,
+                "tokens": tokens,
+                "tpd": limits.tpd,
+                "percentage": round(used * 100, 1),
+            }
+        return {
+            "date": self._last_reset_date.isoformat(),
+            "models": models,
+            "alerts": [
+                {"model": a.model_id, "metric": a.metric, "level": a.level.value, "percentage": a.percentage}
+                for a in self._alerts
+            ],
+        }
+
+    def _namespace(self, kind: str = "budget") -> str:
+        return f"{kind}:{date.today().isoformat()}"
 
     def _check_thresholds(self, model_id: str) -> List[BudgetAlert]:
         alerts: List[BudgetAlert] = []
         limits = self.get_limits(model_id)
-        usage = self._usage.get(model_id, UsageRecord())
+        usage = self.get_usage(model_id)
 
         req_pct = usage.requests / limits.rpd if limits.rpd else 0
         tok_pct = usage.tokens / limits.tpd if limits.tpd else 0
@@ -172,12 +242,25 @@ class BudgetTracker:
 
     def reset(self) -> None:
         """Test convenience reset."""
-        self._usage.clear()
-        self._key_usage.clear()
+        _state().delete(self._namespace())
+        _state().delete(self._namespace("budget_keys"))
         self._alerts.clear()
         self._custom_limits.clear()
+        self._avg_completion.clear()
         self._last_reset_date = date.today()
 
 
+def _state():
+    from app.core.resilience.state import get_state_backend
+
+    return get_state_backend()
+
+
+def _count_rejection(model_id: str, limit: str) -> None:
+    from app.core.metrics import llm_budget_rejections_counter
+
+    llm_budget_rejections_counter.labels(model=model_id, limit=limit).inc()
+
+
 budget_tracker = BudgetTracker()
 
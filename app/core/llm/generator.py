@@ -12,13 +12,15 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import inspect
-from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Optional
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Iterator, Optional, Tuple
 
+from app.config import get_settings
 from app.core.llm.budget_tracker import budget_tracker
 from app.core.llm.governance import governance
-from app.core.llm.key_manager import key_manager
+from app.core.llm.key_manager import key_manager, provider_status_code
+from app.core.llm.tokens import TokenUsage, estimate_prompt_tokens, estimate_tokens
 from app.core.logger import get_logger
 
 try:
@@ -69,7 +71,9 @@ class LLMGenerator:
             override_model = request.metadata.get("override_model")
         models = governance.with_override(request.role, override_model)
         errors: list[str] = []
+        budget_errors: list[tuple[str, str]] = []
         attempt_count = 0
+        prompt_tokens = estimate_prompt_tokens(request)
         
         for model_id in models:
             attempt_count += 1
@@ -89,23 +93,21 @@ class LLMGenerator:
                 logger.warning(f"[LLMGenerator] Provider not registered: {provider_name}")
                 continue
 
-            api_key = key_manager.get_best_key(model_id=model_id)
+            estimated, budget_err = _admit(model_id, prompt_tokens, request)
+            if budget_err:
+                # 429 beklemeden zincirdeki sonraki modele geç
+                logger.warning(f"[LLMGenerator] Budget exceeded for: {model_id} ({budget_err})")
+                budget_errors.append((model_id, budget_err))
+                errors.append(f"{model_id}: {budget_err}")
+                continue
+
+            # Tahmini token'lar seçilen anahtarın TPM bucket'ından ayrılır
+            api_key = key_manager.get_best_key(model_id=model_id, tokens=estimated)
             if not api_key:
                 errors.append(f"{model_id}: no api key available")
                 logger.warning(f"[LLMGenerator] No API key for: {model_id}")
                 continue
 
-            budget_ok, budget_err = budget_tracker.check_budget(model_id)
-            if not budget_ok:
-                logger.warning(f"[LLMGenerator] Budget exceeded for: {model_id}")
-                return GeneratorResult(
-                    ok=False,
-                    text=budget_err or "budget_exceeded",
-                    error_code="BUDGET",
-                    retryable=False,
-                    model=model_id,
-                )
-
             try:
                 # Execute with timeout
                 result = await asyncio.wait_for(
@@ -113,11 +115,13 @@ class LLMGenerator:
                     timeout=timeout
                 )
                 text = getattr(result, "text", None) or str(result)
-                tokens = getattr(result, "tokens", 0)
                 
                 # Success!
-                budget_tracker.record_usage(model_id, tokens=tokens, key_prefix=api_key[:5])
-                key_manager.report_success(api_key, model_id=model_id)
+                tokens = _record_tokens(
+                    model_id, api_key, prompt_tokens, getattr(result, "usage", None), text,
+                    reported_tokens=getattr(result, "tokens", 0),
+                )
+                key_manager.report_success(api_key, model_id=model_id, tokens=tokens, reserved=estimated)
                 
                 logger.info(
                     f"✅ [LLMGenerator] BAŞARILI: {model_id} "
@@ -156,7 +160,7 @@ class LLMGenerator:
             except Exception as exc:  # noqa: BLE001
                 error_msg = f"{model_id}: {type(exc).__name__}: {exc}"
                 errors.append(error_msg)
-                key_manager.report_error(api_key, error_msg=str(exc), model_id=model_id)
+                _report_error(api_key, exc, model_id, estimated)
                 logger.error(f"[LLMGenerator] ERROR: {error_msg}")
                 
                 if telemetry and EventType:
@@ -172,6 +176,16 @@ class LLMGenerator:
                     )
                 continue
 
+        if budget_errors and len(budget_errors) == len(errors):
+            model_id, budget_err = budget_errors[0]
+            return GeneratorResult(
+                ok=False,
+                text=budget_err,
+                error_code="BUDGET",
+                retryable=False,
+                model=model_id,
+            )
+
         # All models failed
         logger.error(
             f"[LLMGenerator] ALL FAILED for role={request.role}. "
@@ -198,61 +212,375 @@ class LLMGenerator:
         )
 
     async def generate_stream(self, request: LLMRequest) -> AsyncGenerator[str, None]:
+        """
+        Stream with model-chain fallback, a per-role first-token deadline and
+        optional hedging.
+
+        If the current attempt produces no token within the role's TTFT
+        deadline, the next chain entry is started in parallel (hedge); the
+        first stream to yield a token wins and the other is cancelled.
+        Without hedging, the stalled attempt is cancelled and the chain
+        moves on. When there is no chain entry left to move on to, the last
+        attempt is not cancelled at the TTFT deadline; it keeps streaming
+        until LLM_STREAM_FIRST_TOKEN_TIMEOUT. Errors before or during
+        streaming fall back as before. Key reservations of cancelled
+        attempts are settled to the prompt size.
+        Models whose budget would not admit the request are skipped; only
+        when every model was skipped for budget is `budget_exceeded:` yielded.
+        """
         override_model = None
         if request.metadata:
             override_model = request.metadata.get("override_model")
         models = governance.with_override(request.role, override_model)
-        errors: list[str] = []
-        attempt_count = 0
-        for model_id in models:
-            attempt_count += 1
+        deadline = _ttft_deadline(request.role)
+        state = _StreamState(
+            request=request,
+            candidates=iter(enumerate(models, 1)),
+            total=len(models),
+            deadline=deadline,
+            prompt_tokens=estimate_prompt_tokens(request),
+            hard_timeout=get_settings().LLM_STREAM_FIRST_TOKEN_TIMEOUT,
+        )
+        hedging = deadline > 0 and get_settings().LLM_STREAM_HEDGING_ENABLED
+        errors = state.errors
+        loop = asyncio.get_running_loop()
+        pending: list[_StreamAttempt] = []
+        streaming: Optional[_StreamAttempt] = None
+        parts: list[str] = []
+
+        try:
+            while True:
+                if not pending:
+                    attempt = self._start_stream_attempt(state)
+                    if attempt is None:
+                        break
+                    pending.append(attempt)
+
+                timeout = None
+                next_deadline = min(a.deadline for a in pending)
+                if next_deadline != float("inf"):
+                    timeout = max(0.0, next_deadline - loop.time())
+                done, _ = await asyncio.wait(
+                    [a.first for a in pending], timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    await self._on_ttft_deadline(pending, state, hedging)
+                    continue
+
+                winner = None
+                for attempt in list(pending):
+                    if not attempt.first.done():
+                        continue
+                    exc = attempt.first.exception()
+                    if exc is None or isinstance(exc, StopAsyncIteration):
+                        winner = winner or attempt
+                        continue
+                    pending.remove(attempt)
+                    _report_error(attempt.api_key, exc, attempt.model_id, attempt.reserved)
+                    errors.append(f"{attempt.model_id}: {exc}")
+                if winner is None:
+                    continue
+
+                pending.remove(winner)
+                if winner.is_hedge:
+                    _hedge_counter(winner.model_id, "won")
+                for loser in pending:
+                    await loser.abandon(state.prompt_tokens)
+                    if loser.is_hedge:
+                        _hedge_counter(loser.model_id, "lost")
+                pending = []
+
+                if isinstance(winner.first.exception(), StopAsyncIteration):
+                    chunks = []
+                else:
+                    chunks = [winner.first.result()]
+                    _observe_ttft(winner.model_id, winner.first_at - winner.started)
+
+                usage: Optional[TokenUsage] = None
+                parts = []
+                streaming = winner
+                try:
+                    for chunk in chunks:
+                        if isinstance(chunk, TokenUsage):
+                            usage = chunk
+                            continue
+                        parts.append(chunk)
+                        yield chunk
+                    waiting_since = loop.time()  # tüketicide geçen süre ölçülmesin
+                    async for chunk in winner.stream:
+                        if isinstance(chunk, TokenUsage):
+                            usage = chunk
+                            continue
+                        _observe_inter_token(winner.model_id, loop.time() - waiting_since)
+                        parts.append(chunk)
+                        yield chunk
+                        waiting_since = loop.time()
+                except Exception as exc:  # noqa: BLE001
+                    streaming = None
+                    _report_error(winner.api_key, exc, winner.model_id, winner.reserved)
+                    errors.append(f"{winner.model_id}: {exc}")
+                    continue
+                streaming = None
+
+                tokens = _record_tokens(winner.model_id, winner.api_key, state.prompt_tokens, usage, "".join(parts))
+                key_manager.report_success(
+                    winner.api_key, model_id=winner.model_id, tokens=tokens, reserved=winner.reserved
+                )
+                logger.info(
+                    f"✅ [LLMGenerator] STREAM BAŞARILI: {winner.model_id}"
+                    f"{' (hedge)' if winner.is_hedge else ''}"
+                )
+                return
+        finally:
+            for attempt in pending:
+                await attempt.abandon(state.prompt_tokens)
+            if streaming is not None:
+                # Tüketici stream bitmeden ayrıldı: o ana kadarki kullanım
+                key_manager.release(
+                    streaming.api_key, streaming.model_id, streaming.reserved,
+                    used=state.prompt_tokens + estimate_tokens("".join(parts)),
+                )
+
+        if state.budget_errors and len(state.budget_errors) == len(errors):
+            yield f"budget_exceeded:{state.budget_errors[0]}"
+        elif errors:
+            yield f"error:{'; '.join(errors)}"
+        else:
+            yield "error:no_model_available"
+
+    def _start_stream_attempt(self, state: "_StreamState", is_hedge: bool = False) -> Optional["_StreamAttempt"]:
+        """Starts the next usable chain entry (None when the chain is exhausted)."""
+        request = state.request
+        for attempt_count, model_id in state.candidates:
             provider_name = governance.detect_provider(model_id)
             adapter = self.providers.get(provider_name)
-            
-            is_fallback = attempt_count > 1
-            fallback_marker = " [FALLBACK]" if is_fallback else ""
+
+            marker = " [HEDGE]" if is_hedge else (" [FALLBACK]" if attempt_count > 1 else "")
             logger.info(
-                f"🚀 [LLMGenerator] {'🔄' if is_fallback else '🎯'} STREAM: {request.role.upper()} katmanı için {model_id} deneniyor... "
-                f"(Adım: {attempt_count}/{len(models)}){fallback_marker}"
+                f"🚀 [LLMGenerator] {'🔄' if attempt_count > 1 else '🎯'} STREAM: {request.role.upper()} katmanı için {model_id} deneniyor... "
+                f"(Adım: {attempt_count}/{state.total}){marker}"
             )
 
             if adapter is None:
-                errors.append(f"{model_id}: provider '{provider_name}' not registered")
+                state.errors.append(f"{model_id}: provider '{provider_name}' not registered")
                 continue
 
-            api_key = key_manager.get_best_key(model_id=model_id)
+            estimated, budget_err = _admit(model_id, state.prompt_tokens, request)
+            if budget_err:
+                state.budget_errors.append(budget_err)
+                state.errors.append(f"{model_id}: {budget_err}")
+                continue
+
+            api_key = key_manager.get_best_key(model_id=model_id, tokens=estimated)
             if not api_key:
-                errors.append(f"{model_id}: no api key available")
+                state.errors.append(f"{model_id}: no api key available")
                 continue
 
-            budget_ok, budget_err = budget_tracker.check_budget(model_id)
-            if not budget_ok:
-                yield f"budget_exceeded:{budget_err}"
-                return
+            if is_hedge:
+                _hedge_counter(model_id, "launched")
+            return _StreamAttempt(adapter, model_id, api_key, request, state.deadline, is_hedge, estimated)
+        return None
 
-            try:
-                # Get the stream from adapter
-                stream_or_awaitable = adapter(model_id=model_id, api_key=api_key, request=request, stream=True)
-                
-                if inspect.isawaitable(stream_or_awaitable):
-                    stream = await stream_or_awaitable
-                else:
-                    stream = stream_or_awaitable
-                
-                # Iterate and yield from the generator
-                async for chunk in stream:
-                    yield chunk
-                
-                budget_tracker.record_usage(model_id, tokens=0, key_prefix=api_key[:5])
-                key_manager.report_success(api_key, model_id=model_id)
-                logger.info(f"✅ [LLMGenerator] STREAM BAŞARILI: {model_id}")
-                return
-            except Exception as exc:  # noqa: BLE001
-                key_manager.report_error(api_key, error_msg=str(exc), model_id=model_id)
-                errors.append(f"{model_id}: {exc}")
+    async def _on_ttft_deadline(self, pending: list["_StreamAttempt"], state: "_StreamState", hedging: bool) -> None:
+        """
+        Hedges (once) or replaces attempts whose first-token deadline passed.
+
+        An attempt is only cancelled at the TTFT deadline when another one
+        is racing or takes its place; the last one keeps waiting until the
+        hard first-token timeout.
+        """
+        deadline = state.deadline
+        now = asyncio.get_running_loop().time()
+        for attempt in [a for a in pending if a.deadline <= now]:
+            if attempt.final:
+                await self._abandon_stalled(attempt, pending, state, state.hard_timeout)
                 continue
 
-        if errors:
-            yield f"error:{'; '.join(errors)}"
-        else:
-            yield "error:no_model_available"
+            if hedging and (not attempt.hedged or len(pending) == 1):
+                hedge = self._start_stream_attempt(state, is_hedge=True)
+                if hedge is not None:
+                    logger.warning(
+                        f"⏱️ [LLMGenerator] TTFT {deadline}s aşıldı: {attempt.model_id}, hedge → {hedge.model_id}"
+                    )
+                    attempt.hedged = True
+                    attempt.deadline = hedge.deadline
+                    pending.append(hedge)
+                    continue
+            elif not hedging:
+                fallback = self._start_stream_attempt(state)
+                if fallback is not None:
+                    await self._abandon_stalled(attempt, pending, state, deadline)
+                    pending.append(fallback)
+                    continue
+            if len(pending) > 1:
+                # Başka bir deneme hâlâ yarışıyor: yavaş olan bırakılır
+                await self._abandon_stalled(attempt, pending, state, deadline)
+                continue
+
+            # Zincirde geçilecek model yok: son denemeyi iptal etme, sert sınıra kadar bekle
+            attempt.final = True
+            hard_timeout = state.hard_timeout
+            attempt.deadline = attempt.started + hard_timeout if hard_timeout > 0 else float("inf")
+            logger.warning(
+                f"⏱️ [LLMGenerator] TTFT {deadline}s aşıldı: {attempt.model_id}, "
+                f"zincirde başka model yok, ilk token bekleniyor"
+            )
+
+    @staticmethod
+    async def _abandon_stalled(
+        attempt: "_StreamAttempt", pending: list["_StreamAttempt"], state: "_StreamState", waited: float
+    ) -> None:
+        pending.remove(attempt)
+        await attempt.abandon(state.prompt_tokens)
+        state.errors.append(f"{attempt.model_id}: no first token within {waited}s")
+        _ttft_timeout_counter(attempt.model_id)
+        logger.warning(f"⏱️ [LLMGenerator] TTFT timeout: {attempt.model_id} ({waited}s)")
+
+
+@dataclass
+class _StreamState:
+    """Per-call state shared by the primary attempt and its hedges."""
+
+    request: LLMRequest
+    candidates: Iterator[Tuple[int, str]]
+    total: int
+    deadline: float
+    prompt_tokens: int
+    hard_timeout: float = 0.0
+    errors: list = field(default_factory=list)
+    budget_errors: list = field(default_factory=list)
+
+
+class _StreamAttempt:
+    """One in-flight stream; `first` resolves with its first chunk."""
+
+    def __init__(
+        self,
+        adapter: Adapter,
+        model_id: str,
+        api_key: str,
+        request: LLMRequest,
+        deadline: float,
+        is_hedge: bool,
+        reserved: int = 0,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        self.model_id = model_id
+        self.api_key = api_key
+        self.reserved = reserved
+        self.is_hedge = is_hedge
+        self.hedged = False
+        # Zincirin son denemesi: TTFT'de iptal edilmez, sert sınıra kadar beklenir
+        self.final = False
+        self.started = loop.time()
+        self.deadline = self.started + deadline if deadline > 0 else float("inf")
+        self.first_at = self.started
+        self.stream = _open_stream(adapter, model_id, api_key, request)
+        self.first = asyncio.ensure_future(self.stream.__anext__())
+        self.first.add_done_callback(self._stamp)
+
+    def _stamp(self, _future: asyncio.Future) -> None:
+        self.first_at = asyncio.get_running_loop().time()
+
+    async def close(self) -> None:
+        if not self.first.done():
+            self.first.cancel()
+        await asyncio.gather(self.first, return_exceptions=True)
+        try:
+            await self.stream.aclose()
+        except Exception:  # noqa: BLE001
+            pass
+
+    async def abandon(self, prompt_tokens: int) -> None:
+        """Cancels the stream; its key reservation is settled to the prompt the provider already received."""
+        await self.close()
+        key_manager.release(self.api_key, self.model_id, self.reserved, used=prompt_tokens)
+
+
+async def _open_stream(adapter: Adapter, model_id: str, api_key: str, request: LLMRequest) -> AsyncGenerator[str, None]:
+    stream = adapter(model_id=model_id, api_key=api_key, request=request, stream=True)
+    if inspect.isawaitable(stream):
+        stream = await stream
+    async for chunk in stream:
+        yield chunk
+
+
+def _report_error(api_key: str, exc: BaseException, model_id: str, reserved: int) -> None:
+    """Reports a provider failure with its HTTP status, so 4xx request errors do not trip the model circuit."""
+    key_manager.report_error(
+        api_key,
+        status_code=provider_status_code(exc),
+        error_msg=f"{type(exc).__name__}: {exc}",
+        model_id=model_id,
+        reserved=reserved,
+    )
+
+
+def _admit(model_id: str, prompt_tokens: int, request: LLMRequest) -> Tuple[int, Optional[str]]:
+    """Predictive budget check; returns (estimated tokens, rejection reason or None)."""
+    estimated = prompt_tokens + budget_tracker.expected_completion_tokens(model_id, request.max_tokens)
+    budget_ok, budget_err = budget_tracker.check_budget(model_id, estimated_tokens=estimated)
+    if budget_ok:
+        return estimated, None
+    return estimated, budget_err or "budget_exceeded"
+
+
+def _record_tokens(
+    model_id: str,
+    api_key: str,
+    prompt_tokens: int,
+    usage: Optional[TokenUsage],
+    completion_text: str,
+    reported_tokens: int = 0,
+) -> int:
+    """Records provider-reported usage, or the local estimate when none came back."""
+    from app.core.metrics import llm_tokens_counter
+
+    completion_tokens: Optional[int] = None
+    if usage is not None and usage.reported:
+        tokens, completion_tokens, source = usage.total, usage.completion_tokens, "reported"
+    elif reported_tokens:
+        tokens, source = reported_tokens, "reported"
+    else:
+        completion_tokens = estimate_tokens(completion_text)
+        tokens, source = prompt_tokens + completion_tokens, "estimated"
+
+    budget_tracker.record_usage(
+        model_id, tokens=tokens, key_prefix=api_key[:5], completion_tokens=completion_tokens
+    )
+    llm_tokens_counter.labels(model=model_id, source=source).inc(tokens)
+    return tokens
+
+
+def _ttft_deadline(role: str) -> float:
+    """Role's first-token deadline in seconds (0 = no deadline)."""
+    deadlines = get_settings().LLM_TTFT_DEADLINES or {}
+    try:
+        return float(deadlines.get(role, deadlines.get("default", 0)) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _observe_ttft(model_id: str, seconds: float) -> None:
+    from app.core.metrics import llm_ttft_histogram
+
+    llm_ttft_histogram.labels(model=model_id).observe(seconds)
+
+
+def _observe_inter_token(model_id: str, seconds: float) -> None:
+    from app.core.metrics import llm_inter_token_histogram
+
+    llm_inter_token_histogram.labels(model=model_id).observe(seconds)
+
+
+def _hedge_counter(model_id: str, result: str) -> None:
+    from app.core.metrics import llm_stream_hedges_counter
+
+    llm_stream_hedges_counter.labels(model=model_id, result=result).inc()
+
+
+def _ttft_timeout_counter(model_id: str) -> None:
+    from app.core.metrics import llm_ttft_timeouts_counter
+
+    llm_ttft_timeouts_counter.labels(model=model_id).inc()
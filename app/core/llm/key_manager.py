@@ -4,20 +4,32 @@ LLM key manager (Groq/Gemini focused).
 - Pool based key tracking
 - Cooldown (429) and quota markers
 - Provider detection by model name
+- Key selection through KeyScheduler (per-key RPM/TPM token buckets),
+  report lookups through a key-hash index
+- Cooldown / exhausted deadlines and the per-model circuit breaker
+  (llm:<model>) live in the resilience state backend, so every worker sees
+  the same key health
 """
 from __future__ import annotations
 
+import hashlib
 import logging
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
+from functools import lru_cache
 from typing import Dict, Optional
 
 from app.config import get_settings
+from app.core.llm.key_scheduler import KeyScheduler
 from app.core.logger import get_logger
 
 logger = get_logger("app.core.llm.key_manager", use_json=False)
 
+# Ortak durum deposunda anahtar deadline'ları: <key_hash> = cooldown, <key_hash>:<model> = exhausted
+KEYS_NAMESPACE = "keys"
+
 
 class KeyStatus(Enum):
     HEALTHY = "healthy"
@@ -39,7 +51,7 @@ class KeyStats:
     cooldown_until: Optional[datetime] = None
     last_error: Optional[str] = None
     model_usage: Dict[str, int] = field(default_factory=dict)
-    model_exhausted: Dict[str, datetime] = field(default_factory=dict)
+    key_hash: str = ""
 
     @property
     def success_rate(self) -> float:
@@ -51,31 +63,37 @@ class KeyStats:
         if self.status == KeyStatus.DISABLED:
             return False
 
-        if model_id and model_id in self.model_exhausted:
-            if datetime.now() < self.model_exhausted[model_id]:
-                return False
-            del self.model_exhausted[model_id]
+        state = _state()
+        now = time.time()
+        if model_id and state.get(KEYS_NAMESPACE, f"{self.key_hash}:{model_id}") > now:
+            return False
 
+        cooldown_until = state.get(KEYS_NAMESPACE, self.key_hash)
+        if cooldown_until > now:
+            self.status = KeyStatus.COOLDOWN
+            self.cooldown_until = datetime.fromtimestamp(cooldown_until)
+            return False
         if self.status == KeyStatus.COOLDOWN:
-            if self.cooldown_until and datetime.now() < self.cooldown_until:
-                return False
             self.status = KeyStatus.HEALTHY
         return True
 
     def mark_cooldown(self, seconds: int) -> None:
         self.status = KeyStatus.COOLDOWN
         self.cooldown_until = datetime.now() + timedelta(seconds=seconds)
+        _state().set(KEYS_NAMESPACE, self.key_hash, self.cooldown_until.timestamp())
 
     def mark_exhausted_until_midnight(self, model_id: str) -> None:
         tomorrow = (
             datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
             + timedelta(days=1)
         )
-        self.model_exhausted[model_id] = tomorrow
+        _state().set(KEYS_NAMESPACE, f"{self.key_hash}:{model_id}", tomorrow.timestamp())
 
 
 class LLMKeyManager:
     _pools: Dict[str, Dict[str, KeyStats]] = {"groq": {}, "gemini": {}}
+    _index: Dict[str, KeyStats] = {}  # key_hash -> stats
+    _scheduler: KeyScheduler = KeyScheduler()
     _cooldown_seconds: int = 60
     _initialized: bool = False
 
@@ -84,22 +102,27 @@ class LLMKeyManager:
         cls, groq_keys: Optional[list[str]] = None, gemini_keys: Optional[list[str]] = None
     ) -> None:
         cls._pools = {"groq": {}, "gemini": {}}
+        cls._index = {}
         if groq_keys:
             for i, key in enumerate(groq_keys):
                 if not key:
                     continue
                 key_id = f"groq_{i+1}"
-                stats = KeyStats(key_id=key_id, key_masked=_mask(key))
+                stats = KeyStats(key_id=key_id, key_masked=_mask(key), key_hash=key_hash(key))
                 stats._actual_key = key
                 cls._pools["groq"][key_id] = stats
+                cls._index[key_hash(key)] = stats
         if gemini_keys:
             for i, key in enumerate(gemini_keys):
                 if not key:
                     continue
                 key_id = f"gemini_{i+1}"
-                stats = KeyStats(key_id=key_id, key_masked=_mask(key))
+                stats = KeyStats(key_id=key_id, key_masked=_mask(key), key_hash=key_hash(key))
                 stats._actual_key = key
                 cls._pools["gemini"][key_id] = stats
+                cls._index[key_hash(key)] = stats
+        for provider, pool in cls._pools.items():
+            cls._scheduler.register(provider, [key_hash(s._actual_key) for s in pool.values()])
         cls._initialized = True
 
     @classmethod
@@ -131,7 +154,13 @@ class LLMKeyManager:
         return "groq"
 
     @classmethod
-    def get_best_key(cls, model_id: Optional[str] = None) -> Optional[str]:
+    def get_best_key(cls, model_id: Optional[str] = None, tokens: int = 0) -> Optional[str]:
+        """
+        Key with the most remaining RPM/TPM capacity for model_id; `tokens`
+        (estimated request size) is reserved on it. None when the model's
+        circuit is open, every key is cooling down / exhausted or none has
+        capacity right now.
+        """
         cls._auto_initialize()
         provider = cls._detect_provider(model_id)
         pool = cls._pools.get(provider, {})
@@ -143,25 +172,53 @@ class LLMKeyManager:
             cls.initialize(settings.get_groq_api_keys(), settings.get_gemini_api_keys())
             pool = cls._pools.get(provider, {})
 
-        available = [s for s in pool.values() if s.is_available(model_id)]
-        if not available:
+        if model_id and not model_circuit(model_id).can_execute():
+            logger.warning(f"[KeyManager] Circuit OPEN for model {model_id}, skipping")
             return None
-        best = sorted(available, key=lambda s: (s.total_requests, -s.success_rate))[0]
-        return getattr(best, "_actual_key", None)
+
+        chosen = cls._scheduler.select(
+            provider,
+            model_id or "",
+            tokens,
+            is_available=lambda h: cls._index[h].is_available(model_id),
+        )
+        if chosen is None:
+            return None
+        return getattr(cls._index[chosen], "_actual_key", None)
 
     @classmethod
-    def report_success(cls, api_key: str, model_id: Optional[str] = None) -> None:
+    def report_success(
+        cls,
+        api_key: str,
+        model_id: Optional[str] = None,
+        tokens: Optional[int] = None,
+        reserved: int = 0,
+    ) -> None:
+        """tokens: actual usage; replaces the `reserved` estimate in the key's TPM bucket."""
         stats = cls._find(api_key)
         if not stats:
             return
+        if model_id and tokens is not None:
+            cls._scheduler.settle(key_hash(api_key), model_id, tokens - reserved)
         stats.total_requests += 1
         stats.successful_requests += 1
         stats.last_used = datetime.now()
         if model_id:
             stats.model_usage[model_id] = stats.model_usage.get(model_id, 0) + 1
+            model_circuit(model_id).record_success()
         
         logger.info(f"✅ [KeyManager] Success! Key: {stats.key_masked}, Model: {model_id}")
 
+    @classmethod
+    def release(cls, api_key: str, model_id: Optional[str], reserved: int, used: int = 0) -> None:
+        """
+        Attempt abandoned before it finished (lost a hedge race, passed its
+        deadline, consumer went away): replaces the `reserved` estimate with
+        `used` tokens without counting a success or an error.
+        """
+        if model_id and reserved and cls._find(api_key):
+            cls._scheduler.settle(key_hash(api_key), model_id, used - reserved)
+
     @classmethod
     def report_error(
         cls,
@@ -169,10 +226,13 @@ class LLMKeyManager:
         status_code: int | None = None,
         error_msg: str = "",
         model_id: Optional[str] = None,
+        reserved: int = 0,
     ) -> None:
         stats = cls._find(api_key)
         if not stats:
             return
+        if model_id and reserved:
+            cls._scheduler.settle(key_hash(api_key), model_id, -reserved)
         stats.total_requests += 1
         stats.failed_requests += 1
         stats.last_used = datetime.now()
@@ -180,10 +240,14 @@ class LLMKeyManager:
 
         err_lower = (error_msg or "").lower()
         logger.warning(f"❌ [KeyManager] Error with Key: {stats.key_masked}, Model: {model_id}, Error: {error_msg}")
+        if model_id and _is_model_failure(status_code, err_lower):
+            model_circuit(model_id).record_failure()
         
         if status_code == 429:
             stats.rate_limit_hits += 1
             stats.mark_cooldown(cls._cooldown_seconds)
+            if model_id:
+                cls._scheduler.drain(key_hash(api_key), model_id)
             logger.warning(f"⏳ [KeyManager] Key {stats.key_masked} entered COOLDOWN for {cls._cooldown_seconds}s (Rate Limit: 429)")
             return
         if status_code and status_code >= 500:
@@ -203,7 +267,7 @@ class LLMKeyManager:
                     {
                         "id": s.key_id,
                         "masked": s.key_masked,
-                        "status": s.status.value,
+                        "status": s.status.value if s.is_available() else KeyStatus.COOLDOWN.value,
                         "success_rate": round(s.success_rate, 2),
                         "total_requests": s.total_requests,
                         "failed_requests": s.failed_requests,
@@ -218,21 +282,71 @@ class LLMKeyManager:
     def reset(cls) -> None:
         """Test convenience reset."""
         cls._pools = {"groq": {}, "gemini": {}}
+        cls._index = {}
+        cls._scheduler = KeyScheduler()
         cls._initialized = False
+        _state().delete(KEYS_NAMESPACE)
+        from app.core.resilience.circuit_breaker import CircuitManager
+
+        CircuitManager.reset(prefix="llm:")
 
     @classmethod
     def _find(cls, api_key: str) -> Optional[KeyStats]:
-        for pool in cls._pools.values():
-            for stats in pool.values():
-                if getattr(stats, "_actual_key", None) == api_key:
-                    return stats
-        return None
+        return cls._index.get(key_hash(api_key)) if api_key else None
+
+
+@lru_cache(maxsize=256)
+def key_hash(api_key: str) -> str:
+    """Stable non-reversible id of an API key (index / scheduler key)."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
 
 
 def _mask(key: str) -> str:
     return f"...{key[-4:]}" if len(key) > 4 else "****"
 
 
+def model_circuit(model_id: str):
+    """Shared circuit breaker of a model (opens after consecutive provider failures)."""
+    from app.core.resilience.circuit_breaker import CircuitManager
+
+    return CircuitManager.get_breaker(f"llm:{model_id}")
+
+
+# Durum kodu olmayan hatalardan yalnızca bağlantı / zaman aşımı olanlar modele yazılır
+_TRANSPORT_ERROR_MARKERS = (
+    "timeout", "timed out", "connect", "connection", "network", "unavailable", "reset by peer",
+    "broken pipe", "remoteprotocolerror", "unexpected eof",
+)
+
+
+def _is_model_failure(status_code: Optional[int], err_lower: str) -> bool:
+    # 429 / kota anahtara, 4xx (context_length_exceeded, hatalı istek) isteğe aittir;
+    # modeli yalnızca 5xx ile bağlantı ve zaman aşımı hataları düşürür
+    if status_code is not None:
+        return status_code >= 500
+    if any(x in err_lower for x in ("429", "rate limit", "quota", "exceeded")):
+        return False
+    return any(x in err_lower for x in _TRANSPORT_ERROR_MARKERS)
+
+
+def provider_status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by a provider SDK / httpx exception (None when there is none)."""
+    for candidate in (
+        getattr(exc, "status_code", None),
+        getattr(exc, "code", None),
+        getattr(getattr(exc, "response", None), "status_code", None),
+    ):
+        if isinstance(candidate, int) and 100 <= candidate < 600:
+            return candidate
+    return None
+
+
+def _state():
+    from app.core.resilience.state import get_state_backend
+
+    return get_state_backend()
+
+
 # Singleton alias for convenience
 key_manager = LLMKeyManager
 
@@ -0,0 +1,246 @@
+"""
+Key scheduler: per-key RPM/TPM token buckets and capacity-ordered selection.
+
+Each (key, model) lane holds two buckets (requests and tokens per minute)
+sized from the provider limits. A bucket is stored as the moment it will
+be full again; both refill over the same 60s window, so
+max(requests_full_at, tokens_full_at) orders keys exactly by their
+remaining fraction of capacity and does not drift as time passes. Keys of
+a model sit in a min-heap on that value (lazy deletion via versions), so
+selection is O(log n) and never sorts the pool.
+
+Selection reserves the request's estimated tokens; settle() corrects the
+reservation once the real usage is known. The heap order is a single
+number, so the top key may be short on the lane a request actually needs
+(e.g. tokens for a large prompt) while a lower key has room: selection
+pops keys until one admits the (1 request, tokens) demand. Only when no
+key can admit it does the caller get None and route to the next chain
+entry instead of collecting a 429.
+
+Limits: Groq TPM from LLM_KEY_LIMITS_FILE (scripts/groq_models.json),
+RPM from LLM_KEY_RPM_LIMIT. Other providers are not shaped (least
+recently selected key first).
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from app.core.logger import get_logger
+
+logger = get_logger("app.core.llm.key_scheduler", use_json=False)
+
+WINDOW_SECONDS = 60.0
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+
+@dataclass(frozen=True)
+class KeyLimits:
+    rpm: float
+    tpm: float
+
+
+class Lane:
+    """Buckets of one (key, model) pair, stored as 'full at' timestamps."""
+
+    __slots__ = ("limits", "requests_full_at", "tokens_full_at", "version")
+
+    def __init__(self, limits: Optional[KeyLimits]) -> None:
+        self.limits = limits
+        self.requests_full_at = 0.0
+        self.tokens_full_at = 0.0
+        self.version = 0
+
+    @property
+    def priority(self) -> float:
+        return max(self.requests_full_at, self.tokens_full_at)
+
+    def available(self, now: float) -> Tuple[float, float]:
+        """(requests, tokens) currently in the buckets."""
+        if self.limits is None:
+            return float("inf"), float("inf")
+        return (
+            self.limits.rpm - max(0.0, self.requests_full_at - now) * self.limits.rpm / WINDOW_SECONDS,
+            self.limits.tpm - max(0.0, self.tokens_full_at - now) * self.limits.tpm / WINDOW_SECONDS,
+        )
+
+    def admits(self, tokens: int, now: float) -> bool:
+        if self.limits is None:
+            return True
+        requests, available_tokens = self.available(now)
+        # Kapasiteden büyük istek, bucket dolunca kabul edilir (aç kalmasın)
+        return requests >= 1 and available_tokens >= min(tokens, self.limits.tpm)
+
+    def take(self, tokens: int, now: float) -> None:
+        if self.limits is None:
+            self.requests_full_at = now  # LRU sırası
+        else:
+            self.requests_full_at = max(self.requests_full_at, now) + WINDOW_SECONDS / self.limits.rpm
+            self._add_tokens(tokens, now)
+        self.version += 1
+
+    def settle(self, tokens: int, now: float) -> None:
+        """Adds (or refunds, when negative) tokens after the fact."""
+        if self.limits is None or not tokens:
+            return
+        self._add_tokens(tokens, now)
+        self.version += 1
+
+    def drain(self, now: float) -> None:
+        """Provider said 429: treat both buckets as empty."""
+        if self.limits is None:
+            return
+        self.requests_full_at = max(self.requests_full_at, now + WINDOW_SECONDS)
+        self.tokens_full_at = max(self.tokens_full_at, now + WINDOW_SECONDS)
+        self.version += 1
+
+    def _add_tokens(self, tokens: int, now: float) -> None:
+        self.tokens_full_at = max(self.tokens_full_at, now) + tokens * WINDOW_SECONDS / self.limits.tpm
+        if self.tokens_full_at < now:
+            self.tokens_full_at = now
+
+
+class KeyScheduler:
+    """Capacity-ordered key selection per (provider, model)."""
+
+    def __init__(
+        self,
+        limits_for: Optional[Callable[[str, str], Optional[KeyLimits]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._limits_for = limits_for or default_limits
+        self._clock = clock
+        self._keys: Dict[str, List[str]] = {}
+        self._provider_of: Dict[str, str] = {}
+        self._lanes: Dict[Tuple[str, str], Lane] = {}
+        self._heaps: Dict[Tuple[str, str], List[Tuple[float, int, int, str]]] = {}
+        self._seq = itertools.count()
+
+    def register(self, provider: str, key_ids: List[str]) -> None:
+        """Sets the key pool of a provider (drops its heaps and lanes)."""
+        self._keys[provider] = list(key_ids)
+        self._provider_of = {key_id: p for p, keys in self._keys.items() for key_id in keys}
+        for heap_key in [k for k in self._heaps if k[0] == provider]:
+            del self._heaps[heap_key]
+        self._lanes = {k: lane for k, lane in self._lanes.items() if k[0] in self._provider_of}
+
+    def select(
+        self,
+        provider: str,
+        model_id: str,
+        tokens: int = 0,
+        is_available: Callable[[str], bool] = lambda key_id: True,
+    ) -> Optional[str]:
+        """Best key for model_id with `tokens` reserved, or None when none can admit it."""
+        heap = self._heap(provider, model_id)
+        now = self._clock()
+        skipped = []
+        chosen = None
+        result = "unavailable"
+        while heap:
+            entry = heapq.heappop(heap)
+            _, _, version, key_id = entry
+            lane = self._lanes[(key_id, model_id)]
+            if version != lane.version:
+                continue  # bayat kayıt
+            if not is_available(key_id):
+                skipped.append(entry)
+                continue
+            if not lane.admits(tokens, now):
+                # Başka lane'i dolu olan daha alttaki bir key talebi karşılayabilir
+                skipped.append(entry)
+                result = "throttled"
+                continue
+            lane.take(tokens, now)
+            self._push(heap, key_id, lane)
+            chosen, result = key_id, "selected"
+            break
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        _count_selection(provider, result)
+        return chosen
+
+    def settle(self, key_id: str, model_id: str, tokens: int) -> None:
+        """Corrects a reservation by `tokens` (actual - reserved)."""
+        self._update(key_id, model_id, lambda lane, now: lane.settle(tokens, now))
+
+    def drain(self, key_id: str, model_id: str) -> None:
+        self._update(key_id, model_id, lambda lane, now: lane.drain(now))
+
+    def snapshot(self, key_id: str, model_id: str) -> Optional[Dict[str, float]]:
+        lane = self._lanes.get((key_id, model_id))
+        if lane is None or lane.limits is None:
+            return None
+        requests, tokens = lane.available(self._clock())
+        return {"requests": round(requests, 2), "tokens": round(tokens, 1)}
+
+    def _update(self, key_id: str, model_id: str, change: Callable[[Lane, float], None]) -> None:
+        lane = self._lanes.get((key_id, model_id))
+        if lane is None:
+            return
+        change(lane, self._clock())
+        heap = self._heaps.get((self._provider_of.get(key_id), model_id))
+        if heap is not None:
+            self._push(heap, key_id, lane)
+
+    def _heap(self, provider: str, model_id: str) -> List[Tuple[float, int, int, str]]:
+        heap = self._heaps.get((provider, model_id))
+        if heap is not None and len(heap) <= 4 * len(self._keys.get(provider, ())) + 8:
+            return heap
+        # İlk kullanım veya bayat kayıtlar birikti: yeniden kur
+        limits = self._limits_for(provider, model_id)
+        heap = []
+        for key_id in self._keys.get(provider, ()):
+            lane = self._lanes.get((key_id, model_id))
+            if lane is None:
+                lane = self._lanes[(key_id, model_id)] = Lane(limits)
+            heap.append((lane.priority, next(self._seq), lane.version, key_id))
+        heapq.heapify(heap)
+        self._heaps[(provider, model_id)] = heap
+        return heap
+
+    def _push(self, heap, key_id: str, lane: Lane) -> None:
+        heapq.heappush(heap, (lane.priority, next(self._seq), lane.version, key_id))
+
+
+_limits_cache: Dict[str, Dict[str, float]] = {}
+
+
+def load_tpm_limits(path: str) -> Dict[str, float]:
+    """model_id -> TPM from a Groq model report (cached per path, {} when unreadable)."""
+    if path in _limits_cache:
+        return _limits_cache[path]
+    file = Path(path)
+    if not file.is_absolute():
+        file = PROJECT_ROOT / file
+    limits: Dict[str, float] = {}
+    try:
+        report = json.loads(file.read_text(encoding="utf-8"))
+        for row in report.get("test_results", []):
+            if row.get("tpm_limit"):
+                limits[row["model"]] = float(row["tpm_limit"])
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"[KeyScheduler] Limit dosyası okunamadı ({file}): {e}")
+    _limits_cache[path] = limits
+    return limits
+
+
+def default_limits(provider: str, model_id: str) -> Optional[KeyLimits]:
+    if provider != "groq":
+        return None
+    settings = get_settings()
+    factor = settings.LLM_KEY_CAPACITY_FACTOR
+    tpm = load_tpm_limits(settings.LLM_KEY_LIMITS_FILE).get(model_id, settings.LLM_KEY_DEFAULT_TPM)
+    return KeyLimits(rpm=max(1.0, settings.LLM_KEY_RPM_LIMIT * factor), tpm=max(1.0, tpm * factor))
+
+
+def _count_selection(provider: str, result: str) -> None:
+    from app.core.metrics import llm_key_selections_counter
+
+    llm_key_selections_counter.labels(provider=provider, result=result).inc()
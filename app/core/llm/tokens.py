@@ -0,0 +1,80 @@
+"""
+Token accounting helpers for the LLM layer.
+
+- TokenUsage: provider-reported usage. Providers fill it when passed as
+  `usage=`; stream adapters yield it as the final item so LLMGenerator can
+  record real totals instead of 0.
+- estimate_tokens / estimate_prompt_tokens: fast local estimate used for
+  budget admission before a request is sent (and as a fallback when the
+  provider reports nothing).
+
+The estimator mimics BPE pre-tokenization (words, digit groups,
+punctuation) and prices each piece by length; it errs slightly high on
+Turkish, which is the safe side for admission.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Optional
+
+# Mesaj başına rol/ayraç token'ları (chat template overhead)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_PIECE = re.compile(r"\d+|[^\W\d_]+|\S", re.UNICODE)
+
+
+@dataclass
+class TokenUsage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    reported: bool = False
+
+    @property
+    def total(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def update(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+        """Sets provider-reported counts (stream usage is cumulative, last one wins)."""
+        self.prompt_tokens = int(prompt_tokens or 0)
+        self.completion_tokens = int(completion_tokens or 0)
+        self.reported = True
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of `text`."""
+    if not text:
+        return 0
+    total = 0
+    for piece in _PIECE.findall(text):
+        size = len(piece)
+        if piece[0].isdigit():
+            total += -(-size // 3)  # sayılar 3'lü gruplara bölünür
+        elif size == 1:
+            total += 1
+        elif piece.isascii():
+            total += -(-size // 6)
+        else:
+            total += -(-size // 3)  # ASCII dışı (Türkçe ekler) daha çok parçalanır
+    return total
+
+
+# Sistem prompt'ları istekler arasında tekrarlanır
+_estimate_cached = lru_cache(maxsize=128)(estimate_tokens)
+
+
+def estimate_prompt_tokens(request: Any) -> int:
+    """Estimated prompt tokens of an LLMRequest (prompt, history, system prompt)."""
+    total = 0
+    system_prompt = (request.metadata or {}).get("system_prompt")
+    if system_prompt:
+        total += _estimate_cached(system_prompt) + MESSAGE_OVERHEAD_TOKENS
+    for message in request.messages or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            total += estimate_tokens(content)
+        total += MESSAGE_OVERHEAD_TOKENS
+    if request.prompt:
+        total += estimate_tokens(request.prompt) + MESSAGE_OVERHEAD_TOKENS
+    return total
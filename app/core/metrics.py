@@ -41,6 +41,29 @@ Prometheus Metrikleri:
     - mami_cpu_percent: CPU kullanımı (gauge)
     - mami_memory_percent: Memory kullanımı (gauge)
     - mami_disk_percent: Disk kullanımı (gauge)
+    - mami_embedding_cache_hits_total: Embedding cache isabetleri (counter)
+    - mami_embedding_cache_misses_total: Embedding cache ıskalamaları (counter)
+    - mami_message_journal_batch_size: Journal flush başına kayıt sayısı (histogram)
+    - mami_message_journal_failures_total: Başarısız journal flush'ları (counter)
+    - mami_answer_cache_lookups_total: Yanıt önbelleği sorguları, sonuca göre (counter)
+    - mami_answer_cache_stores_total: Yanıt önbelleğine yazılan yanıtlar (counter)
+    - mami_classification_cache_lookups_total: Sınıflandırma önbelleği sorguları (counter)
+    - mami_classification_cache_evictions_total: Sınıflandırma önbelleğinden düşen kayıtlar (counter)
+    - mami_memory_dedup_checks_total: Hafıza dedup katman kontrolleri, katman/sonuca göre (counter)
+    - mami_memory_access_flush_size: Erişim günlüğü flush başına hafıza sayısı (histogram)
+    - mami_memory_access_flush_failures_total: Başarısız erişim günlüğü flush'ları (counter)
+    - mami_user_fact_cache_lookups_total: Kullanıcı kimlik bloğu önbelleği sorguları (counter)
+    - mami_llm_client_lookups_total: LLM istemci registry sorguları, reused/created (counter)
+    - mami_llm_http_requests_total: LLM sağlayıcılarına giden HTTP istekleri (counter)
+    - mami_llm_http_connections_total: LLM sağlayıcılarına açılan yeni TCP bağlantıları (counter)
+    - mami_llm_ttft_seconds: Stream'de ilk token'a kadar geçen süre, modele göre (histogram)
+    - mami_llm_inter_token_seconds: Stream'de ardışık token'lar arası süre, modele göre (histogram)
+    - mami_llm_stream_hedges_total: Hedge stream'leri, launched/won/lost (counter)
+    - mami_llm_ttft_timeouts_total: İlk token süre sınırını aşıp iptal edilen stream'ler (counter)
+    - mami_llm_tokens_total: LLM token kullanımı, reported/estimated kaynağına göre (counter)
+    - mami_llm_budget_rejections_total: Bütçe kontrolünde reddedilen istekler, rpd/tpd (counter)
+    - mami_llm_key_selections_total: Anahtar zamanlayıcı seçimleri, selected/throttled/unavailable (counter)
+    - mami_circuit_transitions_total: Devre kesici durum geçişleri, servis/duruma göre (counter)
 """
 
 import psutil
@@ -133,6 +156,172 @@ disk_percent_gauge = Gauge(
     registry=get_metrics_registry(),
 )
 
+# Embedding Cache Counters
+embedding_cache_hits_counter = Counter(
+    name="mami_embedding_cache_hits_total",
+    documentation="Embedding cache isabet sayısı (tier: memory | disk)",
+    labelnames=["model", "tier"],
+    registry=get_metrics_registry(),
+)
+
+embedding_cache_misses_counter = Counter(
+    name="mami_embedding_cache_misses_total",
+    documentation="Embedding cache ıskalama sayısı",
+    labelnames=["model"],
+    registry=get_metrics_registry(),
+)
+
+# Message Journal (write-behind)
+message_journal_batch_histogram = Histogram(
+    name="mami_message_journal_batch_size",
+    documentation="Tek transaction'da yazılan journal kaydı sayısı (op: append | update)",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250),
+    labelnames=["op"],
+    registry=get_metrics_registry(),
+)
+
+message_journal_failures_counter = Counter(
+    name="mami_message_journal_failures_total",
+    documentation="Başarısız journal flush sayısı",
+    registry=get_metrics_registry(),
+)
+
+# Answer Cache (hit oranı = hit_* / tüm lookup'lar)
+answer_cache_lookups_counter = Counter(
+    name="mami_answer_cache_lookups_total",
+    documentation="Yanıt önbelleği sorgu sayısı (result: hit_exact | hit_semantic | miss | bypass)",
+    labelnames=["result"],
+    registry=get_metrics_registry(),
+)
+
+answer_cache_stores_counter = Counter(
+    name="mami_answer_cache_stores_total",
+    documentation="Önbelleğe yazılan yanıt sayısı (ttl: default | volatile)",
+    labelnames=["ttl"],
+    registry=get_metrics_registry(),
+)
+
+# Classification Cache (intent / semantic / router)
+classification_cache_lookups_counter = Counter(
+    name="mami_classification_cache_lookups_total",
+    documentation="Sınıflandırma önbelleği sorguları (result: hit_memory | hit_redis | miss | coalesced)",
+    labelnames=["cache", "result"],
+    registry=get_metrics_registry(),
+)
+
+classification_cache_evictions_counter = Counter(
+    name="mami_classification_cache_evictions_total",
+    documentation="Önbellekten düşen kayıtlar (reason: capacity | expired)",
+    labelnames=["cache", "reason"],
+    registry=get_metrics_registry(),
+)
+
+memory_dedup_checks_counter = Counter(
+    name="mami_memory_dedup_checks_total",
+    documentation="Hafıza dedup katmanları (tier: hash | simhash | semantic, result: duplicate | miss | error)",
+    labelnames=["tier", "result"],
+    registry=get_metrics_registry(),
+)
+
+memory_access_flush_histogram = Histogram(
+    name="mami_memory_access_flush_size",
+    documentation="Tek ChromaDB update'inde last_accessed'i güncellenen hafıza sayısı",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500),
+    registry=get_metrics_registry(),
+)
+
+memory_access_flush_failures_counter = Counter(
+    name="mami_memory_access_flush_failures_total",
+    documentation="Başarısız erişim günlüğü flush sayısı",
+    registry=get_metrics_registry(),
+)
+
+user_fact_cache_lookups_counter = Counter(
+    name="mami_user_fact_cache_lookups_total",
+    documentation="Kullanıcı kimlik bloğu önbelleği sorguları (result: hit | miss)",
+    labelnames=["scope", "result"],
+    registry=get_metrics_registry(),
+)
+
+llm_client_lookups_counter = Counter(
+    name="mami_llm_client_lookups_total",
+    documentation="LLM provider registry sorguları (result: reused | created)",
+    labelnames=["provider", "result"],
+    registry=get_metrics_registry(),
+)
+
+llm_http_requests_counter = Counter(
+    name="mami_llm_http_requests_total",
+    documentation="Paylaşılan havuz üzerinden LLM sağlayıcısına gönderilen HTTP istekleri",
+    labelnames=["provider"],
+    registry=get_metrics_registry(),
+)
+
+llm_http_connections_counter = Counter(
+    name="mami_llm_http_connections_total",
+    documentation="LLM sağlayıcısına açılan yeni TCP bağlantıları (istek/bağlantı oranı = yeniden kullanım)",
+    labelnames=["provider"],
+    registry=get_metrics_registry(),
+)
+
+llm_ttft_histogram = Histogram(
+    name="mami_llm_ttft_seconds",
+    documentation="Stream isteğinde ilk token'a kadar geçen süre (saniye)",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0),
+    labelnames=["model"],
+    registry=get_metrics_registry(),
+)
+
+llm_inter_token_histogram = Histogram(
+    name="mami_llm_inter_token_seconds",
+    documentation="Stream'de ardışık token/chunk'lar arası süre (saniye)",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    labelnames=["model"],
+    registry=get_metrics_registry(),
+)
+
+llm_stream_hedges_counter = Counter(
+    name="mami_llm_stream_hedges_total",
+    documentation="TTFT aşımında başlatılan hedge stream'leri (result: launched | won | lost)",
+    labelnames=["model", "result"],
+    registry=get_metrics_registry(),
+)
+
+llm_ttft_timeouts_counter = Counter(
+    name="mami_llm_ttft_timeouts_total",
+    documentation="İlk token süre sınırını aşıp iptal edilen stream denemeleri",
+    labelnames=["model"],
+    registry=get_metrics_registry(),
+)
+
+llm_tokens_counter = Counter(
+    name="mami_llm_tokens_total",
+    documentation="Bütçeye yazılan LLM token'ları (source: reported = sağlayıcı usage | estimated = yerel tahmin)",
+    labelnames=["model", "source"],
+    registry=get_metrics_registry(),
+)
+
+llm_budget_rejections_counter = Counter(
+    name="mami_llm_budget_rejections_total",
+    documentation="Ön kabul kontrolünde reddedilip sonraki modele yönlendirilen istekler (limit: rpd | tpd)",
+    labelnames=["model", "limit"],
+    registry=get_metrics_registry(),
+)
+
+llm_key_selections_counter = Counter(
+    name="mami_llm_key_selections_total",
+    documentation="Anahtar seçimleri (result: selected | throttled = RPM/TPM kapasitesi yok | unavailable = cooldown/exhausted)",
+    labelnames=["provider", "result"],
+    registry=get_metrics_registry(),
+)
+
+circuit_transitions_counter = Counter(
+    name="mami_circuit_transitions_total",
+    documentation="Devre kesici geçişleri (service: llm:<model> | tool_<ad> | serper | forge; state: open | closed)",
+    labelnames=["service", "state"],
+    registry=get_metrics_registry(),
+)
+
 # =============================================================================
 # SYSTEM METRICS COLLECTOR
 # =============================================================================
@@ -2,14 +2,27 @@
 Mami AI - Resilience Package
 ----------------------------
 Atlas Sovereign OS'un hata toleransı ve kaynak yönetimi modülleri.
+
+Tek çekirdek: anahtar yöneticisi ve bütçe takipçisi app.core.llm'deki
+nesnelerdir, devre kesiciler CircuitManager'dadır; hepsi durumlarını
+ortak depoda (memory | redis) tutar.
 """
 
 from app.core.resilience.key_manager import KeyManager, key_manager
-from app.core.resilience.circuit_breaker import CircuitBreaker, CircuitManager
+from app.core.resilience.circuit_breaker import CircuitBreaker, CircuitManager, CircuitState
 from app.core.resilience.budget_tracker import BudgetTracker, budget_tracker
+from app.core.resilience.state import (
+    MemoryStateBackend,
+    RedisStateBackend,
+    get_state_backend,
+    set_state_backend,
+)
+from app.core.resilience.status import status_snapshot
 
 __all__ = [
     "KeyManager", "key_manager",
-    "CircuitBreaker", "CircuitManager", 
-    "BudgetTracker", "budget_tracker"
+    "CircuitBreaker", "CircuitManager", "CircuitState",
+    "BudgetTracker", "budget_tracker",
+    "MemoryStateBackend", "RedisStateBackend", "get_state_backend", "set_state_backend",
+    "status_snapshot",
 ]
@@ -2,108 +2,202 @@
 Mami AI - Devre Kesici (Circuit Breaker)
 ----------------------------------------
 Dış servislerde ardışık hataları takip eder ve sistemi korumak için akışı keser.
+
+Tek uygulama: LLM modelleri (llm:<model>), araçlar (tool_<ad>), Serper
+araması (serper) ve Forge (forge) aynı sınıfı kullanır. Sayaçlar ortak
+durum deposunda (app.core.resilience.state) tutulur; Redis seçiliyse
+worker'lar aynı devreyi görür ve durum yeniden başlatmada kaybolmaz.
+
+    CLOSED -> (fail_threshold ardışık hata) -> OPEN
+    OPEN -> (reset_timeout) -> HALF_OPEN
+    HALF_OPEN -> (success_threshold başarı) -> CLOSED
+    HALF_OPEN -> (hata) -> OPEN
 """
 
+import asyncio
 import time
 from enum import Enum
-from dataclasses import dataclass, field
-from typing import Optional, Dict
+from typing import Callable, Dict, Optional, TypeVar
+
+from app.config import get_settings
+from app.core.logger import get_logger
+from app.core.resilience.state import get_state_backend
+
+logger = get_logger("app.core.resilience.circuit_breaker", use_json=False)
+
+T = TypeVar("T")
 
+NAMESPACE = "circuit"
+_FIELDS = ("failures", "opened_at", "probes", "calls", "errors")
 
-class CircuitState(Enum):
+
+class CircuitState(str, Enum):
     """Devre kesicinin alabileceği durum değerleri."""
     CLOSED = "closed"
     OPEN = "open"
     HALF_OPEN = "half_open"
 
 
-@dataclass
-class CircuitStats:
-    """Hata ve başarı istatistikleri."""
-    fail_count: int = 0
-    success_count: int = 0
-    total_calls: int = 0
-    last_failure_time: Optional[float] = None
-    last_state_change: float = field(default_factory=time.time)
-    state: CircuitState = CircuitState.CLOSED
-
-
 class CircuitBreaker:
     """Dış servis çağrılarını denetleyen ve hata durumunda devreyi kesen sınıf."""
-    
-    def __init__(self, service_name: str, fail_threshold: int = 5, reset_timeout: int = 60):
+
+    def __init__(
+        self,
+        service_name: str,
+        fail_threshold: Optional[int] = None,
+        reset_timeout: Optional[int] = None,
+        success_threshold: int = 1,
+        expected_exception: type = Exception,
+    ):
+        settings = get_settings()
         self.service_name = service_name
-        self.fail_threshold = fail_threshold
-        self.reset_timeout = reset_timeout
-        self.stats = CircuitStats()
-    
+        self.fail_threshold = fail_threshold or settings.RESILIENCE_CIRCUIT_FAIL_THRESHOLD
+        self.reset_timeout = settings.RESILIENCE_CIRCUIT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.success_threshold = max(1, success_threshold)
+        self.expected_exception = expected_exception
+        CircuitManager._circuits[service_name] = self
+
+    @property
+    def state(self) -> CircuitState:
+        opened_at = self._get("opened_at")
+        if not opened_at:
+            return CircuitState.CLOSED
+        if time.time() - opened_at < self.reset_timeout:
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    @property
+    def failure_count(self) -> int:
+        return int(self._get("failures"))
+
     def can_execute(self) -> bool:
-        """İstek yapılabilir mi?"""
-        if self.stats.state == CircuitState.CLOSED:
-            return True
-        
-        if self.stats.state == CircuitState.OPEN:
-            if time.time() - self.stats.last_state_change > self.reset_timeout:
-                self._transition_to(CircuitState.HALF_OPEN)
-                return True
-            return False
-        
-        if self.stats.state == CircuitState.HALF_OPEN:
-            return True
-        
-        return False
-    
-    def record_success(self):
+        """İstek yapılabilir mi? (OPEN dışında evet; HALF_OPEN deneme isteğine izin verir)"""
+        return self.state != CircuitState.OPEN
+
+    can_attempt = can_execute
+
+    def record_success(self) -> None:
         """Başarılı çağrı kaydı."""
-        self.stats.total_calls += 1
-        self.stats.success_count += 1
-        
-        if self.stats.state == CircuitState.HALF_OPEN:
-            self._transition_to(CircuitState.CLOSED)
-            self.stats.fail_count = 0
-    
-    def record_failure(self):
+        state = self.state
+        self._incr("calls")
+        if state == CircuitState.HALF_OPEN:
+            if self._incr("probes") >= self.success_threshold:
+                self._close()
+        elif state == CircuitState.CLOSED and self._get("failures"):
+            self._set("failures", 0)  # ardışık hata sayılır
+
+    def record_failure(self, error: Optional[Exception] = None) -> None:
         """Hatalı çağrı kaydı."""
-        self.stats.total_calls += 1
-        self.stats.fail_count += 1
-        self.stats.last_failure_time = time.time()
-        
-        if self.stats.state == CircuitState.HALF_OPEN:
-            self._transition_to(CircuitState.OPEN)
-        elif self.stats.state == CircuitState.CLOSED:
-            if self.stats.fail_count >= self.fail_threshold:
-                self._transition_to(CircuitState.OPEN)
-    
-    def _transition_to(self, new_state: CircuitState):
-        """Durum değişikliği."""
-        import logging
-        logging.getLogger(__name__).info(
-            f"[CircuitBreaker] {self.service_name}: {self.stats.state.value} -> {new_state.value}"
-        )
-        self.stats.state = new_state
-        self.stats.last_state_change = time.time()
-    
+        state = self.state
+        self._incr("calls")
+        self._incr("errors")
+        failures = self._incr("failures")
+        reason = f": {error}" if error else ""
+        if state == CircuitState.HALF_OPEN:
+            self._open(f"deneme başarısız{reason}")
+        elif state == CircuitState.CLOSED and failures >= self.fail_threshold:
+            self._open(f"{int(failures)} ardışık hata{reason}")
+
+    async def call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """Runs func (sync or async) behind the breaker; raises ExternalServiceError while OPEN."""
+        if not self.can_execute():
+            from app.core.exceptions import ExternalServiceError
+
+            logger.warning(f"[CircuitBreaker] {self.service_name} OPEN - istek reddedildi")
+            raise ExternalServiceError(
+                service=self.service_name,
+                message="Circuit breaker is OPEN - service unavailable",
+                retryable=True,
+                retry_after=self.reset_timeout,
+            )
+        try:
+            if asyncio.iscoroutinefunction(func):
+                result = await func(*args, **kwargs)
+            else:
+                result = func(*args, **kwargs)
+        except self.expected_exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def reset(self) -> None:
+        """Devreyi kapatır ve sayaçları sıfırlar (manuel müdahale)."""
+        backend = get_state_backend()
+        for field in _FIELDS:
+            backend.delete(NAMESPACE, self._field(field))
+
     def get_status(self) -> dict:
         """Güncel durum özeti."""
+        state = self.state
+        calls = self._get("calls")
+        errors = self._get("errors")
+        retry_after = 0
+        if state == CircuitState.OPEN:
+            retry_after = max(0, int(self._get("opened_at") + self.reset_timeout - time.time()))
         return {
             "service": self.service_name,
-            "state": self.stats.state.value,
-            "fail_count": self.stats.fail_count,
-            "success_count": self.stats.success_count,
-            "is_open": self.stats.state == CircuitState.OPEN
+            "state": state.value,
+            "is_open": state == CircuitState.OPEN,
+            "fail_count": self.failure_count,
+            "fail_threshold": self.fail_threshold,
+            "success_count": int(calls - errors),
+            "total_calls": int(calls),
+            "retry_after": retry_after,
         }
 
+    get_state = get_status
+
+    def _open(self, reason: str) -> None:
+        self._set("opened_at", time.time())
+        self._set("probes", 0)
+        logger.warning(f"[CircuitBreaker] {self.service_name}: -> open ({reason})")
+        _count_transition(self.service_name, CircuitState.OPEN)
+
+    def _close(self) -> None:
+        for field in ("opened_at", "failures", "probes"):
+            self._set(field, 0)
+        logger.info(f"[CircuitBreaker] {self.service_name}: half_open -> closed")
+        _count_transition(self.service_name, CircuitState.CLOSED)
+
+    def _field(self, field: str) -> str:
+        return f"{self.service_name}:{field}"
+
+    def _get(self, field: str) -> float:
+        return get_state_backend().get(NAMESPACE, self._field(field))
+
+    def _set(self, field: str, value: float) -> None:
+        get_state_backend().set(NAMESPACE, self._field(field), value)
+
+    def _incr(self, field: str) -> float:
+        return get_state_backend().incr(NAMESPACE, self._field(field))
+
 
 class CircuitManager:
     """Tüm servis şalterlerini merkezi yöneten sınıf."""
     _circuits: Dict[str, CircuitBreaker] = {}
-    
+
     @classmethod
-    def get_breaker(cls, service_name: str) -> CircuitBreaker:
-        if service_name not in cls._circuits:
-            cls._circuits[service_name] = CircuitBreaker(service_name)
-        return cls._circuits[service_name]
-    
+    def get_breaker(cls, service_name: str, **options) -> CircuitBreaker:
+        """Registered breaker of service_name; options apply only when it is created."""
+        breaker = cls._circuits.get(service_name)
+        if breaker is None:
+            breaker = CircuitBreaker(service_name, **options)
+        return breaker
+
     @classmethod
     def get_all_status(cls) -> list:
         return [cb.get_status() for cb in cls._circuits.values()]
+
+    @classmethod
+    def reset(cls, prefix: str = "") -> None:
+        """Resets every breaker whose service name starts with prefix."""
+        for name, breaker in cls._circuits.items():
+            if name.startswith(prefix):
+                breaker.reset()
+
+
+def _count_transition(service: str, state: CircuitState) -> None:
+    from app.core.metrics import circuit_transitions_counter
+
+    circuit_transitions_counter.labels(service=service, state=state.value).inc()
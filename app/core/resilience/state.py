@@ -0,0 +1,262 @@
+"""
+Shared state backend of the resilience core.
+
+Key cooldowns, daily budgets and circuit breaker counters live here instead
+of in per-module dicts, so every limiter reads the same numbers:
+
+- MemoryStateBackend: in-process state (single worker, tests).
+- RedisStateBackend: local mirror backed by Redis hashes. Reads stay
+  synchronous (they sit on the request hot path); writes are applied to
+  the mirror and queued. Every RESILIENCE_SYNC_INTERVAL seconds the queue
+  is flushed (HINCRBYFLOAT / HSET / HDEL in one pipeline) and the mirror is
+  refreshed from Redis (namespaces this process has read or written), so
+  workers converge within one interval and state survives restarts.
+  Namespace TTLs are set on the Redis hash too; a TTL running out in the
+  mirror only evicts it locally, and only explicit deletes reach Redis.
+  Redis errors are fail-open: the mirror keeps working and queued writes
+  are retried on the next sync. The pipeline is not transactional, so when
+  only some commands fail, only those writes are retried (a retried
+  HINCRBYFLOAT that had already been applied would count twice).
+
+State is a set of namespaced hashes of numbers (namespace -> field ->
+float). Deadlines (cooldowns, open circuits) are stored as epoch seconds.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from app.core.logger import get_logger
+
+logger = get_logger("app.core.resilience.state", use_json=False)
+
+# Redis'e ulaşılamazken biriken yazım sınırı (en eskiler düşer)
+MAX_PENDING_WRITES = 10_000
+
+_Write = Tuple[str, str, Optional[str], float, Optional[int]]
+
+
+class MemoryStateBackend:
+    """Namespaced numeric state of a single process."""
+
+    name = "memory"
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
+        self._data: Dict[str, Dict[str, float]] = {}
+        self._expires_at: Dict[str, float] = {}
+
+    def get(self, namespace: str, field: str, default: float = 0.0) -> float:
+        return self._namespace(namespace).get(field, default)
+
+    def get_all(self, namespace: str) -> Dict[str, float]:
+        return dict(self._namespace(namespace))
+
+    def incr(self, namespace: str, field: str, amount: float = 1.0, ttl: Optional[int] = None) -> float:
+        values = self._namespace(namespace, ttl)
+        values[field] = values.get(field, 0.0) + amount
+        return values[field]
+
+    def set(self, namespace: str, field: str, value: float, ttl: Optional[int] = None) -> None:
+        self._namespace(namespace, ttl)[field] = float(value)
+
+    def delete(self, namespace: str, field: Optional[str] = None) -> None:
+        """Removes one field, or the whole namespace when field is None."""
+        if field is None:
+            self._evict(namespace)
+        elif namespace in self._data:
+            self._data[namespace].pop(field, None)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name, "namespaces": len(self._data)}
+
+    def _evict(self, namespace: str) -> None:
+        """Drops a namespace from this process only (TTL expiry, explicit delete)."""
+        self._data.pop(namespace, None)
+        self._expires_at.pop(namespace, None)
+
+    def _namespace(self, namespace: str, ttl: Optional[int] = None) -> Dict[str, float]:
+        expires_at = self._expires_at.get(namespace)
+        if expires_at is not None and self._clock() >= expires_at:
+            # Yerel süre dolumu Redis'e DEL olarak gitmez; Redis kendi TTL'ini uygular
+            self._evict(namespace)
+        if ttl:
+            self._expires_at[namespace] = self._clock() + ttl
+        return self._data.setdefault(namespace, {})
+
+
+class RedisStateBackend(MemoryStateBackend):
+    """Local mirror synchronised with Redis hashes (one hash per namespace)."""
+
+    name = "redis"
+
+    def __init__(
+        self,
+        prefix: str = "mami:resilience",
+        sync_interval: float = 2.0,
+        client_factory: Optional[Callable[[], Awaitable[Any]]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        super().__init__(clock)
+        self._prefix = prefix
+        self._sync_interval = sync_interval
+        self._client_factory = client_factory or _default_client
+        self._pending: List[_Write] = []
+        self._last_sync = float("-inf")
+        self._synced_at: Optional[float] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.last_error: Optional[str] = None
+
+    def get(self, namespace: str, field: str, default: float = 0.0) -> float:
+        self._maybe_sync()
+        return super().get(namespace, field, default)
+
+    def get_all(self, namespace: str) -> Dict[str, float]:
+        self._maybe_sync()
+        return super().get_all(namespace)
+
+    def incr(self, namespace: str, field: str, amount: float = 1.0, ttl: Optional[int] = None) -> float:
+        value = super().incr(namespace, field, amount, ttl)
+        self._queue(("incr", namespace, field, amount, ttl))
+        return value
+
+    def set(self, namespace: str, field: str, value: float, ttl: Optional[int] = None) -> None:
+        super().set(namespace, field, value, ttl)
+        self._queue(("set", namespace, field, float(value), ttl))
+
+    def delete(self, namespace: str, field: Optional[str] = None) -> None:
+        super().delete(namespace, field)
+        self._queue(("delete", namespace, field, 0.0, None))
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            **super().describe(),
+            "connected": self.connected,
+            "pending_writes": len(self._pending),
+            "last_sync_age": round(self._clock() - self._synced_at, 1) if self._synced_at else None,
+            "last_error": self.last_error,
+        }
+
+    async def sync(self) -> bool:
+        """Flushes queued writes and refreshes the mirror (False when Redis is unreachable)."""
+        self._last_sync = time.monotonic()
+        writes, self._pending = self._pending, []
+        namespaces = list(self._data)
+        try:
+            client = await self._client_factory()
+            if client is None:
+                raise ConnectionError("redis unavailable")
+            pipe = client.pipeline(transaction=False)
+            positions: List[int] = []  # her yazımın pipeline'daki ilk komutu
+            for op, namespace, field, value, ttl in writes:
+                key = self._key(namespace)
+                positions.append(len(pipe))
+                if op == "incr":
+                    pipe.hincrbyfloat(key, field, value)
+                elif op == "set":
+                    pipe.hset(key, field, value)
+                elif field is None:
+                    pipe.delete(key)
+                else:
+                    pipe.hdel(key, field)
+                if ttl:
+                    pipe.expire(key, int(ttl))
+            refresh_from = len(pipe)
+            for namespace in namespaces:
+                pipe.hgetall(self._key(namespace))
+            results = await pipe.execute(raise_on_error=False)
+        except Exception as e:  # noqa: BLE001
+            # Fail-open: yazımlar bir sonraki senkronizasyonda tekrar denenir
+            self._pending = (writes + self._pending)[-MAX_PENDING_WRITES:]
+            if self.connected or self.last_error is None:
+                logger.warning(f"[Resilience] Redis senkronizasyonu başarısız, yerel durumla devam: {e}")
+            self.connected = False
+            self.last_error = str(e)
+            return False
+
+        # Yalnızca hata veren yazımlar yeniden denenir; uygulanmış incr tekrar gönderilmez
+        failed = [
+            write for write, position in zip(writes, positions, strict=True)
+            if isinstance(results[position], Exception)
+        ]
+        if failed:
+            self._pending = (failed + self._pending)[-MAX_PENDING_WRITES:]
+            logger.warning(f"[Resilience] Redis {len(failed)} yazımı reddetti, sonraki senkronizasyonda tekrar denenecek")
+        for namespace, values in zip(namespaces, results[refresh_from:], strict=True):
+            if isinstance(values, Exception):
+                continue
+            self._data[namespace] = {_text(f): float(v) for f, v in (values or {}).items()}
+        # Senkronizasyon sürerken gelen yazımlar henüz Redis'te yok: yerel kopyaya yeniden uygula
+        for op, namespace, field, value, ttl in self._pending:
+            if op == "incr":
+                MemoryStateBackend.incr(self, namespace, field, value, ttl)
+            elif op == "set":
+                MemoryStateBackend.set(self, namespace, field, value, ttl)
+            else:
+                MemoryStateBackend.delete(self, namespace, field)
+        self.connected = True
+        self.last_error = None
+        self._synced_at = self._clock()
+        return True
+
+    def _queue(self, write: _Write) -> None:
+        self._pending.append(write)
+        if len(self._pending) > MAX_PENDING_WRITES:
+            del self._pending[0]
+        self._maybe_sync()
+
+    def _maybe_sync(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # senkron bağlam: yerel kopya ile devam
+        task = self._sync_task
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+        if time.monotonic() - self._last_sync < self._sync_interval:
+            return
+        self._last_sync = time.monotonic()
+        self._sync_task = loop.create_task(self.sync())
+
+    def _key(self, namespace: str) -> str:
+        return f"{self._prefix}:{namespace}"
+
+
+async def _default_client() -> Any:
+    from app.core.redis_client import get_redis
+
+    return await get_redis()
+
+
+def _text(value: Any) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+_backend: Optional[MemoryStateBackend] = None
+
+
+def get_state_backend() -> MemoryStateBackend:
+    """Process-wide backend selected by RESILIENCE_STATE_BACKEND."""
+    global _backend
+    if _backend is None:
+        settings = get_settings()
+        kind = (settings.RESILIENCE_STATE_BACKEND or "memory").lower()
+        if kind == "redis":
+            _backend = RedisStateBackend(
+                prefix=settings.RESILIENCE_REDIS_PREFIX,
+                sync_interval=settings.RESILIENCE_SYNC_INTERVAL,
+            )
+        else:
+            if kind != "memory":
+                logger.warning(f"[Resilience] Bilinmeyen durum deposu '{kind}', memory kullanılıyor")
+            _backend = MemoryStateBackend()
+    return _backend
+
+
+def set_state_backend(backend: Optional[MemoryStateBackend]) -> None:
+    """Replaces the process-wide backend (None = re-read settings on next use)."""
+    global _backend
+    _backend = backend
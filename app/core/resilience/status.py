@@ -0,0 +1,30 @@
+"""
+Mami AI - Resilience Durum Özeti
+--------------------------------
+Anahtarlar, günlük bütçeler ve devre kesiciler için tek tutarlı görünüm
+(admin API). Redis deposunda önce senkronize edilir; tüm bölümler aynı
+yerel kopyadan okunur.
+"""
+
+from datetime import datetime
+from typing import Any, Dict
+
+from app.core.resilience.circuit_breaker import CircuitManager
+from app.core.resilience.state import RedisStateBackend, get_state_backend
+
+
+async def status_snapshot() -> Dict[str, Any]:
+    """Keys, budgets and circuits read from the same state backend view."""
+    from app.core.llm.budget_tracker import budget_tracker
+    from app.core.llm.key_manager import key_manager
+
+    backend = get_state_backend()
+    if isinstance(backend, RedisStateBackend):
+        await backend.sync()
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "backend": backend.describe(),
+        "keys": key_manager.get_stats(),
+        "budget": budget_tracker.get_usage_stats(),
+        "circuits": CircuitManager.get_all_status(),
+    }
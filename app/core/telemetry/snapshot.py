@@ -43,7 +43,7 @@ async def build_admin_orch_snapshot(verbose: bool = False) -> Dict[str, Any]:
             "timestamp": None,
         },
         "runtime_state": {},
-        "auto_circuit": {"status": "not_implemented"},
+        "auto_circuit": _circuit_summary(),
     }
 
     return {
@@ -51,3 +51,18 @@ async def build_admin_orch_snapshot(verbose: bool = False) -> Dict[str, Any]:
         "telemetry": {},
         "verbose": verbose,
     }
+
+
+def _circuit_summary() -> Dict[str, Any]:
+    """Devre kesicilerin durumu (resilience çekirdeği); hata olursa boş döner."""
+    try:
+        from app.core.resilience import CircuitManager
+
+        circuits = CircuitManager.get_all_status()
+    except Exception as e:  # noqa: BLE001
+        logger.warning(f"[SNAPSHOT] Circuit durumu okunamadı: {e}")
+        return {"status": "unavailable", "circuits": []}
+    return {
+        "status": "open" if any(c["is_open"] for c in circuits) else "ok",
+        "circuits": circuits,
+    }
@@ -9,6 +9,7 @@ Desteklenen Mesaj Tipleri:
     - image_progress: Görsel üretim ilerleme durumu
     - image_complete: Görsel üretim tamamlandı
     - image_error: Görsel üretim hatası
+    - document_progress: Belge ingestion ilerleme durumu
     - notification: Genel bildirimler
 """
 
@@ -147,6 +148,53 @@ async def send_image_progress(
     return sent_count
 
 
+async def send_document_progress(
+    username: str,
+    upload_id: str,
+    filename: str,
+    status: str,
+    pages_done: int = 0,
+    total_pages: int = 0,
+    chunks_added: int = 0,
+    error: str | None = None,
+) -> int:
+    """
+    Belge ingestion ilerlemesini WebSocket üzerinden gönderir.
+
+    Görsel ilerleme ile aynı kullanıcı kanalını (send_to_user) kullanır;
+    yalnızca mesaj tipi "document_progress" olarak ayrışır.
+
+    Args:
+        username: Kullanıcı adı
+        upload_id: Yükleme ID'si (devam ettirme anahtarı)
+        filename: Orijinal dosya adı
+        status: "processing", "complete" veya "error"
+        pages_done: İşlenen sayfa sayısı
+        total_pages: Toplam sayfa sayısı
+        chunks_added: Şu ana kadar yazılan chunk sayısı
+        error: Hata mesajı (error durumunda)
+
+    Returns:
+        int: Gönderilen istemci sayısı
+    """
+    progress = int(pages_done * 100 / total_pages) if total_pages else 0
+    payload: dict[str, Any] = {
+        "type": "document_progress",
+        "upload_id": upload_id,
+        "filename": filename,
+        "status": status,
+        "progress": min(max(progress, 0), 100),
+        "pages_done": pages_done,
+        "total_pages": total_pages,
+        "chunks_added": chunks_added,
+        "username": username,
+    }
+    if error:
+        payload["error"] = error
+
+    return await send_to_user(username, payload)
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 # REDIS PUB/SUB BRIDGE (Atlas Hybrid Connectivity)
 # ═══════════════════════════════════════════════════════════════════════════
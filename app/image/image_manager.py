@@ -83,7 +83,7 @@ async def request_image_generation(
     from html import escape as html_escape
 
     from app.image.routing import decide_image_job
-    from app.memory.conversation import update_message
+    from app.memory.message_journal import message_journal
     from app.services.user_preferences import get_effective_preferences
 
     # Kullanıcı tercihlerini al
@@ -102,7 +102,7 @@ async def request_image_generation(
         # Blocked ise mesajı hata ile güncelle
         if spec.blocked:
             logger.warning(f"[IMAGE_MANAGER] Request blocked: {spec.block_reason}")
-            update_message(message_id, f"❌ {spec.block_reason}", {"status": "error"})
+            message_journal.update(message_id, f"❌ {spec.block_reason}", {"status": "error"})
             return None
 
         # Routing kararini logla
@@ -127,7 +127,7 @@ async def request_image_generation(
         try:
             if result.startswith("(IMAGE ERROR)"):
                 # Hata durumu
-                update_message(
+                message_journal.update(
                     message_id,
                     f"❌ Görsel üretilemedi: {result.replace('(IMAGE ERROR)', '').strip()}",
                     {"status": "error", "type": "image"},
@@ -136,7 +136,7 @@ async def request_image_generation(
                 # Başarılı - resim URL'i ile güncelle
                 safe_prompt = html_escape(prompt, quote=True)
                 prompt_snippet = f'<span class="image-prompt" data-prompt="{safe_prompt}"></span>'
-                update_message(
+                message_journal.update(
                     message_id,
                     f"[IMAGE] Resminiz hazır.{prompt_snippet}\nIMAGE_PATH: {result}",
                     {"status": "complete", "type": "image", "image_url": result},
@@ -139,9 +139,9 @@ class ImageJobQueue:
                 return
 
             # FAZE 2: Processing başladığında queue_position'ı 0'a set et
-            from app.memory.conversation import update_message
+            from app.memory.message_journal import message_journal
             if job.message_id:
-                update_message(
+                message_journal.update(
                     job.message_id,
                     None,
                     {
@@ -193,13 +193,13 @@ class ImageJobQueue:
             logger.error(f"[IMAGE_QUEUE] Resim hatası: {e}", exc_info=True)
             
             # FAZE 2: Error recovery - error persist et ve sonraki job başlasın
-            from app.memory.conversation import update_message
+            from app.memory.message_journal import message_journal
             if job.message_id:
                 error_msg = str(e)
                 if isinstance(e, TimeoutError):
                     error_msg = f"Timeout: {error_msg}"
-                update_message(job.message_id,
-                    content=f"❌ Görsel oluşturulamadı: {error_msg}",
+                message_journal.update(job.message_id,
+                    new_content=f"❌ Görsel oluşturulamadı: {error_msg}",
                     new_metadata={
                         "status": "error",
                         "error": error_msg,
@@ -272,9 +272,9 @@ class ImageJobQueue:
         job.queue_pos = queue_pos
         
         # FAZE 2: Queue position'ı persist et
-        from app.memory.conversation import update_message
+        from app.memory.message_journal import message_journal
         if job.message_id:
-            update_message(
+            message_journal.update(
                 job.message_id,
                 None,
                 {
@@ -445,61 +445,70 @@ class ImageJobQueue:
 
     async def _recalculate_queue_positions(self, conversation_id: str | None) -> None:
         """FAZE 3: Recalculate queue positions for all queued jobs in conversation, considering priority"""
-        from app.core.database import get_session
-        from app.core.models import Message
-        
+        from sqlmodel import col, select
+
+        from app.core.database import get_async_session
+        from app.core.models import Conversation, Message, User
+        from app.memory.message_journal import message_journal
+
         if not conversation_id:
             return
-        
+
         try:
-            session = get_session()
-            
-            # Get all queued messages in conversation
-            queued_messages = session.query(Message).filter(
-                Message.conversation_id == conversation_id,
-                Message.extra_metadata["status"].astext == "queued"
-            ).order_by(Message.created_at).all()
-            
+            async with get_async_session() as session:
+                owner = (await session.exec(
+                    select(User.username)
+                    .join(Conversation, col(Conversation.user_id) == col(User.id))
+                    .where(Conversation.id == conversation_id)
+                )).first()
+                # Bot mesajları; status JSON içinde olduğu için (SQLite/Postgres ortak) Python'da süzülür
+                bot_messages = (await session.exec(
+                    select(Message)
+                    .where(Message.conversation_id == conversation_id, Message.role == "bot")
+                    .order_by(col(Message.created_at))
+                )).all()
+            # Journal'da bekleyen status/queue_position güncellemeleri (read-your-writes)
+            message_journal.overlay(bot_messages)
+
+            queued_messages = [m for m in bot_messages if (m.extra_metadata or {}).get("status") == "queued"]
             if not queued_messages:
                 return
-            
+
             # Sort by priority first, then by creation time
             priority_order = {"high": 0, "normal": 1, "low": 2}
-            
+
             def get_sort_key(msg):
                 meta = msg.extra_metadata or {}
                 priority = meta.get("priority", "normal")
                 return (priority_order.get(priority, 1), msg.created_at)
-            
+
             queued_messages.sort(key=get_sort_key)
-            
+
             # Recalculate positions
-            from app.memory.conversation import update_message
             for idx, msg in enumerate(queued_messages, 1):
                 new_position = idx
-                old_position = msg.extra_metadata.get("queue_position", 0) if msg.extra_metadata else 0
-                
+                meta = msg.extra_metadata or {}
+                old_position = meta.get("queue_position", 0)
+
                 if old_position != new_position:
-                    update_message(msg.id, None, {
-                        "queue_position": new_position
-                    })
-                    
+                    message_journal.update(msg.id, None, {"queue_position": new_position})
+
                     # Send WebSocket notification for position change
                     try:
                         await send_image_progress(
-                            username=msg.user.username if msg.user else "unknown",
+                            username=owner or "unknown",
                             conversation_id=conversation_id,
-                            job_id=msg.extra_metadata.get("job_id", "") if msg.extra_metadata else "",
+                            job_id=meta.get("job_id", ""),
                             status=ImageJobStatus.QUEUED,
                             progress=0,
                             queue_position=new_position,
-                            prompt=msg.extra_metadata.get("prompt", "") if msg.extra_metadata else "",
+                            prompt=meta.get("prompt", ""),
                         )
                     except Exception as e:
                         logger.debug(f"[IMAGE_QUEUE] Position update WS notification failed: {e}")
-            
+
             logger.info(f"[IMAGE_QUEUE] Recalculated positions for {len(queued_messages)} queued jobs (priority-aware)")
-            
+
         except Exception as e:
             logger.error(f"[IMAGE_QUEUE] Position recalculation failed: {e}", exc_info=True)
 
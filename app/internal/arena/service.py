@@ -114,8 +114,8 @@ class ArenaService:
                 )
             else:
                 # Fallback: Direct Groq call
-                from app.providers.llm.groq import GroqProvider
-                provider = GroqProvider()
+                from app.providers.llm.registry import get_provider
+                provider = get_provider("groq")
                 response = await provider.generate(
                     prompt=test_case.prompt,
                     model=model,
@@ -151,6 +151,13 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"RAG FTS initialization error: {e}")
 
+    # RAG v2: Crash sonrası yarım kalan PDF ingestion işlerini sürdür
+    try:
+        from app.memory.rag_v2_ingest import resume_pending_ingestions
+        asyncio.create_task(resume_pending_ingestions())
+    except Exception as e:
+        logger.error(f"RAG ingestion resume error: {e}")
+
     # Startup Checks
     try:
         from app.auth.user_manager import ensure_default_admin
@@ -177,6 +184,55 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Analytics tracker kapatılırken hata: {e}", exc_info=True)
     
+    # RAG v2 lexical index bağlantı havuzunu kapat
+    try:
+        from app.memory.rag_v2_lexical import close_lexical_index
+        close_lexical_index()
+    except Exception as e:
+        logger.error(f"Lexical index kapatılırken hata: {e}", exc_info=True)
+
+    # Gemini embedding HTTP havuzunu kapat
+    try:
+        from app.services.brain.memory.embeddings import embedder
+        await embedder.aclose()
+    except Exception as e:
+        logger.error(f"Embedding client kapatılırken hata: {e}", exc_info=True)
+
+    # LLM sağlayıcı istemci havuzunu kapat (keep-alive bağlantılar)
+    try:
+        from app.providers.llm.registry import provider_registry
+        await provider_registry.aclose()
+    except Exception as e:
+        logger.error(f"LLM istemci havuzu kapatılırken hata: {e}", exc_info=True)
+
+    # Embedding cache (SQLite) bağlantısını kapat
+    try:
+        from app.core.embedding_cache import close_embedding_cache
+        close_embedding_cache()
+    except Exception as e:
+        logger.error(f"Embedding cache kapatılırken hata: {e}", exc_info=True)
+
+    # Message journal: bekleyen mesaj yazımlarını flush et (DB havuzu kapanmadan önce)
+    try:
+        from app.memory.message_journal import message_journal
+        await message_journal.close()
+    except Exception as e:
+        logger.error(f"Message journal flush hatası: {e}", exc_info=True)
+
+    # Hafıza erişim günlüğü: bekleyen last_accessed güncellemelerini yaz
+    try:
+        from app.memory.memory_access_log import memory_access_log
+        await memory_access_log.close()
+    except Exception as e:
+        logger.error(f"Memory access log flush hatası: {e}", exc_info=True)
+
+    # Async veritabanı havuzunu kapat
+    try:
+        from app.core.database import dispose_async_engine
+        await dispose_async_engine()
+    except Exception as e:
+        logger.error(f"Async DB havuzu kapatılırken hata: {e}", exc_info=True)
+
     # Health Monitor'ı durdur
     try:
         await stop_health_monitor()
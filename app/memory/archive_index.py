@@ -0,0 +1,182 @@
+"""
+Mami AI - Conversation Archive Index (SQLite FTS5)
+=================================================
+
+Sohbet arşivi araması için başlık + özet + entity tam metin indeksi.
+
+Yapı:
+    conversation_archive       içerik tablosu (conversation_id UNIQUE, owner, metinler)
+    conversation_archive_fts   FTS5 (external content, unicode61 + diacritic folding)
+
+Bakım tamamen veritabanı trigger'larıyla yapılır; uygulama kodu indeksi
+ayrıca güncellemez:
+    conversations          INSERT / UPDATE OF title / DELETE
+    conversation_summaries INSERT / UPDATE OF summary, entities / DELETE
+    conversation_archive   → conversation_archive_fts senkronu
+
+owner kolonu "u{user_id}" token'ı taşır; kullanıcı filtresi MATCH ifadesinin
+parçasıdır (owner:u42 AND ...), böylece filtre indeks içinde çalışır.
+
+Kurulum: alembic migration (mevcut kayıtları da doldurur) ya da
+create_all fallback'inde ensure_archive_index().
+"""
+
+import logging
+import re
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_TABLE = "conversation_archive"
+ARCHIVE_FTS_TABLE = "conversation_archive_fts"
+
+# bm25 kolon ağırlıkları: owner, title, summary, entities
+BM25_WEIGHTS = (0.0, 3.0, 1.0, 2.0)
+
+ARCHIVE_INDEX_DDL: tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS conversation_archive (
+        id INTEGER PRIMARY KEY,
+        conversation_id TEXT NOT NULL UNIQUE,
+        owner TEXT NOT NULL,
+        title TEXT NOT NULL DEFAULT '',
+        summary TEXT NOT NULL DEFAULT '',
+        entities TEXT NOT NULL DEFAULT ''
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS conversation_archive_fts USING fts5(
+        owner, title, summary, entities,
+        content='conversation_archive', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    # İçerik tablosu → FTS
+    """
+    CREATE TRIGGER IF NOT EXISTS conversation_archive_ai AFTER INSERT ON conversation_archive BEGIN
+        INSERT INTO conversation_archive_fts(rowid, owner, title, summary, entities)
+        VALUES (new.id, new.owner, new.title, new.summary, new.entities);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversation_archive_ad AFTER DELETE ON conversation_archive BEGIN
+        INSERT INTO conversation_archive_fts(conversation_archive_fts, rowid, owner, title, summary, entities)
+        VALUES ('delete', old.id, old.owner, old.title, old.summary, old.entities);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversation_archive_au AFTER UPDATE ON conversation_archive BEGIN
+        INSERT INTO conversation_archive_fts(conversation_archive_fts, rowid, owner, title, summary, entities)
+        VALUES ('delete', old.id, old.owner, old.title, old.summary, old.entities);
+        INSERT INTO conversation_archive_fts(rowid, owner, title, summary, entities)
+        VALUES (new.id, new.owner, new.title, new.summary, new.entities);
+    END
+    """,
+    # Kaynak tablolar → içerik tablosu
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_archive_ai AFTER INSERT ON conversations BEGIN
+        INSERT OR IGNORE INTO conversation_archive(conversation_id, owner, title)
+        VALUES (new.id, 'u' || new.user_id, COALESCE(new.title, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_archive_au AFTER UPDATE OF title ON conversations BEGIN
+        UPDATE conversation_archive SET title = COALESCE(new.title, '') WHERE conversation_id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_archive_ad AFTER DELETE ON conversations BEGIN
+        DELETE FROM conversation_archive WHERE conversation_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversation_summaries_archive_ai AFTER INSERT ON conversation_summaries BEGIN
+        INSERT INTO conversation_archive(conversation_id, owner, title, summary, entities)
+        SELECT c.id, 'u' || c.user_id, COALESCE(c.title, ''), COALESCE(new.summary, ''), COALESCE(new.entities, '')
+        FROM conversations c WHERE c.id = new.conversation_id
+        ON CONFLICT(conversation_id) DO UPDATE SET summary = excluded.summary, entities = excluded.entities;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversation_summaries_archive_au
+    AFTER UPDATE OF summary, entities ON conversation_summaries BEGIN
+        UPDATE conversation_archive
+        SET summary = COALESCE(new.summary, ''), entities = COALESCE(new.entities, '')
+        WHERE conversation_id = new.conversation_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS conversation_summaries_archive_ad AFTER DELETE ON conversation_summaries BEGIN
+        UPDATE conversation_archive SET summary = '', entities = '' WHERE conversation_id = old.conversation_id;
+    END
+    """,
+)
+
+ARCHIVE_INDEX_BACKFILL = """
+    INSERT OR IGNORE INTO conversation_archive(conversation_id, owner, title, summary, entities)
+    SELECT c.id, 'u' || c.user_id, COALESCE(c.title, ''), COALESCE(s.summary, ''), COALESCE(s.entities, '')
+    FROM conversations c LEFT JOIN conversation_summaries s ON s.conversation_id = c.id
+"""
+
+ARCHIVE_INDEX_DROP: tuple[str, ...] = (
+    "DROP TRIGGER IF EXISTS conversation_summaries_archive_ad",
+    "DROP TRIGGER IF EXISTS conversation_summaries_archive_au",
+    "DROP TRIGGER IF EXISTS conversation_summaries_archive_ai",
+    "DROP TRIGGER IF EXISTS conversations_archive_ad",
+    "DROP TRIGGER IF EXISTS conversations_archive_au",
+    "DROP TRIGGER IF EXISTS conversations_archive_ai",
+    "DROP TRIGGER IF EXISTS conversation_archive_au",
+    "DROP TRIGGER IF EXISTS conversation_archive_ad",
+    "DROP TRIGGER IF EXISTS conversation_archive_ai",
+    "DROP TABLE IF EXISTS conversation_archive_fts",
+    "DROP TABLE IF EXISTS conversation_archive",
+)
+
+# Arama terimi olmayan kelimeler: soru ekleri + arşiv/tarih tetikleyicileri
+STOP_WORDS = frozenset({
+    "ne", "nasıl", "nerede", "kim", "bu", "şu", "bir", "ve", "ile", "mi", "mı", "mu", "mü",
+    "da", "de", "ki", "için", "hakkında", "biz", "ben", "sen", "neler",
+    "geçen", "daha", "önce", "önceki", "hatırla", "hatırlıyor", "hatırlıyorsun", "konuşmuştuk",
+    "konuştuk", "bahsetmiştik", "hafta", "haftaki", "ay", "gün", "dün", "bugün", "son",
+    "last", "before", "previous", "remember", "discussed", "week", "days", "yesterday", "what", "did", "we",
+})
+
+
+def ensure_archive_index(connection: Any) -> bool:
+    """İndeks tablolarını ve trigger'ları kurar (yalnızca SQLite); mevcut kayıtları doldurur."""
+    from sqlalchemy import text
+
+    if connection.dialect.name != "sqlite":
+        return False
+    for statement in ARCHIVE_INDEX_DDL:
+        connection.execute(text(statement))
+    connection.execute(text(ARCHIVE_INDEX_BACKFILL))
+    return True
+
+
+def _prefix(term: str) -> str:
+    """Uzun kelimelerde son 3 harfi bırakır: Türkçe ekler (kediler → kedi*) önek eşleşmesine takılmaz."""
+    return term[: max(4, len(term) - 3)] if len(term) >= 6 else term
+
+
+def query_terms(query: str) -> list[str]:
+    """
+    Sorgudan önek arama terimlerini çıkarır (küçük harf, stop word'ler hariç).
+
+    unicode61 tokenizer'ı "I"yı "i" yapar, "ı"yı olduğu gibi bırakır. Büyük
+    "I" içeren kelimeler hem bu biçimde (Instagram → instagram) hem Türkçe
+    küçük harfle (IŞIK → ışık) aranır; sorgu metnin kendi yazımıyla da eşleşir.
+    """
+    terms: list[str] = []
+    for word in re.findall(r"\w+", query.replace("İ", "i")):
+        plain, turkish = word.lower(), word.replace("I", "ı").lower()
+        if len(plain) < 2 or plain in STOP_WORDS or turkish in STOP_WORDS:
+            continue
+        terms.extend((_prefix(plain), _prefix(turkish)))
+    return list(dict.fromkeys(terms))
+
+
+def build_match(user_id: int, terms: list[str]) -> str:
+    """FTS5 MATCH ifadesi: kullanıcı token'ı AND (terimlerden herhangi biri, önek eşleşmeli)."""
+    any_term = " OR ".join(f'"{term}"*' for term in terms)
+    return f"owner:u{int(user_id)} AND {{title summary entities}}: ({any_term})"
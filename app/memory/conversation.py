@@ -18,6 +18,9 @@ Kullanım:
 
     # Mesaj ekle
     append_message("john", conv.id, "user", "Nasılsın?")
+
+    # Async request handler'larda (event loop'u bloklamaz)
+    msg = await append_message_async("john", conv.id, "user", "Nasılsın?")
 """
 
 from __future__ import annotations
@@ -198,7 +201,47 @@ def load_messages(username: str, conv_id: str) -> list:
         from sqlmodel import asc
 
         statement = select(Message).where(Message.conversation_id == conv_id).order_by(asc(Message.created_at))
-        return list(session.exec(statement).all())
+        messages = list(session.exec(statement).all())
+    _overlay_pending(messages)
+    return messages
+
+
+def _overlay_pending(messages: list) -> None:
+    """Message journal'da bekleyen (henüz yazılmamış) güncellemeleri uygular."""
+    from app.memory.message_journal import message_journal
+
+    message_journal.overlay(messages)
+
+
+def _tail_messages_stmt(conv_id: str, limit: int, before_id: int | None = None):
+    """
+    Sohbetin en yeni `limit` mesajı (yeniden eskiye).
+
+    ORDER BY created_at DESC, id DESC LIMIT N: (conversation_id, created_at, id)
+    indeksinin sonundan okunur; sohbet uzunluğundan bağımsızdır.
+    before_id verilirse keyset sayfalama: o mesajdan daha eski olanlar.
+    """
+    from sqlalchemy import tuple_
+
+    _, _, Message = _get_imports()
+    statement = select(Message).where(Message.conversation_id == conv_id)
+    if before_id is not None:
+        anchor = select(Message.created_at).where(Message.id == before_id).scalar_subquery()
+        statement = statement.where(tuple_(col(Message.created_at), col(Message.id)) < tuple_(anchor, before_id))
+    return statement.order_by(col(Message.created_at).desc(), col(Message.id).desc()).limit(limit)
+
+
+def load_recent_messages(conv_id: str, limit: int = 10) -> list:
+    """
+    Sohbetin son `limit` mesajını kronolojik sırayla döndürür (sahiplik kontrolü yok;
+    çağıran conv_id'nin doğruluğundan sorumludur).
+    """
+    get_session, _, _ = _get_imports()
+    with get_session() as session:
+        messages = list(session.exec(_tail_messages_stmt(conv_id, limit)).all())
+    messages.reverse()
+    _overlay_pending(messages)
+    return messages
 
 
 def append_message(
@@ -223,6 +266,8 @@ def append_message(
     Returns:
         Message: Eklenen mesaj
     """
+    from sqlalchemy import update
+
     get_session, Conversation, Message = _get_imports()
     user_id = _resolve_user_id(username)
 
@@ -244,12 +289,14 @@ def append_message(
             created_at=datetime.utcnow(),
         )
 
-        # Sohbet güncelleme zamanını da güncelle
-        conv.updated_at = datetime.utcnow()
-
         try:
             session.add(new_msg)
-            session.add(conv)
+            # Güncelleme zamanı ve mesaj sayısı SQL tarafında (eşzamanlı eklemeler sayı kaybetmez)
+            session.execute(
+                update(Conversation)
+                .where(col(Conversation.id) == conv_id)
+                .values(updated_at=new_msg.created_at, message_count=col(Conversation.message_count) + 1)
+            )
             session.commit()
             session.refresh(new_msg)
             return new_msg
@@ -297,7 +344,6 @@ def update_message(message_id: int, new_content: str | None = None, new_metadata
             logger.debug(f"[CONV] Deep merge: {list(new_metadata.keys())} alanları eklendi/güncellendi")
 
         try:
-            msg.updated_at = datetime.utcnow()
             session.add(msg)
             session.commit()
             logger.info(f"[CONV] Mesaj güncellendi: {message_id}")
@@ -308,6 +354,165 @@ def update_message(message_id: int, new_content: str | None = None, new_metadata
             return False
 
 
+# =============================================================================
+# ASYNC REPOSITORY (aiosqlite / asyncpg)
+# =============================================================================
+# Sıcak sohbet yolları için sync fonksiyonların async karşılıkları. Sahiplik
+# kontrolü, sync user resolver'ı çağırmak yerine users tablosuyla tek JOIN
+# sorgusunda yapılır.
+
+
+def _owned_conversation_stmt(username: str, conv_id: str):
+    """Kullanıcıya ait sohbeti seçen sorgu (sahip değilse sonuç boş)."""
+    from app.core.models import Conversation, User
+
+    return (
+        select(Conversation)
+        .join(User, col(User.id) == col(Conversation.user_id))
+        .where(Conversation.id == conv_id, User.username == username)
+    )
+
+
+async def get_conversation_async(username: str, conv_id: str):
+    """get_conversation() async karşılığı."""
+    from app.core.database import get_async_session
+
+    async with get_async_session() as session:
+        conv = (await session.exec(_owned_conversation_stmt(username, conv_id))).first()
+        if not conv:
+            logger.warning(f"[CONV] Yetkisiz erişim veya bulunamadı: {username} -> {conv_id}")
+        return conv
+
+
+async def load_messages_async(username: str, conv_id: str) -> list:
+    """load_messages() async karşılığı (kronolojik)."""
+    from app.core.database import get_async_session
+    from app.core.models import Message
+
+    async with get_async_session() as session:
+        conv = (await session.exec(_owned_conversation_stmt(username, conv_id))).first()
+        if not conv:
+            logger.warning(f"[CONV] Yetkisiz erişim: {username} -> {conv_id}")
+            return []
+
+        statement = select(Message).where(Message.conversation_id == conv_id).order_by(col(Message.created_at).asc())
+        messages = list((await session.exec(statement)).all())
+    _overlay_pending(messages)
+    return messages
+
+
+async def load_recent_messages_async(conv_id: str, limit: int = 10) -> list:
+    """load_recent_messages() async karşılığı."""
+    from app.core.database import get_async_session
+
+    async with get_async_session() as session:
+        messages = list((await session.exec(_tail_messages_stmt(conv_id, limit))).all())
+    messages.reverse()
+    _overlay_pending(messages)
+    return messages
+
+
+async def load_messages_page_async(
+    username: str, conv_id: str, limit: int = 50, before_id: int | None = None
+) -> tuple[list, int | None]:
+    """
+    Sohbet görünümü için keyset sayfalama.
+
+    Args:
+        limit: Sayfa boyutu
+        before_id: Önceki sayfanın imleci (bu mesajdan daha eskiler gelir)
+
+    Returns:
+        (mesajlar (kronolojik), sonraki imleç). Daha eski mesaj yoksa imleç None.
+    """
+    from app.core.database import get_async_session
+
+    async with get_async_session() as session:
+        conv = (await session.exec(_owned_conversation_stmt(username, conv_id))).first()
+        if not conv:
+            logger.warning(f"[CONV] Yetkisiz erişim: {username} -> {conv_id}")
+            return [], None
+        # Bir fazla oku: sonraki sayfa olup olmadığını ek sorgu olmadan anla
+        messages = list((await session.exec(_tail_messages_stmt(conv_id, limit + 1, before_id))).all())
+
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    messages.reverse()
+    _overlay_pending(messages)
+    return messages, (messages[0].id if has_more else None)
+
+
+async def append_message_async(
+    username: str,
+    conv_id: str,
+    role: str,
+    text: str,
+    extra_metadata: dict[str, Any] | None = None,
+    images: list[str] | None = None,
+):
+    """append_message() async karşılığı."""
+    from sqlalchemy import update
+
+    from app.core.database import get_async_session
+    from app.core.models import Conversation, Message
+
+    async with get_async_session() as session:
+        conv = (await session.exec(_owned_conversation_stmt(username, conv_id))).first()
+        if not conv:
+            raise ValueError(f"Sohbet bulunamadı veya yetki yok: {conv_id}")
+
+        meta = extra_metadata or {}
+        if images:
+            meta["images"] = images
+
+        now = datetime.utcnow()
+        new_msg = Message(conversation_id=conv_id, role=role, content=text, extra_metadata=meta, created_at=now)
+
+        try:
+            session.add(new_msg)
+            await session.execute(
+                update(Conversation)
+                .where(col(Conversation.id) == conv_id)
+                .values(updated_at=now, message_count=col(Conversation.message_count) + 1)
+            )
+            await session.commit()
+            await session.refresh(new_msg)
+            return new_msg
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"[CONV] Mesaj ekleme hatası: {e}", exc_info=True)
+            raise
+
+
+async def update_message_async(
+    message_id: int, new_content: str | None = None, new_metadata: dict[str, Any] | None = None
+) -> bool:
+    """update_message() async karşılığı (metadata deep merge)."""
+    from app.core.database import get_async_session
+    from app.core.models import Message
+
+    async with get_async_session() as session:
+        msg = await session.get(Message, message_id)
+        if not msg:
+            logger.warning(f"[CONV] Mesaj bulunamadı: {message_id}")
+            return False
+
+        if new_content is not None:
+            msg.content = new_content
+        if new_metadata is not None:
+            msg.extra_metadata = {**(msg.extra_metadata or {}), **new_metadata}
+
+        try:
+            session.add(msg)
+            await session.commit()
+            logger.info(f"[CONV] Mesaj güncellendi: {message_id}")
+            return True
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"[CONV] Mesaj güncelleme hatası: {e}", exc_info=True)
+            return False
+
+
 def delete_conversation(username: str, conv_id: str) -> bool:
     """
     Sohbeti ve mesajlarını siler.
@@ -330,6 +535,9 @@ def delete_conversation(username: str, conv_id: str) -> bool:
         try:
             session.delete(conv)  # Cascade ile mesajlar da silinir
             session.commit()
+            from app.memory.message_journal import message_journal
+
+            message_journal.forget_conversation(conv_id)
             logger.info(f"[CONV] Silindi: {conv_id}")
             return True
         except Exception as e:
@@ -372,12 +580,11 @@ def get_recent_context(username: str, conv_id: str, max_messages: int = 4) -> st
     Returns:
         str veya None: Son mesajlar formatlanmış string
     """
-    messages = load_messages(username, conv_id)
-    if not messages:
+    if not get_conversation(username, conv_id):
+        return None
+    recent = load_recent_messages(conv_id, max_messages)
+    if not recent:
         return None
-
-    # Son N mesajı al
-    recent = messages[-max_messages:] if len(messages) > max_messages else messages
 
     # Formatla
     lines = []
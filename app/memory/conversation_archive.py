@@ -3,7 +3,7 @@
 Conversation Archive - Blueprint v1 Section 8 Layer 4
 
 Geçmiş sohbet arama ve özet yönetimi:
-- Semantic search ile sohbet arşivi sorgulama
+- Tam metin indeksi (FTS5) ile sohbet arşivi sorgulama
 - Rolling summary (her 8 turn'da async güncelleme)
 - Tarih aralığı filtreleme
 - Gateway entegrasyonu için context generation
@@ -29,7 +29,7 @@ from datetime import datetime, timedelta
 from typing import Any
 from dataclasses import dataclass
 
-from sqlmodel import Session, select, col
+from sqlmodel import select, col
 
 logger = logging.getLogger("orchestrator.conversation_archive")
 
@@ -145,6 +145,7 @@ class ConversationArchive:
     # Search settings
     MAX_SEARCH_RESULTS = 10
     MIN_RELEVANCE_THRESHOLD = 0.3
+    FALLBACK_SCAN_LIMIT = 200  # FTS5 olmayan dialect'lerde skorlanan en fazla sohbet
     
     # ==========================================================================
     # SEMANTIC SEARCH
@@ -159,7 +160,11 @@ class ConversationArchive:
         limit: int | None = None
     ) -> list[ArchiveSearchResult]:
         """
-        Geçmiş sohbetlerde semantic search yapar.
+        Geçmiş sohbetlerde tam metin araması yapar.
+        
+        Tek sorgu: SQLite'ta FTS5 (bm25 + importance) sıralaması, tarih
+        aralığı ve LIMIT SQL içinde uygulanır. Sorguda arama terimi yoksa
+        ("geçen hafta ne konuştuk?") aralıktaki en güncel sohbetler döner.
         
         Args:
             user_id: Kullanıcı ID
@@ -170,8 +175,8 @@ class ConversationArchive:
         Returns:
             List[ArchiveSearchResult]: Sıralı arama sonuçları
         """
-        from app.core.database import get_session
-        from app.core.models import Conversation, ConversationSummary, Message
+        from app.core.database import get_async_session
+        from app.memory.archive_index import query_terms
         
         max_results = limit or cls.MAX_SEARCH_RESULTS
         
@@ -179,96 +184,147 @@ class ConversationArchive:
         if date_range is None:
             date_range = DateRangeDetector.detect(query)
         
+        terms = query_terms(query)
+        
         try:
-            with get_session() as session:
-                # Base query: kullanıcının sohbetleri + özetleri
-                conversations = await cls._get_user_conversations(
-                    session, user_id, date_range
-                )
-                
-                if not conversations:
-                    from app.config import get_settings
-                    settings = get_settings()
-                    if settings.DEBUG:
-                        logger.debug(f"[ARCHIVE] No conversations found for user {user_id}")
-                    return []
-                
-                # Özetlerle eşleştir ve skorla
-                results = []
-                for conv in conversations:
-                    # Summary al
-                    summary = session.get(ConversationSummary, conv.id)
-                    summary_text = summary.summary if summary else ""
-                    
-                    # Mesaj sayısını al
-                    msg_count = await cls._get_message_count(session, conv.id)
-                    
-                    # Relevance skorla
-                    relevance = cls._calculate_relevance(
-                        query, 
-                        conv.title or "", 
-                        summary_text,
-                        importance=summary.importance if summary else 1,
-                        entities=summary.entities if summary else []
-                    )
-                    
-                    if relevance >= cls.MIN_RELEVANCE_THRESHOLD:
-                        results.append(ArchiveSearchResult(
-                            conversation_id=conv.id,
-                            title=conv.title or "Untitled",
-                            summary=summary_text if summary_text else None,
-                            importance=summary.importance if summary else 1,
-                            entities=summary.entities if summary else [],
-                            relevance_score=relevance,
-                            created_at=conv.created_at,
-                            updated_at=conv.updated_at,
-                            message_count=msg_count,
-                        ))
-                
-                # Relevance'a göre sırala
-                results.sort(key=lambda x: x.relevance_score, reverse=True)
-                
-                logger.info(f"[ARCHIVE] Search: user={user_id}, results={len(results[:max_results])}")
-                return results[:max_results]
+            async with get_async_session() as session:
+                if not terms:
+                    results = await cls._recent_conversations(session, user_id, date_range, max_results)
+                elif session.bind.dialect.name == "sqlite":
+                    results = await cls._ranked_search(session, user_id, terms, date_range, max_results)
+                else:
+                    results = await cls._scan_search(session, user_id, terms, date_range, max_results)
+            
+            logger.info(f"[ARCHIVE] Search: user={user_id}, results={len(results)}")
+            return results
                 
         except Exception as e:
             logger.error(f"[ARCHIVE] Search error: {e}", exc_info=True)
             return []
     
     @classmethod
-    async def _get_user_conversations(
-        cls,
-        session: Session,
-        user_id: int,
-        date_range: tuple[datetime, datetime] | None
-    ) -> list:
-        """Kullanıcının sohbetlerini date range ile filtreler."""
-        from app.core.models import Conversation
-        
-        query = select(Conversation).where(Conversation.user_id == user_id)
+    def _archive_select(cls, user_id: int, date_range: tuple[datetime, datetime] | None):
+        """Sohbet + özet satırları (tek JOIN); tarih aralığı SQL'de."""
+        from sqlalchemy import select as sa_select
+        from app.core.models import Conversation, ConversationSummary
+        
+        stmt = (
+            sa_select(
+                col(Conversation.id).label("conversation_id"),
+                col(Conversation.title),
+                col(Conversation.created_at),
+                col(Conversation.updated_at),
+                col(Conversation.message_count),
+                col(ConversationSummary.summary),
+                col(ConversationSummary.importance),
+                col(ConversationSummary.entities),
+            )
+            .outerjoin(ConversationSummary, col(ConversationSummary.conversation_id) == col(Conversation.id))
+            .where(col(Conversation.user_id) == user_id)
+        )
         
         if date_range:
             start, end = date_range
-            query = query.where(
-                Conversation.updated_at >= start,
-                Conversation.updated_at <= end
-            )
-        
-        query = query.order_by(col(Conversation.updated_at).desc())
+            stmt = stmt.where(col(Conversation.updated_at) >= start, col(Conversation.updated_at) <= end)
         
-        return list(session.exec(query).all())
+        return stmt.order_by(col(Conversation.updated_at).desc())
     
     @classmethod
-    async def _get_message_count(cls, session: Session, conv_id: str) -> int:
-        """Sohbetteki mesaj sayısını döndürür."""
-        from app.core.models import Message
-        from sqlalchemy import func
-        
-        result = session.exec(
-            select(func.count()).where(Message.conversation_id == conv_id)
-        ).first()
+    async def _recent_conversations(
+        cls,
+        session: Any,
+        user_id: int,
+        date_range: tuple[datetime, datetime] | None,
+        limit: int
+    ) -> list[ArchiveSearchResult]:
+        """Terimsiz sorgu: aralıktaki en güncel sohbetler."""
+        rows = (await session.execute(cls._archive_select(user_id, date_range).limit(limit))).all()
+        return [cls._to_result(row, cls._calculate_relevance("", "", "")) for row in rows]
+    
+    @classmethod
+    async def _ranked_search(
+        cls,
+        session: Any,
+        user_id: int,
+        terms: list[str],
+        date_range: tuple[datetime, datetime] | None,
+        limit: int
+    ) -> list[ArchiveSearchResult]:
+        """SQLite FTS5: eşleşme, tarih filtresi, sıralama ve LIMIT tek sorguda."""
+        from sqlalchemy import JSON, bindparam, text
+        from app.core.models import Conversation
+        from app.memory.archive_index import ARCHIVE_FTS_TABLE, BM25_WEIGHTS, build_match
+        
+        date_type = Conversation.__table__.c.updated_at.type
+        date_clause = "AND c.updated_at >= :start AND c.updated_at <= :end" if date_range else ""
+        weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+        stmt = text(f"""
+            SELECT c.id AS conversation_id, c.title AS title, c.created_at AS created_at,
+                   c.updated_at AS updated_at, c.message_count AS message_count,
+                   s.summary AS summary, s.importance AS importance, s.entities AS entities
+            FROM {ARCHIVE_FTS_TABLE}
+            JOIN conversation_archive a ON a.id = {ARCHIVE_FTS_TABLE}.rowid
+            JOIN conversations c ON c.id = a.conversation_id
+            LEFT JOIN conversation_summaries s ON s.conversation_id = c.id
+            WHERE {ARCHIVE_FTS_TABLE} MATCH :match {date_clause}
+            ORDER BY bm25({ARCHIVE_FTS_TABLE}, {weights}) * (1.0 + COALESCE(s.importance, 1) * 0.025)
+            LIMIT :limit
+        """).columns(created_at=date_type, updated_at=date_type, entities=JSON)
+        
+        params: dict[str, Any] = {"match": build_match(user_id, terms), "limit": limit}
+        if date_range:
+            stmt = stmt.bindparams(bindparam("start", type_=date_type), bindparam("end", type_=date_type))
+            params["start"], params["end"] = date_range
         
-        return result or 0
+        rows = (await session.execute(stmt, params)).all()
+        query = " ".join(terms)
+        return [cls._to_result(row, cls._relevance_for(query, row)) for row in rows]
+    
+    @classmethod
+    async def _scan_search(
+        cls,
+        session: Any,
+        user_id: int,
+        terms: list[str],
+        date_range: tuple[datetime, datetime] | None,
+        limit: int
+    ) -> list[ArchiveSearchResult]:
+        """FTS5 olmayan dialect'ler: en güncel FALLBACK_SCAN_LIMIT sohbet tek sorguda, skor Python'da."""
+        rows = (await session.execute(cls._archive_select(user_id, date_range).limit(cls.FALLBACK_SCAN_LIMIT))).all()
+        query = " ".join(terms)
+        
+        results = []
+        for row in rows:
+            relevance = cls._relevance_for(query, row)
+            if relevance >= cls.MIN_RELEVANCE_THRESHOLD:
+                results.append(cls._to_result(row, relevance))
+        
+        results.sort(key=lambda x: x.relevance_score, reverse=True)
+        return results[:limit]
+    
+    @classmethod
+    def _relevance_for(cls, query: str, row: Any) -> float:
+        return cls._calculate_relevance(
+            query,
+            row.title or "",
+            row.summary or "",
+            importance=row.importance or 1,
+            entities=row.entities or []
+        )
+    
+    @classmethod
+    def _to_result(cls, row: Any, relevance: float) -> ArchiveSearchResult:
+        return ArchiveSearchResult(
+            conversation_id=row.conversation_id,
+            title=row.title or "Untitled",
+            summary=row.summary or None,
+            importance=row.importance or 1,
+            entities=row.entities or [],
+            relevance_score=relevance,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+            message_count=row.message_count or 0,
+        )
     
     @classmethod
     def _calculate_relevance(cls, query: str, title: str, summary: str, importance: int = 1, entities: list[str] = None) -> float:
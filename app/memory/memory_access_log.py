@@ -0,0 +1,249 @@
+"""
+Mami AI - Memory Access Log (Write-Behind)
+==========================================
+
+Hafıza erişimlerini (last_accessed) sohbet kritik yolundan çıkaran
+write-behind günlük.
+
+- record: senkron, I/O yok; erişim süreç içi tampona düşer ve aynı hafızaya
+  gelen erişimler birleştirilir (en yeni zaman kazanır)
+- flush: belirli aralıkla ya da tampon max_batch hafızaya ulaşınca (aralık
+  dolmadan) tampon
+    1. Redis sorted set'e eklenir (ZADD GT, member=memory_id, score=epoch):
+       worker'lar arası birleştirilmiş erişim verisi; set en yeni
+       REDIS_MAX_ENTRIES erişimle sınırlıdır (eskiler ZREMRANGEBYRANK ile düşer)
+    2. ChromaDB'ye tek update çağrısıyla yazılır; yalnızca last_accessed
+       anahtarı gönderilir (Chroma metadata'yı birleştirir)
+- last_accessed_many: tampon + Redis'teki en yeni erişim zamanları
+  (ImportanceDecay bunu okur)
+- Hata: Chroma yazımı başarısızsa tampon yeni erişimlerle birleştirilip
+  sonraki turda tekrar denenir
+- Shutdown: close() kalan erişimleri yazar (app lifespan)
+
+Kullanım:
+    from app.memory.memory_access_log import memory_access_log
+
+    memory_access_log.record(["mem-1", "mem-2"])
+    times = await memory_access_log.last_accessed_many(["mem-1"])
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = "memory:last_access"
+# Sorted set'te tutulan en fazla hafıza (en eski erişimler düşer; Chroma'da kalıcıdır)
+REDIS_MAX_ENTRIES = 100_000
+
+# writer({memory_id: epoch}) -> None
+AccessWriter = Callable[[dict[str, float]], Awaitable[None]]
+
+
+def to_datetime(ts: float) -> datetime:
+    """Epoch → naive UTC datetime (hafıza metadata'sındaki biçim)."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+
+
+class MemoryAccessLog:
+    """last_accessed güncellemeleri için birleştiren tampon + toplu yazıcı."""
+
+    def __init__(
+        self,
+        flush_interval_s: float | None = None,
+        max_batch: int | None = None,
+        writer: AccessWriter | None = None,
+        use_redis: bool = True,
+    ):
+        if flush_interval_s is None or max_batch is None:
+            try:
+                from app.config import get_settings
+
+                settings = get_settings()
+                flush_interval_s = settings.MEMORY_ACCESS_FLUSH_SECONDS if flush_interval_s is None else flush_interval_s
+                max_batch = settings.MEMORY_ACCESS_MAX_BATCH if max_batch is None else max_batch
+            except Exception as e:
+                logger.warning(f"[ACCESS_LOG] Settings unavailable, using defaults: {e}")
+        self.flush_interval = 30.0 if flush_interval_s is None else flush_interval_s
+        self.max_batch = max(1, max_batch or 500)
+        self.use_redis = use_redis
+        self._writer = writer or _write_chroma
+
+        self._pending: dict[str, float] = {}
+        self._inflight: dict[str, float] = {}
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        # Aralığı beklemeden flush: tampon doldu ya da shutdown
+        self._flush_now: asyncio.Event | None = None
+        self._flush_lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def record(self, memory_ids: Iterable[str], ts: float | None = None) -> None:
+        """Erişimi tampona ekler (beklemez, I/O yapmaz)."""
+        ts = time.time() if ts is None else ts
+        for memory_id in memory_ids:
+            if not memory_id:
+                continue
+            if ts > self._pending.get(memory_id, 0.0):
+                self._pending[memory_id] = ts
+        try:
+            self._ensure_started()
+        except RuntimeError:
+            return  # Event loop yok: bir sonraki flush/close yazar
+        self._signal()
+        if len(self._pending) >= self.max_batch:
+            self._flush_now.set()
+
+    async def last_accessed_many(self, memory_ids: Iterable[str]) -> dict[str, datetime]:
+        """Tampon ve Redis'teki en yeni erişim zamanları (bilinmeyenler dönmez)."""
+        ids = [m for m in dict.fromkeys(memory_ids) if m]
+        latest: dict[str, float] = {}
+        for source in (self._inflight, self._pending):
+            for memory_id in ids:
+                ts = source.get(memory_id)
+                if ts is not None and ts > latest.get(memory_id, 0.0):
+                    latest[memory_id] = ts
+
+        client = await self._get_redis() if ids else None
+        if client is not None:
+            try:
+                scores = await client.zmscore(REDIS_KEY, ids)
+                for memory_id, score in zip(ids, scores, strict=True):
+                    if score is not None and float(score) > latest.get(memory_id, 0.0):
+                        latest[memory_id] = float(score)
+            except Exception as e:
+                logger.debug(f"[ACCESS_LOG] Redis read failed: {e}")
+
+        return {memory_id: to_datetime(ts) for memory_id, ts in latest.items()}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> None:
+        """Bekleyen tüm erişimleri yazar."""
+        self._ensure_loop_state()
+        async with self._flush_lock:
+            while self._pending:
+                if not await self._flush_batch():
+                    break
+
+    async def close(self) -> None:
+        """Kalan erişimleri yazar ve flusher'ı durdurur (app shutdown)."""
+        self._closed = True
+        if self._task is not None and not self._task.done():
+            self._flush_now.set()
+            self._signal()
+            await self._task
+        self._task = None
+        if self._pending:
+            await self.flush()
+        logger.info("[ACCESS_LOG] Closed")
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _ensure_loop_state(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Yeni event loop (testler, reload): loop'a bağlı nesneleri yeniden kur
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._flush_now = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = None
+
+    def _ensure_started(self) -> None:
+        self._ensure_loop_state()
+        if not self._closed and (self._task is None or self._task.done()):
+            self._task = self._loop.create_task(self._run())
+
+    def _signal(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        failed = False
+        while not self._closed:
+            await self._wakeup.wait()
+            if failed or self.pending < self.max_batch:
+                # Aralık kadar biriktir (tampon dolarsa ya da shutdown'da beklemeden)
+                try:
+                    await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            async with self._flush_lock:
+                failed = bool(self._pending) and not await self._flush_batch()
+                if not self._pending:
+                    self._wakeup.clear()
+                if (failed or self.pending < self.max_batch) and not self._closed:
+                    self._flush_now.clear()
+
+    async def _flush_batch(self) -> bool:
+        from app.core.metrics import memory_access_flush_failures_counter, memory_access_flush_histogram
+
+        keys = list(self._pending)[: self.max_batch]
+        batch = {memory_id: self._pending.pop(memory_id) for memory_id in keys}
+        self._inflight = batch
+        try:
+            await self._append_redis(batch)
+            await self._writer(batch)
+        except Exception as e:
+            memory_access_flush_failures_counter.inc()
+            logger.error(f"[ACCESS_LOG] Flush failed ({len(batch)} memories): {e}")
+            # Yeni erişimlerle birleştirip geri koy (en yeni zaman kazanır)
+            for memory_id, ts in batch.items():
+                if ts > self._pending.get(memory_id, 0.0):
+                    self._pending[memory_id] = ts
+            return False
+        finally:
+            self._inflight = {}
+        memory_access_flush_histogram.observe(len(batch))
+        return True
+
+    async def _get_redis(self):
+        if not self.use_redis:
+            return None
+        try:
+            from app.core.redis_client import get_redis
+
+            return await get_redis()
+        except Exception:
+            return None
+
+    async def _append_redis(self, batch: dict[str, float]) -> None:
+        client = await self._get_redis()
+        if client is None:
+            return
+        try:
+            await client.zadd(REDIS_KEY, batch, gt=True)
+            # En yeni REDIS_MAX_ENTRIES erişim kalır (skor = epoch, düşük rank = eski)
+            await client.zremrangebyrank(REDIS_KEY, 0, -(REDIS_MAX_ENTRIES + 1))
+        except Exception as e:
+            logger.warning(f"[ACCESS_LOG] Redis append failed: {e}")
+
+
+async def _write_chroma(batch: dict[str, float]) -> None:
+    """Varsayılan writer: tek ChromaDB update (yalnızca last_accessed anahtarı)."""
+    from app.services.memory_service import MemoryService
+
+    collection = MemoryService._get_collection()
+    ids = list(batch)
+    metadatas = [{"last_accessed": to_datetime(batch[memory_id]).isoformat()} for memory_id in ids]
+    await asyncio.to_thread(collection.update, ids=ids, metadatas=metadatas)
+
+
+# Singleton
+memory_access_log = MemoryAccessLog()
@@ -0,0 +1,426 @@
+"""
+Mami AI - Message Journal (Write-Behind)
+========================================
+
+Sohbet mesajı yazımlarını toplayıp birkaç milisaniyede bir (ya da N kayıtta)
+tek transaction'da veritabanına yazan write-behind katmanı.
+
+- append: kayıt kuyruğa girer, çağıran flush'ı bekler ve ID'li Message alır
+  (group commit: eşzamanlı tüm append'ler tek commit paylaşır)
+- update: beklenmez; aynı mesaja gelen güncellemeler birleştirilir
+  (içerik: son yazan kazanır, metadata: sırayla merge)
+- Hata izolasyonu: toplu commit başarısız olursa batch sohbet bazında ayrı
+  transaction'larla yeniden yazılır; yalnızca hatalı sohbetin append'leri
+  hata alır, diğer kullanıcıların yazımları etkilenmez
+- Sıra: append'ler geliş sırasıyla yazılır → sohbet içi sıra korunur
+- Sahiplik: (username, conv_id) çifti batch başına tek sorguyla doğrulanır
+  ve önbelleğe alınır; her yazımda Conversation yeniden okunmaz
+- Read-your-writes: henüz yazılmamış güncellemeler overlay() ile okunan
+  mesajlara uygulanır
+- Shutdown: close() kalan kayıtları yazar (app lifespan)
+
+Kullanım:
+    from app.memory.message_journal import message_journal
+
+    msg = await message_journal.append("john", conv_id, "bot", "", {"status": "streaming"})
+    message_journal.update(msg.id, None, {"status": "complete"})
+
+Not: Mesaj ID'leri veritabanı autoincrement'inden geldiği için append zaten
+bir DB round trip'i beklemek zorunda; tampon bu nedenle süreç içidir (Redis
+kuyruğu bu beklemeyi kaldırmazdı).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+OWNERSHIP_CACHE_SIZE = 4096
+MAX_UPDATE_RETRIES = 3
+
+
+@dataclass
+class PendingAppend:
+    username: str
+    conv_id: str
+    role: str
+    text: str
+    extra_metadata: dict[str, Any]
+    created_at: datetime
+    future: asyncio.Future = field(repr=False)
+
+
+@dataclass
+class PendingUpdate:
+    content: str | None = None
+    metadata: dict[str, Any] | None = None
+    retries: int = 0
+
+    def merge(self, content: str | None, metadata: dict[str, Any] | None) -> None:
+        if content is not None:
+            self.content = content
+        if metadata is not None:
+            self.metadata = {**(self.metadata or {}), **metadata}
+
+    def apply(self, msg: Any) -> None:
+        if self.content is not None:
+            msg.content = self.content
+        if self.metadata is not None:
+            msg.extra_metadata = {**(msg.extra_metadata or {}), **self.metadata}
+
+
+# writer(appends, updates, owned) -> her append için Message ya da Exception
+BatchWriter = Callable[
+    [list[PendingAppend], dict[int, PendingUpdate], "MessageJournal"], Awaitable[list[Any]]
+]
+
+
+class MessageJournal:
+    """Sohbet mesajları için write-behind tampon + toplu yazıcı."""
+
+    def __init__(
+        self,
+        flush_interval_ms: float | None = None,
+        max_batch: int | None = None,
+        writer: BatchWriter | None = None,
+    ):
+        if flush_interval_ms is None or max_batch is None:
+            try:
+                from app.config import get_settings
+
+                settings = get_settings()
+                flush_interval_ms = settings.MESSAGE_JOURNAL_FLUSH_MS if flush_interval_ms is None else flush_interval_ms
+                max_batch = settings.MESSAGE_JOURNAL_MAX_BATCH if max_batch is None else max_batch
+            except Exception as e:
+                logger.warning(f"[JOURNAL] Settings unavailable, using defaults: {e}")
+        self.flush_interval = (5 if flush_interval_ms is None else flush_interval_ms) / 1000
+        self.max_batch = max(1, max_batch or 100)
+        self._writer = writer or _write_batch_sql
+
+        self._appends: list[PendingAppend] = []
+        self._updates: dict[int, PendingUpdate] = {}
+        self._inflight_updates: dict[int, PendingUpdate] = {}
+        self._owned: OrderedDict[tuple[str, str], bool] = OrderedDict()
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._stop: asyncio.Event | None = None
+        self._flush_lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def append(
+        self,
+        username: str,
+        conv_id: str,
+        role: str,
+        text: str,
+        extra_metadata: dict[str, Any] | None = None,
+        images: list[str] | None = None,
+    ):
+        """Mesajı kuyruğa ekler; bir sonraki toplu commit'ten sonra ID'li Message döner."""
+        self._ensure_started()
+        meta = extra_metadata or {}
+        if images:
+            meta["images"] = images
+        future = self._loop.create_future()
+        self._appends.append(PendingAppend(username, conv_id, role, text, meta, datetime.utcnow(), future))
+        self._signal()
+        if self._closed:
+            await self.flush()
+        return await future
+
+    def update(self, message_id: int, new_content: str | None = None, new_metadata: dict[str, Any] | None = None) -> None:
+        """Güncellemeyi kuyruğa ekler (beklemez); aynı mesajın bekleyen güncellemesiyle birleşir."""
+        try:
+            self._ensure_started()
+        except RuntimeError:
+            # Event loop yok (sync bağlam, worker thread): doğrudan yaz
+            from app.memory.conversation import update_message
+
+            update_message(message_id, new_content, new_metadata)
+            return
+        pending = self._updates.get(message_id)
+        if pending is None:
+            pending = self._updates[message_id] = PendingUpdate()
+        pending.merge(new_content, new_metadata)
+        self._signal()
+
+    def overlay(self, messages: Iterable[Any]) -> None:
+        """Henüz yazılmamış güncellemeleri okunan mesajlara uygular (read-your-writes)."""
+        if not self._updates and not self._inflight_updates:
+            return
+        for msg in messages:
+            for source in (self._inflight_updates, self._updates):
+                pending = source.get(msg.id)
+                if pending is not None:
+                    pending.apply(msg)
+
+    @property
+    def pending(self) -> int:
+        return len(self._appends) + len(self._updates)
+
+    async def flush(self) -> None:
+        """Bekleyen tüm kayıtları yazar (sıra korunur)."""
+        self._ensure_loop_state()
+        async with self._flush_lock:
+            while self._appends or self._updates:
+                await self._flush_batch()
+
+    async def close(self) -> None:
+        """Kalan kayıtları yazar ve flusher'ı durdurur (app shutdown)."""
+        self._closed = True
+        if self._task is not None and not self._task.done():
+            # Flusher iptal edilmez (yazım ortasında kayıt kaybolur): uyandırılır,
+            # elindeki batch'i bitirip çıkar
+            self._stop.set()
+            self._signal()
+            await self._task
+        self._task = None
+        if self._appends or self._updates:
+            await self.flush()
+        logger.info("[JOURNAL] Closed")
+
+    # ------------------------------------------------------------------
+    # Ownership cache (writer kullanır)
+    # ------------------------------------------------------------------
+
+    def is_owned(self, username: str, conv_id: str) -> bool | None:
+        """Önbellekteki sahiplik sonucu (bilinmiyorsa None)."""
+        result = self._owned.get((username, conv_id))
+        if result is not None:
+            self._owned.move_to_end((username, conv_id))
+        return result
+
+    def remember_ownership(self, username: str, conv_id: str, owned: bool) -> None:
+        # Yalnızca olumlu sonuçlar önbelleğe alınır (sohbet sonradan oluşturulabilir)
+        if not owned:
+            return
+        self._owned[(username, conv_id)] = True
+        self._owned.move_to_end((username, conv_id))
+        while len(self._owned) > OWNERSHIP_CACHE_SIZE:
+            self._owned.popitem(last=False)
+
+    def forget_conversation(self, conv_id: str) -> None:
+        """Sohbet silindiğinde sahiplik önbelleğinden çıkarır."""
+        for key in [k for k in self._owned if k[1] == conv_id]:
+            del self._owned[key]
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _ensure_loop_state(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            previous = self._loop
+            if previous is not None and not previous.is_closed() and self._task is not None and not self._task.done():
+                # Flusher hâlâ başka bir loop'ta çalışıyor: sessizce ikinci bir kuyruk başlatma
+                raise RuntimeError("MessageJournal is bound to another running event loop")
+            if self.pending:
+                # Kuyruktaki kayıtlar yeni loop'un flusher'ı ile yazılmak üzere korunur
+                logger.warning(f"[JOURNAL] Event loop changed with {self.pending} queued writes, carrying them over")
+            # Yeni event loop (testler, reload): loop'a bağlı nesneleri yeniden kur
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._stop = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = None
+        elif self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+    def _ensure_started(self) -> None:
+        self._ensure_loop_state()
+        if not self._closed and (self._task is None or self._task.done()):
+            self._task = self._loop.create_task(self._run())
+
+    def _signal(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self._closed:
+            await self._wakeup.wait()
+            if self.pending < self.max_batch:
+                # Aralık kadar biriktir (shutdown beklemeyi keser)
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            async with self._flush_lock:
+                if self._appends or self._updates:
+                    await self._flush_batch()
+                if not self._appends and not self._updates:
+                    self._wakeup.clear()
+
+    async def _flush_batch(self) -> None:
+        from app.core.metrics import message_journal_batch_histogram, message_journal_failures_counter
+
+        appends = self._appends[: self.max_batch]
+        del self._appends[: len(appends)]
+        updates, self._updates = self._updates, {}
+        self._inflight_updates = updates
+
+        try:
+            results = await self._writer(appends, updates, self)
+        except Exception as e:
+            message_journal_failures_counter.inc()
+            logger.error(f"[JOURNAL] Batch write failed: {e}", exc_info=True)
+            for item in appends:
+                if not item.future.done() and not item.future.get_loop().is_closed():
+                    item.future.set_exception(e)
+            self._requeue_updates(updates)
+            return
+        finally:
+            self._inflight_updates = {}
+
+        for item, result in zip(appends, results, strict=True):
+            if item.future.done() or item.future.get_loop().is_closed():
+                continue
+            if isinstance(result, Exception):
+                item.future.set_exception(result)
+            else:
+                item.future.set_result(result)
+        if appends:
+            message_journal_batch_histogram.labels(op="append").observe(len(appends))
+        if updates:
+            message_journal_batch_histogram.labels(op="update").observe(len(updates))
+
+    def _requeue_updates(self, updates: dict[int, PendingUpdate]) -> None:
+        """Başarısız güncellemeleri yeni gelenlerin önüne koyar (sınırlı deneme)."""
+        for message_id, failed in updates.items():
+            if failed.retries + 1 >= MAX_UPDATE_RETRIES:
+                logger.error(f"[JOURNAL] Dropping update for message {message_id} after {MAX_UPDATE_RETRIES} attempts")
+                continue
+            newer = self._updates.get(message_id)
+            failed.retries += 1
+            if newer is not None:
+                failed.merge(newer.content, newer.metadata)
+            self._updates[message_id] = failed
+
+
+async def _write_batch_sql(
+    appends: list[PendingAppend], updates: dict[int, PendingUpdate], journal: MessageJournal
+) -> list[Any]:
+    """
+    Varsayılan writer: tek async transaction (sahiplik + insert + updated_at + update).
+
+    Toplu commit başarısız olursa (ör. sohbet silinmiş ama sahiplik önbelleği
+    hâlâ geçerli → FK ihlali) kayıtlar sohbet bazında ayrı transaction'larla
+    yeniden yazılır: hatalı sohbetin append'leri hatayla döner ve sahipliği
+    önbellekten düşer, güncellemeler ayrı denenir, gerekirse yeniden kuyruklanır.
+    """
+    from app.core.metrics import message_journal_failures_counter
+
+    results: list[Any] = [None] * len(appends)
+    groups: dict[str, list[int]] = {}
+    for i, item in enumerate(appends):
+        groups.setdefault(item.conv_id, []).append(i)
+    try:
+        await _commit_batch(appends, list(range(len(appends))), updates, journal, results)
+        return results
+    except Exception as e:
+        if len(groups) + (1 if updates else 0) <= 1:
+            raise  # Ayrıştırılacak bir şey yok: _flush_batch hata yolunu işler
+        logger.warning(f"[JOURNAL] Batch commit failed, retrying per conversation: {e}")
+
+    for conv_id, indexes in groups.items():
+        try:
+            await _commit_batch(appends, indexes, {}, journal, results)
+        except Exception as e:
+            message_journal_failures_counter.inc()
+            logger.error(f"[JOURNAL] Dropping {len(indexes)} message(s) of conversation {conv_id}: {e}", exc_info=True)
+            journal.forget_conversation(conv_id)
+            for i in indexes:
+                results[i] = e
+    if updates:
+        try:
+            await _commit_batch(appends, [], updates, journal, results)
+        except Exception as e:
+            message_journal_failures_counter.inc()
+            logger.error(f"[JOURNAL] Update batch failed: {e}", exc_info=True)
+            journal._requeue_updates(updates)
+    return results
+
+
+async def _commit_batch(
+    appends: list[PendingAppend],
+    indexes: list[int],
+    updates: dict[int, PendingUpdate],
+    journal: MessageJournal,
+    results: list[Any],
+) -> None:
+    """appends[indexes] ve updates'i tek transaction'da yazar; sonuçlar results'a işlenir."""
+    from sqlalchemy import update
+    from sqlmodel import col, select
+
+    from app.core.database import get_async_session
+    from app.core.models import Conversation, Message, User
+
+    selected = [(i, appends[i]) for i in indexes]
+    async with get_async_session() as session:
+        unknown = {(a.username, a.conv_id) for _, a in selected if journal.is_owned(a.username, a.conv_id) is None}
+        if unknown:
+            rows = await session.exec(
+                select(Conversation.id, User.username)
+                .join(User, col(User.id) == col(Conversation.user_id))
+                .where(col(Conversation.id).in_({conv_id for _, conv_id in unknown}))
+            )
+            owners = {(username, conv_id) for conv_id, username in rows.all()}
+            for key in unknown:
+                journal.remember_ownership(*key, key in owners)
+
+        new_messages: list[tuple[int, Any]] = []
+        touched: dict[str, datetime] = {}
+        added: dict[str, int] = {}
+        for i, item in selected:
+            if not journal.is_owned(item.username, item.conv_id):
+                results[i] = ValueError(f"Sohbet bulunamadı veya yetki yok: {item.conv_id}")
+                continue
+            msg = Message(
+                conversation_id=item.conv_id,
+                role=item.role,
+                content=item.text,
+                extra_metadata=item.extra_metadata,
+                created_at=item.created_at,
+            )
+            session.add(msg)
+            new_messages.append((i, msg))
+            touched[item.conv_id] = item.created_at
+            added[item.conv_id] = added.get(item.conv_id, 0) + 1
+
+        for conv_id, ts in touched.items():
+            await session.execute(
+                update(Conversation)
+                .where(col(Conversation.id) == conv_id)
+                .values(updated_at=ts, message_count=col(Conversation.message_count) + added[conv_id])
+            )
+
+        if updates:
+            existing = await session.exec(select(Message).where(col(Message.id).in_(list(updates))))
+            found = set()
+            for msg in existing.all():
+                updates[msg.id].apply(msg)
+                session.add(msg)
+                found.add(msg.id)
+            for missing in set(updates) - found:
+                logger.warning(f"[JOURNAL] Mesaj bulunamadı: {missing}")
+
+        await session.commit()
+        for i, msg in new_messages:
+            results[i] = msg
+
+
+# Singleton
+message_journal = MessageJournal()
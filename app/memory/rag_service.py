@@ -21,6 +21,7 @@ Kullanım:
     rag_service.delete_document_by_filename(filename, owner)
 """
 
+import asyncio
 import logging
 from pathlib import Path
 from typing import Any, Literal, List, Dict
@@ -83,6 +84,45 @@ class RagService:
                 logger.error(f"[RAG_SERVICE] File read error: {e}", exc_info=True)
                 return 0
 
+    async def add_file_async(
+        self,
+        file_path: str | Path,
+        filename: str,
+        owner: str,
+        scope: Scope = "user",
+        conversation_id: str | None = None,
+        upload_id: str | None = None,
+        notify_username: str | None = None,
+    ) -> int:
+        """
+        add_file'in event loop'u bloklamayan sürümü.
+
+        PDF'ler aşamalı ingestion hattından geçer (paralel çıkarım, toplu yazma,
+        upload_id bazlı devam); ilerleme notify_username'e WebSocket ile bildirilir.
+        """
+        path = Path(file_path)
+        if not path.exists():
+            logger.error(f"[RAG_SERVICE] File not found: {path}", exc_info=False)
+            return 0
+
+        if filename.lower().endswith(".pdf"):
+            from app.memory import rag_v2_ingest
+
+            try:
+                return await rag_v2_ingest.ingest_pdf_async(
+                    file_path=path,
+                    filename=filename,
+                    owner=owner,
+                    scope=scope,
+                    upload_id=upload_id,
+                    notify_username=notify_username,
+                )
+            except Exception as e:
+                logger.error(f"[RAG_SERVICE] PDF ingestion failed: {type(e).__name__}: {e}", exc_info=True)
+                return 0
+
+        return await asyncio.to_thread(self.add_file, path, filename, owner, scope, conversation_id)
+
     # =========================================================================
     # ARAMA (RETRIEVAL)
     # =========================================================================
@@ -199,9 +239,13 @@ class RagService:
         """Upload ID'ye göre tüm chunk'ları siler."""
         return rag_v2.delete_by_upload_id(upload_id, owner)
 
-    def list_user_documents(self, owner: str) -> list[dict[str, Any]]:
-        """Kullanıcının belgelerini listeler."""
-        return rag_v2.list_documents(owner=owner)
+    def list_user_documents(self, owner: str, limit: int = 50, offset: int = 0) -> list[dict[str, Any]]:
+        """Kullanıcının belgelerini listeler (sayfalı, en yeni önce)."""
+        return rag_v2.list_documents(owner=owner, limit=limit, offset=offset)
+
+    def count_user_documents(self, owner: str) -> int:
+        """Kullanıcının toplam belge sayısı."""
+        return rag_v2.count_documents(owner)
 
     async def get_shadow_context(self, query: str, owner: str) -> str:
         """
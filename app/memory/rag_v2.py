@@ -7,12 +7,15 @@ Stores chunks in 'rag_v2_chunks' collection with multilingual embeddings.
 Features: Semantic chunking, metadata extraction, query expansion support.
 """
 
+import asyncio
 import logging
 import re
 import sys
+import threading
 import uuid
 import time
 import json
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Literal, List, Dict
@@ -38,6 +41,7 @@ DEFAULT_CHUNK_OVERLAP = 200
 
 # Multilingual embedding model
 EMBEDDING_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+EMBEDDING_DIMENSION = 384
 _embedding_function = None
 
 
@@ -184,13 +188,19 @@ def add_document_pages_from_pdf(
     conversation_id: str | None = None,
     upload_id: str | None = None,
     fail_open: bool = True,
+    progress_callback=None,
 ) -> int:
     """
-    Ingest a PDF file page-by-page.
+    Ingest a PDF file through the staged pipeline (see rag_v2_ingest).
+
+    Pages are extracted in a process pool, chunks are batched across pages
+    and written to Chroma/FTS in large transactions with a per-upload checkpoint.
 
     Args:
         upload_id: Optional unique ID for this upload batch. Generated if None.
+            Re-using the ID of an interrupted upload resumes from its last checkpoint.
         fail_open: If True, returns 0 on error instead of raising.
+        progress_callback: Optional callable(pages_done, total_pages, chunks_added).
 
     Returns:
         int: Total chunks added.
@@ -200,89 +210,16 @@ def add_document_pages_from_pdf(
         return 0
 
     try:
-        collection = _get_rag_v2_collection()
-        safe_filename = _sanitize_filename(filename)
-        now = datetime.utcnow().isoformat()
-
-        # Generate upload_id if not provided to ensure uniqueness across uploads of same file
-        if not upload_id:
-            upload_id = str(uuid.uuid4())
-
-        total_chunks_added = 0
-
-        with open(file_path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            len(reader.pages)
-
-            for page_idx, page in enumerate(reader.pages):
-                page_num = page_idx + 1
-                text = page.extract_text() or ""
-                # Kısmi temizlik
-                text = text.strip()
-
-                # Debug logging (sadece DEBUG modunda)
-                from app.config import get_settings
-                settings = get_settings()
-                if settings.DEBUG:
-                    logger.debug(f"[RAG v2] Page {page_num}: Extracted {len(text)} chars.")
-
-                if len(text) < 10:  # Çok kısa sayfaları atla
-                    if settings.DEBUG:
-                        logger.debug(f"[RAG v2] Page {page_num} skipped (<10 chars).")
-                    continue
-
-                # NEW: Semantic Chunking
-                # Returns list of (chunk_text, extracted_meta)
-                chunks_data = semantic_chunk_text(text)
-                if settings.DEBUG:
-                    logger.debug(
-                        f"[RAG v2] Page {page_num}: Generated {len(chunks_data) if chunks_data else 0} semantic chunks."
-                    )
-
-                if not chunks_data:
-                    continue
-
-                ids = []
-                documents = []
-                metadatas = []
-
-                for chunk_idx, (chunk_text, extracted_meta) in enumerate(chunks_data):
-                    # Deterministic ID
-                    # owner:safe_filename:upload_id:pX:cY
-                    doc_id = f"{owner}:{safe_filename}:{upload_id}:p{page_num}:c{chunk_idx}"
-
-                    # Merge metadata
-                    meta = {
-                        "scope": scope,
-                        "owner": owner,
-                        "source": "upload_v2",
-                        "filename": filename,
-                        "upload_id": upload_id,
-                        "page_number": page_num,
-                        "chunk_index": chunk_idx,
-                        "ingest_date": now,
-                        **extracted_meta
-                    }
-
-                    ids.append(doc_id)
-                    documents.append(chunk_text)
-                    metadatas.append(meta)
-
-                if documents:
-                    # Batch add to Chroma
-                    collection.add(ids=ids, documents=documents, metadatas=metadatas)
-
-                    # Add to FTS (Lexical)
-                    try:
-                        from app.memory.rag_v2_lexical import add_chunks_to_fts
-
-                        add_chunks_to_fts(ids, documents, metadatas)
-                    except Exception as e:
-                        logger.warning(f"[RAG v2] FTS add failed: {e}", exc_info=True)
-
-                    total_chunks_added += len(documents)
-                    logger.info(f"[RAG v2] Processing {filename} Page {page_num}: {len(documents)} chunks added.")
-            return total_chunks_added
+        from app.memory import rag_v2_ingest
+
+        return rag_v2_ingest.ingest_pdf(
+            file_path=file_path,
+            filename=filename,
+            owner=owner,
+            scope=scope,
+            upload_id=upload_id,
+            progress_callback=progress_callback,
+        )
 
     except Exception as e:
         # Error logging with traceback (exc_info=True)
@@ -296,8 +233,8 @@ async def _rerank_with_llm(query: str, results: List[Dict]) -> List[Dict]:
     """LLM kullanarak bulunan sonuçları anlamsal olarak yeniden puanlar."""
     if not results: return []
     
-    from app.providers.llm.groq import GroqProvider
-    provider = GroqProvider()
+    from app.providers.llm.registry import get_provider
+    provider = get_provider("groq")
     
     # Sadece ilk 15 sonucu rerank et (Performans/Maliyet)
     to_rerank = results[:15]
@@ -323,16 +260,13 @@ async def _rerank_with_llm(query: str, results: List[Dict]) -> List[Dict]:
         match = re.search(r"\[.*\]", response, re.DOTALL)
         if match:
             new_order_ids = json.loads(match.group(0))
-            reranked = []
-            for idx in new_order_ids:
-                if isinstance(idx, int) and idx < len(to_rerank):
-                    reranked.append(to_rerank[idx])
-            # Geri kalanları ekle
-            seen_texts = {r['text'] for r in reranked}
-            for r in results:
-                if r['text'] not in seen_texts:
-                    reranked.append(r)
-            return reranked
+            # Adaylar kopyalanmaz: sadece konum sırası yeniden kurulur
+            order = list(dict.fromkeys(
+                idx for idx in new_order_ids if isinstance(idx, int) and 0 <= idx < len(to_rerank)
+            ))
+            seen = set(order)
+            order.extend(i for i in range(len(results)) if i not in seen)
+            return [results[i] for i in order]
     except Exception as e:
         logger.warning(f"[RAG Reranker] LLM Reranking failed: {e}", exc_info=True)
     return results
@@ -362,8 +296,8 @@ async def _generate_page_summary(
         return None
     
     try:
-        from app.providers.llm.groq import GroqProvider
-        provider = GroqProvider()
+        from app.providers.llm.registry import get_provider
+        provider = get_provider("groq")
         
         # Truncate to first 2000 chars for cost control
         # 2000 chars ≈ 400 tokens
@@ -479,11 +413,15 @@ def add_txt_document(
         if ids:
             collection.add(ids=ids, documents=documents, metadatas=metadatas)
             try:
-                from app.memory.rag_v2_lexical import upsert_chunk
-                for idx, chunk in enumerate(documents):
-                    upsert_chunk(owner=owner, scope=scope, filename=filename, upload_id=upload_id, page_number=1, chunk_index=idx, content=chunk)
+                from app.memory.rag_v2_lexical import add_chunks_to_fts
+                add_chunks_to_fts(ids, documents, metadatas)
             except Exception as fts_err:
                 logger.warning(f"[RAG v2] FTS indexing failed: {fts_err}", exc_info=True)
+            from app.memory import rag_v2_docs
+
+            rag_v2_docs.upsert_document(
+                owner, upload_id, filename, 1, len(ids), len(text.encode("utf-8")), scope=str(scope), created_at=now
+            )
             return len(ids)
         return 0
     except Exception as e:
@@ -491,6 +429,159 @@ def add_txt_document(
         return 0
 
 
+LEXICAL_RRF_WEIGHT = 1.5
+
+
+def _expand_top_hits(owner: str, scope: str, candidates: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    hybrid_score eşiğin altındaki ilk NEIGHBOR_EXPANSION_TOP_N adayın komşularını
+    her adayın hemen arkasına ekler (zaten listede olan chunk'lar atlanır).
+    """
+    strong = [
+        i for i, c in enumerate(candidates[:NEIGHBOR_EXPANSION_TOP_N])
+        if c.get("hybrid_score", 1.0) < NEIGHBOR_EXPANSION_MAX_HYBRID
+    ]
+    if not strong:
+        return candidates
+
+    neighbor_lists = expand_neighbors_batch(owner, scope, [candidates[i] for i in strong], radius=1)
+    seen_keys = {(c.get("upload_id"), c.get("page_number"), c.get("chunk_index")) for c in candidates}
+    inserts: dict[int, list[dict[str, Any]]] = {}
+    for i, neighbors in zip(strong, neighbor_lists, strict=True):
+        best = candidates[i]
+        new_context = []
+        for n in neighbors:
+            n_key = (n.get("upload_id"), n.get("page_number"), n.get("chunk_index"))
+            if n_key not in seen_keys:
+                seen_keys.add(n_key)
+                n["score_type"] = "neighbor"
+                n["hybrid_score"] = best.get("hybrid_score", 0.0) + 0.01  # Slightly lower priority
+                new_context.append(n)
+        if new_context:
+            inserts[i] = new_context
+            logger.info(f"[RAG v2.5] Context Expanded: Added {len(new_context)} neighbors for {best.get('filename')}")
+
+    if not inserts:
+        return candidates
+    expanded = []
+    for i, cand in enumerate(candidates):
+        expanded.append(cand)
+        expanded.extend(inserts.get(i, ()))
+    return expanded
+
+
+def _fuse_hybrid(dense: list[dict[str, Any]], lexical: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Dense + lexical sonuçlarını RRF ile birleştirir (rag_v2_ranking çekirdeği).
+
+    Dense aday dict'leri yerinde güncellenir; yalnızca lexical'e özgü adaylar
+    için yeni dict üretilir.
+    """
+    from app.memory.rag_v2_ranking import RankedList, chunk_key, rrf_fuse
+
+    fused = rrf_fuse([
+        RankedList.from_items("dense", dense, key=chunk_key, score="score"),
+        RankedList.from_items("lexical", lexical, key=chunk_key, score="bm25_score", weight=LEXICAL_RRF_WEIGHT),
+    ])
+    dense_pos, lexical_pos = (pos.tolist() for pos in fused.positions)
+
+    merged: list[dict[str, Any]] = []
+    append = merged.append
+    for d_pos, l_pos, rrf_score, hybrid_score in zip(
+        dense_pos, lexical_pos, fused.rrf.tolist(), fused.hybrid.tolist(), strict=True
+    ):
+        if d_pos >= 0:
+            cand = dense[d_pos]
+        else:
+            lex = lexical[l_pos]
+            cand = {
+                "text": lex["text"],
+                "filename": lex["filename"],
+                "page_number": lex["page_number"],
+                "chunk_index": lex["chunk_index"],
+                "upload_id": lex["upload_id"],
+                "score": 1.0,  # Distance padding
+            }
+        cand["rrf_score"] = rrf_score
+        cand["fts_matched"] = l_pos >= 0
+        cand["hybrid_score"] = hybrid_score
+        cand["score_type"] = "hybrid_distance"
+        append(cand)
+    return merged
+
+
+SEED_RESULTS = 50  # Deep mode doküman seçimi için seed pass boyutu
+
+
+def _embed_query(coll, query: str) -> list[float] | None:
+    """
+    Sorguyu tek sefer embed eder.
+
+    Seed ve ana dense pass aynı vektörü query_embeddings ile kullanır; böylece
+    deep mode'da model iki kez çalıştırılmaz. Embedding alınamazsa None döner
+    ve çağıran query_texts yoluna düşer (fail-open).
+    """
+    own_ef = _get_embedding_function()
+    ef = own_ef or getattr(coll, "_embedding_function", None)
+    if ef is None:
+        return None
+    cache = None
+    if own_ef is not None:
+        try:
+            from app.core.embedding_cache import get_embedding_cache
+
+            cache = get_embedding_cache(EMBEDDING_MODEL_NAME, EMBEDDING_DIMENSION)
+            cached = cache.get_many([query])[0]
+            if cached is not None:
+                return cached
+        except Exception as e:
+            logger.warning(f"[RAG v2] Embedding cache lookup failed: {e}")
+            cache = None
+    try:
+        vector = [float(x) for x in ef([query])[0]]
+        if cache is not None:
+            cache.put_many([query], [vector])
+        return vector
+    except Exception as e:
+        logger.warning(f"[RAG v2] Query embedding failed, falling back to query_texts: {e}", exc_info=True)
+        return None
+
+
+def _dense_query(coll, query: str, query_embedding: list[float] | None, n_results: int, where: dict):
+    """Önceden hesaplanmış vektör varsa onu, yoksa ham metni kullanarak Chroma sorgusu yapar."""
+    if query_embedding is not None:
+        return coll.query(query_embeddings=[query_embedding], n_results=n_results, where=where)
+    return coll.query(query_texts=[query], n_results=n_results, where=where)
+
+
+def _parse_dense_results(results) -> list[dict[str, Any]]:
+    """Chroma query çıktısını aday (candidate) sözlüklerine çevirir."""
+    if not results or not results["ids"] or not results["ids"][0]:
+        return []
+
+    ids = results["ids"][0]
+    metadatas = results["metadatas"][0]
+    documents = results["documents"][0]
+    distances = results["distances"][0] if results["distances"] else [0.0] * len(ids)
+
+    candidates = []
+    for i, doc_id in enumerate(ids):
+        meta = metadatas[i]
+        candidates.append(
+            {
+                "text": documents[i],
+                "filename": meta.get("filename", "unknown"),
+                "page_number": meta.get("page_number", 0),
+                "chunk_index": meta.get("chunk_index", 0),
+                "upload_id": meta.get("upload_id", ""),
+                "score": distances[i],  # Distance (smaller is better)
+                "score_type": "distance",
+                "id": doc_id,
+            }
+        )
+    return candidates
+
+
 async def search_documents_v2(
     query: str,
     owner: str,
@@ -517,9 +608,11 @@ async def search_documents_v2(
         mode = "deep"
 
     start_time = time.time()
+    t_embed = 0.0
     t_dense = 0.0
     t_lexical = 0.0
     t_merge = 0.0
+    dense_passes = 0
 
     dense_count = 0
     lexical_count = 0
@@ -576,37 +669,37 @@ async def search_documents_v2(
             except Exception:
                 pass
 
+        # Retrieval Planner: sorgu bir kez embed edilir, tüm dense pass'ler bu vektörü kullanır
+        # (embedding cache SQLite okuması ve model çağrısı event loop'u bloklamasın)
+        t_e = time.time()
+        query_embedding = await asyncio.to_thread(_embed_query, coll, query)
+        t_embed = (time.time() - t_e) * 1000
+
+        if mode == "deep":
+            top_k = max(top_k, 200)
+
         # 2. Document Selection (Scope Narrowing)
         # Only if not pinned and in Deep mode (to save costs on very broad queries)
+        seed_hits: list[dict[str, Any]] = []
+        seed_exhausted = False
+        selected_ids: list[str] = []
         if not pinned_id and mode == "deep":
             try:
                 # Seed Search: Get top 50 chunks roughly to see which docs are relevant
-                # Using 'fast' dense search logic locally (no recursion)
-                seed_results = coll.query(
-                    query_texts=[query],
-                    n_results=50,
-                    where=where_filter,  # Global filter at this point
+                t_s = time.time()
+                seed_hits = _parse_dense_results(
+                    _dense_query(coll, query, query_embedding, SEED_RESULTS, where_filter)  # Global filter at this point
                 )
+                t_dense += (time.time() - t_s) * 1000
+                dense_passes += 1
+                # Seed limitten az döndüyse filtrelenmiş koleksiyon tükendi demektir
+                seed_exhausted = len(seed_hits) < SEED_RESULTS
 
-                seed_candidates = []
-                if seed_results and seed_results["ids"] and seed_results["ids"][0]:
-                    s_ids = seed_results["ids"][0]
-                    s_metas = seed_results["metadatas"][0]
-                    s_dists = seed_results["distances"][0] if seed_results["distances"] else [0.0] * len(s_ids)
-
-                    for i, _ in enumerate(s_ids):
-                        seed_candidates.append({"upload_id": s_metas[i].get("upload_id"), "score": s_dists[i]})
-
-                if seed_candidates:
-                    # Estimate total unique docs involved in top 20
-                    unique_seeds = {c["upload_id"] for c in seed_candidates if c.get("upload_id")}
-                    docs_total = len(unique_seeds)
-
-                    # Dynamic doc count based on query intent
+                if seed_hits:
+                    # Dynamic doc count based on query intent; docs_total catalog'dan gelir
                     dynamic_top_k = _determine_doc_count(query)
-                    selected_ids = rag_v2_docs.get_doc_candidates_from_seeds(
-                        seed_candidates, 
-                        top_k_docs=dynamic_top_k
+                    selected_ids, docs_total = rag_v2_docs.select_documents(
+                        owner, seed_hits, top_k_docs=dynamic_top_k
                     )
 
                     if selected_ids:
@@ -620,37 +713,30 @@ async def search_documents_v2(
             except Exception as e:
                 logger.warning(f"[RAG v2] Doc selection failed (fail-open): {e}", exc_info=True)
 
-        if mode == "deep":
-            top_k = max(top_k, 200)
+        # Seed pass'in sonuçları seçilen dokümanlarla sınırlanıp ana sonuç kümesine taşınır
+        if selected_ids:
+            selected_set = set(selected_ids)
+            seed_hits = [c for c in seed_hits if c.get("upload_id") in selected_set]
 
-        # Dense Search (Vector) - Main Pass
-        t0 = time.time()
-        results = coll.query(query_texts=[query], n_results=top_k, where=where_filter)
-        t_dense = (time.time() - t0) * 1000
-
-        candidates = []
-
-        # Parse Dense Results
-        if results and results["ids"] and results["ids"][0]:
-            ids = results["ids"][0]
-            metadatas = results["metadatas"][0]
-            documents = results["documents"][0]
-            distances = results["distances"][0] if results["distances"] else [0.0] * len(ids)
-
-            for i, doc_id in enumerate(ids):
-                meta = metadatas[i]
-                cand = {
-                    "text": documents[i],
-                    "filename": meta.get("filename", "unknown"),
-                    "page_number": meta.get("page_number", 0),
-                    "chunk_index": meta.get("chunk_index", 0),
-                    "upload_id": meta.get("upload_id", ""),
-                    "score": distances[i],  # Distance (smaller is better)
-                    "score_type": "distance",
-                    "id": doc_id,
-                }
-                candidates.append(cand)
-            dense_count = len(candidates)
+        if seed_hits and seed_exhausted:
+            # Seed pass filtrelenmiş koleksiyonu zaten tüketti: ana pass yeni sonuç getiremez
+            candidates = seed_hits
+        else:
+            # Dense Search (Vector) - Main Pass
+            t0 = time.time()
+            results = _dense_query(coll, query, query_embedding, top_k, where_filter)
+            t_dense += (time.time() - t0) * 1000
+            dense_passes += 1
+
+            candidates = _parse_dense_results(results)
+            if seed_hits:
+                seen_ids = {c["id"] for c in candidates}
+                carried = [c for c in seed_hits if c["id"] not in seen_ids]
+                if carried:
+                    candidates.extend(carried)
+                    candidates.sort(key=lambda x: x["score"])
+
+        dense_count = len(candidates)
 
         # Hybrid Logic (Activated for all modes to ensure keyword precision)
         if mode in ["deep", "fast"]:
@@ -658,7 +744,9 @@ async def search_documents_v2(
                 from app.memory import rag_v2_lexical
 
                 t1 = time.time()
-                lexical_results = rag_v2_lexical.lexical_search(query=query, owner=owner, scope=str(scope), top_k=top_k)
+                lexical_results = await rag_v2_lexical.lexical_search_async(
+                    query=query, owner=owner, scope=str(scope), top_k=top_k
+                )
                 t_lexical = (time.time() - t1) * 1000
 
                 if lexical_results:
@@ -672,82 +760,13 @@ async def search_documents_v2(
                     t2 = time.time()
                     # Merge Logic
                     # --- RAG v2.5: RRF (Reciprocal Rank Fusion) MERGE LOGIC ---
-                    k = 60
-                    merged_map = {} # (upload_id, page_number, chunk_index) -> candidate_dict
-
-                    # 1. Rank Dense Results (Smaller distance is better)
-                    candidates.sort(key=lambda x: x["score"])
-                    for rank, cand in enumerate(candidates, 1):
-                        key = (cand.get("upload_id"), cand.get("page_number"), cand.get("chunk_index"))
-                        cand["rrf_score"] = 1.0 / (k + rank)
-                        cand["fts_matched"] = False
-                        merged_map[key] = cand
-
-                    # 2. Rank Lexical Results (More negative BM25 is better)
-                    lexical_results.sort(key=lambda x: x["bm25_score"])
-                    for rank, lex in enumerate(lexical_results, 1):
-                        key = (lex.get("upload_id"), lex.get("page_number"), lex.get("chunk_index"))
-                        # RRF Upgrade: Lexical precision is prioritized (1.5x boost) for technical accuracy
-                        lex_rrf_contribution = (1.0 / (k + rank)) * 1.5
-                        
-                        if key in merged_map:
-                            merged_map[key]["rrf_score"] += lex_rrf_contribution
-                            merged_map[key]["fts_matched"] = True
-                        else:
-                            # New candidate from lexical search
-                            merged_map[key] = {
-                                "text": lex["text"],
-                                "filename": lex["filename"],
-                                "page_number": lex["page_number"],
-                                "chunk_index": lex["chunk_index"],
-                                "upload_id": lex["upload_id"],
-                                "score": 1.0, # Distance padding
-                                "rrf_score": lex_rrf_contribution,
-                                "fts_matched": True,
-                                "score_type": "hybrid_distance"
-                            }
-                    
-                    # 3. Final Selection and Normalization
-                    final_candidates = list(merged_map.values())
-                    # Sort by RRF score (HIGHER is BETTER)
-                    # Tie-break: fts_matched results first
-                    final_candidates.sort(key=lambda x: (x["rrf_score"], x.get("fts_matched", False)), reverse=True)
-                    
-                    # Re-map RRF score to a distance-like 0.0-1.0 range
-                    if final_candidates:
-                        max_rrf = max(c["rrf_score"] for c in final_candidates)
-                        for cand in final_candidates:
-                            cand["hybrid_score"] = 1.0 - (cand["rrf_score"] / max_rrf)
-                            cand["score_type"] = "hybrid_distance"
-                    
-                    candidates = final_candidates
+                    # Dense: küçük distance iyi. Lexical: daha negatif BM25 iyi;
+                    # teknik doğruluk için lexical 1.5x ağırlıklı.
+                    candidates = _fuse_hybrid(candidates, lexical_results)
 
                     # 4. RAG v2.5: Parent-Child Context Expansion
-                    # If top candidate is very strong, fetch its neighbors for richer context
-                    if candidates and candidates[0].get("hybrid_score", 1.0) < 0.2:
-                        best = candidates[0]
-                        neighbors = expand_neighbors(
-                            owner=owner,
-                            scope=str(scope),
-                            filename=best.get("filename"),
-                            page_number=best.get("page_number"),
-                            chunk_index=best.get("chunk_index"),
-                            radius=1
-                        )
-                        if neighbors:
-                            # Insert neighbors right after the best chunk if they aren't already in candidates
-                            seen_keys = {(c.get("upload_id"), c.get("page_number"), c.get("chunk_index")) for c in candidates}
-                            new_context = []
-                            for n in neighbors:
-                                n_key = (n.get("upload_id"), n.get("page_number"), n.get("chunk_index"))
-                                if n_key not in seen_keys:
-                                    n["score_type"] = "neighbor"
-                                    n["hybrid_score"] = best.get("hybrid_score", 0.0) + 0.01 # Slightly lower priority
-                                    new_context.append(n)
-                            
-                            if new_context:
-                                candidates = [candidates[0]] + new_context + candidates[1:]
-                                logger.info(f"[RAG v2.5] Context Expanded: Added {len(new_context)} neighbors for {best.get('filename')}")
+                    # Güçlü ilk N hit için komşular tek toplu çağrıda getirilir
+                    candidates = _expand_top_hits(owner, str(scope), candidates)
 
                     t_merge = (time.time() - t2) * 1000
 
@@ -819,15 +838,54 @@ async def search_documents_v2(
         best_score_type = candidates[0].get("score_type") if candidates else None
 
         # 4. DEEP MODE: SEMANTIC RERANKING
+        reranker_used = None
+        rerank_confidence = None
+        t_rerank = 0.0
         if mode == "deep" and candidates:
+            from app.memory.rag_v2_rerank import get_reranker
+
             logger.info(f"[RAG v2] Entering Semantic Reranking for {len(candidates)} candidates")
-            candidates = await _rerank_with_llm(primary_query, candidates)
+            rerank_result = await get_reranker().rerank(primary_query, candidates)
+            candidates = rerank_result.candidates
+            reranker_used = rerank_result.reranker
+            rerank_confidence = round(rerank_result.confidence, 3)
+            t_rerank = rerank_result.latency_ms
 
         total_latency = (time.time() - start_time) * 1000
         
         if return_stats:
-            # Stats generation (simplified for brevity here, should be kept robust)
-            return candidates, None 
+            stats = RAGV2Stats(
+                query_hash=calculate_query_hash(query),
+                owner=owner,
+                scope=str(scope),
+                mode_used=mode,
+                used_lexical=used_lexical,
+                dense_count=dense_count,
+                lexical_count=lexical_count,
+                merged_count=merged_count,
+                best_score_type=best_score_type,
+                best_score=best_score,
+                second_score=second_score,
+                latency_ms_total=int(total_latency),
+                latency_ms_embed=int(t_embed),
+                latency_ms_dense=int(t_dense),
+                latency_ms_lexical=int(t_lexical),
+                latency_ms_merge=int(t_merge),
+                latency_ms_rerank=int(t_rerank),
+                reranker_used=reranker_used,
+                rerank_confidence=rerank_confidence,
+                dense_passes=dense_passes,
+                query_embedded_once=query_embedding is not None,
+                docs_total=docs_total,
+                docs_selected=docs_selected,
+                doc_selection_used=doc_selection_used,
+                conversation_pinning_used=conversation_pinning_used,
+                continue_mode_used=continue_mode,
+                continuation_window_pages=continue_window_size,
+                last_page_used=last_page_used,
+                page_window_applied=continue_window_applied,
+            )
+            return candidates, stats
         return candidates
 
     except Exception as e:
@@ -835,14 +893,139 @@ async def search_documents_v2(
         return []
 
 
+# ============================================================================
+# NEIGHBOR EXPANSION (Parent-Child Context)
+# ============================================================================
+
+NEIGHBOR_PAGE_CACHE_SIZE = 256  # (owner, scope, upload_id, page) girdisi
+NEIGHBOR_EXPANSION_TOP_N = 3
+NEIGHBOR_EXPANSION_MAX_HYBRID = 0.2
+
+# (owner, scope, upload_id, page_number) -> {chunk_index: chunk dict | None (yok olduğu biliniyor)}
+# upload_id istemciden gelebildiği için anahtar owner kapsamındadır
+_NeighborPageKey = tuple[str, str, str, int]
+_neighbor_page_cache: "OrderedDict[_NeighborPageKey, dict[int, dict[str, Any] | None]]" = OrderedDict()
+_neighbor_cache_lock = threading.Lock()
+
+
+def invalidate_neighbor_cache(upload_id: str, owner: str) -> None:
+    """Kullanıcının bir upload'ına ait tüm sayfa girdilerini düşürür (silme / yeniden indeksleme)."""
+    with _neighbor_cache_lock:
+        for key in [k for k in _neighbor_page_cache if k[0] == owner and k[2] == upload_id]:
+            del _neighbor_page_cache[key]
+
+
+def _chunk_id(owner: str, filename: str, upload_id: str, page_number: int, chunk_index: int) -> str:
+    return f"{owner}:{_sanitize_filename(filename)}:{upload_id}:p{page_number}:c{chunk_index}"
+
+
+def expand_neighbors_batch(
+    owner: str, scope: Scope, hits: list[dict[str, Any]], radius: int = 1
+) -> list[list[dict[str, Any]]]:
+    """
+    Birden fazla hit için komşu chunk'ları tek seferde getirir.
+
+    Chunk ID'leri deterministik olduğu için (owner:file:upload:pX:cY) sayfanın
+    tamamı yerine yalnızca gereken ID'ler `collection.get(ids=...)` ile okunur.
+    Okunan chunk'lar (owner, scope, upload_id, page) anahtarlı sınırlı bir LRU'da tutulur;
+    continue mode'da aynı sayfalara tekrar gelindiğinde Chroma'ya gidilmez.
+
+    Returns:
+        hits ile aynı sırada, her hit için chunk_index'e göre sıralı komşular
+        (hit'in kendisi dahil; çağıran tekilleştirir).
+    """
+    wanted: list[list[tuple[_NeighborPageKey, int]]] = []
+    missing: dict[str, tuple[_NeighborPageKey, int]] = {}
+
+    with _neighbor_cache_lock:
+        for hit in hits:
+            upload_id = hit.get("upload_id")
+            page = hit.get("page_number")
+            c_idx = hit.get("chunk_index")
+            if not upload_id or page is None or c_idx is None:
+                wanted.append([])
+                continue
+            page_key = (owner, str(scope), upload_id, page)
+            cached = _neighbor_page_cache.get(page_key)
+            if cached is not None:
+                _neighbor_page_cache.move_to_end(page_key)
+            slots = []
+            for idx in range(max(0, c_idx - radius), c_idx + radius + 1):
+                slots.append((page_key, idx))
+                if cached is None or idx not in cached:
+                    chunk_id = _chunk_id(owner, hit.get("filename", ""), upload_id, page, idx)
+                    missing[chunk_id] = (page_key, idx)
+            wanted.append(slots)
+
+    if missing:
+        fetched: dict[tuple[_NeighborPageKey, int], dict[str, Any]] = {}
+        try:
+            results = _get_rag_v2_collection().get(ids=list(missing), include=["documents", "metadatas"])
+            for chunk_id, doc_text, meta in zip(
+                results.get("ids") or [], results.get("documents") or [], results.get("metadatas") or [], strict=False
+            ):
+                meta = meta or {}
+                if meta.get("owner") != owner or meta.get("scope") != str(scope):
+                    continue
+                fetched[missing[chunk_id]] = {
+                    "text": doc_text,
+                    "filename": meta.get("filename", ""),
+                    "page_number": meta.get("page_number", missing[chunk_id][0][3]),
+                    "chunk_index": meta.get("chunk_index", missing[chunk_id][1]),
+                    "upload_id": meta.get("upload_id", ""),
+                    "score": 0.0,  # Artificial score for neighbors
+                    "score_type": "neighbor",
+                }
+        except Exception as e:
+            logger.error(f"[RAG v2] Expansion error: {e}", exc_info=True)
+            return [[] for _ in hits]
+
+        with _neighbor_cache_lock:
+            for slot in missing.values():
+                page_key, idx = slot
+                entry = _neighbor_page_cache.setdefault(page_key, {})
+                entry[idx] = fetched.get(slot)
+                _neighbor_page_cache.move_to_end(page_key)
+            while len(_neighbor_page_cache) > NEIGHBOR_PAGE_CACHE_SIZE:
+                _neighbor_page_cache.popitem(last=False)
+    else:
+        fetched = {}
+
+    expanded = []
+    with _neighbor_cache_lock:
+        for slots in wanted:
+            neighbors = []
+            for page_key, idx in slots:
+                chunk = fetched.get((page_key, idx))
+                if chunk is None:
+                    chunk = (_neighbor_page_cache.get(page_key) or {}).get(idx)
+                if chunk is not None:
+                    # Çağıranlar score_type/hybrid_score ekleyebilir: cache'teki nesne paylaşılmaz
+                    neighbors.append(dict(chunk))
+            expanded.append(neighbors)
+    return expanded
+
+
 def expand_neighbors(
-    owner: str, scope: Scope, filename: str, page_number: int, chunk_index: int, radius: int = 1
+    owner: str,
+    scope: Scope,
+    filename: str,
+    page_number: int,
+    chunk_index: int,
+    radius: int = 1,
+    upload_id: str | None = None,
 ) -> list[dict[str, Any]]:
     """
     Find neighbor chunks for a given chunk.
 
+    upload_id verilirse ID bazlı toplu yol (expand_neighbors_batch) kullanılır;
+    verilmezse sayfanın tamamı metadata filtresiyle okunur.
     Returns neighbors sorted by chunk_index.
     """
+    if upload_id:
+        hit = {"upload_id": upload_id, "filename": filename, "page_number": page_number, "chunk_index": chunk_index}
+        return expand_neighbors_batch(owner, scope, [hit], radius=radius)[0]
+
     try:
         collection = _get_rag_v2_collection()
 
@@ -902,54 +1085,24 @@ def expand_neighbors(
 # =============================================================================
 
 
-def list_documents(owner: str, limit: int = 500) -> list[dict[str, Any]]:
+def list_documents(owner: str, limit: int = 50, offset: int = 0) -> list[dict[str, Any]]:
     """
-    Kullanıcıya ait belgeleri listeler.
-    Benzersiz dosya isimlerini döndürür (chunk'lar gruplanır).
+    Kullanıcıya ait belgeleri listeler (document catalog, en yeni önce).
+
+    Chunk metadata'sı taranmaz; upload başına tek catalog satırı okunur.
 
     Args:
         owner: Kullanıcı adı
-        limit: Maksimum chunk sayısı
+        limit: Sayfa boyutu (doküman sayısı)
+        offset: Atlanacak doküman sayısı
 
     Returns:
-        List[Dict]: Benzersiz dosya listesi
+        List[Dict]: filename, upload_id, created_at, chunk_count, page_count, byte_size, scope
     """
     try:
-        collection = _get_rag_v2_collection()
-
-        results = collection.get(where={"owner": owner}, limit=limit, include=["metadatas"])
-
-        if not results or not results.get("ids"):
-            return []
-
-        # Benzersiz dosyaları topla
-        files = {}
-        for i, _doc_id in enumerate(results["ids"]):
-            meta = results["metadatas"][i] if results.get("metadatas") else {}
-            fname = meta.get("filename", "Bilinmeyen")
-            upload_id = meta.get("upload_id", "")
-
-            # upload_id bazında grupla (aynı dosyanın farklı yüklemeleri)
-            key = f"{fname}:{upload_id}"
-
-            if key not in files:
-                files[key] = {
-                    "filename": fname,
-                    "upload_id": upload_id,
-                    "created_at": meta.get("created_at", ""),
-                    "chunk_count": 1,
-                    "page_count": {meta.get("page_number", 1)},
-                }
-            else:
-                files[key]["chunk_count"] += 1
-                files[key]["page_count"].add(meta.get("page_number", 1))
-
-        # page_count'u sayıya çevir
-        result = []
-        for f in files.values():
-            f["page_count"] = len(f["page_count"])
-            result.append(f)
+        from app.memory import rag_v2_docs
 
+        result = rag_v2_docs.list_documents(owner, limit=limit, offset=offset)
         logger.info(f"[RAG v2] Listed {len(result)} documents for {owner}")
         return result
 
@@ -958,6 +1111,17 @@ def list_documents(owner: str, limit: int = 500) -> list[dict[str, Any]]:
         return []
 
 
+def count_documents(owner: str) -> int:
+    """Kullanıcının toplam doküman sayısı (sayfalama için)."""
+    try:
+        from app.memory import rag_v2_docs
+
+        return rag_v2_docs.count_documents(owner)
+    except Exception as e:
+        logger.error(f"[RAG v2] Count error: {e}", exc_info=True)
+        return 0
+
+
 def delete_document(doc_id: str) -> bool:
     """
     Tek bir chunk/doküman siler (ID ile).
@@ -995,7 +1159,10 @@ def delete_by_filename(filename: str, owner: str) -> int:
         # Önce eşleşen ID'leri bul
         results = collection.get(where={"$and": [{"filename": filename}, {"owner": owner}]}, limit=5000)
 
+        from app.memory import rag_v2_docs
+
         if not results or not results.get("ids"):
+            rag_v2_docs.remove_documents_by_filename(filename, owner)
             return 0
 
         ids_to_delete = results["ids"]
@@ -1003,15 +1170,15 @@ def delete_by_filename(filename: str, owner: str) -> int:
 
         # Sil
         collection.delete(ids=ids_to_delete)
+        for upload_id in {(m or {}).get("upload_id") for m in results.get("metadatas") or []}:
+            if upload_id:
+                invalidate_neighbor_cache(upload_id, owner)
 
         # FTS tablosundan da sil
-        try:
-            from app.memory.rag_v2_lexical import _get_connection
+        from app.memory import rag_v2_lexical
 
-            with _get_connection() as conn:
-                conn.execute("DELETE FROM rag_v2_fts WHERE filename = ? AND owner = ?", (filename, owner))
-        except Exception as e:
-            logger.warning(f"[RAG v2] FTS delete failed: {e}", exc_info=True)
+        rag_v2_lexical.delete_by_filename(filename, owner)
+        rag_v2_docs.remove_documents_by_filename(filename, owner)
 
         logger.info(f"[RAG v2] Deleted {count} chunks for {filename}")
         return count
@@ -1037,22 +1204,23 @@ def delete_by_upload_id(upload_id: str, owner: str) -> int:
 
         results = collection.get(where={"$and": [{"upload_id": upload_id}, {"owner": owner}]}, limit=5000)
 
+        from app.memory import rag_v2_docs
+
         if not results or not results.get("ids"):
+            rag_v2_docs.remove_document(upload_id, owner)
             return 0
 
         ids_to_delete = results["ids"]
         count = len(ids_to_delete)
 
         collection.delete(ids=ids_to_delete)
+        invalidate_neighbor_cache(upload_id, owner)
 
         # FTS tablosundan da sil
-        try:
-            from app.memory.rag_v2_lexical import _get_connection
+        from app.memory import rag_v2_lexical
 
-            with _get_connection() as conn:
-                conn.execute("DELETE FROM rag_v2_fts WHERE upload_id = ? AND owner = ?", (upload_id, owner))
-        except Exception as e:
-            logger.warning(f"[RAG v2] FTS delete failed: {e}", exc_info=True)
+        rag_v2_lexical.delete_by_upload_id(upload_id, owner)
+        rag_v2_docs.remove_document(upload_id, owner)
 
         logger.info(f"[RAG v2] Deleted {count} chunks for upload_id {upload_id}")
         return count
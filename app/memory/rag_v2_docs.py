@@ -1,8 +1,198 @@
+"""
+RAG v2 Documents
+================
+
+Doküman seviyesinde işlemler:
+
+- Document catalog (rag_v2_documents): (owner, upload_id) başına tek satır
+  (filename, page_count, chunk_count, byte_size, created_at). Satır ingestion
+  tamamlandığında yazılır (yarım/başarısız yüklemeler listede görünmez),
+  silmede kaldırılır; listeleme ve doküman seçimi
+  chunk metadata'sını taramak yerine bu tablodan O(docs) okur.
+- Seed sonuçlarından doküman seçimi (deep mode scope narrowing).
+"""
+
 import logging
+import os
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime
 from typing import Any
 
 logger = logging.getLogger(__name__)
 
+CATALOG_DB_PATH = os.path.join("data", "rag_v2_catalog.db")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+_CATALOG_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS rag_v2_documents (
+    upload_id TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    scope TEXT NOT NULL DEFAULT 'user',
+    page_count INTEGER NOT NULL DEFAULT 0,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    byte_size INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (owner, upload_id)
+)
+"""
+_CATALOG_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_rag_v2_documents_owner_created "
+    "ON rag_v2_documents (owner, created_at DESC, upload_id)"
+)
+_UPSERT_DOCUMENT_SQL = """
+INSERT INTO rag_v2_documents (upload_id, owner, filename, scope, page_count, chunk_count, byte_size, created_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(owner, upload_id) DO UPDATE SET
+    filename = excluded.filename,
+    scope = excluded.scope,
+    page_count = excluded.page_count,
+    chunk_count = excluded.chunk_count,
+    byte_size = CASE WHEN excluded.byte_size > 0 THEN excluded.byte_size ELSE rag_v2_documents.byte_size END
+"""
+
+_ready_paths: set[str] = set()
+_catalog_lock = threading.Lock()
+
+
+# =============================================================================
+# DOCUMENT CATALOG
+# =============================================================================
+
+
+@contextmanager
+def _catalog_connection() -> Iterator[sqlite3.Connection]:
+    """Catalog veritabanı bağlantısı (commit + close garantili)."""
+    os.makedirs(os.path.dirname(CATALOG_DB_PATH) or ".", exist_ok=True)
+    conn = sqlite3.connect(CATALOG_DB_PATH, timeout=10)
+    conn.row_factory = sqlite3.Row
+    try:
+        _ensure_catalog(conn)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _ensure_catalog(conn: sqlite3.Connection) -> None:
+    """Şema + ilk açılışta mevcut chunk'lardan tek seferlik doldurma (backfill)."""
+    if CATALOG_DB_PATH in _ready_paths:
+        return
+    with _catalog_lock:
+        if CATALOG_DB_PATH in _ready_paths:
+            return
+        conn.execute("PRAGMA journal_mode=WAL")
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'rag_v2_documents'").fetchone()
+        conn.execute(_CATALOG_SCHEMA_SQL)
+        conn.execute(_CATALOG_INDEX_SQL)
+        if not exists:
+            _backfill_catalog(conn)
+        conn.commit()
+        _ready_paths.add(CATALOG_DB_PATH)
+
+
+def _backfill_catalog(conn: sqlite3.Connection) -> None:
+    """
+    Catalog öncesi yüklenmiş dokümanları lexical chunk tablosundan tek bir
+    GROUP BY ile çıkarır. Orijinal dosya boyutu bilinmediği için byte_size
+    chunk metinlerinin UTF-8 boyutudur.
+    """
+    try:
+        from app.memory.rag_v2_lexical import get_lexical_index
+
+        with get_lexical_index().reader() as lex:
+            rows = lex.execute(
+                """
+                SELECT upload_id, owner, MIN(filename), MIN(scope), COUNT(DISTINCT page_number), COUNT(*),
+                       SUM(LENGTH(CAST(content AS BLOB)))
+                FROM rag_v2_chunks WHERE upload_id != '' GROUP BY upload_id, owner
+                """
+            ).fetchall()
+        now = datetime.utcnow().isoformat()
+        conn.executemany(_UPSERT_DOCUMENT_SQL, [(*row, now) for row in rows])
+        if rows:
+            logger.info(f"[RAG v2 Docs] Catalog backfilled with {len(rows)} documents")
+    except Exception as e:
+        logger.warning(f"[RAG v2 Docs] Catalog backfill skipped: {e}", exc_info=True)
+
+
+def upsert_document(
+    owner: str,
+    upload_id: str,
+    filename: str,
+    page_count: int,
+    chunk_count: int,
+    byte_size: int = 0,
+    scope: str = "user",
+    created_at: str | None = None,
+) -> None:
+    """Catalog satırını oluşturur/günceller (created_at ilk yazımda sabitlenir)."""
+    try:
+        with _catalog_connection() as conn:
+            conn.execute(
+                _UPSERT_DOCUMENT_SQL,
+                (upload_id, owner, filename, scope, page_count, chunk_count, byte_size,
+                 created_at or datetime.utcnow().isoformat()),
+            )
+    except Exception as e:
+        logger.warning(f"[RAG v2 Docs] Catalog upsert failed for {upload_id}: {e}", exc_info=True)
+
+
+def remove_document(upload_id: str, owner: str) -> None:
+    try:
+        with _catalog_connection() as conn:
+            conn.execute("DELETE FROM rag_v2_documents WHERE upload_id = ? AND owner = ?", (upload_id, owner))
+    except Exception as e:
+        logger.warning(f"[RAG v2 Docs] Catalog delete failed for {upload_id}: {e}", exc_info=True)
+
+
+def remove_documents_by_filename(filename: str, owner: str) -> list[str]:
+    """Dosya adına ait tüm upload'ları catalog'dan siler; silinen upload_id'leri döndürür."""
+    try:
+        with _catalog_connection() as conn:
+            rows = conn.execute(
+                "DELETE FROM rag_v2_documents WHERE owner = ? AND filename = ? RETURNING upload_id", (owner, filename)
+            ).fetchall()
+        return [row[0] for row in rows]
+    except Exception as e:
+        logger.warning(f"[RAG v2 Docs] Catalog delete failed for {filename}: {e}", exc_info=True)
+        return []
+
+
+def list_documents(owner: str, limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> list[dict[str, Any]]:
+    """Kullanıcının dokümanları, en yeni önce (owner, created_at) indeksi üzerinden sayfalı."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    with _catalog_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT upload_id, filename, scope, page_count, chunk_count, byte_size, created_at
+            FROM rag_v2_documents WHERE owner = ?
+            ORDER BY created_at DESC, upload_id LIMIT ? OFFSET ?
+            """,
+            (owner, limit, max(0, offset)),
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def count_documents(owner: str) -> int:
+    with _catalog_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM rag_v2_documents WHERE owner = ?", (owner,)).fetchone()[0]
+
+
+def get_document_ids(owner: str) -> set[str]:
+    """Kullanıcının catalog'daki upload_id'leri (doküman seçimi için)."""
+    with _catalog_connection() as conn:
+        return {row[0] for row in conn.execute("SELECT upload_id FROM rag_v2_documents WHERE owner = ?", (owner,))}
+
+
+# =============================================================================
+# DOCUMENT SELECTION
+# =============================================================================
+
 
 def get_doc_candidates_from_seeds(seed_candidates: list[dict[str, Any]], top_k_docs: int = 5) -> list[str]:
     """
@@ -44,3 +234,28 @@ def get_doc_candidates_from_seeds(seed_candidates: list[dict[str, Any]], top_k_d
     except Exception as e:
         logger.warning(f"[RAG v2 Docs] Selection failed: {e}")
         return []
+
+
+def select_documents(
+    owner: str, seed_candidates: list[dict[str, Any]], top_k_docs: int = 5
+) -> tuple[list[str], int]:
+    """
+    Catalog destekli doküman seçimi.
+
+    Returns:
+        (selected_upload_ids, docs_total). docs_total kullanıcının catalog'daki
+        doküman sayısıdır; catalog'da olmayan (silinmiş) upload'lar seçilmez.
+        Catalog okunamazsa ya da boşsa yalnızca seed'lere göre seçilir.
+    """
+    try:
+        known_ids = get_document_ids(owner)
+    except Exception as e:
+        logger.warning(f"[RAG v2 Docs] Catalog unavailable, selecting from seeds only: {e}")
+        known_ids = set()
+
+    if not known_ids:
+        unique = {c.get("upload_id") for c in seed_candidates if c.get("upload_id")}
+        return get_doc_candidates_from_seeds(seed_candidates, top_k_docs=top_k_docs), len(unique)
+
+    live_seeds = [c for c in seed_candidates if c.get("upload_id") in known_ids]
+    return get_doc_candidates_from_seeds(live_seeds, top_k_docs=top_k_docs), len(known_ids)
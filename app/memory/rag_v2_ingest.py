@@ -0,0 +1,512 @@
+"""
+RAG v2 Ingestion Pipeline (Staged + Resumable)
+==============================================
+
+PDF belgelerini aşamalı bir hat üzerinden indeksler:
+
+1. Çıkarım: Sayfa blokları ProcessPoolExecutor içinde paralel okunur.
+2. Chunking: Bloklar sayfa sırasıyla gelir ve semantic_chunk_text ile parçalanır.
+   Blok N işlenirken sonraki bloklar havuzda çıkarılmaya devam eder.
+3. Yazma: Sayfalar arası biriken chunk'lar RAG_INGEST_BATCH_CHUNKS boyutunda
+   tek Chroma upsert (toplu embedding) + tek FTS transaction ile yazılır.
+
+Her batch sonrası (owner, upload_id) için checkpoint (son tamamlanan sayfa)
+kaydedilir. Aynı kullanıcı aynı upload_id ile aynı dosyayı (ad + SHA-256)
+tekrar gönderdiğinde işlem kaldığı sayfadan devam eder; dosya farklıysa iş
+sıfırdan başlar. Uygulama açılışında yarım kalan işler
+resume_pending_ingestions ile toplanır: her iş onu yürüten sürecin
+WORKER_ID'sini taşır; sahibi ölmüş (aynı host, süreç yok) işler hemen,
+diğerleri heartbeat'i eskiyince sahiplenilir. Başka süreçlerin running
+işleri bitene kadar tarama periyodik olarak tekrarlanır.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import repeat
+from pathlib import Path
+from typing import Any
+
+from app.memory import rag_v2, rag_v2_docs, rag_v2_lexical
+
+logger = logging.getLogger(__name__)
+
+STATE_DB_PATH = os.path.join("data", "rag_v2_ingest.db")
+MIN_PAGE_CHARS = 10  # Bundan kısa sayfalar atlanır (eski davranışla aynı)
+STALE_JOB_SECONDS = 300  # Heartbeat bu süreden eskiyse iş sahipsiz (crash) sayılır
+RESCAN_SECONDS = 60  # Başka süreçlerin running işleri varken yarım iş taraması aralığı
+# Bu sürecin kimliği (host:pid:boot); hızlı yeniden başlatmada eski işi ayırt eder
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# (pages_done, total_pages, chunks_added)
+ProgressCallback = Callable[[int, int, int], None]
+
+
+# =============================================================================
+# CHECKPOINT STORE
+# =============================================================================
+
+
+@contextmanager
+def _state_connection() -> Iterator[sqlite3.Connection]:
+    """Checkpoint veritabanı bağlantısı (commit + close garantili)."""
+    os.makedirs(os.path.dirname(STATE_DB_PATH) or ".", exist_ok=True)
+    conn = sqlite3.connect(STATE_DB_PATH, timeout=10)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rag_v2_ingest_jobs (
+                upload_id TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                file_hash TEXT NOT NULL DEFAULT '',
+                total_pages INTEGER NOT NULL DEFAULT 0,
+                last_page INTEGER NOT NULL DEFAULT 0,
+                chunks_added INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'running',
+                error TEXT,
+                updated_at REAL NOT NULL,
+                worker_id TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (owner, upload_id)
+            )
+            """
+        )
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(rag_v2_ingest_jobs)")}
+        if "worker_id" not in columns:
+            conn.execute("ALTER TABLE rag_v2_ingest_jobs ADD COLUMN worker_id TEXT NOT NULL DEFAULT ''")
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_job(upload_id: str, owner: str) -> dict[str, Any] | None:
+    """Kullanıcının upload_id için kayıtlı ingestion durumunu döndürür."""
+    with _state_connection() as conn:
+        row = conn.execute(
+            "SELECT * FROM rag_v2_ingest_jobs WHERE owner = ? AND upload_id = ?", (owner, upload_id)
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def _start_job(
+    upload_id: str,
+    owner: str,
+    filename: str,
+    scope: str,
+    file_path: str,
+    file_hash: str,
+    total_pages: int,
+    resume: bool,
+) -> None:
+    """İşi running durumuna alır; resume=False ise checkpoint sıfırlanır (yeni dosya)."""
+    with _state_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO rag_v2_ingest_jobs
+                (upload_id, owner, filename, scope, file_path, file_hash, total_pages, updated_at, worker_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(owner, upload_id) DO UPDATE SET
+                filename = excluded.filename,
+                scope = excluded.scope,
+                file_path = excluded.file_path,
+                file_hash = excluded.file_hash,
+                total_pages = excluded.total_pages,
+                last_page = CASE WHEN ? THEN rag_v2_ingest_jobs.last_page ELSE 0 END,
+                chunks_added = CASE WHEN ? THEN rag_v2_ingest_jobs.chunks_added ELSE 0 END,
+                status = 'running',
+                error = NULL,
+                updated_at = excluded.updated_at,
+                worker_id = excluded.worker_id
+            """,
+            (
+                upload_id, owner, filename, scope, file_path, file_hash, total_pages, time.time(), WORKER_ID,
+                resume, resume,
+            ),
+        )
+
+
+def _checkpoint(upload_id: str, owner: str, last_page: int, chunks_added: int) -> None:
+    with _state_connection() as conn:
+        conn.execute(
+            "UPDATE rag_v2_ingest_jobs SET last_page = ?, chunks_added = ?, updated_at = ? "
+            "WHERE owner = ? AND upload_id = ?",
+            (last_page, chunks_added, time.time(), owner, upload_id),
+        )
+
+
+def _finish_job(upload_id: str, owner: str, status: str, error: str | None = None) -> None:
+    with _state_connection() as conn:
+        conn.execute(
+            "UPDATE rag_v2_ingest_jobs SET status = ?, error = ?, updated_at = ? WHERE owner = ? AND upload_id = ?",
+            (status, error, time.time(), owner, upload_id),
+        )
+
+
+def _worker_is_dead(worker_id: str) -> bool:
+    """İşin sahibi bu host'ta artık çalışmıyor mu? (başka host / bilinmiyorsa False)"""
+    host, _, rest = worker_id.partition(":")
+    pid_text = rest.partition(":")[0]
+    if host != socket.gethostname() or not pid_text.isdigit():
+        return False
+    pid = int(pid_text)
+    if pid == os.getpid():
+        return worker_id != WORKER_ID  # aynı pid, farklı boot: önceki süreç
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False  # pid yaşıyor (ya da yeniden kullanıldı): heartbeat'e bırakılır
+
+
+def _claim_stale_jobs() -> tuple[list[dict[str, Any]], int]:
+    """
+    Crash sonrası yarım kalan işleri sahiplenir: sahibi ölmüş olanları hemen,
+    sahibi bilinmeyenleri heartbeat STALE_JOB_SECONDS'tan eskiyse.
+
+    Çoklu worker ortamında aynı işi iki sürecin almaması için
+    (updated_at, worker_id) üzerinden compare-and-set yapılır.
+
+    Returns:
+        (sahiplenilen işler, başka süreçte hâlâ running görünen iş sayısı)
+    """
+    cutoff = time.time() - STALE_JOB_SECONDS
+    claimed = []
+    waiting = 0
+    with _state_connection() as conn:
+        rows = conn.execute(
+            "SELECT * FROM rag_v2_ingest_jobs WHERE status = 'running' AND worker_id != ?", (WORKER_ID,)
+        ).fetchall()
+        for row in rows:
+            if row["updated_at"] >= cutoff and not _worker_is_dead(row["worker_id"]):
+                waiting += 1
+                continue
+            cur = conn.execute(
+                "UPDATE rag_v2_ingest_jobs SET updated_at = ?, worker_id = ? "
+                "WHERE owner = ? AND upload_id = ? AND updated_at = ? AND worker_id = ?",
+                (time.time(), WORKER_ID, row["owner"], row["upload_id"], row["updated_at"], row["worker_id"]),
+            )
+            if cur.rowcount == 1:
+                claimed.append(dict(row))
+    return claimed, waiting
+
+
+# =============================================================================
+# STAGE 1: SAYFA ÇIKARIMI (Process Pool)
+# =============================================================================
+
+
+def _file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _count_pages(file_path: str) -> int:
+    with open(file_path, "rb") as f:
+        return len(rag_v2.PyPDF2.PdfReader(f).pages)
+
+
+def _extract_page_range(file_path: str, start: int, end: int) -> list[tuple[int, str]]:
+    """
+    [start, end) aralığındaki sayfaların metnini çıkarır.
+
+    Süreç havuzunda çalıştığı için modül seviyesinde ve picklable olmalıdır;
+    PdfReader nesnesi süreçler arası taşınamadığından her görev dosyayı kendisi açar.
+    """
+    import PyPDF2
+
+    pages = []
+    with open(file_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        for idx in range(start, min(end, len(reader.pages))):
+            text = (reader.pages[idx].extract_text() or "").strip()
+            pages.append((idx + 1, text))
+    return pages
+
+
+def _iter_page_blocks(
+    file_path: str, first_page_idx: int, total_pages: int, workers: int, pages_per_task: int
+) -> Iterator[list[tuple[int, str]]]:
+    """
+    Sayfa bloklarını sıralı olarak üretir.
+
+    workers > 1 ise bloklar havuza önden gönderilir; executor.map sırayı koruduğu
+    için tüketici blok N'i yazarken N+1.. paralel çıkarılmaya devam eder.
+    """
+    pages_per_task = max(1, pages_per_task)
+    starts = list(range(first_page_idx, total_pages, pages_per_task))
+    ends = [min(s + pages_per_task, total_pages) for s in starts]
+
+    executor = None
+    if workers > 1 and len(starts) > 1:
+        try:
+            executor = ProcessPoolExecutor(max_workers=min(workers, len(starts)))
+        except (OSError, NotImplementedError) as e:
+            logger.warning(f"[RAG v2 Ingest] Process pool unavailable, extracting in-process: {e}")
+
+    if executor is None:
+        for start, end in zip(starts, ends, strict=True):
+            yield _extract_page_range(file_path, start, end)
+        return
+
+    try:
+        yield from executor.map(_extract_page_range, repeat(file_path), starts, ends)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# =============================================================================
+# STAGE 2-3: CHUNKING + TOPLU YAZMA
+# =============================================================================
+
+
+def _write_batch(collection, ids: list[str], documents: list[str], metadatas: list[dict]) -> None:
+    """
+    Tek batch'i Chroma ve FTS'e yazar.
+
+    Chroma embedding'leri tek çağrıda toplu hesaplar. upsert kullanıldığı için
+    devam (resume) sırasında aynı ID'lerin tekrar yazılması güvenlidir.
+    """
+    collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+    for upload_id, owner in {(meta.get("upload_id"), meta.get("owner")) for meta in metadatas}:
+        if upload_id:
+            rag_v2.invalidate_neighbor_cache(upload_id, owner)
+    if not rag_v2_lexical.add_chunks_to_fts(ids, documents, metadatas):
+        logger.warning(f"[RAG v2 Ingest] FTS batch write failed ({len(ids)} chunks)")
+
+
+def ingest_pdf(
+    file_path: str | Path,
+    filename: str,
+    owner: str,
+    scope: str = "user",
+    upload_id: str | None = None,
+    progress_callback: ProgressCallback | None = None,
+    workers: int | None = None,
+) -> int:
+    """
+    PDF'i aşamalı hat üzerinden indeksler (senkron, thread içinde çağrılabilir).
+
+    Args:
+        upload_id: Devam ettirme anahtarı (owner kapsamında). Aynı kullanıcı aynı
+            dosyayla tekrar çağırırsa son checkpoint'ten devam edilir, tamamlanmış
+            iş tekrar işlenmez; dosya adı veya içeriği farklıysa iş sıfırdan başlar.
+        progress_callback: (pages_done, total_pages, chunks_added) ile çağrılır.
+        workers: Süreç havuzu boyutu (None ise RAG_INGEST_WORKERS).
+
+    Returns:
+        int: Bu upload_id için toplam eklenen chunk sayısı.
+    """
+    from app.config import get_settings
+
+    settings = get_settings()
+    workers = settings.RAG_INGEST_WORKERS if workers is None else workers
+    batch_limit = max(1, settings.RAG_INGEST_BATCH_CHUNKS)
+    upload_id = upload_id or str(uuid.uuid4())
+    path = str(file_path)
+
+    file_hash = _file_sha256(path)
+    job = get_job(upload_id, owner)
+    resume = bool(job) and job["filename"] == filename and job["file_hash"] == file_hash
+    if resume and job["status"] == "complete":
+        logger.info(f"[RAG v2 Ingest] {filename} ({upload_id}) already ingested, skipping.")
+        return job["chunks_added"]
+    if job and not resume:
+        # Aynı upload_id ile farklı dosya: önceki içeriğin chunk'ları yenisine karışmasın
+        logger.info(f"[RAG v2 Ingest] {upload_id} re-used for a different file, starting fresh.")
+        rag_v2.delete_by_upload_id(upload_id, owner)
+
+    start_page = job["last_page"] if resume else 0
+    chunks_added = job["chunks_added"] if resume else 0
+
+    total_pages = _count_pages(path)
+    _start_job(upload_id, owner, filename, scope, path, file_hash, total_pages, resume)
+
+    if start_page:
+        # Son checkpoint'ten sonra FTS'e yazılmış olabilecek yarım batch'i temizle
+        # (Chroma tarafı upsert ile zaten idempotent)
+        rag_v2_lexical.delete_pages_after(upload_id, owner, start_page)
+        logger.info(f"[RAG v2 Ingest] Resuming {filename} ({upload_id}) from page {start_page + 1}/{total_pages}")
+
+    collection = rag_v2._get_rag_v2_collection()
+    safe_filename = rag_v2._sanitize_filename(filename)
+    now = datetime.utcnow().isoformat()
+
+    ids: list[str] = []
+    documents: list[str] = []
+    metadatas: list[dict] = []
+    last_page = start_page
+
+    def _report(pending: int = 0) -> None:
+        if progress_callback:
+            try:
+                progress_callback(last_page, total_pages, chunks_added + pending)
+            except Exception as e:
+                logger.debug(f"[RAG v2 Ingest] Progress callback failed: {e}")
+
+    def _flush() -> None:
+        nonlocal chunks_added, ids, documents, metadatas
+        if ids:
+            _write_batch(collection, ids, documents, metadatas)
+            chunks_added += len(ids)
+            ids, documents, metadatas = [], [], []
+        _checkpoint(upload_id, owner, last_page, chunks_added)
+        _report()
+
+    t0 = time.time()
+    try:
+        blocks = _iter_page_blocks(path, start_page, total_pages, workers, settings.RAG_INGEST_PAGES_PER_TASK)
+        for block in blocks:
+            for page_num, text in block:
+                last_page = page_num
+                if len(text) < MIN_PAGE_CHARS:
+                    continue
+
+                for chunk_idx, (chunk_text, extracted_meta) in enumerate(rag_v2.semantic_chunk_text(text)):
+                    # Deterministic ID: owner:safe_filename:upload_id:pX:cY
+                    ids.append(f"{owner}:{safe_filename}:{upload_id}:p{page_num}:c{chunk_idx}")
+                    documents.append(chunk_text)
+                    metadatas.append(
+                        {
+                            "scope": scope,
+                            "owner": owner,
+                            "source": "upload_v2",
+                            "filename": filename,
+                            "upload_id": upload_id,
+                            "page_number": page_num,
+                            "chunk_index": chunk_idx,
+                            "ingest_date": now,
+                            **extracted_meta,
+                        }
+                    )
+
+                # Batch yalnızca sayfa sınırında kapanır; checkpoint = son tam sayfa
+                if len(ids) >= batch_limit:
+                    _flush()
+
+            _report(pending=len(ids))
+
+        _flush()
+        # Catalog satırı yalnızca tamamlanan iş için yazılır: yarım yükleme listede görünmez
+        try:
+            byte_size = os.path.getsize(path)
+        except OSError:
+            byte_size = 0
+        rag_v2_docs.upsert_document(owner, upload_id, filename, total_pages, chunks_added, byte_size, scope=scope)
+        _finish_job(upload_id, owner, "complete")
+    except Exception as e:
+        _finish_job(upload_id, owner, "failed", f"{type(e).__name__}: {e}")
+        raise
+
+    logger.info(
+        f"[RAG v2 Ingest] {filename}: {chunks_added} chunks from {total_pages} pages "
+        f"in {(time.time() - t0) * 1000:.0f}ms (workers={workers})"
+    )
+    return chunks_added
+
+
+async def ingest_pdf_async(
+    file_path: str | Path,
+    filename: str,
+    owner: str,
+    scope: str = "user",
+    upload_id: str | None = None,
+    notify_username: str | None = None,
+) -> int:
+    """
+    ingest_pdf'in event loop'u bloklamayan sürümü.
+
+    İşlem bir thread'de yürür; ilerleme notify_username'e WebSocket
+    "document_progress" mesajlarıyla iletilir.
+    """
+    from app.core.websockets import send_document_progress
+
+    loop = asyncio.get_running_loop()
+    upload_id = upload_id or str(uuid.uuid4())
+
+    def _notify(pages_done: int, total_pages: int, chunks_added: int) -> None:
+        if notify_username:
+            asyncio.run_coroutine_threadsafe(
+                send_document_progress(
+                    notify_username, upload_id, filename, "processing", pages_done, total_pages, chunks_added
+                ),
+                loop,
+            )
+
+    try:
+        count = await asyncio.to_thread(
+            ingest_pdf, file_path, filename, owner, scope, upload_id, progress_callback=_notify
+        )
+    except Exception as e:
+        if notify_username:
+            await send_document_progress(notify_username, upload_id, filename, "error", error=str(e))
+        raise
+
+    if notify_username:
+        job = get_job(upload_id, owner) or {}
+        total = job.get("total_pages", 0)
+        await send_document_progress(notify_username, upload_id, filename, "complete", total, total, count)
+    return count
+
+
+async def resume_pending_ingestions() -> int:
+    """
+    Crash nedeniyle yarım kalan ingestion işlerini kaldıkları sayfadan sürdürür.
+
+    Uygulama açılışında (lifespan) arka plan görevi olarak çağrılır. Başka bir
+    süreçte running görünen işler kaldıkça (hızlı yeniden başlatmada heartbeat'i
+    henüz eskimemiş yarım iş, ya da çalışan başka worker) tarama
+    RESCAN_SECONDS aralıkla tekrarlanır.
+
+    Returns:
+        int: Sürdürülen iş sayısı.
+    """
+    resumed = 0
+    while True:
+        try:
+            jobs, waiting = await asyncio.to_thread(_claim_stale_jobs)
+        except Exception as e:
+            logger.warning(f"[RAG v2 Ingest] Pending job scan failed: {e}", exc_info=True)
+            return resumed
+
+        done = 0
+        for job in jobs:
+            if not Path(job["file_path"]).exists():
+                _finish_job(job["upload_id"], job["owner"], "failed", "source file missing")
+                continue
+            try:
+                await ingest_pdf_async(
+                    job["file_path"],
+                    job["filename"],
+                    job["owner"],
+                    job["scope"],
+                    upload_id=job["upload_id"],
+                    notify_username=job["owner"],
+                )
+                done += 1
+            except Exception as e:
+                logger.error(f"[RAG v2 Ingest] Resume failed for {job['upload_id']}: {e}", exc_info=True)
+
+        if jobs:
+            logger.info(f"[RAG v2 Ingest] Resumed {done}/{len(jobs)} interrupted ingestions")
+        resumed += done
+        if not waiting:
+            return resumed
+        await asyncio.sleep(RESCAN_SECONDS)
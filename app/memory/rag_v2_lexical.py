@@ -1,37 +1,421 @@
+"""
+RAG v2 Lexical Index (SQLite FTS5)
+==================================
+
+Long-lived lexical index service for hybrid retrieval.
+
+- WAL journal: readers never block the writer (and vice versa).
+- A small pool of read connections shared by concurrent searches.
+- Exactly one writer connection; writes are serialized behind a lock.
+- SQL text is kept constant so each pooled connection prepares a statement
+  once and reuses it from its statement cache.
+- Multi-term queries keep the AND-then-OR semantics: all terms must match,
+  and any-term (OR) matching is used only when the AND query finds nothing.
+  Ranking is FTS5 bm25() weighted on the content column, computed inside
+  SQLite, so cost does not depend on Python work per matching row.
+- Chunk identity lives in an ordinary indexed table (rag_v2_chunks, keyed by
+  chunk id); rag_v2_fts is an external-content index over it, so upserts and
+  per-upload deletes are B-tree lookups instead of virtual-table scans.
+  Legacy self-contained FTS databases are migrated in place on first open.
+"""
+
+import asyncio
 import logging
 import os
-import sqlite3
+import queue
 import re
+import sqlite3
+import threading
+import unicodedata
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+
 from app.memory.query_normalizer import query_normalizer
 
 logger = logging.getLogger(__name__)
 
 DB_PATH = os.path.join("data", "rag_v2_fts.db")
+READ_POOL_SIZE = 4
+STATEMENT_CACHE_SIZE = 64
+TERM_SEPARATOR = "\x1f"
+
+SCHEMA_VERSION = 2
+
+# Chunk kimliği sıradan (indeksli) bir tabloda tutulur; FTS5 tablosu bu tabloyu
+# external content olarak kullanır. Upsert/silme işlemleri B-tree indeksleri
+# üzerinden yapılır, FTS senkronizasyonu tetikleyicilerle rowid bazında olur.
+_SCHEMA_STATEMENTS = (
+    """
+    CREATE TABLE IF NOT EXISTS rag_v2_chunks (
+        id INTEGER PRIMARY KEY,
+        chunk_id TEXT NOT NULL UNIQUE,
+        content TEXT NOT NULL,
+        owner TEXT NOT NULL,
+        scope TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        upload_id TEXT NOT NULL,
+        page_number INTEGER NOT NULL DEFAULT 0,
+        chunk_index INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_rag_v2_chunks_upload ON rag_v2_chunks (upload_id, page_number)",
+    "CREATE INDEX IF NOT EXISTS idx_rag_v2_chunks_owner_file ON rag_v2_chunks (owner, filename)",
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS rag_v2_fts
+    USING fts5(
+        content,
+        owner,
+        scope,
+        filename,
+        upload_id,
+        page_number UNINDEXED,
+        chunk_index UNINDEXED,
+        content='rag_v2_chunks',
+        content_rowid='id',
+        tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS rag_v2_chunks_ai AFTER INSERT ON rag_v2_chunks BEGIN
+        INSERT INTO rag_v2_fts (rowid, content, owner, scope, filename, upload_id, page_number, chunk_index)
+        VALUES (new.id, new.content, new.owner, new.scope, new.filename, new.upload_id, new.page_number, new.chunk_index);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS rag_v2_chunks_ad AFTER DELETE ON rag_v2_chunks BEGIN
+        INSERT INTO rag_v2_fts (rag_v2_fts, rowid, content, owner, scope, filename, upload_id, page_number, chunk_index)
+        VALUES ('delete', old.id, old.content, old.owner, old.scope, old.filename, old.upload_id, old.page_number, old.chunk_index);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS rag_v2_chunks_au AFTER UPDATE ON rag_v2_chunks BEGIN
+        INSERT INTO rag_v2_fts (rag_v2_fts, rowid, content, owner, scope, filename, upload_id, page_number, chunk_index)
+        VALUES ('delete', old.id, old.content, old.owner, old.scope, old.filename, old.upload_id, old.page_number, old.chunk_index);
+        INSERT INTO rag_v2_fts (rowid, content, owner, scope, filename, upload_id, page_number, chunk_index)
+        VALUES (new.id, new.content, new.owner, new.scope, new.filename, new.upload_id, new.page_number, new.chunk_index);
+    END
+    """,
+)
+
+_UPSERT_SQL = """
+INSERT INTO rag_v2_chunks (chunk_id, content, owner, scope, filename, upload_id, page_number, chunk_index)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(chunk_id) DO UPDATE SET
+    content = excluded.content,
+    owner = excluded.owner,
+    scope = excluded.scope,
+    filename = excluded.filename,
+    upload_id = excluded.upload_id,
+    page_number = excluded.page_number,
+    chunk_index = excluded.chunk_index
+"""
+_DELETE_PAGES_AFTER_SQL = "DELETE FROM rag_v2_chunks WHERE upload_id = ? AND +owner = ? AND page_number > ?"
+# +owner: planner upload_id indeksini seçsin (upload başına satır sayısı çok daha az)
+_DELETE_UPLOAD_SQL = "DELETE FROM rag_v2_chunks WHERE upload_id = ? AND +owner = ?"
+_DELETE_FILENAME_SQL = "DELETE FROM rag_v2_chunks WHERE owner = ? AND filename = ?"
+# bm25 kolon ağırlıkları: yalnızca content puanlanır; owner/scope/filename/upload_id
+# sadece filtre olduğundan sıralamaya katılmaz (0.0)
+# Tek sorguda AND-then-OR: OR kolu yalnızca AND kolu boşsa çalışır (NOT EXISTS
+# döngü dışı sabit koşul olarak bir kez değerlendirilir)
+_SEARCH_SQL = """
+WITH and_hits AS (
+    SELECT rowid, bm25(rag_v2_fts, 1.0, 0.0, 0.0, 0.0, 0.0) AS score
+    FROM rag_v2_fts WHERE rag_v2_fts MATCH ?
+),
+hits AS (
+    SELECT rowid, score, 1 AS all_terms FROM and_hits
+    UNION ALL
+    SELECT rowid, bm25(rag_v2_fts, 1.0, 0.0, 0.0, 0.0, 0.0), 0
+    FROM rag_v2_fts WHERE rag_v2_fts MATCH ? AND NOT EXISTS (SELECT 1 FROM and_hits)
+)
+SELECT c.filename, c.page_number, c.chunk_index, c.upload_id, c.content, h.score, c.chunk_id, h.all_terms
+FROM hits h JOIN rag_v2_chunks c ON c.id = h.rowid
+ORDER BY h.all_terms DESC, h.score ASC LIMIT ?
+"""
+
+
+def make_chunk_id(owner: str, filename: str, upload_id: str, page_number: int, chunk_index: int) -> str:
+    """Deterministic chunk id, identical to the Chroma id (owner:safe_filename:upload_id:pX:cY)."""
+    safe_filename = re.sub(r"[^a-zA-Z0-9.\-_]", "_", filename or "")
+    return f"{owner}:{safe_filename}:{upload_id}:p{page_number}:c{chunk_index}"
+
+
+def _fold(text: str) -> str:
+    """Mirror unicode61 case/diacritic folding so Python term checks agree with FTS5."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def _tokens(text: str) -> list[str]:
+    return re.findall(r"\w+", _fold(text))
+
+
+@lru_cache(maxsize=256)
+def _parse_terms(terms: str) -> tuple[tuple[str, ...], ...]:
+    return tuple(tuple(_tokens(t)) for t in terms.split(TERM_SEPARATOR) if t)
+
+
+def _term_hits(content: str | None, terms: str) -> int:
+    """Number of query terms whose tokens all occur in the chunk (OR fallback rows only)."""
+    parsed = _parse_terms(terms)
+    if not content or not parsed:
+        return 0
+    content_tokens = set(_tokens(content))
+    return sum(1 for term in parsed if term and all(tok in content_tokens for tok in term))
+
+
+class LexicalIndex:
+    """Pooled FTS5 index: WAL read pool + single serialized writer."""
 
+    def __init__(self, db_path: str = DB_PATH, pool_size: int = READ_POOL_SIZE):
+        self.db_path = db_path
+        self.pool_size = max(1, pool_size)
+        self._readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer: sqlite3.Connection | None = None
+        self._closed = False
 
-def _get_connection():
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        """Create the schema, migrating a legacy (self-contained FTS) index in place."""
+        with self.writer() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            legacy = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'rag_v2_fts'"
+            ).fetchone() and not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'rag_v2_chunks'"
+            ).fetchone()
+            if legacy:
+                self._migrate_legacy(conn)
+            else:
+                for stmt in _SCHEMA_STATEMENTS:
+                    conn.execute(stmt)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def _migrate_legacy(conn: sqlite3.Connection) -> None:
+        """
+        v1 → v2: copy rows out of the contentful FTS table into rag_v2_chunks,
+        recreate rag_v2_fts as external content and rebuild it.
+        Legacy duplicates (append-only inserts) collapse onto one chunk_id.
+        """
+        rows = conn.execute(
+            "SELECT content, owner, scope, filename, upload_id, page_number, chunk_index FROM rag_v2_fts ORDER BY rowid"
+        ).fetchall()
+        conn.execute("ALTER TABLE rag_v2_fts RENAME TO rag_v2_fts_legacy")
+        # Önce yalnızca içerik tablosu + indeksler: kopyalama tetikleyicisiz yapılır,
+        # FTS tek bir 'rebuild' ile doldurulur
+        for stmt in _SCHEMA_STATEMENTS[:3]:
+            conn.execute(stmt)
+        conn.executemany(
+            _UPSERT_SQL,
+            (
+                (
+                    make_chunk_id(owner, filename, upload_id, int(page or 0), int(chunk or 0)),
+                    content or "",
+                    owner or "",
+                    scope or "user",
+                    filename or "",
+                    upload_id or "",
+                    int(page or 0),
+                    int(chunk or 0),
+                )
+                for content, owner, scope, filename, upload_id, page, chunk in rows
+            ),
+        )
+        conn.execute("DROP TABLE rag_v2_fts_legacy")
+        for stmt in _SCHEMA_STATEMENTS[3:]:
+            conn.execute(stmt)
+        conn.execute("INSERT INTO rag_v2_fts (rag_v2_fts) VALUES ('rebuild')")
+        logger.info(f"[RAG v2 Lexical] Migrated {len(rows)} legacy FTS rows to chunk-id keyed index")
+
+    def rebuild(self) -> None:
+        """Rebuild and optimize the FTS index from rag_v2_chunks."""
+        with self.writer() as conn:
+            conn.execute("INSERT INTO rag_v2_fts (rag_v2_fts) VALUES ('rebuild')")
+            conn.execute("INSERT INTO rag_v2_fts (rag_v2_fts) VALUES ('optimize')")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path, timeout=10, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled read connection (blocks when all are in use)."""
+        conn = None
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._reader_lock:
+                if self._reader_count < self.pool_size:
+                    self._reader_count += 1
+                    conn = self._connect()
+            if conn is None:
+                conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                self._readers.put(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Serialized write transaction on the single writer connection."""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def close(self) -> None:
+        self._closed = True
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+    # -------------------------------------------------------------------------
+    # Writes
+    # -------------------------------------------------------------------------
+
+    def add_chunks(self, ids: list[str], documents: list[str], metadatas: list[dict]) -> None:
+        rows = []
+        for i, doc in enumerate(documents):
+            meta = metadatas[i]
+            rows.append(
+                (
+                    ids[i],
+                    doc,
+                    meta.get("owner", ""),
+                    meta.get("scope", "user"),
+                    meta.get("filename", ""),
+                    meta.get("upload_id", ""),
+                    meta.get("page_number", 0),
+                    meta.get("chunk_index", 0),
+                )
+            )
+        with self.writer() as conn:
+            conn.executemany(_UPSERT_SQL, rows)
+
+    def upsert(
+        self,
+        owner: str,
+        scope: str,
+        filename: str,
+        upload_id: str,
+        page_number: int,
+        chunk_index: int,
+        content: str,
+        chunk_id: str | None = None,
+    ) -> None:
+        chunk_id = chunk_id or make_chunk_id(owner, filename, upload_id, page_number, chunk_index)
+        with self.writer() as conn:
+            conn.execute(_UPSERT_SQL, (chunk_id, content, owner, scope, filename, upload_id, page_number, chunk_index))
+
+    def delete_pages_after(self, upload_id: str, owner: str, page_number: int) -> None:
+        with self.writer() as conn:
+            conn.execute(_DELETE_PAGES_AFTER_SQL, (upload_id, owner, page_number))
+
+    def delete_upload(self, upload_id: str, owner: str) -> int:
+        with self.writer() as conn:
+            return conn.execute(_DELETE_UPLOAD_SQL, (upload_id, owner)).rowcount
+
+    def delete_filename(self, filename: str, owner: str) -> int:
+        with self.writer() as conn:
+            return conn.execute(_DELETE_FILENAME_SQL, (owner, filename)).rowcount
+
+    # -------------------------------------------------------------------------
+    # Search
+    # -------------------------------------------------------------------------
+
+    def search(self, query: str, owner: str, scope: str, top_k: int = 50) -> list[dict]:
+        # 1. Merkezi normalizasyon ve temizlik (Generalized)
+        sanitized_query = query_normalizer.sanitize_for_fts(query)
+        if not sanitized_query:
+            return []
+
+        terms = sanitized_query.split()
+        # Özel karakterler (157/1) için kelimeleri tırnak içine alıyoruz
+        quoted = [f'"{w}"' for w in terms]
+
+        def _fts_query(operator: str) -> str:
+            # Değerleri çift tırnak içine alarak güvenli hale getiriyoruz
+            return f'content:({f" {operator} ".join(quoted)}) AND owner:"{owner}" AND scope:"{scope}"'
+
+        with self.reader() as conn:
+            # Önce tüm kelimeler (AND); sonuç yoksa herhangi biri (OR) — tek round trip
+            rows = conn.execute(_SEARCH_SQL, (_fts_query("AND"), _fts_query("OR"), top_k)).fetchall()
+
+        joined_terms = TERM_SEPARATOR.join(terms)
+        # SQLite FTS5 bm25(): the lower the value, the more relevant the result.
+        return [
+            {
+                "filename": row[0],
+                "page_number": int(row[1]) if row[1] is not None else 0,
+                "chunk_index": int(row[2]) if row[2] is not None else 0,
+                "upload_id": row[3],
+                "text": row[4],
+                "bm25_score": row[5],
+                "matched_terms": len(terms) if row[7] else _term_hits(row[4], joined_terms),
+                "all_terms_matched": bool(row[7]),
+                "chunk_id": row[6],
+            }
+            for row in rows
+        ]
+
+
+_index: LexicalIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> LexicalIndex:
+    """Process-wide lexical index (created lazily, schema ensured on first use)."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LexicalIndex(DB_PATH)
+    return _index
+
+
+def close_lexical_index() -> None:
+    """Close pooled connections (app shutdown)."""
+    global _index
+    with _index_lock:
+        if _index is not None:
+            _index.close()
+            _index = None
 
 
 def init_fts():
     """Initialize FTS5 virtual table."""
     try:
-        with _get_connection() as conn:
-            # Check if FTS5 is supported is implied by success of this query
-            conn.execute("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS rag_v2_fts
-            USING fts5(
-                content,
-                owner,
-                scope,
-                filename,
-                upload_id,
-                page_number UNINDEXED,
-                chunk_index UNINDEXED,
-                tokenize='unicode61'
-            );
-            """)
+        get_lexical_index()
     except Exception as e:
         logger.warning(f"[RAG v2 Lexical] Init failed (FTS5 might be missing): {e}", exc_info=True)
 
@@ -42,39 +426,44 @@ def add_chunks_to_fts(
     metadatas: list[dict],
 ) -> bool:
     """
-    Batch insert chunks into FTS index.
+    Batch insert chunks into FTS index (single transaction).
     """
     try:
-        with _get_connection() as conn:
-            data = []
-            for i, doc in enumerate(documents):
-                meta = metadatas[i]
-                data.append(
-                    (
-                        doc,
-                        meta.get("owner", ""),
-                        meta.get("scope", "user"),
-                        meta.get("filename", ""),
-                        meta.get("upload_id", ""),
-                        meta.get("page_number", 0),
-                        meta.get("chunk_index", 0),
-                    )
-                )
-
-            conn.executemany(
-                """
-                INSERT INTO rag_v2_fts (
-                    content, owner, scope, filename, upload_id, page_number, chunk_index
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-                data,
-            )
-            return True
+        get_lexical_index().add_chunks(ids, documents, metadatas)
+        return True
     except Exception as e:
         logger.error(f"[RAG v2 Lexical] Batch add failed: {e}")
         return False
 
 
+def delete_pages_after(upload_id: str, owner: str, page_number: int) -> bool:
+    """Remove an owner's FTS rows of an upload beyond a page (resume cleanup for partial batches)."""
+    try:
+        get_lexical_index().delete_pages_after(upload_id, owner, page_number)
+        return True
+    except Exception as e:
+        logger.warning(f"[RAG v2 Lexical] Partial page cleanup failed: {e}", exc_info=True)
+        return False
+
+
+def delete_by_upload_id(upload_id: str, owner: str) -> int:
+    """Remove all FTS rows of an upload."""
+    try:
+        return get_lexical_index().delete_upload(upload_id, owner)
+    except Exception as e:
+        logger.warning(f"[RAG v2 Lexical] Delete by upload_id failed: {e}", exc_info=True)
+        return 0
+
+
+def delete_by_filename(filename: str, owner: str) -> int:
+    """Remove all FTS rows of a filename."""
+    try:
+        return get_lexical_index().delete_filename(filename, owner)
+    except Exception as e:
+        logger.warning(f"[RAG v2 Lexical] Delete by filename failed: {e}", exc_info=True)
+        return 0
+
+
 def upsert_chunk(
     owner: str,
     scope: str,
@@ -83,108 +472,42 @@ def upsert_chunk(
     page_number: int,
     chunk_index: int,
     content: str,
+    chunk_id: str | None = None,
 ) -> bool:
-    """Insert or replace chunk in FTS index."""
+    """Insert or replace chunk in FTS index (keyed by chunk id, indexed lookup)."""
     try:
-        with _get_connection() as conn:
-            # FTS5 does not support primary keys directly in the same way for upsert usually.
-            # But we can just redundant insert or delete-then-insert.
-            # To avoid duplicates if we re-ingest, best to delete matches first by ID if we had one.
-            # Here we identify by specific fields.
-
-            # Simple approach: Delete row if exact match exists (not robust without explicit ID)
-            # But FTS tables have implicit rowid.
-            # We will just INSERT. Users should clear DB if re-ingesting fully or we handle it upstream.
-            # For this task: Simple INSERT.
-
-            # Better: use a separate lookup table? No, keep it simple.
-            # Let's try to delete matching chunk first to support "update".
-            # "DELETE FROM rag_v2_fts WHERE filename=? AND chunk_index=? ..." is slow on FTS.
-            # FTS is designed for text search, not structured updates.
-            # Delete existing exact match to avoid duplicates (Append-only fix)
-            conn.execute(
-                """
-                DELETE FROM rag_v2_fts
-                WHERE owner=? AND scope=? AND filename=? AND upload_id=? AND page_number=? AND chunk_index=?
-                """,
-                (owner, scope, filename, upload_id, page_number, chunk_index),
-            )
-
-            conn.execute(
-                "INSERT INTO rag_v2_fts (content, owner, scope, filename, upload_id, page_number, chunk_index) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (content, owner, scope, filename, upload_id, page_number, chunk_index),
-            )
+        get_lexical_index().upsert(owner, scope, filename, upload_id, page_number, chunk_index, content, chunk_id)
         return True
     except Exception as e:
         logger.warning(f"[RAG v2 Lexical] Upsert failed: {e}", exc_info=True)
         return False
 
 
-def lexical_search(query: str, owner: str, scope: str, top_k: int = 50) -> list[dict]:
-    """
-    Perform legacy lexical search using FTS5 and BM25 ranking (simulated or built-in).
-    SQLite FTS5 has 'bm25(rag_v2_fts)' function.
-    """
+def rebuild_fts_index() -> bool:
+    """Rebuild + optimize the FTS index in place from the chunk table."""
     try:
-        # 1. Merkezi normalizasyon ve temizlik (Generalized)
-        sanitized_query = query_normalizer.sanitize_for_fts(query)
-
-        if not sanitized_query:
-            return []
-
-        with _get_connection() as conn:
-            # FTS5'te arama: Tüm kelimeler geçmeli (AND) 
-            # Özel karakterler (157/1) için kelimeleri tırnak içine alıyoruz
-            words = [f'"{w}"' for w in sanitized_query.split()]
-            if len(words) > 1:
-                content_query = " AND ".join(words)
-            else:
-                content_query = words[0]
+        get_lexical_index().rebuild()
+        return True
+    except Exception as e:
+        logger.error(f"[RAG v2 Lexical] Rebuild failed: {e}", exc_info=True)
+        return False
 
-            # MATCH formatı: content:... AND owner:...
-            # Değerleri çift tırnak içine alarak güvenli hale getiriyoruz
-            fts_query = f'content:({content_query}) AND owner:"{owner}" AND scope:"{scope}"'
-
-            def perform_query(q):
-                return conn.execute(
-                    """
-                    SELECT filename, page_number, chunk_index, upload_id, content, bm25(rag_v2_fts) as score
-                    FROM rag_v2_fts WHERE rag_v2_fts MATCH ? ORDER BY score ASC LIMIT ?
-                    """,
-                    (q, top_k),
-                ).fetchall()
-
-            rows = perform_query(fts_query)
-            
-            # FALLBACK: AND ile sonuç yoksa OR dene
-            if not rows and len(words) > 1:
-                logger.info(f"[RAG Lexical] No AND results for '{content_query}', falling back to OR")
-                content_query_or = " OR ".join(words)
-                fts_query_or = f'content:({content_query_or}) AND owner:"{owner}" AND scope:"{scope}"'
-                rows = perform_query(fts_query_or)
-
-            results = []
-            for row in rows:
-                # bm25 in sqlite fts5: smaller is better (more negative usually or close to 0?)
-                # Actually sqlite bm25 returns negative values (more negative is better) OR
-                # positive values where smaller is better?
-                # Standard BM25 is Higher is Better.
-                # SQLite FTS5 `bm25()` returns a score where *smaller* (more negative) is better?
-                # Documentation says: "The lower the value, the more relevant the result."
-
-                results.append(
-                    {
-                        "filename": row[0],
-                        "page_number": int(row[1]) if row[1] is not None else 0,
-                        "chunk_index": int(row[2]) if row[2] is not None else 0,
-                        "upload_id": row[3],
-                        "text": row[4],
-                        "bm25_score": row[5],
-                    }
-                )
 
-            return results
+def lexical_search(query: str, owner: str, scope: str, top_k: int = 50) -> list[dict]:
+    """
+    Lexical search using FTS5 + BM25.
 
+    Single round trip: chunks containing every query term (AND MATCH) ranked
+    by bm25; only when there are none, chunks containing any term (OR MATCH).
+    OR rows carry all_terms_matched=False and a Python-side matched_terms count.
+    """
+    try:
+        return get_lexical_index().search(query, owner, scope, top_k)
     except Exception as e:
         logger.warning(f"[RAG v2 Lexical] Search failed: {e}", exc_info=True)
         return []
+
+
+async def lexical_search_async(query: str, owner: str, scope: str, top_k: int = 50) -> list[dict]:
+    """Event loop'u bloklamadan lexical_search (pooled connection, worker thread)."""
+    return await asyncio.to_thread(lexical_search, query, owner, scope, top_k)
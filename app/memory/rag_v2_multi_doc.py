@@ -77,7 +77,7 @@ async def generate_multi_doc_summary(
             - sources_breakdown: List of {filename, upload_id, chunk_count}
             - total_docs: Number of unique documents used
     """
-    from app.providers.llm.groq import GroqProvider
+    from app.providers.llm.registry import get_provider
     
     # Group by document
     docs_map: Dict[str, List[Dict]] = {}
@@ -130,7 +130,7 @@ async def generate_multi_doc_summary(
     
     # Generate comparative summary
     try:
-        provider = GroqProvider()
+        provider = get_provider("groq")
         
         prompt = f"""Kullanıcı Sorusu: "{query}"
 
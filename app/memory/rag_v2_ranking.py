@@ -0,0 +1,158 @@
+"""
+RAG v2 Ranking (Rank Fusion)
+============================
+
+Retriever sonuçlarını (dense, lexical, arşiv, hafıza...) Reciprocal Rank
+Fusion ile birleştiren yeniden kullanılabilir katman.
+
+- Aday başına dict yerine paralel diziler: anahtarlar (list) + skorlar (np.ndarray)
+- Sıralama, RRF katkısı ve normalizasyon NumPy üzerinde tek geçişte
+- İkiden fazla retriever, retriever başına ağırlık
+- Aday payload'ları kopyalanmaz; sonuç her retriever'daki orijinal
+  konumu (ya da -1) taşır, çağıran yalnızca gerektiğinde dict üretir
+
+Örnek:
+    fused = rrf_fuse([
+        RankedList.from_items("dense", dense, key=chunk_key, score="score"),
+        RankedList.from_items("lexical", lexical, key=chunk_key, score="bm25_score", weight=1.5),
+    ])
+    for i in range(len(fused)):
+        dense_pos = fused.positions[0][i]
+"""
+
+from collections.abc import Callable, Hashable, Sequence
+from dataclasses import dataclass, field
+from operator import itemgetter
+from typing import Any
+
+import numpy as np
+
+RRF_K = 60
+
+
+@dataclass
+class RankedList:
+    """
+    Tek bir retriever'ın sonuçları (paralel diziler).
+
+    scores: ham skor; higher_is_better=False ise küçük değer daha iyi
+    (Chroma distance, FTS5 bm25). Rank, skora göre kararlı sıralamayla
+    hesaplanır; eşit skorlar giriş sırasını korur.
+    """
+
+    name: str
+    keys: list[Hashable]
+    scores: np.ndarray
+    weight: float = 1.0
+    higher_is_better: bool = False
+
+    @classmethod
+    def from_items(
+        cls,
+        name: str,
+        items: Sequence[dict[str, Any]],
+        key: Callable[[dict[str, Any]], Hashable],
+        score: str,
+        weight: float = 1.0,
+        higher_is_better: bool = False,
+    ) -> "RankedList":
+        """items'tan paralel diziler; `score` alanı her öğede bulunmalı."""
+        return cls(
+            name=name,
+            keys=list(map(key, items)),
+            scores=np.fromiter(map(itemgetter(score), items), dtype=np.float64, count=len(items)),
+            weight=weight,
+            higher_is_better=higher_is_better,
+        )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+@dataclass
+class FusedRanking:
+    """
+    Birleşik sıralama (en iyi → en kötü).
+
+    keys: benzersiz aday anahtarları
+    rrf: ağırlıklı RRF skoru (büyük daha iyi)
+    hybrid: 1 - rrf/max(rrf), distance benzeri 0..1 (küçük daha iyi)
+    positions[j][i]: i. adayın j. retriever listesindeki konumu, yoksa -1
+    """
+
+    keys: list[Hashable]
+    rrf: np.ndarray
+    hybrid: np.ndarray
+    positions: list[np.ndarray] = field(default_factory=list)
+    names: list[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def matched(self, name: str) -> np.ndarray:
+        """Boolean mask: aday verilen retriever'da var mı."""
+        return self.positions[self.names.index(name)] >= 0
+
+
+def rrf_fuse(lists: Sequence[RankedList], k: int = RRF_K) -> FusedRanking:
+    """
+    Weighted Reciprocal Rank Fusion: score(d) = Σ w_j / (k + rank_j(d)).
+
+    Eşitlikte, aday hangi retriever'larda bulunuyorsa onların ağırlık toplamı
+    büyük olan önce gelir (ör. lexical 1.5x ağırlıkla FTS eşleşmesi önde),
+    sonra ilk görülme sırası. Python tarafında yalnızca anahtarlar slotlara
+    çevrilir; rank, katkı ve normalizasyon sabit sayıda NumPy çağrısıdır.
+    """
+    names = [ranked.name for ranked in lists]
+    lengths = np.array([len(ranked) for ranked in lists], dtype=np.int64)
+    all_keys = [key for ranked in lists for key in ranked.keys]
+    # Anahtar → slot: her anahtar tek kez hash'lenir (yeni anahtar sıradaki slotu alır)
+    key_index: dict[Hashable, int] = {}
+    slots = np.array([key_index.setdefault(key, len(key_index)) for key in all_keys], dtype=np.int64)
+    unique_keys = list(key_index)
+    n = len(unique_keys)
+    if n == 0:
+        empty = np.zeros(0, dtype=np.float64)
+        return FusedRanking(keys=[], rrf=empty, hybrid=empty,
+                            positions=[np.zeros(0, dtype=np.int64) for _ in lists], names=names)
+
+    # Tüm listeler tek düz dizide: (liste no, liste içi konum, aday slotu, işaretli skor)
+    list_ids = np.repeat(np.arange(len(lists)), lengths)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    local_pos = np.arange(len(all_keys)) - starts[list_ids]
+    signed = np.concatenate([
+        -ranked.scores if ranked.higher_is_better else ranked.scores for ranked in lists
+    ])
+    weights = np.array([ranked.weight for ranked in lists], dtype=np.float64)
+
+    # Liste içinde skora göre kararlı sıralama → rank (1-tabanlı)
+    by_score = np.lexsort((signed, list_ids))
+    ranks = np.empty(len(all_keys), dtype=np.int64)
+    ranks[by_score] = np.arange(len(all_keys)) - starts[list_ids[by_score]] + 1
+
+    item_weights = weights[list_ids]
+    rrf = np.bincount(slots, weights=(1.0 / (k + ranks)) * item_weights, minlength=n)
+    matched_weight = np.bincount(slots, weights=item_weights, minlength=n)
+
+    # Her listede adayın ilk konumu (ters atama: ilk görülen en son yazılır)
+    positions = np.full((len(lists), n), -1, dtype=np.int64)
+    positions[list_ids[::-1], slots[::-1]] = local_pos[::-1]
+
+    order = np.lexsort((np.arange(n), -matched_weight, -rrf))
+    rrf = rrf[order]
+    max_rrf = rrf[0]
+    hybrid = 1.0 - rrf / max_rrf if max_rrf > 0 else np.ones(n, dtype=np.float64)
+    order_list = order.tolist()
+
+    return FusedRanking(
+        keys=[unique_keys[i] for i in order_list],
+        rrf=rrf,
+        hybrid=hybrid,
+        positions=list(positions[:, order]),
+        names=names,
+    )
+
+
+# Doküman chunk kimliği: (upload_id, page_number, chunk_index).
+# itemgetter C tarafında tuple üretir; dense ve lexical adaylarda üç alan da her zaman var.
+chunk_key = itemgetter("upload_id", "page_number", "chunk_index")
@@ -0,0 +1,204 @@
+"""
+RAG v2 Rerankers (Deep Mode)
+============================
+
+search_documents_v2 deep mode'da adayları yeniden sıralayan takılabilir katman.
+
+- LexicalFeatureReranker: CPU-only, ağ çağrısı yok. Sorgu/chunk arasındaki
+  lexical özellikler (terim kapsamı, ardışık terim çiftleri, _extract_patterns
+  tanımlayıcıları, başlık eşleşmesi) + retrieval skoru tek matriste NumPy ile
+  puanlanır. Süre bütçesi aşılırsa kalan adaylar sırası korunarak eklenir.
+- LLMReranker: mevcut Groq tabanlı _rerank_with_llm.
+- CascadeReranker: önce yerel; güven düşükse LLM'e düşer.
+
+Seçim: settings.RAG_RERANKER (local | llm | cascade).
+"""
+
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from app.memory.rag_v2_lexical import _fold, _tokens
+
+logger = logging.getLogger(__name__)
+
+# Özellik sırası: coverage, bigram, identifier, header, retrieval prior
+FEATURE_WEIGHTS = np.array([0.45, 0.15, 0.20, 0.05, 0.15])
+MARGIN_SCALE = 0.15
+MIN_TOKEN_LEN = 2
+
+
+@dataclass
+class RerankResult:
+    candidates: list[dict[str, Any]]
+    reranker: str
+    confidence: float = 1.0
+    latency_ms: float = 0.0
+    scored: int = 0
+
+
+class BaseReranker(ABC):
+    """Reranker arayüzü: aday listesini yeniden sıralar, kopyalamaz."""
+
+    name = "base"
+
+    @abstractmethod
+    async def rerank(self, query: str, candidates: list[dict[str, Any]]) -> RerankResult:
+        pass
+
+
+class LexicalFeatureReranker(BaseReranker):
+    """
+    Yerel, CPU-only reranker.
+
+    Güven (0-1): en iyi adayın terim kapsamı ile ilk iki skor arasındaki
+    farkın birleşimi. Sorgu terimleri en iyi adayda tam bulunuyor ve ikinciden
+    belirgin ayrışıyorsa yüksektir.
+    """
+
+    name = "local"
+
+    def __init__(self, latency_budget_ms: float = 50.0, max_candidates: int = 50):
+        self.latency_budget_ms = latency_budget_ms
+        self.max_candidates = max_candidates
+
+    async def rerank(self, query: str, candidates: list[dict[str, Any]]) -> RerankResult:
+        return self.rerank_sync(query, candidates)
+
+    def rerank_sync(self, query: str, candidates: list[dict[str, Any]]) -> RerankResult:
+        start = time.perf_counter()
+        if not candidates:
+            return RerankResult([], self.name, confidence=0.0)
+
+        from app.memory.rag_v2 import _extract_patterns
+
+        q_tokens = [t for t in dict.fromkeys(_tokens(query)) if len(t) >= MIN_TOKEN_LEN]
+        if not q_tokens:
+            return RerankResult(candidates, self.name, confidence=0.0)
+        q_set = set(q_tokens)
+        q_bigrams = set(zip(q_tokens, q_tokens[1:], strict=False))
+        q_ids = [_fold(i) for i in _extract_patterns(query)["identifiers"].split(",") if i]
+
+        deadline = start + self.latency_budget_ms / 1000
+        pool = candidates[: self.max_candidates]
+        rows = []
+        for cand in pool:
+            # Bütçe kontrolü: en az bir aday her zaman puanlanır
+            if rows and time.perf_counter() > deadline:
+                break
+            rows.append(self._features(cand, q_set, q_bigrams, q_ids))
+
+        features = np.array(rows, dtype=np.float64)
+        scores = features @ FEATURE_WEIGHTS
+        order = np.argsort(-scores, kind="stable").tolist()
+
+        reranked = [pool[i] for i in order]
+        for i, score in zip(order, scores[order].tolist(), strict=True):
+            pool[i]["rerank_score"] = score
+        reranked.extend(candidates[len(rows):])
+
+        top = scores[order[0]]
+        margin = top - scores[order[1]] if len(order) > 1 else MARGIN_SCALE
+        confidence = 0.6 * features[order[0], 0] + 0.4 * min(1.0, max(0.0, margin) / MARGIN_SCALE)
+        if len(rows) < len(pool):
+            # Bütçe aşıldı: puanlanmayan adaylar olduğu için güven düşürülür
+            confidence *= len(rows) / len(pool)
+
+        return RerankResult(
+            reranked,
+            self.name,
+            confidence=float(confidence),
+            latency_ms=(time.perf_counter() - start) * 1000,
+            scored=len(rows),
+        )
+
+    @staticmethod
+    def _features(cand: dict[str, Any], q_set: set[str], q_bigrams: set[tuple[str, str]], q_ids: list[str]) -> list[float]:
+        text = cand.get("text") or ""
+        c_tokens = _tokens(text)
+        c_set = set(c_tokens)
+        coverage = len(q_set & c_set) / len(q_set)
+
+        bigram = 0.0
+        if q_bigrams:
+            bigram = len(q_bigrams & set(zip(c_tokens, c_tokens[1:], strict=False))) / len(q_bigrams)
+
+        identifier = 0.0
+        if q_ids:
+            folded = _fold(text)
+            identifier = sum(1 for i in q_ids if i in folded) / len(q_ids)
+
+        header_text = cand.get("headers") or text.split("\n", 1)[0][:100]
+        header = len(q_set & set(_tokens(header_text))) / len(q_set)
+
+        if cand.get("hybrid_score") is not None:
+            prior = 1.0 - float(cand["hybrid_score"])
+        else:
+            prior = 1.0 - min(1.0, float(cand.get("score") or 0.0))
+
+        return [coverage, bigram, identifier, header, prior]
+
+
+class LLMReranker(BaseReranker):
+    """Groq tabanlı anlamsal reranker (ağ çağrısı, bütçe tüketir)."""
+
+    name = "llm"
+
+    async def rerank(self, query: str, candidates: list[dict[str, Any]]) -> RerankResult:
+        from app.memory.rag_v2 import _rerank_with_llm
+
+        start = time.perf_counter()
+        reranked = await _rerank_with_llm(query, candidates)
+        return RerankResult(
+            reranked, self.name, latency_ms=(time.perf_counter() - start) * 1000, scored=min(len(candidates), 15)
+        )
+
+
+class CascadeReranker(BaseReranker):
+    """Yerel reranker; güven eşiğin altındaysa yerel sırayı LLM'e verir."""
+
+    name = "cascade"
+
+    def __init__(self, local: BaseReranker, fallback: BaseReranker, min_confidence: float = 0.55):
+        self.local = local
+        self.fallback = fallback
+        self.min_confidence = min_confidence
+
+    async def rerank(self, query: str, candidates: list[dict[str, Any]]) -> RerankResult:
+        local = await self.local.rerank(query, candidates)
+        if local.confidence >= self.min_confidence:
+            return local
+
+        logger.info(
+            f"[RAG Reranker] Local confidence {local.confidence:.2f} < {self.min_confidence:.2f}, falling back to LLM"
+        )
+        fallback = await self.fallback.rerank(query, local.candidates)
+        fallback.reranker = f"{self.local.name}+{fallback.reranker}"
+        fallback.confidence = local.confidence
+        fallback.latency_ms += local.latency_ms
+        return fallback
+
+
+def get_reranker() -> BaseReranker:
+    """Ayarlara göre reranker (ayarlar okunamazsa cascade)."""
+    kind, budget_ms, min_confidence = "cascade", 50, 0.55
+    try:
+        from app.config import get_settings
+
+        settings = get_settings()
+        kind = settings.RAG_RERANKER
+        budget_ms = settings.RAG_RERANK_LATENCY_BUDGET_MS
+        min_confidence = settings.RAG_RERANK_MIN_CONFIDENCE
+    except Exception as e:
+        logger.warning(f"[RAG Reranker] Settings unavailable, using cascade: {e}")
+
+    if kind == "llm":
+        return LLMReranker()
+    local = LexicalFeatureReranker(latency_budget_ms=budget_ms)
+    if kind == "local":
+        return local
+    return CascadeReranker(local, LLMReranker(), min_confidence=min_confidence)
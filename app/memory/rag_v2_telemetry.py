@@ -32,6 +32,12 @@ class RAGV2Stats:
     latency_ms_dense: int = 0
     latency_ms_lexical: int = 0
     latency_ms_merge: int = 0
+    latency_ms_embed: int = 0
+    dense_passes: int = 0
+    query_embedded_once: bool = False
+    latency_ms_rerank: int = 0
+    reranker_used: str | None = None
+    rerank_confidence: float | None = None
     timestamp: str = ""
     deep_fallback_triggered: bool = False
     expansion_used: bool = False
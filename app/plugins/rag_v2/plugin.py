@@ -156,25 +156,18 @@ class RagV2Plugin:
             MAX_CHUNK_CHARS = 650
             GUARD_TEXT = "⚠️ Aşağıdaki bilgiler BELGE KANITIDIR. Bu kanıtlar dışında cevap üretme."
 
+            # İlk 2 adayın komşuları tek toplu çağrıda (ID bazlı, sayfa cache'li)
+            top_hits = [c for c in candidates[:2] if c.get("chunk_index") is not None]
+            try:
+                neighbor_lists = rag_v2.expand_neighbors_batch(owner=owner, scope=scope, hits=top_hits, radius=1)
+            except Exception:
+                neighbor_lists = [[] for _ in top_hits]
+            neighbors_by_hit = {id(hit): n for hit, n in zip(top_hits, neighbor_lists, strict=True)}
+
             final_pool = []
-            for i, cand in enumerate(candidates):
+            for cand in candidates:
                 final_pool.append(cand)
-                if i < 2:
-                    c_idx = cand.get("chunk_index")
-                    if c_idx is not None:
-                        try:
-                            neighbors = rag_v2.expand_neighbors(
-                                owner=owner,
-                                scope=scope,
-                                filename=cand.get("filename", ""),
-                                page_number=cand.get("page_number", 0),
-                                chunk_index=c_idx,
-                                radius=1,
-                            )
-                            if neighbors:
-                                final_pool.extend(neighbors)
-                        except Exception:
-                            pass
+                final_pool.extend(neighbors_by_hit.get(id(cand), ()))
 
             evidence_lines = []
             seen = set()
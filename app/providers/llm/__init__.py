@@ -1,4 +1,5 @@
 from app.providers.llm.gemini import GeminiProvider
 from app.providers.llm.groq import GroqProvider
+from app.providers.llm.registry import get_provider, provider_registry
 
-__all__ = ["GeminiProvider", "GroqProvider"]
+__all__ = ["GeminiProvider", "GroqProvider", "get_provider", "provider_registry"]
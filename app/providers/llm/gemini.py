@@ -102,6 +102,7 @@ class GeminiProvider(BaseLLMProvider):
 
             duration = time.time() - start_time
             result_text = response.text
+            _report_usage(kwargs.get("usage"), response)
 
             # Emit Success Telemetry
             if telemetry:
@@ -188,11 +189,20 @@ class GeminiProvider(BaseLLMProvider):
             ):
                 if chunk.text:
                     yield chunk.text
+                _report_usage(kwargs.get("usage"), chunk)  # usage_metadata kümülatif, sonuncusu geçerli
 
         except Exception as e:
             logger.error(f"[Gemini] Streaming failed: {e}")
             raise e
 
 
+def _report_usage(usage_sink, response) -> None:
+    """Copies usage_metadata into a TokenUsage sink when the caller passed one."""
+    metadata = getattr(response, "usage_metadata", None)
+    if usage_sink is None or metadata is None or metadata.prompt_token_count is None:
+        return
+    usage_sink.update(metadata.prompt_token_count, metadata.candidates_token_count)
+
+
 # REDUNDANT ADAPTER REMOVED
 # Use app.core.llm.adapters.gemini_adapter for centralized LLM calls
@@ -1,6 +1,7 @@
 import time
 import logging
 from typing import Any, Dict, Optional
+import httpx
 from groq import AsyncGroq
 from app.config import get_settings
 from app.providers.llm.base import BaseLLMProvider
@@ -14,10 +15,11 @@ class GroqProvider(BaseLLMProvider):
     Optimized for high-speed inference.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None):
         self.settings = get_settings()
         self.api_key = api_key or self.settings.GROQ_API_KEY
-        self.client = AsyncGroq(api_key=self.api_key) if self.api_key else None
+        # http_client: registry'nin paylaşılan keep-alive havuzu (yoksa AsyncGroq kendi istemcisini açar)
+        self.client = AsyncGroq(api_key=self.api_key, http_client=http_client) if self.api_key else None
         # Varsayılan model governance'dan alınır
         from app.core.llm.governance import governance
         chain = governance.get_model_chain("synthesizer")
@@ -72,6 +74,9 @@ class GroqProvider(BaseLLMProvider):
 
             # Token usage recording if available
             usage = completion.usage
+            usage_sink = kwargs.get("usage")  # app.core.llm.tokens.TokenUsage (adapter'dan)
+            if usage_sink is not None and usage is not None:
+                usage_sink.update(usage.prompt_tokens, usage.completion_tokens)
             telemetry.emit(
                 EventType.LLM_REQUEST,
                 {
@@ -131,9 +136,15 @@ class GroqProvider(BaseLLMProvider):
                 stream=True
             )
 
+            usage_sink = kwargs.get("usage")
             async for chunk in stream:
-                if chunk.choices[0].delta.content:
+                if chunk.choices and chunk.choices[0].delta.content:
                     yield chunk.choices[0].delta.content
+                if usage_sink is not None:
+                    # Groq usage'ı son chunk'ta x_groq.usage içinde gönderir
+                    usage = chunk.usage or (chunk.x_groq.usage if chunk.x_groq else None)
+                    if usage is not None:
+                        usage_sink.update(usage.prompt_tokens, usage.completion_tokens)
 
         except Exception as e:
             logger.error(f"Groq streaming failed: {e}")
@@ -0,0 +1,150 @@
+"""
+LLM provider client registry.
+
+(provider, api_key) → long-lived provider instance. Groq clients for all
+keys share one keep-alive (HTTP/2 when h2 is installed) httpx.AsyncClient
+pool per provider; the API key only travels in a header, so every LLM call
+reuses warm connections instead of paying a new TLS handshake.
+
+Used by app.core.llm.adapters (every LLMGenerator) and direct provider
+users (reranker, extractor, arena...). Closed in the app lifespan.
+
+Metrics:
+    mami_llm_client_lookups_total{provider,result}   reused | created
+    mami_llm_http_requests_total{provider}           HTTP requests sent
+    mami_llm_http_connections_total{provider}        new TCP connections opened
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.config import get_settings
+from app.providers.llm.base import BaseLLMProvider
+
+logger = logging.getLogger("app.provider.llm.registry")
+
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+
+class ProviderRegistry:
+    """Pooled provider instances keyed by (provider, api_key)."""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport
+        self._providers: Dict[Tuple[str, str], BaseLLMProvider] = {}
+        self._http_clients: Dict[str, httpx.AsyncClient] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get(self, provider: str, api_key: Optional[str] = None) -> BaseLLMProvider:
+        """Returns the shared provider for (provider, api_key); the default key when api_key is None."""
+        self._check_loop()
+        api_key = api_key or self._default_key(provider)
+        key = (provider, api_key or "")
+        instance = self._providers.get(key)
+        if instance is not None:
+            self._count(provider, "reused")
+            return instance
+
+        if provider == "groq":
+            from app.providers.llm.groq import GroqProvider
+            instance = GroqProvider(api_key=api_key, http_client=self._http_client(provider))
+        elif provider == "gemini":
+            from app.providers.llm.gemini import GeminiProvider
+            instance = GeminiProvider(api_key=api_key)
+        else:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+
+        self._providers[key] = instance
+        self._count(provider, "created")
+        return instance
+
+    def _check_loop(self) -> None:
+        """Connections belong to one event loop; start over if it changed (tests, reloads)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop is not loop:
+            if self._loop is not None:
+                self._providers.clear()
+                self._http_clients.clear()
+            self._loop = loop
+
+    @staticmethod
+    def _default_key(provider: str) -> Optional[str]:
+        settings = get_settings()
+        if provider == "groq":
+            return settings.GROQ_API_KEY
+        if provider == "gemini":
+            return settings.GEMINI_API_KEY
+        return None
+
+    def _http_client(self, provider: str) -> httpx.AsyncClient:
+        client = self._http_clients.get(provider)
+        if client is not None and not client.is_closed:
+            return client
+
+        settings = get_settings()
+        http2 = settings.LLM_HTTP2_ENABLED and _HTTP2_AVAILABLE
+        if settings.LLM_HTTP2_ENABLED and not _HTTP2_AVAILABLE:
+            logger.warning("[LLMRegistry] h2 paketi yok, HTTP/1.1 keep-alive kullanılıyor")
+
+        client = httpx.AsyncClient(
+            http2=http2,
+            transport=self._transport,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_SECONDS,
+            ),
+            event_hooks={"request": [self._request_hook(provider)]},
+        )
+        self._http_clients[provider] = client
+        return client
+
+    @staticmethod
+    def _request_hook(provider: str):
+        from app.core.metrics import llm_http_connections_counter, llm_http_requests_counter
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                llm_http_connections_counter.labels(provider=provider).inc()
+
+        async def on_request(request: httpx.Request) -> None:
+            llm_http_requests_counter.labels(provider=provider).inc()
+            request.extensions["trace"] = trace
+
+        return on_request
+
+    async def aclose(self) -> None:
+        """Closes pooled HTTP clients (app shutdown)."""
+        clients = list(self._http_clients.values())
+        self._providers.clear()
+        self._http_clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"[LLMRegistry] HTTP client close failed: {e}")
+
+    @staticmethod
+    def _count(provider: str, result: str) -> None:
+        from app.core.metrics import llm_client_lookups_counter
+
+        llm_client_lookups_counter.labels(provider=provider, result=result).inc()
+
+
+provider_registry = ProviderRegistry()
+
+
+def get_provider(provider: str, api_key: Optional[str] = None) -> BaseLLMProvider:
+    """Shortcut for provider_registry.get()."""
+    return provider_registry.get(provider, api_key)
@@ -6,6 +6,7 @@ import httpx
 
 from app.config import get_settings
 from app.core.logger import get_logger
+from app.core.resilience import CircuitManager
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -36,6 +37,11 @@ async def serper_search_async(
         logger.info("[SERPER] API key ayarlı değil, bu provider devre dışı.")
         return []
 
+    breaker = CircuitManager.get_breaker("serper")
+    if not breaker.can_execute():
+        logger.warning("[SERPER] Circuit OPEN - arama atlanıyor.")
+        return []
+
     headers = {
         "X-API-KEY": api_key,
         "Content-Type": "application/json",
@@ -85,9 +91,11 @@ async def serper_search_async(
                 async with httpx.AsyncClient() as ac:
                     results = await _do_request(ac)
             logger.info(f"[SERPER] '{query}' için {len(results)} sonuç döndü.")
+            breaker.record_success()
             return results
         except Exception as e:
             logger.warning(f"[SERPER] Arama sorunu (deneme {attempt + 1}/2): {e}")
             if attempt == 0:
                 continue
+            breaker.record_failure(e)
     return []
@@ -0,0 +1,445 @@
+"""
+Mami AI - Semantic Answer Cache
+===============================
+
+BrainEngine içinde, hafıza/RAG yüklemesi, sohbet geçmişi, planlama ve LLM
+çağrısından önce duran yanıt önbelleği (answer_cache tablosu). Tekrarlanan
+genel sorular (döviz kuru, hava durumu, "nasıl yapılır" soruları) beyin
+hattının geri kalanından geçmeden yanıtlanır.
+
+- Exact: (kullanıcı, persona, stil, normalize soru) → sha256 cache_key;
+  kayıtlar kullanıcıya özeldir, başka kullanıcının hafızasıyla üretilmiş
+  yanıt dönmez
+- Semantic: aynı kullanıcı + persona + stil kapsamındaki geçerli kayıtların
+  soru embedding'leri ile kosinüs benzerliği (ANSWER_CACHE_SIMILARITY eşiği);
+  sorulardaki sayılar ve özel isimler birebir aynı olmalıdır
+- TTL: web aramasına dayanan yanıtlar kısa (VOLATILE), diğerleri uzun yaşar
+- Bypass: yanıtı hafıza/RAG bağlamı değiştirecek istekler ne okunur ne
+  yazılır (kişisel ve takip soruları, görseller, hatırlatmalar, kullanıcının
+  yüklediği belgelerde eşleşmesi olan sorular; belge, hafıza ve görsel
+  araçları kullanan ya da hata içeren planlar)
+- Replay: hit, normal akışla aynı event'lerle (metadata/sources/chunk)
+  stream edilir; UI farkı görmez
+
+Kullanım:
+    from app.services.brain.answer_cache import answer_cache
+
+    cached = await answer_cache.lookup(ctx)
+    if cached:
+        async for event in answer_cache.replay(ctx, cached):
+            yield event
+    ...
+    await answer_cache.store(ctx, response)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENGINE_NAME = "atlas"
+MIN_QUESTION_WORDS = 2
+REPLAY_CHUNK_CHARS = 32
+
+# Yanıtı kullanıcıya özgü bağlama bağlayan araçlar
+UNCACHEABLE_TOOLS = {"document_tool", "memory_tool", "flux_tool"}
+VOLATILE_TOOLS = {"search_tool"}
+
+# asciify edilmiş metin üzerinde aranır
+_PERSONAL_PATTERN = re.compile(
+    r"\b(ben|beni|bana|benim|bende|benden|kendim|adim|hatirla\w*|hafiza\w*|"
+    r"yukledigim|belge\w*|dokuman\w*|dosya\w*|pdf|sozlesme\w*|konustu\w*|soyledi\w*|"
+    r"i|me|my|mine|remember)\b"
+)
+_FOLLOW_UP_PATTERN = re.compile(
+    r"\b(peki|o zaman|bunu|bunun|onu|onun|sunu|yukaridaki|devam|ayni|baska|daha fazla|"
+    r"it|that|this|more)\b"
+)
+_TR_ASCII = str.maketrans("çğıöşüÇĞİÖŞÜ", "cgiosuCGIOSU")
+# Sayılar (tarih, tutar, yıl) ve büyük harfle başlayan kelimeler (isim, şehir, kurum)
+_ENTITY_PATTERN = re.compile(r"\d+(?:[.,:/]\d+)*|\b[A-ZÇĞİÖŞÜ][\wçğıöşü]*")
+
+
+def normalize_question(text: str) -> str:
+    """Küçük harf, noktalama yok, tek boşluk (exact key ve bypass kontrolü için)."""
+    # Türkçe büyük harfler: "İ".lower() birleşik nokta bırakır
+    lowered = (text or "").replace("İ", "i").replace("I", "ı").lower()
+    return " ".join(re.sub(r"[^\w\s]", " ", lowered).split())
+
+
+def _asciify(text: str) -> str:
+    return text.translate(_TR_ASCII).lower()
+
+
+def _entities(text: str) -> set:
+    """Sorudaki sayı ve özel isim kelimeleri (normalize, ASCII)."""
+    return {
+        token
+        for match in _ENTITY_PATTERN.findall(text or "")
+        for token in _asciify(normalize_question(match)).split()
+    }
+
+
+def _same_entities(question: str, other: str) -> bool:
+    """
+    İki sorunun sayı ve özel isimleri karşılıklı olarak birbirinde geçiyor mu?
+
+    Cümle başındaki büyük harf ("Dolar kaç lira" / "dolar kuru") fark yaratmaz;
+    "Ankara'da hava" ile "İzmir'de hava" ya da "2023 enflasyonu" ile "2024
+    enflasyonu" eşleşmez. Kelimeler ek alabilir (ankara → ankaradaki), sayılar
+    birebir aynı olmalıdır.
+    """
+    def covered(entities: set, text: str) -> bool:
+        tokens = _asciify(normalize_question(text)).split()
+        return all(
+            entity in tokens if entity.isdigit() else any(token.startswith(entity) for token in tokens)
+            for entity in entities
+        )
+
+    return covered(_entities(question), other) and covered(_entities(other), question)
+
+
+def _style_fingerprint(style_profile: Any) -> str:
+    if style_profile is None:
+        return ""
+    if hasattr(style_profile, "model_dump"):
+        style_profile = style_profile.model_dump()
+    raw = json.dumps(style_profile, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def _chunk_text(text: str, size: int = REPLAY_CHUNK_CHARS) -> List[str]:
+    """Yanıtı kelime sınırlarında ~size karakterlik parçalara böler."""
+    pieces: List[str] = []
+    current = ""
+    for token in re.findall(r"\S+\s*|\s+", text):
+        current += token
+        if len(current) >= size:
+            pieces.append(current)
+            current = ""
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+@dataclass
+class CachedAnswer:
+    """Önbellekten dönen yanıt."""
+    answer: str
+    match: str  # "exact" | "semantic"
+    similarity: float = 1.0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class _LookupState:
+    """Lookup sırasında hesaplanan ve store'da yeniden kullanılan alanlar."""
+    user_id: int
+    persona: str
+    style: str
+    cache_key: str
+    embedding: Optional[List[float]] = None
+
+
+class _SqlAnswerStore:
+    """answer_cache tablosu üzerinde async erişim."""
+
+    async def get_exact(self, user_id: int, cache_key: str, now: datetime):
+        from sqlmodel import select
+
+        from app.core.models import AnswerCache
+        from app.core.database import get_async_session
+
+        async with get_async_session() as session:
+            result = await session.exec(
+                select(AnswerCache)
+                .where(AnswerCache.user_id == user_id, AnswerCache.cache_key == cache_key)
+                .where(AnswerCache.expires_at > now)
+                .order_by(AnswerCache.created_at.desc())
+                .limit(1)
+            )
+            return result.first()
+
+    async def candidates(self, user_id: int, persona: str, now: datetime, limit: int) -> list:
+        from sqlmodel import select
+
+        from app.core.models import AnswerCache
+        from app.core.database import get_async_session
+
+        # (user_id, persona, expires_at) indeksi; en yeni kayıtlar öncelikli
+        async with get_async_session() as session:
+            result = await session.exec(
+                select(AnswerCache)
+                .where(AnswerCache.user_id == user_id, AnswerCache.persona == persona)
+                .where(AnswerCache.expires_at > now, AnswerCache.embedding.is_not(None))
+                .order_by(AnswerCache.created_at.desc())
+                .limit(limit)
+            )
+            return list(result.all())
+
+    async def put(self, entry) -> None:
+        from sqlalchemy import delete, or_
+
+        from app.core.models import AnswerCache
+        from app.core.database import get_async_session
+
+        async with get_async_session() as session:
+            # Aynı anahtarın eski kopyası ve kullanıcının süresi dolmuş kayıtları
+            await session.execute(
+                delete(AnswerCache).where(
+                    AnswerCache.user_id == entry.user_id,
+                    or_(AnswerCache.cache_key == entry.cache_key, AnswerCache.expires_at <= entry.created_at),
+                )
+            )
+            session.add(entry)
+            await session.commit()
+
+
+class AnswerCacheService:
+    """
+    Exact + semantik yanıt önbelleği.
+
+    Tüm hatalar fail-open'dır: önbellek okunamazsa istek normal hattan geçer.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[Any] = None,
+        embed_fn: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+        document_probe: Optional[Callable[[str, str], Awaitable[bool]]] = None,
+    ):
+        self.backend = backend or _SqlAnswerStore()
+        self._embed_fn = embed_fn
+        self._document_probe = document_probe
+
+    # --- Kararlar ---
+
+    def bypass_reason(self, ctx) -> Optional[str]:
+        """Lookup yapılmayacaksa nedenini döner (None → önbelleğe uygun)."""
+        from app.config import get_settings
+
+        if not get_settings().ANSWER_CACHE_ENABLED:
+            return "disabled"
+        if ctx.images:
+            return "images"
+        if ctx.due_tasks:
+            return "due_tasks"
+        if not str(ctx.user_id).isdigit():
+            return "anonymous"
+        normalized = normalize_question(ctx.message)
+        if len(normalized.split()) < MIN_QUESTION_WORDS:
+            return "too_short"
+        ascii_text = _asciify(normalized)
+        if _PERSONAL_PATTERN.search(ascii_text):
+            return "personal"
+        if _FOLLOW_UP_PATTERN.search(ascii_text):
+            return "follow_up"
+        return None
+
+    def ttl_for(self, ctx, response: str) -> Optional[int]:
+        """Yanıt yazılabilirse TTL (saniye), yazılamazsa None."""
+        from app.config import get_settings
+
+        settings = get_settings()
+        ttl_class = self._ttl_class(ctx, response)
+        if ttl_class == "volatile":
+            return settings.ANSWER_CACHE_VOLATILE_TTL_SECONDS
+        if ttl_class == "default":
+            return settings.ANSWER_CACHE_TTL_SECONDS
+        return None
+
+    def _ttl_class(self, ctx, response: str) -> Optional[str]:
+        plan = ctx.plan
+        if not response or not response.strip() or plan is None or plan.is_follow_up:
+            return None
+        tools = {task.tool_name for task in plan.tasks if task.type == "tool"}
+        if tools & UNCACHEABLE_TOOLS or any(task.type == "memory_control" for task in plan.tasks):
+            return None
+        if any(res.get("status") != "success" for res in ctx.task_results):
+            return None
+        sources = ctx.metadata.get("unified_sources") or []
+        if any(isinstance(src, dict) and src.get("type") == "document" for src in sources):
+            return None
+        return "volatile" if tools & VOLATILE_TOOLS else "default"
+
+    # --- Okuma / Yazma ---
+
+    async def lookup(self, ctx) -> Optional[CachedAnswer]:
+        """Exact, ardından semantik eşleşme arar; bulamazsa None."""
+        from app.config import get_settings
+        from app.core.metrics import answer_cache_lookups_counter
+
+        reason = self.bypass_reason(ctx)
+        if reason is None and await self._matches_documents(ctx):
+            reason = "documents"
+        if reason:
+            answer_cache_lookups_counter.labels(result="bypass").inc()
+            logger.debug(f"[AnswerCache] Bypass: {reason}")
+            return None
+
+        settings = get_settings()
+        style = _style_fingerprint(ctx.style_profile)
+        state = _LookupState(
+            user_id=int(ctx.user_id),
+            persona=ctx.persona or "standard",
+            style=style,
+            cache_key=self._cache_key(ctx.user_id, ctx.persona, style, ctx.message),
+        )
+        ctx.metadata["answer_cache"] = state
+        now = datetime.utcnow()
+
+        try:
+            row = await self.backend.get_exact(state.user_id, state.cache_key, now)
+            if row is not None:
+                answer_cache_lookups_counter.labels(result="hit_exact").inc()
+                return CachedAnswer(answer=row.answer, match="exact", metadata=dict(row.extra_metadata or {}))
+
+            state.embedding = await self._embed(ctx.message)
+            if state.embedding:
+                rows = await self.backend.candidates(state.user_id, state.persona, now, settings.ANSWER_CACHE_SCAN_LIMIT)
+                best = self._best_match(state, ctx.message, rows, settings.ANSWER_CACHE_SIMILARITY)
+                if best is not None:
+                    row, similarity = best
+                    answer_cache_lookups_counter.labels(result="hit_semantic").inc()
+                    logger.info(f"[AnswerCache] Semantic hit ({similarity:.3f}): {row.question[:50]}")
+                    return CachedAnswer(
+                        answer=row.answer, match="semantic", similarity=similarity,
+                        metadata=dict(row.extra_metadata or {}),
+                    )
+        except Exception as e:
+            logger.warning(f"[AnswerCache] Lookup failed: {e}", exc_info=True)
+
+        answer_cache_lookups_counter.labels(result="miss").inc()
+        return None
+
+    async def store(self, ctx, response: str) -> bool:
+        """Uygun yanıtı TTL ile yazar. Lookup'ı bypass edilmiş istekler yazılmaz."""
+        from app.core.models import AnswerCache
+        from app.core.embedding_cache import pack_vector
+        from app.core.metrics import answer_cache_stores_counter
+
+        state: Optional[_LookupState] = ctx.metadata.get("answer_cache")
+        if state is None:
+            return False
+        ttl_class = self._ttl_class(ctx, response)
+        if ttl_class is None:
+            return False
+        ttl = self.ttl_for(ctx, response)
+
+        try:
+            if state.embedding is None:
+                state.embedding = await self._embed(ctx.message)
+            now = datetime.utcnow()
+            sources = [src for src in ctx.metadata.get("unified_sources") or [] if isinstance(src, dict)]
+            entry = AnswerCache(
+                user_id=state.user_id,
+                cache_key=state.cache_key,
+                question=ctx.message,
+                answer=response,
+                engine=ENGINE_NAME,
+                persona=state.persona,
+                embedding=pack_vector(state.embedding) if state.embedding else None,
+                extra_metadata={
+                    "intent": ctx.plan.intent, "style": state.style, "sources": sources,
+                },
+                created_at=now,
+                expires_at=now + timedelta(seconds=ttl),
+            )
+            await self.backend.put(entry)
+        except Exception as e:
+            logger.warning(f"[AnswerCache] Store failed: {e}", exc_info=True)
+            return False
+
+        answer_cache_stores_counter.labels(ttl=ttl_class).inc()
+        return True
+
+    async def replay(self, ctx, cached: CachedAnswer) -> AsyncGenerator[Dict[str, Any], None]:
+        """Önbellekteki yanıtı normal stream event'leriyle akıtır."""
+        yield {
+            "type": "metadata",
+            "intent": cached.metadata.get("intent", "general"),
+            "reasoning": f"answer_cache:{cached.match}",
+            "model": "answer-cache",
+            "trace_id": ctx.trace_id,
+            "cached": True,
+        }
+        sources = cached.metadata.get("sources") or []
+        if sources:
+            ctx.metadata["unified_sources"] = list(sources)
+            yield {"type": "sources", "data": sources}
+        for piece in _chunk_text(cached.answer):
+            yield {"type": "chunk", "content": piece}
+            # Parçalar arasında loop'u bırak (istemciye kademeli flush)
+            await asyncio.sleep(0)
+
+    # --- Yardımcılar ---
+
+    @staticmethod
+    def _cache_key(user_id: Any, persona: Optional[str], style: str, message: str) -> str:
+        raw = f"{user_id}|{persona or 'standard'}|{style}|{normalize_question(message)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def _matches_documents(self, ctx) -> bool:
+        """Kullanıcının yüklediği belgelerde soruyla eşleşen içerik var mı? (belirsizse True)"""
+        try:
+            if self._document_probe is not None:
+                return await self._document_probe(ctx.username, ctx.message)
+            from app.memory.rag_v2_lexical import lexical_search_async
+
+            return bool(await lexical_search_async(ctx.message, owner=ctx.username, scope="user", top_k=1))
+        except Exception as e:
+            logger.warning(f"[AnswerCache] Document probe failed, bypassing: {e}")
+            return True
+
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        try:
+            if self._embed_fn is not None:
+                return await self._embed_fn(text)
+            from app.services.brain.memory.embeddings import embedder
+            return await embedder.embed(text)
+        except Exception as e:
+            logger.warning(f"[AnswerCache] Embedding failed, exact-only lookup: {e}")
+            return None
+
+    @staticmethod
+    def _best_match(state: _LookupState, question: str, rows: list, threshold: float):
+        """
+        En benzer kaydı (row, benzerlik) olarak döner; eşik altındaysa None.
+
+        Aday kayıtlar aynı stilde üretilmiş, soruyla aynı sayı/özel
+        isimleri içeren kayıtlarla sınırlıdır ("2023 enflasyonu" ≠ "2024 enflasyonu").
+        """
+        from app.core.embedding_cache import unpack_vector
+
+        query = np.asarray(state.embedding, dtype=np.float32)
+        rows = [
+            row for row in rows
+            if row.embedding
+            and (row.extra_metadata or {}).get("style", "") == state.style
+            and _same_entities(question, row.question)
+        ]
+        vectors = [unpack_vector(row.embedding) for row in rows]
+        usable = [(row, vec) for row, vec in zip(rows, vectors, strict=True) if len(vec) == query.shape[0]]
+        if not usable:
+            return None
+        matrix = np.asarray([vec for _, vec in usable], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+        scores = matrix @ query / np.where(norms == 0, 1.0, norms)
+        best = int(np.argmax(scores))
+        if scores[best] < threshold:
+            return None
+        return usable[best][0], float(scores[best])
+
+
+# Singleton instance
+answer_cache = AnswerCacheService()
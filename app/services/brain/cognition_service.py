@@ -13,9 +13,10 @@ from typing import List, Dict, Any, Optional
 from app.core.logger import get_logger
 from app.core.llm.generator import LLMGenerator, LLMRequest
 from app.core.llm.governance import governance
-from sqlmodel import select
+from sqlmodel import func, select
 from app.core.database import get_session
 from app.core.models import Message, Conversation, ConversationSummary
+from app.memory.conversation import load_recent_messages
 
 logger = get_logger(__name__)
 
@@ -104,20 +105,23 @@ class CognitionService:
             processed_count = 0
             for conv in sessions:
                 # Özet gerekli mi kontrol et? (Örn: 8 mesajda bir)
-                msg_stmt = select(Message).where(Message.conversation_id == conv.id).order_by(Message.created_at)
-                messages = session.exec(msg_stmt).all()
+                # Tüm mesajları yüklemek yerine sayı + son 20 mesaj
+                message_count = session.exec(
+                    select(func.count()).select_from(Message).where(Message.conversation_id == conv.id)
+                ).one()
                 
-                if len(messages) < 5: continue # Yeterli derinlik yok
+                if message_count < 5: continue # Yeterli derinlik yok
                 
                 # Mevcut özeti kontrol et
                 summary_stmt = select(ConversationSummary).where(ConversationSummary.conversation_id == conv.id)
                 existing = session.exec(summary_stmt).first()
                 
-                if existing and existing.message_count_at_update >= len(messages):
+                if existing and existing.message_count_at_update >= message_count:
                     continue # Zaten güncel
                 
                 # Özet üret
-                transcript = "\n".join([f"{'User' if m.role == 'user' else 'AI'}: {m.content}" for m in messages[-20:]])
+                messages = load_recent_messages(conv.id, limit=20)
+                transcript = "\n".join([f"{'User' if m.role == 'user' else 'AI'}: {m.content}" for m in messages])
                 episode_data = await self.generate_episode_summary(transcript)
                 
                 # Kaydet
@@ -126,7 +130,7 @@ class CognitionService:
                     existing.importance = episode_data.get("importance", 1)
                     existing.entities = episode_data.get("entities", [])
                     existing.mood = episode_data.get("mood_detected")
-                    existing.message_count_at_update = len(messages)
+                    existing.message_count_at_update = message_count
                     existing.updated_at = datetime.utcnow()
                 else:
                     new_summary = ConversationSummary(
@@ -135,7 +139,7 @@ class CognitionService:
                         importance=episode_data.get("importance", 1),
                         entities=episode_data.get("entities", []),
                         mood=episode_data.get("mood_detected"),
-                        message_count_at_update=len(messages),
+                        message_count_at_update=message_count,
                         updated_at=datetime.utcnow()
                     )
                     session.add(new_summary)
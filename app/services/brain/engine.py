@@ -38,6 +38,7 @@ from app.repositories.graph_db import GraphRepository
 from app.services.brain.memory.embeddings import embedder
 from app.repositories.vector_db import vector_repo
 from app.services.brain.guards.rag_gate import rag_gate
+from app.services.brain.answer_cache import answer_cache
 from app.services.brain.request_context import RequestContext
 from app.memory.rag_service import rag_service
 
@@ -84,6 +85,7 @@ class BrainEngine:
         self.quality_gate = quality_gate
         self.rag_gate = rag_gate
         self.rag_service = rag_service
+        self.answer_cache = answer_cache
         from app.core.llm.generator import LLMGenerator
         self.llm = LLMGenerator() # CENTRALIZED
         asyncio.create_task(self._auto_register_providers())
@@ -240,20 +242,16 @@ class BrainEngine:
 
         # 2. Fallback to SQL (Warm Memory)
         try:
-            from app.core.database import get_session
-            from app.core.models import Message
-            from sqlmodel import select, asc
-            with get_session() as session:
-                stmt = select(Message).where(Message.conversation_id == session_id).order_by(asc(Message.created_at))
-                sql_msgs = list(session.exec(stmt).all())
-                # Take last 10
-                history_list = [{"role": m.role, "content": m.content} for m in sql_msgs[-10:]]
-                
-                # Async populate Redis (Cache warming)
-                if history_list and redis_client:
-                    asyncio.create_task(self._warm_redis(session_id, history_list))
-                   
-                return history_list
+            from app.memory.conversation import load_recent_messages_async
+            # Son 10 mesaj (DB tarafında LIMIT, kronolojik)
+            sql_msgs = await load_recent_messages_async(session_id, limit=10)
+            history_list = [{"role": m.role, "content": m.content} for m in sql_msgs]
+
+            # Async populate Redis (Cache warming)
+            if history_list and redis_client:
+                asyncio.create_task(self._warm_redis(session_id, history_list))
+
+            return history_list
         except Exception as e:
             logger.warning(f"[Brain] SQL history fetch failed: {e}")
             return []
@@ -262,13 +260,9 @@ class BrainEngine:
         if not session_id:
             return []
         try:
-            from app.core.database import get_session
-            from app.core.models import Message
-            from sqlmodel import select, asc
-            with get_session() as session:
-                stmt = select(Message).where(Message.conversation_id == session_id).order_by(asc(Message.created_at))
-                sql_msgs = list(session.exec(stmt).all())
-                return [{"role": m.role, "content": m.content} for m in sql_msgs[-limit:]]
+            from app.memory.conversation import load_recent_messages_async
+            sql_msgs = await load_recent_messages_async(session_id, limit=limit)
+            return [{"role": m.role, "content": m.content} for m in sql_msgs]
         except Exception as e:
             logger.warning(f"[Brain] SQL history fetch failed: {e}")
             return []
@@ -300,6 +294,9 @@ class BrainEngine:
     
     async def process_request(
         self,
+        user_id: str,
+        username: str = "unknown",
+        message: str = "",
         session_id: str = None,
         persona: str = "friendly",
         images: Optional[List[str]] = None
@@ -338,6 +335,23 @@ class BrainEngine:
             {"op": "request_start", "trace_id": ctx.trace_id, "user_id": ctx.user_id},
             component="brain_engine"
         )
+
+        # 1b. Answer Cache: hafıza/RAG ve geçmiş yüklenmeden önce; bağlama dayalı
+        # sorular (kişisel, takip, belge) bypass_reason ile önbellek dışında kalır
+        cached = await self.answer_cache.lookup(ctx)
+        if cached:
+            ctx.response = cached.answer
+            telemetry.emit(
+                EventType.ROUTING,
+                {"op": "request_end", "trace_id": ctx.trace_id, "cache": cached.match},
+                component="brain_engine"
+            )
+            try:
+                await counter_store.incr_request_returned()
+            except Exception as e:
+                logger.warning(f"[Counters] request_returned failed: {e}")
+            asyncio.create_task(self._push_turn_to_redis(ctx, cached.answer))
+            return cached.answer
         
         # 2a. Memory Context (Basic)
         ctx.memory_context = await self.memory_manager.get_user_context(ctx.user_id, ctx.message)
@@ -405,6 +419,7 @@ class BrainEngine:
         
         # 8. Background Learning (Fact + Vector + Redis Upsert)
         asyncio.create_task(self._background_extraction(ctx, response))
+        asyncio.create_task(self.answer_cache.store(ctx, response))
         
         return response
     
@@ -467,7 +482,27 @@ class BrainEngine:
             {"op": "stream_start", "trace_id": ctx.trace_id, "user_id": ctx.user_id},
             component="brain_engine"
         )
-        
+
+        # 1b. Answer Cache: ön düşünce, hafıza/RAG ve geçmiş yüklenmeden önce; hit normal
+        # akışla aynı event'lerle replay edilir
+        cached = await self.answer_cache.lookup(ctx)
+        if cached:
+            log.step("♻️", "Önbellekten Yanıt", f"Eşleşme: {cached.match}")
+            async for event in self.answer_cache.replay(ctx, cached):
+                yield event
+            ctx.response = cached.answer
+            telemetry.emit(
+                EventType.ROUTING,
+                {"op": "stream_end", "trace_id": ctx.trace_id, "cache": cached.match},
+                component="brain_engine"
+            )
+            try:
+                asyncio.create_task(counter_store.incr_request_returned())
+            except Exception as e:
+                logger.warning(f"[Counters] stream_request_returned failed: {e}")
+            asyncio.create_task(self._push_turn_to_redis(ctx, cached.answer))
+            return
+
         # 1. Trace Start -- POINT 6: Proactive Pre-analysis Thought
         try:
             from app.services.brain.context_enricher import context_enricher
@@ -590,6 +625,8 @@ class BrainEngine:
             log.step("💬", "Yanıt Sentezleniyor", f"Model: {current_model_id}")
             # 6. Final Synthesis (Streaming)
             
+            reply_parts = []
+            synthesis_failed = False
             async for chunk in self.synthesizer.synthesize_stream_with_context(
                 ctx,
                 tool_outputs=ctx.tool_outputs,
@@ -597,7 +634,12 @@ class BrainEngine:
                 current_topic=plan.detected_topic,
                 style_profile=style_profile
             ):
+                if chunk.get("type") == "chunk":
+                    reply_parts.append(chunk.get("content") or "")
+                elif chunk.get("type") == "error":
+                    synthesis_failed = True
                 yield chunk
+            ctx.response = "".join(reply_parts)
 
             # --- RAG CITATION FOOTER ---
             # NOTE: RAG sources are now handled via unified_sources in ContextCards (v4.4+)
@@ -617,6 +659,8 @@ class BrainEngine:
             
             # 8. Background Learning (Fact + Vector Upsert)
             asyncio.create_task(self._background_extraction(ctx))
+            if not synthesis_failed:
+                asyncio.create_task(self.answer_cache.store(ctx, ctx.response))
             
         except Exception as e:
             logger.error(f"[BrainEngine] Stream error: {e}")
@@ -635,24 +679,7 @@ class BrainEngine:
         """Arka planda bilgi çıkarımı, vektör kaydı ve Redis önbellek güncellemesi."""
         try:
             # A. Redis Cache Update (Push User Msg & AI Response)
-            if ctx.session_id:
-                try:
-                    redis_client = await get_redis()
-                    if redis_client:
-                        key = f"session:{ctx.session_id}:history"
-                        # User Msg (Old -> New order for LPUSH means we push in reverse, OR push individually to HEAD)
-                        # We want HEAD (index 0) to be NEWEST.
-                        # So if we push User then AI, AI is at 0, User at 1. This is correct for reverse chronological retrieval.
-                        
-                        await redis_client.lpush(key, json.dumps({"role": "user", "content": ctx.message}))
-                        
-                        if response:
-                             await redis_client.lpush(key, json.dumps({"role": "assistant", "content": response}))
-                        
-                        await redis_client.ltrim(key, 0, 19) # Keep 20 items (10 turns)
-                        await redis_client.expire(key, 3600) # 1 hour
-                except Exception as re:
-                     logger.warning(f"[BrainEngine] Redis cache update failed: {re}")
+            await self._push_turn_to_redis(ctx, response)
 
             # B. Vector Memory Upsert
             try:
@@ -713,6 +740,28 @@ class BrainEngine:
         except Exception as e:
             logger.warning(f"[BrainEngine] Background extraction failed: {e}")
 
+    async def _push_turn_to_redis(self, ctx: RequestContext, response: str = None):
+        """Kullanıcı mesajını ve yanıtı Redis sıcak geçmişine ekler."""
+        if not ctx.session_id:
+            return
+        try:
+            redis_client = await get_redis()
+            if redis_client:
+                key = f"session:{ctx.session_id}:history"
+                # User Msg (Old -> New order for LPUSH means we push in reverse, OR push individually to HEAD)
+                # We want HEAD (index 0) to be NEWEST.
+                # So if we push User then AI, AI is at 0, User at 1. This is correct for reverse chronological retrieval.
+                
+                await redis_client.lpush(key, json.dumps({"role": "user", "content": ctx.message}))
+                
+                if response:
+                     await redis_client.lpush(key, json.dumps({"role": "assistant", "content": response}))
+                
+                await redis_client.ltrim(key, 0, 19) # Keep 20 items (10 turns)
+                await redis_client.expire(key, 3600) # 1 hour
+        except Exception as re:
+             logger.warning(f"[BrainEngine] Redis cache update failed: {re}")
+
     async def _auto_register_providers(self) -> None:
         """Auto-register providers based on ModelGovernance requirements."""
         from app.core.llm.governance import governance
@@ -14,9 +14,8 @@ import re
 import json
 import logging
 import os
-import time
 import hashlib
-from typing import Any, Optional, Dict, List, Tuple
+from typing import Any, Optional, Dict, List
 from pydantic import BaseModel, Field
 from dataclasses import dataclass
 
@@ -25,6 +24,7 @@ from app.core.constants import (
     FOLLOWUP_TRIGGERS, GENERAL_TRIGGERS, MODEL_GOVERNANCE
 )
 from app.core.prompts import ORCHESTRATOR_PROMPT
+from app.core.classification_cache import ClassificationCache
 
 from app.core.terminal import log
 logger = logging.getLogger(__name__)
@@ -103,12 +103,26 @@ class IntentLLMResult(BaseModel):
 
 
 # --- PHASE 3B: TTL CACHE ---
-_intent_llm_cache: Dict[str, Tuple[float, IntentLLMResult]] = {}
+# Fallback sonuçları (timeout, HTTP hatası vb.) Redis'e yazılmaz, yerelde kısa süre tutulur
+_FALLBACK_REASONS = {"no_api_key", "parse_error", "timeout", "error"}
+
+
+def _is_shareable_result(result: IntentLLMResult) -> bool:
+    return result.reason not in _FALLBACK_REASONS and not result.reason.startswith("http_")
+
+
+_intent_llm_cache = ClassificationCache(
+    "image_intent",
+    ttl_seconds=INTENT_LLM_CACHE_TTL_S,
+    dumps=lambda result: result.model_dump_json(),
+    loads=IntentLLMResult.model_validate_json,
+    shareable=_is_shareable_result,
+)
 
 
 def _get_cache_key(normalized_text: str) -> str:
-    """Generate cache key from normalized text."""
-    return hashlib.sha256(normalized_text.encode('utf-8')).hexdigest()
+    """Generate cache key from normalized text (whitespace collapsed)."""
+    return hashlib.sha256(" ".join(normalized_text.split()).encode('utf-8')).hexdigest()
 
 
 # --- PHASE 3B: LLM GRAY CLASSIFIER ---
@@ -119,34 +133,28 @@ def classify_image_intent_llm(message: str) -> IntentLLMResult:
     Features:
     - Strict JSON parsing with Pydantic validation
     - Timeout protection (INTENT_LLM_TIMEOUT_S)
-    - TTL caching for idempotency
+    - Bounded LRU+TTL cache with Redis second tier
+    - Single-flight: concurrent identical messages share one LLM call
     - Fallback on errors
     """
+    norm = normalize_text(message)
+    return _intent_llm_cache.get_or_compute_sync(
+        _get_cache_key(norm), lambda: _call_image_intent_llm(message)
+    )
+
+
+def _call_image_intent_llm(message: str) -> IntentLLMResult:
+    """Groq sınıflandırıcı çağrısı (önbelleksiz)."""
     import httpx
     from app.core.resilience import key_manager
     
-    # Normalize and prepare
-    norm = normalize_text(message)
     preview = message[:80]
     
-    # Check cache
-    cache_key = _get_cache_key(norm)
-    now = time.time()
-    if cache_key in _intent_llm_cache:
-        expires, cached_result = _intent_llm_cache[cache_key]
-        if now < expires:
-            logger.debug(f"[INTENT_LLM] Cache hit for: {preview}")
-            return cached_result
-        else:
-            del _intent_llm_cache[cache_key]
-    
     # Get API key
     api_key = key_manager.get_best_key(INTENT_LLM_MODEL)
     if not api_key:
         logger.warning("[INTENT_LLM] No API key available")
-        result = IntentLLMResult(is_image=False, confidence=0.5, reason="no_api_key")
-        _intent_llm_cache[cache_key] = (now + INTENT_LLM_CACHE_TTL_S, result)
-        return result
+        return IntentLLMResult(is_image=False, confidence=0.5, reason="no_api_key")
     
     # System prompt
     system_prompt = (
@@ -184,32 +192,21 @@ def classify_image_intent_llm(message: str) -> IntentLLMResult:
                 data = json.loads(raw_content)
                 result = IntentLLMResult(**data)
                 logger.debug(f"[INTENT_LLM] Success: is_image={result.is_image} conf={result.confidence:.2f} msg='{preview}'")
-                
-                # Cache and return
-                _intent_llm_cache[cache_key] = (now + INTENT_LLM_CACHE_TTL_S, result)
                 return result
             except (json.JSONDecodeError, ValueError) as e:
                 logger.warning(f"[INTENT_LLM] JSON parse error: {e}")
-                result = IntentLLMResult(is_image=False, confidence=0.5, reason="parse_error")
-                _intent_llm_cache[cache_key] = (now + INTENT_LLM_CACHE_TTL_S, result)
-                return result
+                return IntentLLMResult(is_image=False, confidence=0.5, reason="parse_error")
         else:
             key_manager.report_error(api_key, response.status_code, f"HTTP {response.status_code}", INTENT_LLM_MODEL)
             logger.warning(f"[INTENT_LLM] API error {response.status_code}")
-            result = IntentLLMResult(is_image=False, confidence=0.5, reason=f"http_{response.status_code}")
-            _intent_llm_cache[cache_key] = (now + INTENT_LLM_CACHE_TTL_S, result)
-            return result
+            return IntentLLMResult(is_image=False, confidence=0.5, reason=f"http_{response.status_code}")
             
     except httpx.TimeoutException:
         logger.warning(f"[INTENT_LLM] Timeout after {INTENT_LLM_TIMEOUT_S}s")
-        result = IntentLLMResult(is_image=False, confidence=0.5, reason="timeout")
-        _intent_llm_cache[cache_key] = (now + INTENT_LLM_CACHE_TTL_S, result)
-        return result
+        return IntentLLMResult(is_image=False, confidence=0.5, reason="timeout")
     except Exception as e:
         logger.error(f"[INTENT_LLM] Unexpected error: {e}")
-        result = IntentLLMResult(is_image=False, confidence=0.5, reason="error")
-        _intent_llm_cache[cache_key] = (now + INTENT_LLM_CACHE_TTL_S, result)
-        return result
+        return IntentLLMResult(is_image=False, confidence=0.5, reason="error")
 
 
 def _stem_tokens(norm_ascii: str) -> List[str]:
@@ -261,8 +258,8 @@ def decide_intent(message: str, user_mode: Optional[str] = None) -> IntentDecisi
     
     if is_gray and ENABLE_INTENT_LLM:
         # Call LLM classifier
-        llm_result = classify_image_intent_llm(message)
         cache_hit = _get_cache_key(norm) in _intent_llm_cache
+        llm_result = classify_image_intent_llm(message)
         
         if llm_result.is_image and llm_result.confidence >= 0.6:
             intent = "image"
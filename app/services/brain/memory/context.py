@@ -9,8 +9,9 @@ Sorumluluklar:
 3. Format: Atlas "Kullanıcı Profili / Sert Gerçekler / Yumuşak Sinyaller" formatı
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
 from app.services.brain.memory.schemas import MemoryContext, Triplet
@@ -30,6 +31,9 @@ async def build_context(
     """
     Kullanıcı bağlamını oluşturur.
     
+    Graph (identity + hard facts, tek Cypher sorgusu) ve vector araması
+    eşzamanlı çalışır; biri hata verirse diğerinin sonucu yine kullanılır.
+    
     Args:
         user_id: Kullanıcı ID
         query: Kullanıcı sorgusu (vector search için)
@@ -43,123 +47,121 @@ async def build_context(
     context = MemoryContext(user_id=user_id)
     user_anchor = get_user_anchor(user_id)
     
-    # 1. Identity facts from graph
-    if graph_repo:
-        try:
-            identity_facts = await _fetch_identity_facts(graph_repo, user_id, user_anchor)
-            context.identity_facts = identity_facts
-        except Exception as e:
-            logger.warning(f"Identity fetch error: {e}")
-    
-    # 2. Hard facts from graph
-    if graph_repo:
+    async def _graph() -> None:
+        if not graph_repo:
+            return
         try:
-            hard_facts = await _fetch_hard_facts(graph_repo, user_id, user_anchor, limit)
-            context.hard_facts = hard_facts
+            context.identity_facts, context.hard_facts = await _fetch_graph_facts(
+                graph_repo, user_id, user_anchor, limit
+            )
         except Exception as e:
-            logger.warning(f"Hard facts fetch error: {e}")
+            logger.warning(f"Graph facts fetch error: {e}")
     
-    # 3. Vector search for semantic context
-    if vector_repo:
+    async def _vector() -> None:
+        if not vector_repo:
+            return
         try:
-            vector_results = await vector_repo.search(
+            context.vector_results = await vector_repo.search(
                 query=query,
                 user_id=user_id,
                 limit=limit
             )
-            context.vector_results = vector_results
         except Exception as e:
             logger.warning(f"Vector search error: {e}")
     
+    await asyncio.gather(_graph(), _vector())
+    
     return context.to_formatted_string()
 
 
-async def _fetch_identity_facts(
-    graph_repo,
-    user_id: str,
-    user_anchor: str
-) -> List[Triplet]:
-    """Identity predicate'lerini çeker."""
+def _predicates(group: str, fallback: List[str]) -> List[str]:
     catalog = get_catalog()
     if catalog:
-        identity_predicates = catalog.get_predicates_by_group("identity", include_aliases=True)
-    else:
-        identity_predicates = ["ISIM", "YASI", "MESLEGI", "YASAR_YER", "GELDIGI_YER", "LAKABI"]
-    
-    try:
-        query = """
-        MATCH (s:Entity {name: $anchor})-[r:FACT]->(o:Entity)
-        WHERE r.user_id = $uid AND r.predicate IN $predicates
-        AND (r.status IS NULL OR r.status = 'ACTIVE')
-        RETURN r.predicate as predicate, o.name as object, r.confidence as confidence, r.updated_at as updated_at
-        """
-        
-        results = await graph_repo.query(query, {
-            "anchor": user_anchor,
-            "uid": user_id,
-            "predicates": identity_predicates
-        })
-        
-        return [
-            Triplet(
-                subject=user_anchor,
-                predicate=r["predicate"],
-                object=r["object"],
-                confidence=r.get("confidence", 1.0),
-                updated_at=r.get("updated_at"),
-                category="identity"
-            )
-            for r in results
-        ]
-    except Exception as e:
-        logger.error(f"Identity query error: {e}")
-        return []
+        return catalog.get_predicates_by_group(group, include_aliases=True)
+    return list(fallback)
+
+
+# Identity ve hard facts tek round trip: iki dal UNION ALL ile birleşir,
+# satırlar "kind" kolonuyla ayrılır. LIMIT yalnızca hard facts dalına uygulanır.
+GRAPH_FACTS_QUERY = """
+MATCH (s:Entity {name: $anchor})-[r:FACT]->(o:Entity)
+WHERE r.user_id = $uid AND r.predicate IN $identity_predicates
+AND (r.status IS NULL OR r.status = 'ACTIVE')
+RETURN 'identity' as kind, s.name as subject, r.predicate as predicate, o.name as object,
+       r.confidence as confidence, r.updated_at as updated_at
+UNION ALL
+MATCH (s:Entity)-[r:FACT]->(o:Entity)
+WHERE r.user_id = $uid AND r.predicate IN $hard_predicates
+AND (r.status IS NULL OR r.status = 'ACTIVE')
+AND r.confidence >= 0.7
+WITH s, r, o ORDER BY r.updated_at DESC LIMIT $limit
+RETURN 'hard_fact' as kind, s.name as subject, r.predicate as predicate, o.name as object,
+       r.confidence as confidence, r.updated_at as updated_at
+"""
 
+# Identity bloğu önbellekteyken yalnızca hard facts dalı
+HARD_FACTS_QUERY = GRAPH_FACTS_QUERY.split("UNION ALL", 1)[1]
 
-async def _fetch_hard_facts(
+
+async def _fetch_graph_facts(
     graph_repo,
     user_id: str,
     user_anchor: str,
     limit: int
-) -> List[Triplet]:
-    """Sert gerçekleri (preferences, relationships) çeker."""
-    catalog = get_catalog()
-    if catalog:
-        hard_predicates = catalog.get_predicates_by_group("hard_facts", include_aliases=True)
-    else:
-        hard_predicates = ["SEVER", "SEVMIYOR", "ESI", "ARKADASI", "COCUGU", "HOBISI"]
-    
-    try:
-        query = """
-        MATCH (s:Entity)-[r:FACT]->(o:Entity)
-        WHERE r.user_id = $uid AND r.predicate IN $predicates
-        AND (r.status IS NULL OR r.status = 'ACTIVE')
-        AND r.confidence >= 0.7
-        RETURN s.name as subject, r.predicate as predicate, o.name as object, r.confidence as confidence, r.updated_at as updated_at
-        ORDER BY r.updated_at DESC
-        LIMIT $limit
-        """
-        
-        results = await graph_repo.query(query, {
-            "uid": user_id,
-            "predicates": hard_predicates,
-            "limit": limit
-        })
-        
-        return [
-            Triplet(
+) -> Tuple[List[Triplet], List[Triplet]]:
+    """
+    Identity ve hard facts'i tek Cypher sorgusuyla çeker.
+    
+    Identity bloğu kullanıcı başına önbelleklenir (save_fact/forget_fact
+    geçersiz kılar); önbellekteyse yalnızca hard facts sorgulanır.
+    """
+    from app.services.memory.fact_cache import user_fact_cache
+    
+    params = {
+        "uid": user_id,
+        "hard_predicates": _predicates("hard_facts", ["SEVER", "SEVMIYOR", "ESI", "ARKADASI", "COCUGU", "HOBISI"]),
+        "limit": limit,
+    }
+    
+    identity = user_fact_cache.get(user_id, "identity")
+    if identity is not None:
+        rows = await graph_repo.query(HARD_FACTS_QUERY, params)
+        return list(identity), _to_triplets(rows, user_anchor)[1]
+    
+    generation = user_fact_cache.generation(user_id)
+    params["anchor"] = user_anchor
+    params["identity_predicates"] = _predicates(
+        "identity", ["ISIM", "YASI", "MESLEGI", "YASAR_YER", "GELDIGI_YER", "LAKABI"]
+    )
+    rows = await graph_repo.query(GRAPH_FACTS_QUERY, params)
+    identity, hard_facts = _to_triplets(rows, user_anchor)
+    user_fact_cache.put(user_id, "identity", identity, generation)
+    return list(identity), hard_facts
+
+
+def _to_triplets(rows: List[Dict[str, Any]], user_anchor: str) -> Tuple[List[Triplet], List[Triplet]]:
+    """Birleşik sorgu satırlarını kind kolonuna göre identity / hard facts'e ayırır."""
+    identity, hard_facts = [], []
+    for r in rows:
+        if r["kind"] == "identity":
+            identity.append(Triplet(
+                subject=user_anchor,
+                predicate=r["predicate"],
+                object=r["object"],
+                confidence=r.get("confidence") or 1.0,
+                updated_at=r.get("updated_at"),
+                category="identity"
+            ))
+        else:
+            hard_facts.append(Triplet(
                 subject=r["subject"],
                 predicate=r["predicate"],
                 object=r["object"],
-                confidence=r.get("confidence", 0.8),
+                confidence=r.get("confidence") or 0.8,
                 updated_at=r.get("updated_at"),
                 category="hard_fact"
-            )
-            for r in results
-        ]
-    except Exception as e:
-        logger.error(f"Hard facts query error: {e}")
-        return []
+            ))
+    return identity, hard_facts
 
 
 def format_context_for_llm(context: MemoryContext) -> str:
@@ -1,15 +1,21 @@
-
 """
 Mami AI - Gemini Embedding Service
 -------------------------------------------
 Metinleri 768-boyutlu vektörlere dönüştüren Gemini API entegrasyonu.
-Batch processing ve rate limiting desteği.
+
+- batchEmbedContents: istek başına en fazla 100 metin
+- Tek, keep-alive havuzlu httpx.AsyncClient (istek başına yeni bağlantı yok)
+- Sınırlı eşzamanlılık; 429 yanıtlarında limit yarıya iner (AIMD),
+  başarılı isteklerle kademeli olarak geri açılır
+- Batch içindeki aynı metinler tek kez embed edilir
+- Daha önce embed edilmiş metinler content-hash cache'ten gelir (app.core.embedding_cache)
 """
 
 import httpx
 import asyncio
 import logging
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional
 
 from app.config import get_settings
 from app.core.telemetry.service import telemetry, EventType
@@ -17,28 +23,83 @@ from app.core.telemetry.service import telemetry, EventType
 logger = logging.getLogger(__name__)
 
 
+class _AdaptiveLimiter:
+    """
+    Concurrency limiter driven by 429 responses (additive increase,
+    multiplicative decrease). A throttle also pauses new requests until
+    the provider's Retry-After (or a backoff) has elapsed.
+    """
+
+    def __init__(self, max_limit: int, increase_every: int = 4):
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.increase_every = increase_every
+        self._in_flight = 0
+        self._successes = 0
+        self._resume_at = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def release(self, throttled: bool = False, retry_after: float = 0.0) -> None:
+        async with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+                self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+            else:
+                self._successes += 1
+                if self.limit < self.max_limit and self._successes >= self.increase_every:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+
 class GeminiEmbedder:
     """
     Low-memory cloud embedding using Gemini text-embedding-004 API.
-    
+
     Features:
     - 768-dimensional embeddings
-    - Batch processing support
-    - Rate limiting
+    - batchEmbedContents with in-batch dedup
+    - Pooled keep-alive HTTP client
+    - Bounded concurrency, adaptive on 429
     - Automatic retry on errors
     """
-    
+
     MODEL = "models/text-embedding-004"
     DIMENSION = 768
     MAX_BATCH_SIZE = 100
-    
-    def __init__(self, api_base: Optional[str] = None):
+    MAX_CONCURRENCY = 4
+    MAX_TEXT_CHARS = 9000  # Safe limit
+    THROTTLE_BACKOFF = 2.0
+
+    def __init__(
+        self,
+        api_base: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        use_cache: bool = True,
+    ):
         """
         Initialize Gemini Embedder.
         """
         self.settings = get_settings()
         self.api_base = api_base or "https://generativelanguage.googleapis.com/v1beta"
-    
+        self.max_concurrency = max_concurrency or self.MAX_CONCURRENCY
+        self._transport = transport
+        self.use_cache = use_cache
+        self._client: Optional[httpx.AsyncClient] = None
+        self._limiter: Optional[_AdaptiveLimiter] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
     def _get_api_key(self) -> str:
         """Fetches API key from settings."""
         # Config'de spesifik bir embedding key yoksa, mevcut sistemden çekmeli
@@ -46,76 +107,176 @@ class GeminiEmbedder:
         # User config'de GEMINI_API_KEY tanımlı olabilir mi?
         if hasattr(self.settings, 'GEMINI_API_KEY') and self.settings.GEMINI_API_KEY:
             return self.settings.GEMINI_API_KEY
-        
+
         # Fallback: Eğer KEY yoksa logla ve hata fırlat
         logger.error("[Embedder] Gemini API Key bulunamadı!")
         raise ValueError("Gemini API Key missing in configuration.")
 
+    def _get_client(self) -> httpx.AsyncClient:
+        """Pooled client; recreated if the running event loop changed (tests, reloads)."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                transport=self._transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                headers={"Content-Type": "application/json"},
+            )
+            self._limiter = _AdaptiveLimiter(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client (app shutdown)."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
     async def embed(self, text: str, retry_count: int = 3) -> List[float]:
         """
         Generate embedding for a single text.
         """
         if not text or not text.strip():
             return [0.0] * self.DIMENSION
-        
-        api_key = self._get_api_key()
-        url = f"{self.api_base}/{self.MODEL}:embedContent"
-        
-        for attempt in range(retry_count):
-            try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(
-                        url,
-                        params={"key": api_key},
-                        json={
-                            "content": {
-                                "parts": [{"text": text[:9000]}]  # Safe limit
-                            }
-                        },
-                        headers={"Content-Type": "application/json"}
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-                    embedding = data.get("embedding", {}).get("values", [])
-                    
-                    if len(embedding) != self.DIMENSION:
-                        logger.warning(f"Dimension mismatch: got {len(embedding)}, expected {self.DIMENSION}")
-                        # Fallback/Pad logic could go here, but raising is safer for consistency
-                    
-                    return embedding or [0.0] * self.DIMENSION
-                    
-            except httpx.HTTPError as e:
-                logger.warning(f"Gemini API error (attempt {attempt + 1}): {e}")
-                if attempt == retry_count - 1:
-                    telemetry.emit(EventType.ERROR, {"component": "embedder", "error": str(e)}, component="memory")
-                    return [0.0] * self.DIMENSION # Fail safe
-                await asyncio.sleep(1.0 * (attempt + 1))
-            except Exception as e:
-                logger.error(f"Embedding error: {e}")
-                return [0.0] * self.DIMENSION
-        
-        return [0.0] * self.DIMENSION
+        return (await self.embed_batch([text], retry_count=retry_count))[0]
 
-    async def embed_batch(self, texts: List[str], delay: float = 0.5) -> List[List[float]]:
+    async def embed_batch(
+        self, texts: List[str], delay: float = 0.0, retry_count: int = 3
+    ) -> List[List[float]]:
         """
         Generate embeddings for multiple texts.
+
+        Identical texts are embedded once and cached vectors are reused; the
+        remaining unique texts are sent in
+        MAX_BATCH_SIZE chunks concurrently (bounded by the adaptive limiter).
+        `delay` is kept for API compatibility; pacing now comes from 429 feedback.
         """
-        results = []
-        for i in range(0, len(texts), self.MAX_BATCH_SIZE):
-            batch = texts[i:i + self.MAX_BATCH_SIZE]
-            
-            # Parallel execution for batch items might hit rate limits, 
-            # so we do sequential calls or small sub-batches here.
-            # Gemini API is fast, sequential is often safer for free tier.
-            batch_vectors = []
-            for text in batch:
-                vec = await self.embed(text)
-                batch_vectors.append(vec)
-            
-            results.extend(batch_vectors)
-            await asyncio.sleep(delay)
-            
+        results: List[List[float]] = [[0.0] * self.DIMENSION for _ in texts]
+        positions: Dict[str, List[int]] = {}
+        for i, text in enumerate(texts):
+            if text and text.strip():
+                positions.setdefault(text[:self.MAX_TEXT_CHARS], []).append(i)
+        if not positions:
+            return results
+
+        try:
+            api_key = self._get_api_key()
+        except Exception as e:
+            logger.error(f"Embedding error: {e}")
+            return results
+
+        unique = list(positions)
+        cache = self._get_cache()
+        if cache is not None:
+            cached = await cache.aget_many(unique)
+            for text, vec in zip(unique, cached, strict=True):
+                if vec is not None:
+                    for i in positions.pop(text):
+                        results[i] = vec
+            unique = list(positions)
+            if not unique:
+                return results
+
+        chunks = [unique[i:i + self.MAX_BATCH_SIZE] for i in range(0, len(unique), self.MAX_BATCH_SIZE)]
+        vectors = await asyncio.gather(
+            *(self._embed_chunk(chunk, api_key, retry_count) for chunk in chunks)
+        )
+        for chunk, chunk_vectors in zip(chunks, vectors, strict=True):
+            for text, vec in zip(chunk, chunk_vectors, strict=True):
+                for i in positions[text]:
+                    results[i] = vec
+        if cache is not None:
+            # Sıfır (hata) vektörleri cache'e yazılmaz
+            await cache.aput_many(unique, [vec for chunk_vectors in vectors for vec in chunk_vectors])
         return results
 
+    def _get_cache(self):
+        if not self.use_cache:
+            return None
+        try:
+            from app.core.embedding_cache import get_embedding_cache
+            return get_embedding_cache(self.MODEL, self.DIMENSION)
+        except Exception as e:
+            logger.warning(f"[Embedder] Embedding cache unavailable: {e}")
+            return None
+
+    async def _embed_chunk(self, texts: List[str], api_key: str, retry_count: int) -> List[List[float]]:
+        """One batchEmbedContents call (≤ MAX_BATCH_SIZE texts) with retry."""
+        client = self._get_client()
+        limiter = self._limiter
+        url = f"{self.api_base}/{self.MODEL}:batchEmbedContents"
+        payload = {
+            "requests": [
+                {"model": self.MODEL, "content": {"parts": [{"text": text}]}}
+                for text in texts
+            ]
+        }
+        fallback = [[0.0] * self.DIMENSION for _ in texts]
+
+        attempt = 0
+        throttles = 0
+        while attempt < retry_count:
+            await limiter.acquire()
+            try:
+                response = await client.post(url, params={"key": api_key}, json=payload)
+            except httpx.HTTPError as e:
+                await limiter.release()
+                attempt += 1
+                logger.warning(f"Gemini API error (attempt {attempt}): {e}")
+                if attempt < retry_count:
+                    await asyncio.sleep(1.0 * attempt)
+                continue
+            except Exception as e:
+                await limiter.release()
+                logger.error(f"Embedding error: {e}")
+                return fallback
+
+            if response.status_code == 429:
+                retry_after = self._retry_after(response, throttles)
+                await limiter.release(throttled=True, retry_after=retry_after)
+                throttles += 1
+                # 429 deneme hakkından düşmez (limit zaten daraldı), sadece sonsuz döngüye karşı sınırlı
+                if throttles <= retry_count * 3:
+                    logger.info(f"[Embedder] 429 → concurrency {limiter.limit}, retry in {retry_after:.1f}s")
+                    continue
+                attempt = retry_count
+                break
+
+            await limiter.release()
+            try:
+                response.raise_for_status()
+                embeddings = response.json().get("embeddings", [])
+            except (httpx.HTTPError, ValueError) as e:
+                attempt += 1
+                logger.warning(f"Gemini API error (attempt {attempt}): {e}")
+                if attempt < retry_count:
+                    await asyncio.sleep(1.0 * attempt)
+                continue
+
+            vectors = []
+            for i in range(len(texts)):
+                values = embeddings[i].get("values", []) if i < len(embeddings) else []
+                if values and len(values) != self.DIMENSION:
+                    logger.warning(f"Dimension mismatch: got {len(values)}, expected {self.DIMENSION}")
+                vectors.append(values or [0.0] * self.DIMENSION)
+            return vectors
+
+        telemetry.emit(
+            EventType.ERROR,
+            {"component": "embedder", "error": f"batch of {len(texts)} failed after retries"},
+            component="memory",
+        )
+        return fallback  # Fail safe
+
+    def _retry_after(self, response: httpx.Response, throttles: int) -> float:
+        try:
+            return float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            return self.THROTTLE_BACKOFF * (2 ** min(throttles, 4))
+
+
 # Singleton
 embedder = GeminiEmbedder()
@@ -13,7 +13,7 @@ import json
 import logging
 from typing import List, Dict, Any
 
-from app.providers.llm.groq import GroqProvider
+from app.providers.llm.registry import get_provider
 from app.core.prompts import EXTRACTOR_SYSTEM_PROMPT
 from app.core.predicate_catalog import get_catalog, canonicalize_predicate
 from app.services.brain.memory.engines.identity import (
@@ -72,7 +72,7 @@ async def extract_triplets(
     
     try:
         # LLM extraction
-        provider = GroqProvider()
+        provider = get_provider("groq")
         raw_response = await provider.generate(
             prompt=f"Kullanıcı mesajı: {text}",
             system_prompt=EXTRACTOR_SYSTEM_PROMPT,
@@ -4,6 +4,7 @@ from typing import List, Dict, Any, Optional
 
 from app.repositories.graph_db import graph_repo
 from app.repositories.vector_db import vector_repo
+from app.services.memory.fact_cache import user_fact_cache
 from app.core.telemetry.service import telemetry, EventType
 from app.core.predicate_catalog import get_catalog
 
@@ -27,14 +28,21 @@ class ContextBuilder:
             self.identity_preds = ["ISIM", "YASI", "MESLEGI", "YASAR_YER", "LAKABI", "ALERJISI", "SAGLIK_DURUMU"]
 
     async def get_identity_facts(self, user_id: str) -> List[Dict[str, str]]:
-        """Retrieves core identity facts from the knowledge graph."""
+        """Retrieves core identity facts from the knowledge graph (cached per user)."""
+        cached = user_fact_cache.get(user_id, "profile")
+        if cached is not None:
+            return [dict(f) for f in cached]
+
+        generation = user_fact_cache.generation(user_id)
         query = """
         MATCH (s:Entity)-[r:FACT {user_id: $uid}]->(o:Entity)
         WHERE r.predicate IN $preds AND (r.status IS NULL OR r.status = 'ACTIVE')
         RETURN r.predicate as predicate, o.name as value
         """
         results = await graph_repo.query(query, {"uid": user_id, "preds": self.identity_preds})
-        return [{"predicate": r["predicate"], "value": r["value"]} for r in results]
+        facts = [{"predicate": r["predicate"], "value": r["value"]} for r in results]
+        user_fact_cache.put(user_id, "profile", facts, generation)
+        return [dict(f) for f in facts]
 
     async def get_semantic_facts(self, message_vector: List[float], limit: int = 5) -> List[str]:
         """Retrieves semantically similar memories from Qdrant."""
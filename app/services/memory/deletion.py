@@ -23,6 +23,7 @@ from app.repositories.graph_db import graph_repo
 from app.repositories.vector_db import vector_repo
 from app.core.redis_client import get_redis
 from app.services.memory.deletion_parser import deletion_parser
+from app.services.memory.fact_cache import user_fact_cache
 
 logger = logging.getLogger("app.service.memory.deletion")
 
@@ -363,6 +364,7 @@ class DeletionService:
                 else:
                     deleted_counts["neo4j_nodes"] = result[0].get("deleted_nodes", 0)
             logger.info(f"[Deletion] Neo4j deletion complete: {deleted_counts}")
+            user_fact_cache.invalidate(user_id)
         except Exception as e:
             logger.error(f"[Deletion] Neo4j deletion failed: {e}")
             return {
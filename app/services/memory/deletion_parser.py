@@ -111,8 +111,8 @@ class DeletionParser:
         """
         # Lazy load LLM provider
         if self.llm is None:
-            from app.providers.llm.groq import GroqProvider
-            self.llm = GroqProvider()
+            from app.providers.llm.registry import get_provider
+            self.llm = get_provider("groq")
         
         prompt = PARSER_PROMPT.format(user_input=user_input)
         
@@ -0,0 +1,83 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger("app.service.memory.fact_cache")
+
+
+class UserFactCache:
+    """
+    Per-user cache for identity blocks read from the knowledge graph.
+
+    Identity facts (name, job, city...) change rarely but are read on every
+    turn, so the graph round trip for them is skipped while a cached block
+    exists. Entries are grouped per user; invalidate(user_id) drops every
+    scope of that user and is called by MemoryManager.save_fact/forget_fact.
+
+    A generation counter guards against a fetch that started before an
+    invalidation writing its (stale) result back afterwards. The cache is
+    process-local; other workers converge within the TTL.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_users: Optional[int] = None):
+        from app.config import get_settings
+
+        settings = get_settings()
+        self.ttl_seconds = settings.USER_FACT_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_users = max_users or settings.USER_FACT_CACHE_MAX_USERS
+        self._users: "OrderedDict[str, Dict[str, Tuple[float, Any]]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def generation(self, user_id: str) -> Tuple[int, int]:
+        """Token to pass to put(); taken before the graph read starts."""
+        with self._lock:
+            return self._epoch, self._generations.get(user_id, 0)
+
+    def get(self, user_id: str, scope: str) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id, {}).get(scope)
+            if entry is not None and now >= entry[0]:
+                del self._users[user_id][scope]
+                entry = None
+            if entry is not None:
+                self._users.move_to_end(user_id)
+        self._count(scope, "hit" if entry is not None else "miss")
+        return entry[1] if entry is not None else None
+
+    def put(self, user_id: str, scope: str, value: Any, generation: Tuple[int, int]) -> bool:
+        """Stores value unless the user was invalidated since generation was taken."""
+        with self._lock:
+            if (self._epoch, self._generations.get(user_id, 0)) != generation:
+                return False
+            self._users.setdefault(user_id, {})[scope] = (time.monotonic() + self.ttl_seconds, value)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return True
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        """Drops every user (bulk graph jobs that touch many users at once)."""
+        with self._lock:
+            self._epoch += 1
+            self._users.clear()
+
+    def _count(self, scope: str, result: str) -> None:
+        try:
+            from app.core.metrics import user_fact_cache_lookups_counter
+
+            user_fact_cache_lookups_counter.labels(scope=scope, result=result).inc()
+        except Exception:
+            pass
+
+
+user_fact_cache = UserFactCache()
@@ -6,6 +6,7 @@ from app.repositories.graph_db import graph_repo
 from app.repositories.vector_db import vector_repo
 from app.services.memory.mwg import mwg, MemoryPolicy, Decision
 from app.services.memory.context import context_builder
+from app.services.memory.fact_cache import user_fact_cache
 from app.core.predicate_catalog import canonicalize_predicate
 from app.core.telemetry.service import telemetry, EventType
 
@@ -63,6 +64,7 @@ class MemoryManager:
                     "uid": user_id,
                     "conf": triplet.get("confidence", 0.7)
                 })
+                user_fact_cache.invalidate(user_id)
             except Exception as e:
                 logger.error(f"Failed to save fact to Neo4j: {e}")
                 return False
@@ -99,6 +101,7 @@ class MemoryManager:
         """
         try:
             await graph_repo.query(query, {"s": subject, "p": predicate, "uid": user_id})
+            user_fact_cache.invalidate(user_id)
             
             telemetry.emit(
                 EventType.MEMORY_OP, 
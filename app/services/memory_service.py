@@ -1,5 +1,7 @@
 import asyncio
+import hashlib
 import logging
+import re
 import uuid
 from datetime import datetime
 from typing import Any, cast
@@ -16,6 +18,23 @@ COLLECTION_NAME = "memories"
 DEFAULT_IMPORTANCE = 0.5
 DEFAULT_TOPIC = "general"
 
+# Koleksiyon embedding fonksiyonu vermediğinde Chroma'nın varsayılanı (tek örnek, model bir kez yüklenir)
+_default_embedding_function: Any = None
+
+
+def _collection_embedding_function(collection: Any) -> Any:
+    """Koleksiyonun public configuration'daki embedding fonksiyonu; yoksa Chroma varsayılanı."""
+    global _default_embedding_function
+    configuration = getattr(collection, "configuration", None)
+    ef = configuration.get("embedding_function") if isinstance(configuration, dict) else None
+    if ef is not None:
+        return ef
+    if _default_embedding_function is None:
+        from chromadb.utils import embedding_functions
+
+        _default_embedding_function = embedding_functions.DefaultEmbeddingFunction()
+    return _default_embedding_function
+
 
 class MemoryRecord(BaseModel):
     """ChromaDB Ã¼zerinde tutulan bir hafÄ±za kaydÄ±nÄ±n uygulama iÃ§i temsili."""
@@ -84,38 +103,136 @@ class MemoryService:
         except Exception:
             return {}
 
-    # -------------------------------------------------------------------------
-    # API: Ekleme
-    # -------------------------------------------------------------------------
+    @staticmethod
+    def _content_hash(text: str) -> str:
+        """Normalize edilmiş metnin hash'i (exact duplicate katmanı; büyük/küçük harf, boşluk, noktalama duyarsız)."""
+        from app.services.memory_duplicate_detector import detector
+
+        # Türkçe büyük harfler: "İ".lower() birleşik nokta bırakır
+        normalized = detector.normalize_text(text.replace("İ", "i").replace("I", "ı"))
+        normalized = " ".join(re.sub(r"[^\w\s]", " ", normalized).split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _count_dedup(tier: str, result: str) -> None:
+        from app.core.metrics import memory_dedup_checks_counter
+
+        memory_dedup_checks_counter.labels(tier=tier, result=result).inc()
+
+    @staticmethod
+    def _embed_text(collection: Any, text: str) -> list[float] | None:
+        """Koleksiyonun kendi embedding fonksiyonuyla metni vektörler; olmazsa None."""
+        try:
+            vectors = _collection_embedding_function(collection)([text])
+        except Exception as e:
+            logger.debug(f"[MEMORY] Embedding hesaplanamadı, Chroma'ya bırakılıyor: {e}")
+            return None
+        if vectors is None or len(vectors) == 0:
+            return None
+        return [float(x) for x in vectors[0]]
+
     @classmethod
-    async def add_memory(
+    def _existing_record(cls, doc_id: Any, user_id: int, text: Any, meta: dict[str, Any], now: str) -> MemoryRecord:
+        return MemoryRecord(
+            id=cls._to_str(doc_id, ""),
+            user_id=user_id,
+            text=cls._to_str(text, ""),
+            type=cls._to_str(meta.get("type"), "fact"),
+            importance=cls._to_float(meta.get("importance"), 0.5),
+            topic=cls._to_str(meta.get("topic"), DEFAULT_TOPIC),
+            source=cls._to_str(meta.get("source"), "chat"),
+            is_active=True,
+            created_at=cls._to_str(meta.get("created_at"), now),
+            last_accessed=cls._to_str(meta.get("last_accessed"), now),
+            metadata=meta,
+        )
+
+    @classmethod
+    async def _find_duplicate(
         cls,
+        collection: Any,
         user_id: int,
         text: str,
-        memory_type: str = "fact",
-        importance: float = DEFAULT_IMPORTANCE,
-        topic: str = DEFAULT_TOPIC,
-        source: str = "chat",
-        metadata: dict[str, Any] | None = None,
-    ) -> MemoryRecord:
-        """Yeni bir anÄ± ekler."""
-        if not text:
-            raise ValueError("HafÄ±za metni boÅŸ olamaz.")
+        content_hash: str,
+        importance: float,
+        now: str,
+    ) -> tuple[MemoryRecord | None, list[float] | None]:
+        """
+        Katmanlı duplicate kontrolü.
+
+        1. Normalize metin hash'i (metadata filtresi, embedding yok)
+        2. Simhash/LSH adayı + metin benzerliği teyidi
+        3. Semantik sorgu (yalnızca ucuz katmanlar sonuçsuz kalırsa)
+
+        Returns:
+            (mevcut kayıt veya None, semantik katmanda hesaplanan embedding)
+        """
+        from app.services.memory_duplicate_detector import detector
 
-        collection = cls._get_collection()
-        now = cls._get_current_time()
+        active_filter: list[dict[str, Any]] = [{"user_id": user_id}, {"is_active": True}]
 
-        # --- HYBRID DUPLICATE CHECK (SEMANTIC + TEXT + ENTITY) ---
-        from app.services.memory_duplicate_detector import detector
+        # 1. Hash
+        try:
+            hash_res: dict[str, Any] = await asyncio.to_thread(
+                collection.get,
+                where={"$and": [*active_filter, {"content_hash": content_hash}]},
+                limit=1,
+                include=["documents", "metadatas"],
+            )
+            hash_ids = hash_res.get("ids") or []
+            if hash_ids:
+                cls._count_dedup("hash", "duplicate")
+                docs = hash_res.get("documents") or [""]
+                metas = hash_res.get("metadatas") or [{}]
+                logger.info(f"[MEMORY] Duplicate detected: content_hash | ID: {hash_ids[0]}")
+                return cls._existing_record(hash_ids[0], user_id, docs[0], cls._to_metadata(metas[0]), now), None
+            cls._count_dedup("hash", "miss")
+        except Exception as e:
+            cls._count_dedup("hash", "error")
+            logger.warning(f"[MEMORY] Hash duplicate check hatası: {e}")
+
+        # 2. Simhash / LSH
+        try:
+            from app.services.semantic_memory_enhancer import SimhashStore
+
+            sh_result = await SimhashStore.find_similar(user_id, text)
+            if sh_result.is_duplicate and sh_result.existing_id:
+                sh_res: dict[str, Any] = await asyncio.to_thread(
+                    collection.get, ids=[sh_result.existing_id], include=["documents", "metadatas"]
+                )
+                sh_ids = sh_res.get("ids") or []
+                sh_docs = sh_res.get("documents") or []
+                sh_metas = sh_res.get("metadatas") or []
+                if sh_ids and sh_docs:
+                    meta = cls._to_metadata(sh_metas[0]) if sh_metas else {}
+                    existing_text = cls._to_str(sh_docs[0], "")
+                    if (
+                        cls._to_int(meta.get("user_id"), -1) == user_id
+                        and meta.get("is_active", True)
+                        and detector.calculate_text_similarity(text, existing_text) > 0.95
+                    ):
+                        cls._count_dedup("simhash", "duplicate")
+                        logger.info(
+                            f"[MEMORY] Duplicate detected: simhash | ID: {sh_ids[0]} "
+                            f"| hamming={sh_result.hamming_distance}"
+                        )
+                        return cls._existing_record(sh_ids[0], user_id, existing_text, meta, now), None
+            cls._count_dedup("simhash", "miss")
+        except Exception as e:
+            cls._count_dedup("simhash", "error")
+            logger.warning(f"[MEMORY] Simhash duplicate check hatası: {e}")
 
+        # 3. Semantic (hybrid: semantic + text + entity)
+        embedding = await asyncio.to_thread(cls._embed_text, collection, text)
         try:
-            # Benzer iÃ§erikli aktif bir kayÄ±t var mÄ±?
-            # WHERE filter ile native filtering (ChromaDB >=0.4.22)
+            query_input: dict[str, Any] = (
+                {"query_embeddings": [embedding]} if embedding is not None else {"query_texts": [text]}
+            )
             check_res: dict[str, Any] = await asyncio.to_thread(
                 collection.query,
-                query_texts=[text],
+                **query_input,
                 n_results=10,  # Top-10 semantically similar
-                where={"$and": [{"user_id": user_id}, {"is_active": True}]},  # ChromaDB $and filter
+                where={"$and": active_filter},  # ChromaDB $and filter
             )
 
             ids_block = check_res.get("ids") or []
@@ -123,22 +240,20 @@ class MemoryService:
             dists_block = check_res.get("distances") or []
             metas_block = check_res.get("metadatas") or []
 
-            # Hybrid duplicate detection
-            if ids_block and len(ids_block) > 0 and ids_block[0]:
+            if ids_block and ids_block[0]:
                 doc_ids: list[Any] = ids_block[0]
-                docs: list[Any] = docs_block[0] if docs_block else []
+                docs_list: list[Any] = docs_block[0] if docs_block else []
                 dists: list[Any] = dists_block[0] if dists_block else []
-                metas: list[Any] = metas_block[0] if metas_block else []
+                metas_list: list[Any] = metas_block[0] if metas_block else []
 
                 for i, doc_id in enumerate(doc_ids):
-                    if i >= len(docs) or i >= len(dists):
+                    if i >= len(docs_list) or i >= len(dists):
                         continue
 
-                    meta = cls._to_metadata(metas[i]) if i < len(metas) else {}
-                    existing_text = cls._to_str(docs[i], "")
+                    meta = cls._to_metadata(metas_list[i]) if i < len(metas_list) else {}
+                    existing_text = cls._to_str(docs_list[i], "")
                     existing_dist = cls._to_float(dists[i], 0.0)
 
-                    # Hybrid duplicate detection
                     is_dup, reason = detector.is_duplicate(
                         new_text=text,
                         existing_text=existing_text,
@@ -148,27 +263,63 @@ class MemoryService:
                     )
 
                     if is_dup:
+                        cls._count_dedup("semantic", "duplicate")
                         logger.info(f"[MEMORY] Duplicate detected: {reason} | ID: {doc_id} | dist={existing_dist:.4f}")
+                        return cls._existing_record(doc_id, user_id, existing_text, meta, now), embedding
 
-                        # Mevcut kaydZñ dÇôndÇ¬r
-                        return MemoryRecord(
-                            id=cls._to_str(doc_id, ""),
-                            user_id=user_id,
-                            text=existing_text,
-                            type=cls._to_str(meta.get("type"), "fact"),
-                            importance=cls._to_float(meta.get("importance"), 0.5),
-                            topic=cls._to_str(meta.get("topic"), DEFAULT_TOPIC),
-                            source=cls._to_str(meta.get("source"), "chat"),
-                            is_active=True,
-                            created_at=cls._to_str(meta.get("created_at"), now),
-                            last_accessed=cls._to_str(meta.get("last_accessed"), now),
-                            metadata=meta,
-                        )
-                    else:
-                        logger.debug(f"[MEMORY] Not duplicate: {reason}")
-                        break  # Zølk kontrolde duplicate deZYilse diZYerlerine gerek yok
+                    logger.debug(f"[MEMORY] Not duplicate: {reason}")
+                    break  # İlk (en yakın) kayıt duplicate değilse diğerlerine gerek yok
+            cls._count_dedup("semantic", "miss")
+        except Exception as e:
+            cls._count_dedup("semantic", "error")
+            logger.warning(f"[MEMORY] Duplicate check hatası: {e}")
+
+        return None, embedding
+
+    @staticmethod
+    async def _register_simhash(user_id: int, memory_id: str, text: str) -> None:
+        try:
+            from app.services.semantic_memory_enhancer import SimhashStore
+
+            await SimhashStore.add(user_id, memory_id, text)
+        except Exception as e:
+            logger.warning(f"[MEMORY] Simhash kaydı başarısız ({memory_id}): {e}")
+
+    @staticmethod
+    async def _forget_simhash(user_id: int, memory_id: str) -> None:
+        try:
+            from app.services.semantic_memory_enhancer import SimhashStore
+
+            await SimhashStore.remove(user_id, memory_id)
         except Exception as e:
-            logger.warning(f"[MEMORY] Duplicate check hatasÄ±: {e}")
+            logger.warning(f"[MEMORY] Simhash silme başarısız ({memory_id}): {e}")
+
+    # -------------------------------------------------------------------------
+    # API: Ekleme
+    # -------------------------------------------------------------------------
+    @classmethod
+    async def add_memory(
+        cls,
+        user_id: int,
+        text: str,
+        memory_type: str = "fact",
+        importance: float = DEFAULT_IMPORTANCE,
+        topic: str = DEFAULT_TOPIC,
+        source: str = "chat",
+        metadata: dict[str, Any] | None = None,
+    ) -> MemoryRecord:
+        """Yeni bir anÄ± ekler."""
+        if not text:
+            raise ValueError("HafÄ±za metni boÅŸ olamaz.")
+
+        collection = cls._get_collection()
+        now = cls._get_current_time()
+        content_hash = cls._content_hash(text)
+
+        # --- KATMANLI DUPLICATE CHECK (HASH → SIMHASH/LSH → SEMANTIC) ---
+        existing, embedding = await cls._find_duplicate(collection, user_id, text, content_hash, importance, now)
+        if existing is not None:
+            return existing
 
         # EÄŸer duplicate deÄŸilse yeni oluÅŸtur
         memory_id = str(uuid.uuid4())
@@ -182,6 +333,7 @@ class MemoryService:
             "is_active": True,
             "created_at": now,
             "last_accessed": now,
+            "content_hash": content_hash,
         }
 
         if metadata:
@@ -190,12 +342,12 @@ class MemoryService:
                     final_metadata[k] = v if v is not None else ""  # None kontrolÃ¼
 
         # Chroma iÅŸlemi bloklayÄ±cÄ± olabilir, thread'e atÄ±yoruz
-        await asyncio.to_thread(
-            collection.add,
-            documents=[text],
-            metadatas=[final_metadata],
-            ids=[memory_id],
-        )
+        # Dedup için hesaplanan embedding tekrar kullanılır (ikinci embed yok)
+        add_kwargs: dict[str, Any] = {"documents": [text], "metadatas": [final_metadata], "ids": [memory_id]}
+        if embedding is not None:
+            add_kwargs["embeddings"] = [embedding]
+        await asyncio.to_thread(collection.add, **add_kwargs)
+        await cls._register_simhash(user_id, memory_id, text)
 
         logger.info(f"[MEMORY] Yeni kayÄ±t eklendi: {memory_id} (User: {user_id})")
 
@@ -313,18 +465,12 @@ class MemoryService:
         scored_memories.sort(key=lambda r: (r.score or 0.0), reverse=True)
         top_memories = scored_memories[:limit]
 
-        # 4. Yan Etki: SeÃ§ilenlerin 'last_accessed' tarihini gÃ¼ncelle
+        # 4. Yan Etki: Seçilenlerin erişimi günlüğe yazılır; last_accessed
+        # ChromaDB'ye toplu olarak, kritik yolun dışında işlenir
         if top_memories:
-            collection = cls._get_collection()
-            update_ids = [m.id for m in top_memories]
-            new_metas = []
-
-            for m in top_memories:
-                updated_meta = dict(m.metadata)
-                updated_meta["last_accessed"] = cls._get_current_time()
-                new_metas.append(updated_meta)
+            from app.memory.memory_access_log import memory_access_log
 
-            await asyncio.to_thread(collection.update, ids=update_ids, metadatas=new_metas)
+            memory_access_log.record(m.id for m in top_memories)
 
         return top_memories
 
@@ -353,6 +499,7 @@ class MemoryService:
         current_meta["is_active"] = False
 
         await asyncio.to_thread(collection.update, ids=[memory_id], metadatas=[current_meta])
+        await cls._forget_simhash(user_id, memory_id)
         logger.info(f"[MEMORY] KayZñt arYivlendi: {memory_id}")
         return True
 
@@ -387,6 +534,7 @@ class MemoryService:
         current_meta["importance"] = float(new_importance)
         current_meta["topic"] = new_topic
         current_meta["last_accessed"] = cls._get_current_time()
+        current_meta["content_hash"] = cls._content_hash(text)
 
         await asyncio.to_thread(
             collection.update,
@@ -394,6 +542,7 @@ class MemoryService:
             documents=[text],
             metadatas=[current_meta],
         )
+        await cls._register_simhash(user_id, memory_id, text)
 
         return MemoryRecord(
             id=memory_id,
@@ -7,6 +7,7 @@ from pydantic import BaseModel, Field
 
 from app.chat.decider import call_groq_api_safe_async
 from app.config import get_settings
+from app.core.classification_cache import ClassificationCache
 
 settings = get_settings()
 
@@ -33,6 +34,14 @@ class SemanticAnalysis(BaseModel):
     requires_step_by_step: bool = Field(default=False)
 
 
+_semantic_cache = ClassificationCache(
+    "semantic",
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+    dumps=lambda analysis: analysis.model_dump_json(),
+    loads=SemanticAnalysis.model_validate_json,
+)
+
+
 SEMANTIC_SYSTEM_PROMPT = r"""
 Analyze the user message and return STRICT JSON with these fields:
 - domain: ["health","finance","legal","sex","politics","religion","violence","tech","code","personal","relationships","mental_health","weather","sports","creative","general"]
@@ -209,7 +218,33 @@ async def analyze_message_semantics(message: str, now_iso: str | None = None) ->
     """
     Groq üzerinden semantic etiket çıkarır.
     Hızlı model kullanarak performansı artırır.
-    Hata durumunda güvenli varsayılan döner.
+    Mesaj küçük harfe çevrilip boşlukları sadeleştirilerek sınıflandırılır;
+    önbellek anahtarı da bu metindir, böylece yazım varyantları aynı sonucu
+    paylaşır. Eşzamanlı aynı mesajlar tek LLM çağrısını paylaşır. Hata
+    durumunda güvenli varsayılan döner.
+    """
+    normalized = " ".join(message.lower().split())
+    key = _semantic_cache.key(normalized)
+    try:
+        result = await _semantic_cache.get_or_compute(key, lambda: _classify_semantics(normalized))
+    except _SemanticParseError as e:
+        return e.fallback
+    # Paylaşılan önbellek nesnesi çağıranlara kopya olarak verilir
+    return result.model_copy(deep=True) if result else SemanticAnalysis()
+
+
+class _SemanticParseError(Exception):
+    """Model yanıtı ayrıştırılamadı; varsayılan analiz önbelleğe yazılmadan döner."""
+
+    def __init__(self, fallback: SemanticAnalysis):
+        super().__init__("semantic parse failed")
+        self.fallback = fallback
+
+
+async def _classify_semantics(message: str) -> SemanticAnalysis | None:
+    """
+    LLM çağrısı (önbelleksiz). Model yanıt vermezse None, yanıt ayrıştırılamazsa
+    _SemanticParseError; ikisi de önbelleğe yazılmaz.
     """
     from app.core.llm.governance import governance
     
@@ -231,7 +266,7 @@ async def analyze_message_semantics(message: str, now_iso: str | None = None) ->
         max_retries=2,
     )
     if not content:
-        return SemanticAnalysis()
+        return None
 
     try:
         data = json.loads(content)
@@ -241,10 +276,10 @@ async def analyze_message_semantics(message: str, now_iso: str | None = None) ->
         data = _post_process_overrides(data, message)
         data["should_use_internet"] = _derive_should_use_internet(data, message)
         return SemanticAnalysis(**data)
-    except Exception:
+    except Exception as e:
         data = {}
         data["answer_mode"] = "web_factual"
         data["data_freshness_needed"] = "medium"
         data["is_structured_request"] = False
         data["should_use_internet"] = _derive_should_use_internet(data, message)
-        return SemanticAnalysis(**data)
+        raise _SemanticParseError(SemanticAnalysis(**data)) from e
@@ -24,10 +24,13 @@ Kullanım:
 import asyncio
 import logging
 import hashlib
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any
 from dataclasses import dataclass
 
+import numpy as np
+
 from app.chat.decider import _get_llm_generator
 from app.core.llm.generator import LLMRequest
 
@@ -148,8 +151,109 @@ class Simhash:
 
 
 # =============================================================================
-# SIMHASH STORE (In-memory cache for fast lookup)
+# SIMHASH LSH INDEX (Bantlı kova, pigeonhole)
 # =============================================================================
+#
+# 64-bit parmak izi HAMMING_THRESHOLD + 1 banda bölünür. Hamming mesafesi
+# <= eşik olan iki parmak izi en az bir bantta birebir aynıdır (pigeonhole);
+# bu yüzden yalnızca aynı bant değerini paylaşan kovalara bakmak yeterlidir.
+#
+# Redis düzeni:
+#     simhash:{user_id}                    HASH  memory_id -> value (kaynak)
+#     simhash:{user_id}:b{band}:{hex}      SET   "{value}:{memory_id}"
+#     simhash:{user_id}:lsh                STR   kovalar kurulu işareti
+#
+# Kova üyeleri değeri de taşıdığı için arama tek SUNION turudur.
+
+def _band_values(value: int, bands: int, band_bits: int) -> list[int]:
+    """Parmak izini bant değerlerine böler."""
+    mask = (1 << band_bits) - 1
+    return [(value >> (i * band_bits)) & mask for i in range(bands)]
+
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount64(values: np.ndarray) -> np.ndarray:
+    """uint64 dizisi için vektörel popcount."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values).astype(np.int64)
+    as_bytes = values.view(np.uint8).reshape(-1, 8)
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=1, dtype=np.int64)
+
+
+def _closest(query: int, candidates: list[tuple[str, int]]) -> tuple[str, int] | None:
+    """Adaylar arasında en yakın (memory_id, distance) çiftini döner."""
+    if not candidates:
+        return None
+    values = np.fromiter((v for _, v in candidates), dtype=np.uint64, count=len(candidates))
+    distances = _popcount64(np.bitwise_xor(values, np.uint64(query)))
+    best = int(np.argmin(distances))
+    return candidates[best][0], int(distances[best])
+
+
+class _LocalSimhashIndex:
+    """
+    Redis erişilemezken kullanılan süreç içi bantlı indeks.
+
+    add() her zaman buraya da yazar (write-through); böylece Redis kesintisinde
+    aynı süreçte eklenmiş kayıtlar için dedup çalışmaya devam eder.
+    """
+
+    MAX_USERS = 1000
+
+    def __init__(self, bands: int, band_bits: int):
+        self.bands = bands
+        self.band_bits = band_bits
+        # user_id -> (memory_id -> value, [band -> {band_value -> {memory_id}}])
+        self._users: "OrderedDict[str, tuple[dict[str, int], list[dict[int, set[str]]]]]" = OrderedDict()
+
+    def _user(self, user_id: int | str, create: bool = False):
+        key = str(user_id)
+        entry = self._users.get(key)
+        if entry is None and create:
+            entry = self._users[key] = ({}, [dict() for _ in range(self.bands)])
+            while len(self._users) > self.MAX_USERS:
+                self._users.popitem(last=False)
+        if entry is not None:
+            self._users.move_to_end(key)
+        return entry
+
+    def add(self, user_id: int | str, memory_id: str, value: int) -> None:
+        self.remove(user_id, memory_id)
+        values, buckets = self._user(user_id, create=True)
+        values[memory_id] = value
+        for band, band_value in enumerate(_band_values(value, self.bands, self.band_bits)):
+            buckets[band].setdefault(band_value, set()).add(memory_id)
+
+    def remove(self, user_id: int | str, memory_id: str) -> bool:
+        entry = self._user(user_id)
+        if entry is None or memory_id not in entry[0]:
+            return False
+        values, buckets = entry
+        value = values.pop(memory_id)
+        for band, band_value in enumerate(_band_values(value, self.bands, self.band_bits)):
+            bucket = buckets[band].get(band_value)
+            if bucket is not None:
+                bucket.discard(memory_id)
+                if not bucket:
+                    del buckets[band][band_value]
+        return True
+
+    def candidates(self, user_id: int | str, value: int) -> list[tuple[str, int]]:
+        entry = self._user(user_id)
+        if entry is None:
+            return []
+        values, buckets = entry
+        ids: set[str] = set()
+        for band, band_value in enumerate(_band_values(value, self.bands, self.band_bits)):
+            ids |= buckets[band].get(band_value, set())
+        return [(memory_id, values[memory_id]) for memory_id in ids]
+
+    def clear_user(self, user_id: int | str) -> int:
+        entry = self._users.pop(str(user_id), None)
+        return len(entry[0]) if entry else 0
+
 
 # =============================================================================
 # REDIS SIMHASH STORE
@@ -157,8 +261,8 @@ class Simhash:
 
 class SimhashStore:
     """
-    Simhash değerlerini tutar ve hızlı benzerlik araması yapar.
-    Redis-backed implementation.
+    Simhash değerlerini tutar ve bantlı LSH ile benzerlik araması yapar.
+    Redis-backed; Redis yoksa süreç içi indekse düşer.
     """
     
     # Redis Keys
@@ -168,94 +272,218 @@ class SimhashStore:
     SIMILARITY_THRESHOLD = 0.95
     HAMMING_THRESHOLD = 3
     
+    # Pigeonhole: eşik + 1 bant → eşik içindeki her çift en az bir bantta eşleşir
+    BANDS = HAMMING_THRESHOLD + 1
+    BAND_BITS = Simhash.HASH_BITS // BANDS
+    
+    _local = _LocalSimhashIndex(BANDS, BAND_BITS)
+    
+    @classmethod
+    def _hash_key(cls, user_id: int | str) -> str:
+        return f"{cls.KEY_PREFIX}{user_id}"
+    
+    @classmethod
+    def _marker_key(cls, user_id: int | str) -> str:
+        return f"{cls.KEY_PREFIX}{user_id}:lsh"
+    
+    @classmethod
+    def _bucket_keys(cls, user_id: int | str, value: int) -> list[str]:
+        width = cls.BAND_BITS // 4
+        return [
+            f"{cls.KEY_PREFIX}{user_id}:b{band}:{band_value:0{width}x}"
+            for band, band_value in enumerate(_band_values(value, cls.BANDS, cls.BAND_BITS))
+        ]
+    
+    @staticmethod
+    def _member(memory_id: str, value: int) -> str:
+        return f"{value}:{memory_id}"
+    
+    @staticmethod
+    def _parse_member(member: str) -> tuple[str, int] | None:
+        value_str, _, memory_id = member.partition(":")
+        try:
+            return memory_id, int(value_str)
+        except ValueError:
+            return None
+    
+    @classmethod
+    def _result(cls, match: tuple[str, int] | None) -> SimhashResult:
+        if match is None:
+            return SimhashResult(is_duplicate=False, similarity=0.0)
+        memory_id, dist = match
+        sim = 1.0 - (dist / Simhash.HASH_BITS)
+        if dist <= cls.HAMMING_THRESHOLD:
+            return SimhashResult(is_duplicate=True, existing_id=memory_id, hamming_distance=dist, similarity=sim)
+        return SimhashResult(is_duplicate=False, hamming_distance=dist, similarity=sim)
+    
     @classmethod
     async def add(cls, user_id: int, memory_id: str, text: str) -> Simhash:
-        """Redis'e Simhash ekler."""
+        """Redis'e Simhash ekler (hash + bant kovaları)."""
         from app.core.redis_client import get_redis
         
-        redis = await get_redis()
         sh = Simhash(text)
+        cls._local.add(user_id, memory_id, sh.value)
+        
+        redis = await get_redis()
+        if not redis:
+            logger.warning("[SIMHASH] Redis unavailable, indexed locally only.")
+            return sh
         
-        if redis:
-            key = f"{cls.KEY_PREFIX}{user_id}"
-            # Store as hash: field=memory_id, value=simhash_int
-            await redis.hset(key, memory_id, str(sh.value))
-            # Set TTL (e.g. 30 days) to match importance decay roughly, or keep it consistent
-            # For now, let's keep it persistent like memory
-        else:
-            logger.warning("[SIMHASH] Redis unavailable, skipping save.")
+        key = cls._hash_key(user_id)
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.exists(cls._marker_key(user_id))
+                pipe.hget(key, memory_id)
+                indexed, previous = await pipe.execute()
             
+            if not indexed:
+                # Eski (kovasız) kullanıcı: önce mevcut kayıtları indeksle
+                await cls.backfill_user(user_id)
+            
+            async with redis.pipeline(transaction=False) as pipe:
+                if previous is not None and indexed:
+                    try:
+                        old_value = int(previous)
+                        for bucket in cls._bucket_keys(user_id, old_value):
+                            pipe.srem(bucket, cls._member(memory_id, old_value))
+                    except ValueError:
+                        pass
+                pipe.hset(key, memory_id, str(sh.value))
+                for bucket in cls._bucket_keys(user_id, sh.value):
+                    pipe.sadd(bucket, cls._member(memory_id, sh.value))
+                pipe.set(cls._marker_key(user_id), "1")
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"[SIMHASH] Redis write failed, indexed locally only: {e}")
+        
         return sh
     
     @classmethod
     async def find_similar(cls, user_id: int, text: str) -> SimhashResult:
-        """Redis'te benzer memory arar."""
+        """Yalnızca aday kovalara bakarak benzer memory arar."""
         from app.core.redis_client import get_redis
         
         new_sh = Simhash(text)
         redis = await get_redis()
         
         if not redis:
-            logger.warning("[SIMHASH] Redis unavailable, skipping check.")
-            return SimhashResult(is_duplicate=False)
-            
-        key = f"{cls.KEY_PREFIX}{user_id}"
+            logger.warning("[SIMHASH] Redis unavailable, using local index.")
+            return cls._result(_closest(new_sh.value, cls._local.candidates(user_id, new_sh.value)))
         
-        # Get all hashes for user
-        # Note: If user has 10k memories, this might be heavy. 
-        # But for active usage it's acceptable.
-        # Future optimization: Use LSH buckets or Vector DB
-        all_hashes = await redis.hgetall(key)
-        
-        if not all_hashes:
-            return SimhashResult(is_duplicate=False)
+        buckets = cls._bucket_keys(user_id, new_sh.value)
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.exists(cls._marker_key(user_id))
+                pipe.sunion(*buckets)
+                indexed, members = await pipe.execute()
             
-        for memory_id, val_str in all_hashes.items():
-            try:
-                existing_val = int(val_str)
-                # Create rudimentary Simhash obj
-                existing_sh = Simhash("")
-                existing_sh.value = existing_val
-                
-                dist = new_sh.distance(existing_sh)
-                sim = new_sh.similarity(existing_sh)
-                
-                if dist <= cls.HAMMING_THRESHOLD:
-                    return SimhashResult(
-                        is_duplicate=True,
-                        existing_id=memory_id,
-                        hamming_distance=dist,
-                        similarity=sim
-                    )
-            except ValueError:
-                continue
+            if not indexed and await cls.backfill_user(user_id):
+                members = await redis.sunion(*buckets)
+        except Exception as e:
+            logger.warning(f"[SIMHASH] Redis lookup failed, using local index: {e}")
+            return cls._result(_closest(new_sh.value, cls._local.candidates(user_id, new_sh.value)))
         
-        return SimhashResult(is_duplicate=False, similarity=0.0)
+        candidates = [parsed for parsed in map(cls._parse_member, members or ()) if parsed]
+        return cls._result(_closest(new_sh.value, candidates))
     
     @classmethod
     async def remove(cls, user_id: int, memory_id: str) -> bool:
-        """Redis'ten Simhash siler."""
+        """Redis'ten Simhash siler (hash + kovalar)."""
         from app.core.redis_client import get_redis
+        
+        removed_local = cls._local.remove(user_id, memory_id)
         redis = await get_redis()
         if not redis:
-            return False
-            
-        key = f"{cls.KEY_PREFIX}{user_id}"
-        result = await redis.hdel(key, memory_id)
-        return result > 0
+            return removed_local
+        
+        key = cls._hash_key(user_id)
+        previous = await redis.hget(key, memory_id)
+        if previous is None:
+            return removed_local
+        
+        async with redis.pipeline(transaction=False) as pipe:
+            try:
+                old_value = int(previous)
+                for bucket in cls._bucket_keys(user_id, old_value):
+                    pipe.srem(bucket, cls._member(memory_id, old_value))
+            except ValueError:
+                pass
+            pipe.hdel(key, memory_id)
+            result = await pipe.execute()
+        return result[-1] > 0
     
     @classmethod
     async def clear_user(cls, user_id: int) -> int:
-        """Kullanıcının tüm simhash'lerini siler."""
+        """Kullanıcının tüm simhash'lerini ve kovalarını siler."""
+        from app.core.redis_client import get_redis
+        
+        local_count = cls._local.clear_user(user_id)
+        redis = await get_redis()
+        if not redis:
+            return local_count
+        
+        key = cls._hash_key(user_id)
+        all_hashes = await redis.hgetall(key)
+        buckets: set[str] = set()
+        for val_str in all_hashes.values():
+            try:
+                buckets.update(cls._bucket_keys(user_id, int(val_str)))
+            except ValueError:
+                continue
+        await redis.delete(key, cls._marker_key(user_id), *buckets)
+        return len(all_hashes)
+    
+    @classmethod
+    async def backfill_user(cls, user_id: int | str) -> int:
+        """
+        Mevcut simhash hash'inden bant kovalarını (yeniden) kurar.
+        
+        Returns:
+            int: İndekslenen kayıt sayısı
+        """
         from app.core.redis_client import get_redis
+        
         redis = await get_redis()
         if not redis:
             return 0
-            
-        key = f"{cls.KEY_PREFIX}{user_id}"
-        count = await redis.hlen(key)
-        await redis.delete(key)
+        
+        all_hashes = await redis.hgetall(cls._hash_key(user_id))
+        async with redis.pipeline(transaction=False) as pipe:
+            count = 0
+            for memory_id, val_str in all_hashes.items():
+                try:
+                    value = int(val_str)
+                except ValueError:
+                    continue
+                for bucket in cls._bucket_keys(user_id, value):
+                    pipe.sadd(bucket, cls._member(memory_id, value))
+                count += 1
+            pipe.set(cls._marker_key(user_id), "1")
+            await pipe.execute()
+        
+        if count:
+            logger.info(f"[SIMHASH] LSH backfill user={user_id}: {count} kayıt")
         return count
+    
+    @classmethod
+    async def backfill_all(cls) -> dict[str, int]:
+        """Redis'teki tüm kullanıcılar için bant kovalarını kurar."""
+        from app.core.redis_client import get_redis
+        
+        redis = await get_redis()
+        if not redis:
+            logger.warning("[SIMHASH] Redis unavailable, backfill skipped.")
+            return {}
+        
+        results: dict[str, int] = {}
+        async for key in redis.scan_iter(match=f"{cls.KEY_PREFIX}*", count=500):
+            if isinstance(key, bytes):
+                key = key.decode()
+            user_id = key[len(cls.KEY_PREFIX):]
+            if ":" in user_id:
+                continue  # kova / işaret anahtarı
+            results[user_id] = await cls.backfill_user(user_id)
+        return results
 
 
 # =============================================================================
@@ -444,7 +672,8 @@ class ImportanceDecay:
         cls,
         original_importance: float,
         created_at: datetime,
-        now: datetime | None = None
+        now: datetime | None = None,
+        last_accessed: datetime | None = None
     ) -> float:
         """
         Decay uygulanmış importance hesaplar.
@@ -453,6 +682,7 @@ class ImportanceDecay:
             original_importance: Orijinal importance (0-1)
             created_at: Oluşturulma zamanı
             now: Şu anki zaman (test için override)
+            last_accessed: Son erişim zamanı (erişilen hafıza decay saatini sıfırlar)
             
         Returns:
             float: Decay sonrası importance
@@ -460,7 +690,8 @@ class ImportanceDecay:
         if now is None:
             now = datetime.utcnow()
         
-        days_old = (now - created_at).days
+        reference = max(created_at, last_accessed) if last_accessed else created_at
+        days_old = (now - reference).days
         decay_periods = days_old // cls.DECAY_PERIOD_DAYS
         
         if decay_periods <= 0:
@@ -473,6 +704,31 @@ class ImportanceDecay:
     def should_archive(cls, current_importance: float) -> bool:
         """Archive olmalı mı?"""
         return current_importance < cls.ARCHIVE_THRESHOLD
+    
+    @classmethod
+    async def last_access_times(cls, memories: list[dict[str, Any]]) -> dict[str, datetime]:
+        """
+        Birleştirilmiş erişim verisi: erişim günlüğü (tampon + Redis) ve
+        metadata'daki last_accessed'in en yenisi.
+        """
+        from app.memory.memory_access_log import memory_access_log
+        
+        times: dict[str, datetime] = {}
+        for memory in memories:
+            try:
+                times[memory["id"]] = datetime.fromisoformat(memory.get("last_accessed", ""))
+            except (KeyError, ValueError, TypeError):
+                continue
+        
+        try:
+            logged = await memory_access_log.last_accessed_many(m.get("id", "") for m in memories)
+        except Exception as e:
+            logger.warning(f"[DECAY] Access log unavailable: {e}")
+            logged = {}
+        for memory_id, ts in logged.items():
+            if memory_id not in times or ts > times[memory_id]:
+                times[memory_id] = ts
+        return times
 
 
 # =============================================================================
@@ -508,7 +764,6 @@ class SemanticMemoryEnhancer:
         memory_id: str,
         text: str
     ) -> Simhash:
-        """Memory için Simhash kaydeder."""
         """Memory için Simhash kaydeder."""
         return await SimhashStore.add(user_id, memory_id, text)
     
@@ -574,6 +829,7 @@ class SemanticMemoryEnhancer:
         decayed_count = 0
         expired_count = 0
         now = datetime.utcnow()
+        access_times = await ImportanceDecay.last_access_times(memories)
         
         for memory in memories:
             original_importance = memory.get("importance", 0.5)
@@ -587,7 +843,8 @@ class SemanticMemoryEnhancer:
             new_importance = ImportanceDecay.calculate_decayed_importance(
                 original_importance,
                 created_at,
-                now
+                now,
+                last_accessed=access_times.get(memory.get("id", ""))
             )
             
             if new_importance < original_importance:
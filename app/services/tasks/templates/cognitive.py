@@ -146,6 +146,10 @@ class ConsolidationJob(BaseJob):
             
             result = await graph_repo.query(query, {"threshold": threshold})
             cleaned = result[0]["cleaned"] if result else 0
+            if cleaned:
+                # Tüm kullanıcılara dokunan toplu güncelleme: kimlik önbelleği tazelenmeli
+                from app.services.memory.fact_cache import user_fact_cache
+                user_fact_cache.clear()
             
             logger.info(f"[ConsolidationJob] Marked {cleaned} facts as STALE")
             return {"cleaned": cleaned}
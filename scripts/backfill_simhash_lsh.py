@@ -0,0 +1,49 @@
+"""
+Simhash LSH kovalarını mevcut kullanıcılar için kurar.
+
+Bant kovaları gelmeden önce kaydedilmiş simhash hash'leri (simhash:{user_id})
+yalnızca HGETALL ile taranabiliyordu; bu komut her kullanıcı için bant
+setlerini üretir ve "indekslendi" işaretini koyar.
+
+    python scripts/backfill_simhash_lsh.py              # tüm kullanıcılar
+    python scripts/backfill_simhash_lsh.py --user-id 42
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core.redis_client import close_redis, get_redis
+from app.services.semantic_memory_enhancer import SimhashStore
+
+
+async def run(user_id: str | None) -> int:
+    try:
+        if await get_redis() is None:
+            print("redis_unavailable")
+            return 1
+        if user_id is not None:
+            results = {user_id: await SimhashStore.backfill_user(user_id)}
+        else:
+            results = await SimhashStore.backfill_all()
+        for uid, count in sorted(results.items()):
+            print(f"user={uid} indexed={count}")
+        print(f"users={len(results)} memories={sum(results.values())}")
+        return 0
+    finally:
+        await close_redis()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user-id", default=None, help="Yalnızca bu kullanıcıyı indeksle")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.user_id)))
+
+
+if __name__ == "__main__":
+    main()
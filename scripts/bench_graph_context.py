@@ -0,0 +1,100 @@
+"""
+Hafıza bağlamı latency benchmark'ı: eski sıralı akış (identity sorgusu →
+hard facts sorgusu → vector search) vs build_context (tek Cypher sorgusu,
+graph ve vector eşzamanlı, kimlik bloğu önbellekli).
+
+Neo4j/Qdrant gecikmesi sahte repository'lerle simüle edilir:
+
+    python scripts/bench_graph_context.py --graph-rtt-ms 8 --vector-ms 15 --repeat 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.brain.memory.context import build_context
+from app.services.memory.fact_cache import user_fact_cache
+
+
+class SimulatedGraph:
+    """Her sorgu bir round trip (rtt) sürer."""
+
+    def __init__(self, rtt_s):
+        self.rtt_s = rtt_s
+        self.queries = 0
+
+    async def query(self, cypher, params=None):
+        self.queries += 1
+        await asyncio.sleep(self.rtt_s)
+        rows = [{"kind": "hard_fact", "subject": "ALI", "predicate": "SEVER", "object": "kahve", "confidence": 0.9}]
+        if "UNION ALL" in cypher or "$anchor" in cypher:
+            rows.append({"kind": "identity", "subject": "ALI", "predicate": "ISIM", "object": "Ali", "confidence": 1.0})
+        return rows
+
+
+class SimulatedVector:
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+
+    async def search(self, query, user_id, limit):
+        await asyncio.sleep(self.latency_s)
+        return [{"content": "kahve sohbeti"}]
+
+
+async def legacy_build_context(user_id, query, graph_repo, vector_repo, limit=10):
+    """Eski build_context akışı (referans): üç sıralı round trip."""
+    await graph_repo.query("MATCH (s:Entity {name: $anchor}) ... identity", {"uid": user_id})
+    await graph_repo.query("MATCH (s:Entity) ... hard facts", {"uid": user_id, "limit": limit})
+    await vector_repo.search(query=query, user_id=user_id, limit=limit)
+
+
+async def measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def run(args):
+    graph = SimulatedGraph(args.graph_rtt_ms / 1000)
+    vector = SimulatedVector(args.vector_ms / 1000)
+
+    async def cold():
+        user_fact_cache.invalidate("bench")
+        await build_context("bench", "kahve", graph, vector)
+
+    async def warm():
+        await build_context("bench", "kahve", graph, vector)
+
+    cases = {
+        "legacy sequential": lambda: legacy_build_context("bench", "kahve", graph, vector),
+        "single query, cold": cold,
+        "single query, warm": warm,
+    }
+    results = {}
+    for name, fn in cases.items():
+        graph.queries = 0
+        samples = await measure(fn, args.repeat)
+        results[name] = statistics.median(samples)
+        print(f"{name:>20}: p50 {results[name] * 1000:7.2f} ms, {graph.queries / args.repeat:.1f} graph queries/call")
+    print(f"{'speedup (cold)':>20}: {results['legacy sequential'] / results['single query, cold']:7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--graph-rtt-ms", type=float, default=8.0)
+    parser.add_argument("--vector-ms", type=float, default=15.0)
+    parser.add_argument("--repeat", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Anahtar zamanlayıcı yük simülasyonu: eski seçim (en az kullanılan anahtar,
+429 sonrası 60s cooldown) vs KeyScheduler (RPM/TPM token bucket + heap).
+
+Sanal saatle çalışır; stub sağlayıcı Groq gibi sürekli dolan bucket'larla
+limit uygular ve aşımda 429 döner. Ayrıca havuz büyüklüğüne göre seçim
+maliyetini ölçer:
+
+    python scripts/bench_key_scheduler.py --keys 8 --qps 6 --minutes 15
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core.llm.key_scheduler import KeyLimits, KeyScheduler
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubProvider:
+    """Anahtar başına sürekli dolan RPM/TPM bucket'ı; aşımda 429."""
+
+    def __init__(self, clock, rpm, tpm):
+        self.clock, self.rpm, self.tpm = clock, rpm, tpm
+        self.state = {}
+
+    def call(self, key, tokens):
+        requests, budget, last = self.state.get(key, (self.rpm, self.tpm, self.clock()))
+        elapsed = self.clock() - last
+        requests = min(self.rpm, requests + elapsed * self.rpm / 60)
+        budget = min(self.tpm, budget + elapsed * self.tpm / 60)
+        if requests < 1 or budget < tokens:
+            self.state[key] = (requests, budget, self.clock())
+            return 429
+        self.state[key] = (requests - 1, budget - tokens, self.clock())
+        return 200
+
+
+class LegacySelector:
+    """Eski get_best_key: müsait anahtarları sırala, en az kullanılanı seç; 429'da cooldown."""
+
+    def __init__(self, clock, keys):
+        self.clock = clock
+        self.requests = {key: 0 for key in keys}
+        self.cooldown_until = {key: 0.0 for key in keys}
+
+    def select(self, tokens):
+        available = [k for k in self.requests if self.cooldown_until[k] <= self.clock()]
+        if not available:
+            return None
+        key = sorted(available, key=lambda k: self.requests[k])[0]
+        self.requests[key] += 1
+        return key
+
+    def on_result(self, key, status, actual, estimated):
+        if status == 429:
+            self.cooldown_until[key] = self.clock() + 60
+
+
+class ScheduledSelector:
+    def __init__(self, clock, keys, rpm, tpm, factor):
+        self.scheduler = KeyScheduler(limits_for=lambda p, m: KeyLimits(rpm=rpm * factor, tpm=tpm * factor), clock=clock)
+        self.scheduler.register("groq", list(keys))
+
+    def select(self, tokens):
+        return self.scheduler.select("groq", "bench-model", tokens=tokens)
+
+    def on_result(self, key, status, actual, estimated):
+        if status == 429:
+            self.scheduler.drain(key, "bench-model")
+        else:
+            self.scheduler.settle(key, "bench-model", actual - estimated)
+
+
+def simulate(make_selector, args):
+    rng = random.Random(args.seed)
+    clock = VirtualClock()
+    keys = [f"key{i}" for i in range(args.keys)]
+    selector = make_selector(clock, keys)
+    provider = StubProvider(clock, args.rpm, args.tpm)
+    served = routed = limited = 0
+    while clock.now < args.minutes * 60:
+        clock.now += rng.expovariate(args.qps)
+        estimated = rng.randint(100, 600)
+        key = selector.select(estimated)
+        if key is None:
+            routed += 1  # zincirdeki sonraki modele gider
+            continue
+        actual = int(estimated * rng.uniform(0.8, 1.05))
+        status = provider.call(key, actual)
+        selector.on_result(key, status, actual, estimated)
+        if status == 429:
+            limited += 1
+        else:
+            served += 1
+    return served, routed, limited
+
+
+def selection_cost(pool_size, rounds=2000):
+    clock = VirtualClock()
+    keys = [f"key{i}" for i in range(pool_size)]
+    legacy = LegacySelector(clock, keys)
+    scheduled = ScheduledSelector(clock, keys, rpm=10**6, tpm=10**9, factor=1.0)
+    results = {}
+    for name, selector in (("legacy sort", legacy), ("heap", scheduled)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            clock.now += 0.001
+            selector.select(10)
+        results[name] = (time.perf_counter() - start) / rounds * 1e6
+    return results
+
+
+def main():
+    logging.disable(logging.ERROR)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=8)
+    parser.add_argument("--qps", type=float, default=6.0, help="ortalama istek/saniye (Poisson)")
+    parser.add_argument("--minutes", type=float, default=15.0)
+    parser.add_argument("--rpm", type=int, default=30)
+    parser.add_argument("--tpm", type=int, default=6000)
+    parser.add_argument("--factor", type=float, default=0.9, help="LLM_KEY_CAPACITY_FACTOR")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{args.keys} keys x {args.rpm} RPM / {args.tpm} TPM, {args.qps} req/s for {args.minutes:g} min (virtual)")
+    cases = {
+        "legacy": lambda clock, keys: LegacySelector(clock, keys),
+        "scheduler": lambda clock, keys: ScheduledSelector(clock, keys, args.rpm, args.tpm, args.factor),
+    }
+    for name, factory in cases.items():
+        served, routed, limited = simulate(factory, args)
+        print(f"{name:>10}: served {served:6d}, routed away {routed:6d}, 429s {limited:6d}")
+
+    for pool_size in (8, 128, 1024):
+        cost = selection_cost(pool_size)
+        print(f"{'select':>10}: {pool_size:5d} keys  legacy {cost['legacy sort']:8.2f} us  heap {cost['heap']:6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+LLM istemci overhead benchmark'ı: çağrı başına GroqProvider (yeni AsyncGroq +
+yeni bağlantı) vs provider registry (paylaşılan keep-alive havuzu).
+
+Yerel bir OpenAI uyumlu stub sunucuya karşı çalışır; ağ gecikmesi yoktur,
+ölçülen fark istemci kurulumu + bağlantı açma maliyetidir:
+
+    python scripts/bench_llm_clients.py --calls 200
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.core.metrics import llm_http_connections_counter, llm_http_requests_counter
+from app.providers.llm.groq import GroqProvider
+from app.providers.llm.registry import ProviderRegistry
+
+COMPLETION = json.dumps({
+    "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "stub-model",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+}).encode()
+
+connections_seen = 0
+
+
+async def handle(reader, writer):
+    global connections_seen
+    connections_seen += 1
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = next(
+                (int(line.split(b":", 1)[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length:")),
+                0,
+            )
+            await reader.readexactly(length)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(COMPLETION)}\r\n\r\n".encode() + COMPLETION
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+        pass  # istemci bağlantıyı kapattı / benchmark bitti
+    finally:
+        writer.close()
+
+
+async def measure(get_provider, calls):
+    global connections_seen
+    connections_seen = 0
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await get_provider().generate(prompt="selam", model="stub-model")
+        samples.append(time.perf_counter() - start)
+    return samples, connections_seen
+
+
+async def run(args):
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    registry = ProviderRegistry()
+
+    cases = {
+        "per-call provider": lambda: GroqProvider(api_key="gsk_bench"),
+        "registry (pooled)": lambda: registry.get("groq", "gsk_bench"),
+    }
+    results = {}
+    for name, factory in cases.items():
+        await measure(factory, 5)  # ısınma
+        samples, connections = await measure(factory, args.calls)
+        results[name] = statistics.median(samples)
+        print(f"{name:>18}: p50 {results[name] * 1000:7.3f} ms/call, {connections} TCP connections / {args.calls} calls")
+
+    requests = llm_http_requests_counter.labels(provider="groq")._value.get()
+    opened = llm_http_connections_counter.labels(provider="groq")._value.get()
+    print(f"{'registry metrics':>18}: {requests:.0f} requests over {opened:.0f} connections")
+    print(f"{'saved per call':>18}: {(results['per-call provider'] - results['registry (pooled)']) * 1000:7.3f} ms")
+
+    await registry.aclose()
+    server.close()
+    await server.wait_closed()
+
+
+def main():
+    logging.disable(logging.ERROR)  # Redis'siz ortamda telemetry publish hataları ölçümü kirletmesin
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Ortak test fixture'ları.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def naive_utc_datetimes(monkeypatch):
+    """
+    Modeller naive UTC (datetime.utcnow) yazar. Yeni sqlmodel sürümlerinin
+    UTCDateTime kolonu naive değeri reddeder; DB kullanan testlerde naive
+    değerler eski sürümlerdeki gibi UTC kabul edilip olduğu gibi yazılır.
+    """
+    from sqlmodel.sql import sqltypes
+
+    column_type = getattr(sqltypes, "UTCDateTime", None)
+    if column_type is None:
+        return  # Eski sqlmodel: naive datetime zaten kabul ediliyor
+    original = column_type.process_bind_param
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.utcoffset() is None:
+            return value
+        return original(self, value, dialect)
+
+    monkeypatch.setattr(column_type, "process_bind_param", process_bind_param)
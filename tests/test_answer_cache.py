@@ -0,0 +1,288 @@
+"""
+Answer Cache - Unit Tests
+=========================
+
+Yanıt önbelleği: exact ve semantik eşleşme, persona/stil kapsamı, TTL,
+hafıza/RAG bypass kuralları, stream replay ve answer_cache tablosu.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.brain.answer_cache import AnswerCacheService, normalize_question
+from app.services.brain.intent import OrchestrationPlan, TaskSpec
+from app.services.brain.request_context import RequestContext
+
+VECTORS = {
+    "dolar kuru ne kadar": [1.0, 0.0, 0.0],
+    "dolar kaç lira": [0.98, 0.05, 0.0],
+    "python liste nasıl sıralanır": [0.0, 1.0, 0.0],
+    "ankara da yarın hava nasıl": [0.0, 0.0, 1.0],
+    "izmir de yarın hava nasıl": [0.0, 0.01, 1.0],
+}
+
+
+async def _embed(text):
+    return VECTORS.get(normalize_question(text), [0.0, 0.0, 1.0])
+
+
+async def _no_documents(owner, question):
+    return False
+
+
+class _MemoryStore:
+    """answer_cache tablosunun bellek içi karşılığı."""
+
+    def __init__(self):
+        self.rows = []
+
+    async def get_exact(self, user_id, cache_key, now):
+        for row in reversed(self.rows):
+            if row.user_id == user_id and row.cache_key == cache_key and row.expires_at > now:
+                return row
+        return None
+
+    async def candidates(self, user_id, persona, now, limit):
+        rows = [r for r in self.rows if r.user_id == user_id and r.persona == persona and r.expires_at > now]
+        return list(reversed(rows))[:limit]
+
+    async def put(self, entry):
+        self.rows = [r for r in self.rows if not (r.user_id == entry.user_id and r.cache_key == entry.cache_key)]
+        self.rows.append(entry)
+
+
+def _ctx(message, user_id="7", persona="friendly", **kwargs):
+    return RequestContext(
+        trace_id="trace_test", user_id=user_id, username="alice", session_id="conv-1",
+        message=message, persona=persona, **kwargs,
+    )
+
+
+def _plan(*tools, intent="search", **kwargs):
+    tasks = [TaskSpec(id=f"t{i}", type="tool", tool_name=tool) for i, tool in enumerate(tools)]
+    tasks.append(TaskSpec(id="gen", type="generation", specialist="logic"))
+    return OrchestrationPlan(intent=intent, tasks=tasks, **kwargs)
+
+
+async def _answer(cache, message, response, plan, **kwargs):
+    """Miss → pipeline → store akışını taklit eder."""
+    ctx = _ctx(message, **kwargs)
+    assert await cache.lookup(ctx) is None
+    ctx.plan = plan
+    ctx.task_results = [{"status": "success", "type": "tool"} for _ in plan.tasks]
+    return ctx, await cache.store(ctx, response)
+
+
+@pytest.fixture
+def cache():
+    return AnswerCacheService(backend=_MemoryStore(), embed_fn=_embed, document_probe=_no_documents)
+
+
+class TestLookup:
+
+    @pytest.mark.asyncio
+    async def test_exact_hit_ignores_case_and_punctuation(self, cache):
+        _, stored = await _answer(cache, "Python liste nasıl sıralanır?", "sorted() kullan.", _plan(intent="general"))
+        assert stored
+
+        hit = await cache.lookup(_ctx("python LİSTE nasıl sıralanır"))
+        assert hit.match == "exact"
+        assert hit.answer == "sorted() kullan."
+
+    @pytest.mark.asyncio
+    async def test_semantic_hit_above_threshold(self, cache):
+        await _answer(cache, "Dolar kuru ne kadar?", "34 TL", _plan("search_tool"))
+
+        hit = await cache.lookup(_ctx("Dolar kaç lira?"))
+        assert hit.match == "semantic"
+        assert hit.similarity > 0.95
+        assert await cache.lookup(_ctx("Bugün hava nasıl olacak?")) is None
+
+    @pytest.mark.asyncio
+    async def test_scoped_per_user_persona_and_style(self, cache):
+        await _answer(cache, "Dolar kuru ne kadar?", "34 TL", _plan("search_tool"))
+
+        assert await cache.lookup(_ctx("Dolar kuru ne kadar?", user_id="8")) is None
+        assert await cache.lookup(_ctx("Dolar kuru ne kadar?", persona="bela")) is None
+        assert await cache.lookup(_ctx("Dolar kuru ne kadar?", style_profile={"tone": "formal"})) is None
+
+    @pytest.mark.asyncio
+    async def test_hits_later_turns_of_other_conversations(self, cache):
+        # Anahtar geçmişe bağlı değil: ilk turda yazılan yanıt sonraki turlarda da döner
+        await _answer(cache, "Dolar kuru ne kadar?", "34 TL", _plan("search_tool"))
+
+        ctx = _ctx("Dolar kuru ne kadar?")
+        ctx.set_history([{"role": "user", "content": "Python nedir?"}, {"role": "assistant", "content": "Bir dil."}])
+        assert (await cache.lookup(ctx)).match == "exact"
+        assert (await cache.lookup(_ctx("Dolar kaç lira?", memory_context="Kullanıcı İstanbul'da"))).match == "semantic"
+        # Önceki cevaba dayanan takip soruları önbellekten dönmez
+        assert await cache.lookup(_ctx("Peki dolar kaç lira?")) is None
+
+    @pytest.mark.asyncio
+    async def test_semantic_hit_requires_same_numbers_and_names(self, cache):
+        await _answer(cache, "Ankara'da yarın hava nasıl?", "Güneşli", _plan("search_tool"))
+
+        assert await cache.lookup(_ctx("İzmir'de yarın hava nasıl?")) is None
+        assert (await cache.lookup(_ctx("ankara da yarın hava nasıl"))).match == "exact"
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_not_served(self, cache):
+        await _answer(cache, "Dolar kuru ne kadar?", "34 TL", _plan("search_tool"))
+        (row,) = cache.backend.rows
+        assert row.expires_at - row.created_at == timedelta(seconds=600)
+
+        row.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        assert await cache.lookup(_ctx("Dolar kuru ne kadar?")) is None
+
+    @pytest.mark.asyncio
+    async def test_embedding_failure_falls_back_to_exact(self):
+        async def broken(text):
+            raise RuntimeError("embed down")
+
+        cache = AnswerCacheService(backend=_MemoryStore(), embed_fn=broken, document_probe=_no_documents)
+        await _answer(cache, "Dolar kuru ne kadar?", "34 TL", _plan("search_tool"))
+
+        assert cache.backend.rows[0].embedding is None
+        assert (await cache.lookup(_ctx("dolar kuru ne kadar"))).match == "exact"
+        assert await cache.lookup(_ctx("Dolar kaç lira?")) is None
+
+
+class TestBypass:
+
+    @pytest.mark.parametrize("message, kwargs, reason", [
+        ("Benim adım ne?", {}, "personal"),
+        ("Yüklediğim sözleşmede fesih maddesi", {}, "personal"),
+        ("Peki yarın hava nasıl?", {}, "follow_up"),
+        ("Selam", {}, "too_short"),
+        ("Bu görselde ne var?", {"images": ["a.png"]}, "images"),
+        ("Dolar kuru ne kadar?", {"due_tasks": [{"text": "ilaç"}]}, "due_tasks"),
+        ("Dolar kuru ne kadar?", {"user_id": "guest"}, "anonymous"),
+    ])
+    def test_bypass_reasons(self, cache, message, kwargs, reason):
+        assert cache.bypass_reason(_ctx(message, **kwargs)) == reason
+
+    @pytest.mark.asyncio
+    async def test_questions_matching_user_documents_bypass(self):
+        asked = []
+
+        async def probe(owner, question):
+            asked.append((owner, question))
+            return True
+
+        cache = AnswerCacheService(backend=_MemoryStore(), embed_fn=_embed, document_probe=probe)
+        ctx = _ctx("Python liste nasıl sıralanır?")
+        assert await cache.lookup(ctx) is None
+        ctx.plan = _plan(intent="general")
+
+        assert await cache.store(ctx, "sorted()") is False
+        assert asked == [("alice", "Python liste nasıl sıralanır?")]
+
+    @pytest.mark.asyncio
+    async def test_document_probe_failure_bypasses(self):
+        async def broken(owner, question):
+            raise RuntimeError("index locked")
+
+        cache = AnswerCacheService(backend=_MemoryStore(), embed_fn=_embed, document_probe=broken)
+        ctx = _ctx("Python liste nasıl sıralanır?")
+        assert await cache.lookup(ctx) is None
+        ctx.plan = _plan(intent="general")
+        assert await cache.store(ctx, "sorted()") is False
+
+    @pytest.mark.asyncio
+    async def test_bypassed_requests_are_never_stored(self, cache):
+        ctx = _ctx("Benim adım ne?")
+        assert await cache.lookup(ctx) is None
+        ctx.plan = _plan(intent="general")
+
+        assert await cache.store(ctx, "Adın Ali.") is False
+        assert cache.backend.rows == []
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("plan", [
+        _plan("document_tool"),
+        _plan("memory_tool"),
+        _plan("flux_tool"),
+        _plan(intent="general", is_follow_up=True),
+    ])
+    async def test_context_dependent_plans_are_not_stored(self, cache, plan):
+        _, stored = await _answer(cache, "Python liste nasıl sıralanır?", "yanıt", plan)
+        assert stored is False
+
+    @pytest.mark.asyncio
+    async def test_failed_tasks_and_document_sources_are_not_stored(self, cache):
+        ctx = _ctx("Dolar kuru ne kadar?")
+        await cache.lookup(ctx)
+        ctx.plan = _plan("search_tool")
+        ctx.task_results = [{"status": "failed", "error": "timeout"}]
+        assert await cache.store(ctx, "yanıt") is False
+
+        ctx.task_results = [{"status": "success"}]
+        ctx.metadata["unified_sources"] = [{"type": "document", "title": "a.pdf"}]
+        assert await cache.store(ctx, "yanıt") is False
+
+
+class TestReplay:
+
+    @pytest.mark.asyncio
+    async def test_replay_matches_stream_protocol(self, cache):
+        answer = "Python'da listeler sorted() ya da list.sort() ile sıralanır; ikisi de key parametresi alır."
+        ctx, _ = await _answer(cache, "Python liste nasıl sıralanır?", answer, _plan(intent="general"))
+
+        replay_ctx = _ctx("Python liste nasıl sıralanır?")
+        hit = await cache.lookup(replay_ctx)
+        events = [event async for event in cache.replay(replay_ctx, hit)]
+
+        assert events[0]["type"] == "metadata"
+        assert events[0]["intent"] == "general"
+        assert events[0]["cached"] is True
+        chunks = [e["content"] for e in events if e["type"] == "chunk"]
+        assert len(chunks) > 1
+        assert "".join(chunks) == answer
+
+    @pytest.mark.asyncio
+    async def test_replay_restores_web_sources(self, cache):
+        ctx = _ctx("Dolar kuru ne kadar?")
+        await cache.lookup(ctx)
+        ctx.plan = _plan("search_tool")
+        ctx.task_results = [{"status": "success"}]
+        ctx.metadata["unified_sources"] = [{"type": "web", "url": "https://example.com"}]
+        await cache.store(ctx, "34 TL")
+
+        replay_ctx = _ctx("Dolar kuru ne kadar?")
+        events = [e async for e in cache.replay(replay_ctx, await cache.lookup(replay_ctx))]
+
+        assert {"type": "sources", "data": [{"type": "web", "url": "https://example.com"}]} in events
+
+
+class TestSqlStore:
+
+    @pytest.mark.asyncio
+    async def test_roundtrip_against_sqlite(self, tmp_path, monkeypatch, naive_utc_datetimes):
+        from sqlmodel import Session, SQLModel, create_engine
+
+        from app.core import database
+        from app.core.models import User
+
+        url = f"sqlite:///{tmp_path / 'app.db'}"
+        monkeypatch.setattr(database, "get_db_url", lambda: url)
+        monkeypatch.setattr(database, "_async_engine", None)
+        engine = create_engine(url)
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(User(id=7, username="alice", password_hash="x"))
+            session.commit()
+        engine.dispose()
+
+        cache = AnswerCacheService(embed_fn=_embed, document_probe=_no_documents)
+        try:
+            await _answer(cache, "Dolar kuru ne kadar?", "34 TL", _plan("search_tool"))
+            await _answer(cache, "Python liste nasıl sıralanır?", "sorted()", _plan(intent="general"))
+
+            assert (await cache.lookup(_ctx("dolar kuru ne kadar"))).answer == "34 TL"
+            semantic = await cache.lookup(_ctx("Dolar kaç lira?"))
+            assert semantic.match == "semantic"
+            assert semantic.metadata["intent"] == "search"
+            assert await cache.lookup(_ctx("Dolar kuru ne kadar?", persona="bela")) is None
+        finally:
+            await database.dispose_async_engine()
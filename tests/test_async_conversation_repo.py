@@ -0,0 +1,115 @@
+"""
+Async Conversation Repository - Unit Tests
+==========================================
+
+Havuzlu async engine (aiosqlite) üzerinden sohbet mesajı ekleme, yükleme,
+güncelleme ve sahiplik kontrolü.
+"""
+
+import asyncio
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core import database
+from app.core.models import Conversation, User
+from app.memory import conversation
+
+
+@pytest.fixture
+async def db(tmp_path, monkeypatch, naive_utc_datetimes):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    monkeypatch.setattr(database, "get_db_url", lambda: url)
+    monkeypatch.setattr(database, "_async_engine", None)
+
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        alice = User(username="alice", password_hash="x")
+        bob = User(username="bob", password_hash="x")
+        session.add(alice)
+        session.add(bob)
+        session.commit()
+        conv = Conversation(id="conv-1", user_id=alice.id, title="Test")
+        session.add(conv)
+        session.commit()
+    engine.dispose()
+
+    yield
+    await database.dispose_async_engine()
+
+
+class TestAsyncDatabase:
+
+    def test_async_url_mapping(self, monkeypatch):
+        cases = {
+            "sqlite:///data/app.db": "sqlite+aiosqlite:///data/app.db",
+            "postgresql://u:p@db/mami": "postgresql+asyncpg://u:p@db/mami",
+            "postgres://u:p@db/mami": "postgresql+asyncpg://u:p@db/mami",
+            "postgresql+psycopg2://u:p@db/mami": "postgresql+asyncpg://u:p@db/mami",
+            "postgresql+asyncpg://u:p@db/mami": "postgresql+asyncpg://u:p@db/mami",
+        }
+        for url, expected in cases.items():
+            monkeypatch.setattr(database, "get_db_url", lambda url=url: url)
+            assert database.get_async_db_url() == expected
+
+    @pytest.mark.asyncio
+    async def test_engine_is_pooled(self, db):
+        engine = database.get_async_engine()
+        assert engine.url.drivername == "sqlite+aiosqlite"
+        assert engine.pool.size() >= 2
+
+
+class TestAsyncConversationRepository:
+
+    @pytest.mark.asyncio
+    async def test_append_load_update_roundtrip(self, db):
+        user_msg = await conversation.append_message_async("alice", "conv-1", "user", "Merhaba", images=["a.png"])
+        bot_msg = await conversation.append_message_async(
+            "alice", "conv-1", "bot", "", extra_metadata={"status": "streaming"}
+        )
+
+        assert await conversation.update_message_async(bot_msg.id, "Selam!", {"status": "complete"})
+
+        messages = await conversation.load_messages_async("alice", "conv-1")
+        assert [m.id for m in messages] == [user_msg.id, bot_msg.id]
+        assert messages[0].extra_metadata == {"images": ["a.png"]}
+        assert messages[1].content == "Selam!"
+        assert messages[1].extra_metadata == {"status": "complete"}
+
+    @pytest.mark.asyncio
+    async def test_ownership_enforced(self, db):
+        with pytest.raises(ValueError):
+            await conversation.append_message_async("bob", "conv-1", "user", "izinsiz")
+
+        assert await conversation.load_messages_async("bob", "conv-1") == []
+        assert await conversation.get_conversation_async("bob", "conv-1") is None
+        assert (await conversation.get_conversation_async("alice", "conv-1")).title == "Test"
+
+    @pytest.mark.asyncio
+    async def test_update_missing_message(self, db):
+        assert await conversation.update_message_async(9999, "x") is False
+
+    @pytest.mark.asyncio
+    async def test_concurrent_appends_keep_event_loop_free(self, db):
+        ticks = 0
+        stop = asyncio.Event()
+
+        async def heartbeat():
+            nonlocal ticks
+            while not stop.is_set():
+                ticks += 1
+                await asyncio.sleep(0)
+
+        beat = asyncio.create_task(heartbeat())
+        await asyncio.gather(*(
+            conversation.append_message_async("alice", "conv-1", "user", f"mesaj {i}") for i in range(20)
+        ))
+        stop.set()
+        await beat
+
+        assert len(await conversation.load_messages_async("alice", "conv-1")) == 20
+        # Mesaj sayısı SQL tarafında artırıldı: eşzamanlı eklemeler sayı kaybetmedi
+        assert (await conversation.get_conversation_async("alice", "conv-1")).message_count == 20
+        # DB çağrıları sürerken loop başka işleri çalıştırabildi
+        assert ticks > 20
@@ -0,0 +1,328 @@
+"""
+Classification Cache - Unit Tests
+=================================
+
+Sınıflandırma önbelleği: LRU sınırı, TTL, Redis ikinci katmanı,
+single-flight (async/sync) ve intent/semantic/router entegrasyonu.
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.core import classification_cache
+from app.core.classification_cache import ClassificationCache
+from app.core.metrics import classification_cache_evictions_counter, classification_cache_lookups_counter
+
+
+class _FakeRedis:
+    """get/setex destekleyen bellek içi async Redis."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+def _lookups(cache, result):
+    return classification_cache_lookups_counter.labels(cache=cache, result=result)._value.get()
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    async def _none():
+        return None
+
+    monkeypatch.setattr("app.core.redis_client.get_redis", _none)
+    monkeypatch.setattr(classification_cache, "_get_sync_redis", lambda: None)
+
+
+class TestLocalTier:
+
+    def test_lru_bound_and_eviction_counter(self):
+        cache = ClassificationCache("t_lru", ttl_seconds=60, maxsize=3, use_redis=False)
+        before = classification_cache_evictions_counter.labels(cache="t_lru", reason="capacity")._value.get()
+
+        for i in range(5):
+            cache.put_local(f"k{i}", i)
+        cache.get_local("k2")  # en son kullanılan
+        cache.put_local("k5", 5)
+
+        assert len(cache) == 3
+        assert "k2" in cache and "k5" in cache and "k3" not in cache
+        after = classification_cache_evictions_counter.labels(cache="t_lru", reason="capacity")._value.get()
+        assert after - before == 3
+
+    def test_ttl_expiry(self):
+        cache = ClassificationCache("t_ttl", ttl_seconds=60, use_redis=False)
+        cache.put_local("k", "v", ttl_seconds=0.01)
+        time.sleep(0.02)
+
+        assert cache.get_local("k") is None
+        assert len(cache) == 0
+
+
+class TestSingleFlight:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_keys_share_one_call(self, no_redis):
+        cache = ClassificationCache("t_sf", ttl_seconds=60)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"intent": "greeting"}
+
+        before = _lookups("t_sf", "coalesced")
+        results = await asyncio.gather(*(cache.get_or_compute("selam", compute) for _ in range(10)))
+
+        assert calls == 1
+        assert all(r == {"intent": "greeting"} for r in results)
+        assert _lookups("t_sf", "coalesced") - before == 9
+        assert await cache.get_or_compute("selam", compute) == {"intent": "greeting"}
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_and_are_not_cached(self, no_redis):
+        cache = ClassificationCache("t_err", ttl_seconds=60)
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("llm down")
+
+        results = await asyncio.gather(*(cache.get_or_compute("k", failing) for _ in range(3)), return_exceptions=True)
+        assert calls == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        async def none_result():
+            return None
+
+        assert await cache.get_or_compute("k", none_result) is None
+        assert "k" not in cache
+
+    @pytest.mark.asyncio
+    async def test_cancelled_owner_lets_waiter_compute(self, no_redis):
+        cache = ClassificationCache("t_cancel", ttl_seconds=60)
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+
+        async def fast():
+            return "ok"
+
+        owner = asyncio.create_task(cache.get_or_compute("k", slow))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_compute("k", fast))
+        await asyncio.sleep(0)
+        owner.cancel()
+
+        assert await waiter == "ok"
+
+    def test_sync_threads_share_one_call(self, no_redis):
+        cache = ClassificationCache("t_sync", ttl_seconds=60)
+        calls = 0
+        barrier = threading.Barrier(8)
+
+        def compute():
+            nonlocal calls
+            calls += 1
+            time.sleep(0.05)
+            return "text"
+
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(cache.get_or_compute_sync("merhaba", compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert calls == 1
+        assert results == ["text"] * 8
+
+
+class TestRedisTier:
+
+    @pytest.mark.asyncio
+    async def test_second_process_reads_shared_result(self, monkeypatch):
+        redis = _FakeRedis()
+
+        async def _get():
+            return redis
+
+        monkeypatch.setattr("app.core.redis_client.get_redis", _get)
+        first = ClassificationCache("t_shared", ttl_seconds=60)
+        second = ClassificationCache("t_shared", ttl_seconds=60)  # başka süreç
+
+        async def compute():
+            return {"intent": "search"}
+
+        async def must_not_run():
+            raise AssertionError("Redis katmanı kullanılmadı")
+
+        await first.get_or_compute("k", compute)
+        before = _lookups("t_shared", "hit_redis")
+
+        assert await second.get_or_compute("k", must_not_run) == {"intent": "search"}
+        assert _lookups("t_shared", "hit_redis") - before == 1
+        assert "k" in second
+
+    @pytest.mark.asyncio
+    async def test_non_shareable_results_stay_local(self, monkeypatch):
+        redis = _FakeRedis()
+
+        async def _get():
+            return redis
+
+        monkeypatch.setattr("app.core.redis_client.get_redis", _get)
+        cache = ClassificationCache("t_local", ttl_seconds=60, shareable=lambda v: v != "fallback")
+
+        async def fallback():
+            return "fallback"
+
+        await cache.get_or_compute("k", fallback)
+
+        assert redis.data == {}
+        assert "k" in cache
+        expires, _ = cache._entries["k"]
+        assert expires - time.monotonic() <= classification_cache.FALLBACK_TTL_SECONDS
+
+
+class TestIntegrations:
+
+    def test_image_intent_fallbacks_not_shared(self):
+        from app.services.brain.intent import IntentLLMResult, _is_shareable_result
+
+        assert _is_shareable_result(IntentLLMResult(is_image=True, confidence=0.9, reason="asks for a drawing"))
+        assert not _is_shareable_result(IntentLLMResult(is_image=False, confidence=0.5, reason="timeout"))
+        assert not _is_shareable_result(IntentLLMResult(is_image=False, confidence=0.5, reason="http_429"))
+
+    def test_image_intent_single_call_per_message(self, no_redis):
+        from app.services.brain import intent
+
+        intent._intent_llm_cache.clear()
+        calls = []
+
+        def fake_call(message):
+            calls.append(message)
+            return intent.IntentLLMResult(is_image=True, confidence=0.9, reason="draw")
+
+        with patch.object(intent, "_call_image_intent_llm", side_effect=fake_call):
+            first = intent.classify_image_intent_llm("Bir kedi çiz!")
+            second = intent.classify_image_intent_llm("bir kedi çiz")
+        intent._intent_llm_cache.clear()
+
+        assert first.is_image and second.is_image
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_semantic_analysis_cached_and_copied(self, no_redis):
+        from app.services import semantic_classifier
+
+        semantic_classifier._semantic_cache.clear()
+        calls = 0
+
+        async def fake_groq(**kwargs):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return '{"domain": "tech", "complexity": "low"}', None
+
+        with patch.object(semantic_classifier, "call_groq_api_safe_async", side_effect=fake_groq):
+            first, second = await asyncio.gather(
+                semantic_classifier.analyze_message_semantics("Python nedir?"),
+                semantic_classifier.analyze_message_semantics("python nedir?"),
+            )
+            first.domain = "degisti"
+            third = await semantic_classifier.analyze_message_semantics("Python nedir?")
+        semantic_classifier._semantic_cache.clear()
+
+        assert calls == 1
+        assert second.domain == "tech"
+        assert third.domain == "tech"
+
+    @pytest.mark.asyncio
+    async def test_semantic_classifies_the_cached_text(self, no_redis):
+        from app.services import semantic_classifier
+
+        semantic_classifier._semantic_cache.clear()
+        seen = []
+
+        async def fake_groq(**kwargs):
+            seen.append(kwargs["messages"][-1]["content"])
+            return '{"domain": "general"}', None
+
+        with patch.object(semantic_classifier, "call_groq_api_safe_async", side_effect=fake_groq):
+            first = await semantic_classifier.analyze_message_semantics("Bugün\n  HAVA nasıl?")
+            second = await semantic_classifier.analyze_message_semantics("bugün hava nasıl?")
+        semantic_classifier._semantic_cache.clear()
+
+        # Model ve override'lar anahtarla aynı metni görür: varyantlar aynı sonucu paylaşır
+        assert seen == ["bugün hava nasıl?"]
+        assert first.domain == second.domain == "weather"
+        assert first.should_use_internet and second.should_use_internet
+
+    @pytest.mark.asyncio
+    async def test_semantic_failure_not_cached(self, no_redis):
+        from app.services import semantic_classifier
+
+        semantic_classifier._semantic_cache.clear()
+
+        async def empty(**kwargs):
+            return None, "timeout"
+
+        with patch.object(semantic_classifier, "call_groq_api_safe_async", side_effect=empty) as groq:
+            await semantic_classifier.analyze_message_semantics("hava nasıl")
+            await semantic_classifier.analyze_message_semantics("hava nasıl")
+
+        assert groq.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_semantic_parse_failure_not_cached(self, no_redis):
+        from app.services import semantic_classifier
+
+        semantic_classifier._semantic_cache.clear()
+
+        async def garbled(**kwargs):
+            return "not json", None
+
+        with patch.object(semantic_classifier, "call_groq_api_safe_async", side_effect=garbled) as groq:
+            first = await semantic_classifier.analyze_message_semantics("hava nasıl")
+            await semantic_classifier.analyze_message_semantics("hava nasıl")
+
+        assert groq.call_count == 2
+        assert first.answer_mode == "web_factual"
+        assert len(semantic_classifier._semantic_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_router_intent_llm_uses_cache(self, no_redis):
+        from app.chat.smart_router import SmartRouter
+
+        router = SmartRouter()
+        with patch.object(router, "_detect_intent_regex", wraps=router._detect_intent_regex) as regex:
+            results = await asyncio.gather(*(router._detect_intent_llm("selam naber") for _ in range(5)))
+
+        assert regex.call_count == 1
+        assert all(err is None for _, err in results)
+        first, _ = results[0]
+        first["signals"]["tool_needed"] = "degisti"
+        again, _ = await router._detect_intent_llm("selam naber")
+        assert again["signals"]["tool_needed"] != "degisti"
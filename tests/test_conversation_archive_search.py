@@ -0,0 +1,139 @@
+"""
+Conversation Archive Search - Unit Tests
+========================================
+
+FTS5 arşiv indeksi: trigger bakımı, kullanıcı izolasyonu, SQL içinde
+tarih aralığı ve LIMIT, terimsiz sorgular ve sorgu terimi ayrıştırma.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core import database
+from app.core.models import Conversation, ConversationSummary, User
+from app.memory.archive_index import build_match, ensure_archive_index, query_terms
+from app.memory.conversation_archive import ConversationArchive
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch, naive_utc_datetimes):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    monkeypatch.setattr(database, "get_db_url", lambda: url)
+    monkeypatch.setattr(database, "_async_engine", None)
+
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        assert ensure_archive_index(conn)
+    with Session(engine) as session:
+        session.add(User(id=1, username="alice", password_hash="x"))
+        session.add(User(id=2, username="bob", password_hash="x"))
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+def _add(engine, conv_id, user_id, title, summary=None, days_ago=0, importance=1, entities=()):
+    updated = datetime.utcnow() - timedelta(days=days_ago)
+    with Session(engine) as session:
+        session.add(Conversation(id=conv_id, user_id=user_id, title=title, created_at=updated, updated_at=updated))
+        session.commit()
+        if summary is not None:
+            session.add(ConversationSummary(
+                conversation_id=conv_id, summary=summary, importance=importance, entities=list(entities),
+            ))
+            session.commit()
+
+
+async def _search(user_id, query, **kwargs):
+    try:
+        return await ConversationArchive.search_past_conversations(user_id, query, **kwargs)
+    finally:
+        await database.dispose_async_engine()
+
+
+class TestQueryTerms:
+
+    def test_stop_words_dropped_and_suffixes_trimmed(self):
+        assert query_terms("Geçen hafta KEDİLER hakkında ne konuşmuştuk?") == ["kedi"]
+        assert query_terms("geçen hafta ne konuşmuştuk?") == []
+
+    def test_capital_i_searched_in_both_spellings(self):
+        assert query_terms("Instagram ISPARTA") == ["instag", "ınstag", "ispa", "ıspa"]
+        assert query_terms("HAKKINDA kediler") == ["kedi"]
+
+    def test_match_scopes_to_owner(self):
+        assert build_match(42, ["kedi", "django"]) == (
+            'owner:u42 AND {title summary entities}: ("kedi"* OR "django"*)'
+        )
+
+
+class TestArchiveSearch:
+
+    @pytest.mark.asyncio
+    async def test_summary_and_title_matches_ranked(self, engine):
+        _add(engine, "c-title", 1, "Django deploy notları")
+        _add(engine, "c-summary", 1, "Yeni Sohbet", "Kullanıcı Django ile REST API yazdı", importance=9)
+        _add(engine, "c-other", 1, "Tatil planı", "Antalya otelleri")
+
+        results = await _search(1, "Django projesini hatırla")
+
+        assert {r.conversation_id for r in results} == {"c-title", "c-summary"}
+        assert all(r.relevance_score > 0 for r in results)
+
+    @pytest.mark.asyncio
+    async def test_index_follows_summary_updates_and_deletes(self, engine):
+        _add(engine, "c-1", 1, "Yeni Sohbet", "Antalya otelleri")
+        assert await _search(1, "kubernetes hatırla") == []
+
+        with Session(engine) as session:
+            summary = session.get(ConversationSummary, "c-1")
+            summary.summary = "Kubernetes cluster kurulumu"
+            session.add(summary)
+            session.commit()
+        assert [r.conversation_id for r in await _search(1, "kubernetes hatırla")] == ["c-1"]
+
+        with Session(engine) as session:
+            session.delete(session.get(ConversationSummary, "c-1"))
+            session.delete(session.get(Conversation, "c-1"))
+            session.commit()
+        assert await _search(1, "kubernetes hatırla") == []
+
+    @pytest.mark.asyncio
+    async def test_capitalized_title_words_match(self, engine):
+        _add(engine, "c-1", 1, "Instagram reklamları / Istanbul gezisi")
+        _add(engine, "c-2", 1, "Yeni Sohbet", "ışık ayarları konuşuldu")
+
+        assert [r.conversation_id for r in await _search(1, "Instagram hatırla")] == ["c-1"]
+        assert [r.conversation_id for r in await _search(1, "Istanbul gezisi")] == ["c-1"]
+        assert [r.conversation_id for r in await _search(1, "IŞIK ayarları")] == ["c-2"]
+
+    @pytest.mark.asyncio
+    async def test_other_users_never_match(self, engine):
+        _add(engine, "c-bob", 2, "Python dersleri", "Python liste işlemleri")
+
+        assert await _search(1, "python hatırla") == []
+        assert [r.conversation_id for r in await _search(2, "python hatırla")] == ["c-bob"]
+
+    @pytest.mark.asyncio
+    async def test_date_range_and_limit_applied(self, engine):
+        for i in range(5):
+            _add(engine, f"c-{i}", 1, f"Python notları {i}", days_ago=i * 10)
+
+        recent = await _search(1, "son 15 gün python konuşmuştuk")
+        assert {r.conversation_id for r in recent} == {"c-0", "c-1"}
+
+        limited = await _search(1, "python hatırla", limit=3)
+        assert len(limited) == 3
+
+    @pytest.mark.asyncio
+    async def test_query_without_terms_lists_recent(self, engine):
+        _add(engine, "c-new", 1, "Bugünkü sohbet", days_ago=1)
+        _add(engine, "c-old", 1, "Eski sohbet", days_ago=40)
+
+        results = await _search(1, "geçen hafta ne konuşmuştuk?")
+
+        assert [r.conversation_id for r in results] == ["c-new"]
+        assert results[0].message_count == 0
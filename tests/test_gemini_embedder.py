@@ -0,0 +1,170 @@
+"""
+Gemini Embedder - Unit Tests
+============================
+
+batchEmbedContents kullanımı, batch içi tekilleştirme, havuzlu client,
+429 yanıtlarında eşzamanlılığın daraltılması (stub transport ile) ve
+content-hash embedding cache.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core import embedding_cache
+from app.core.embedding_cache import EmbeddingCache, _EmbeddingStore, pack_vector, unpack_vector
+from app.core.metrics import embedding_cache_hits_counter
+from app.services.brain.memory.embeddings import GeminiEmbedder, _AdaptiveLimiter
+
+
+class _StubProvider:
+    """batchEmbedContents taklidi: her metin için [len(text)] * DIMENSION döner."""
+
+    def __init__(self, throttle_first: int = 0):
+        self.calls = []
+        self.throttle_first = throttle_first
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            body = json.loads(request.content)
+            self.calls.append((request.url.path, [r["content"]["parts"][0]["text"] for r in body["requests"]]))
+            if self.throttle_first > 0:
+                self.throttle_first -= 1
+                return httpx.Response(429, headers={"Retry-After": "0"})
+            return httpx.Response(200, json={
+                "embeddings": [{"values": [float(len(r["content"]["parts"][0]["text"]))] * GeminiEmbedder.DIMENSION}
+                               for r in body["requests"]]
+            })
+        finally:
+            self.in_flight -= 1
+
+
+def _embedder(provider, monkeypatch, **kwargs):
+    kwargs.setdefault("use_cache", False)
+    emb = GeminiEmbedder(transport=httpx.MockTransport(provider), **kwargs)
+    monkeypatch.setattr(emb, "_get_api_key", lambda: "test-key")
+    return emb
+
+
+class TestGeminiEmbedder:
+
+    @pytest.mark.asyncio
+    async def test_batch_endpoint_with_dedup(self, monkeypatch):
+        provider = _StubProvider()
+        emb = _embedder(provider, monkeypatch)
+
+        vectors = await emb.embed_batch(["alpha", "be", "alpha", "", "be"])
+
+        assert len(provider.calls) == 1
+        path, sent = provider.calls[0]
+        assert path.endswith(":batchEmbedContents")
+        assert sent == ["alpha", "be"]
+        assert [v[0] for v in vectors] == [5.0, 2.0, 5.0, 0.0, 2.0]
+        assert all(len(v) == GeminiEmbedder.DIMENSION for v in vectors)
+        await emb.aclose()
+
+    @pytest.mark.asyncio
+    async def test_chunks_run_concurrently_on_one_client(self, monkeypatch):
+        provider = _StubProvider()
+        emb = _embedder(provider, monkeypatch, max_concurrency=3)
+        texts = [f"text-{i}" for i in range(GeminiEmbedder.MAX_BATCH_SIZE * 5)]
+
+        vectors = await emb.embed_batch(texts)
+        client = emb._client
+        await emb.embed("another")
+
+        assert len(vectors) == len(texts)
+        assert len(provider.calls) == 6
+        assert 1 < provider.max_in_flight <= 3
+        assert emb._client is client
+        await emb.aclose()
+
+    @pytest.mark.asyncio
+    async def test_429_shrinks_concurrency_and_retries(self, monkeypatch):
+        provider = _StubProvider(throttle_first=1)
+        emb = _embedder(provider, monkeypatch, max_concurrency=4)
+
+        vector = await emb.embed("merhaba")
+
+        assert vector[0] == 7.0
+        assert len(provider.calls) == 2
+        assert emb._limiter.limit == 2
+        await emb.aclose()
+
+    @pytest.mark.asyncio
+    async def test_limiter_recovers_after_successes(self):
+        limiter = _AdaptiveLimiter(4, increase_every=2)
+        await limiter.acquire()
+        await limiter.release(throttled=True)
+        assert limiter.limit == 2
+
+        for _ in range(4):
+            await limiter.acquire()
+            await limiter.release()
+        assert limiter.limit == 4
+
+
+class TestEmbeddingCache:
+
+    def test_vectors_round_trip_as_float32(self):
+        blob = pack_vector([0.25, -1.5, 3.0])
+        assert len(blob) == 12
+        assert unpack_vector(blob) == [0.25, -1.5, 3.0]
+
+    def test_key_includes_model_and_dimension(self, tmp_path):
+        store = _EmbeddingStore(str(tmp_path / "emb.db"))
+        EmbeddingCache("model-a", 2, store=store).put_many(["x"], [[1.0, 2.0]])
+
+        assert EmbeddingCache("model-a", 2, store=store).get_many(["x"]) == [[1.0, 2.0]]
+        assert EmbeddingCache("model-b", 2, store=store).get_many(["x"]) == [None]
+        assert EmbeddingCache("model-a", 3, store=store).get_many(["x"]) == [None]
+        store.close()
+
+    def test_persistent_tier_evicts_expired_and_least_recently_used(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(embedding_cache, "TOUCH_INTERVAL", 0)
+        now = [1000.0]
+        store = _EmbeddingStore(str(tmp_path / "emb.db"), max_entries=2, max_age=100, clock=lambda: now[0])
+        cache = EmbeddingCache("model-a", 2, store=store, lru_size=0)
+
+        cache.put_many(["a", "b"], [[1.0, 1.0], [2.0, 2.0]])
+        now[0] += 10
+        assert cache.get_many(["a"]) == [[1.0, 1.0]]  # a kullanıldı, b en eski
+        cache.put_many(["c"], [[3.0, 3.0]])
+        assert store.prune() == 1
+        assert cache.get_many(["a", "b", "c"]) == [[1.0, 1.0], None, [3.0, 3.0]]
+
+        now[0] += 101
+        assert store.prune() == 2
+        assert cache.get_many(["a", "c"]) == [None, None]
+        store.close()
+
+    def test_zero_vectors_are_not_cached(self, tmp_path):
+        cache = EmbeddingCache("model-a", 2, store=_EmbeddingStore(str(tmp_path / "emb.db")))
+        cache.put_many(["fail"], [[0.0, 0.0]])
+        assert cache.get_many(["fail"]) == [None]
+
+    @pytest.mark.asyncio
+    async def test_embedder_skips_provider_for_cached_texts(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(embedding_cache, "_store", _EmbeddingStore(str(tmp_path / "emb.db")))
+        monkeypatch.setattr(embedding_cache, "_caches", {})
+        provider = _StubProvider()
+        emb = _embedder(provider, monkeypatch, use_cache=True)
+        disk_hits = embedding_cache_hits_counter.labels(model=GeminiEmbedder.MODEL, tier="disk")
+        before = disk_hits._value.get()
+
+        await emb.embed_batch(["alpha", "be"])
+        # Yeni süreç taklidi: LRU boş, kalıcı katman dolu
+        monkeypatch.setattr(embedding_cache, "_caches", {})
+        vectors = await emb.embed_batch(["alpha", "be", "gamma"])
+
+        assert [sent for _, sent in provider.calls] == [["alpha", "be"], ["gamma"]]
+        assert [v[0] for v in vectors] == [5.0, 2.0, 5.0]
+        assert disk_hits._value.get() - before == 2
+        await emb.aclose()
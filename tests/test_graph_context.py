@@ -0,0 +1,143 @@
+"""
+Graph Context - Unit Tests
+==========================
+
+Hafıza bağlamı: identity + hard facts tek Cypher sorgusu, graph/vector
+eşzamanlılığı, kullanıcı başına kimlik önbelleği ve save/forget_fact ile
+geçersiz kılma.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.brain.memory.context import build_context
+from app.services.memory.fact_cache import UserFactCache, user_fact_cache
+
+
+class _FakeGraph:
+    """Birleşik sorguya identity + hard fact, yalnız hard facts sorgusuna hard fact döner."""
+
+    def __init__(self, gate=None):
+        self.queries = []
+        self.identity = [{"predicate": "ISIM", "object": "Ali"}]
+        self.gate = gate
+
+    async def query(self, cypher, params=None):
+        self.queries.append((cypher, params))
+        if self.gate is not None:
+            await asyncio.wait_for(self.gate.wait(), timeout=1)
+        rows = []
+        if "UNION ALL" in cypher:
+            rows += [{"kind": "identity", "subject": params["anchor"], "confidence": 1.0, **f} for f in self.identity]
+        rows.append({"kind": "hard_fact", "subject": "ALI", "predicate": "SEVER", "object": "kahve", "confidence": 0.9})
+        return rows
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    user_fact_cache.clear()
+    yield
+    user_fact_cache.clear()
+
+
+class TestGraphContext:
+
+    @pytest.mark.asyncio
+    async def test_identity_and_hard_facts_in_one_query(self):
+        graph = _FakeGraph()
+
+        text = await build_context("u1", "kahve", graph_repo=graph)
+
+        assert len(graph.queries) == 1
+        assert "UNION ALL" in graph.queries[0][0]
+        assert "ISIM: Ali" in text
+        assert "ALI SEVER kahve" in text
+
+    @pytest.mark.asyncio
+    async def test_cached_identity_skips_identity_branch(self):
+        graph = _FakeGraph()
+        await build_context("u1", "kahve", graph_repo=graph)
+        graph.identity = [{"predicate": "ISIM", "object": "Veli"}]
+
+        text = await build_context("u1", "kahve", graph_repo=graph)
+
+        assert "UNION ALL" not in graph.queries[1][0]
+        assert "ISIM: Ali" in text
+        assert "ALI SEVER kahve" in text
+
+    @pytest.mark.asyncio
+    async def test_graph_and_vector_run_concurrently(self):
+        vector_started = asyncio.Event()
+        graph = _FakeGraph(gate=vector_started)
+
+        class _Vector:
+            async def search(self, query, user_id, limit):
+                vector_started.set()
+                return [{"content": "kahve sohbeti"}]
+
+        # Sıralı çalışsaydı graph, vector başlamadan beklerken timeout alırdı
+        text = await build_context("u1", "kahve", graph_repo=graph, vector_repo=_Vector())
+
+        assert "ISIM: Ali" in text
+
+    @pytest.mark.asyncio
+    async def test_graph_failure_keeps_vector_results(self):
+        class _Broken:
+            async def query(self, cypher, params=None):
+                raise RuntimeError("neo4j down")
+
+        class _Vector:
+            called = False
+
+            async def search(self, query, user_id, limit):
+                _Vector.called = True
+                return []
+
+        assert await build_context("u1", "kahve", graph_repo=_Broken(), vector_repo=_Vector()) == "[Hafıza kaydı yok]"
+        assert _Vector.called
+
+
+class TestFactCacheInvalidation:
+
+    def test_invalidation_during_fetch_discards_stale_result(self):
+        cache = UserFactCache(ttl_seconds=60, max_users=10)
+        generation = cache.generation("u1")
+        cache.invalidate("u1")  # okuma sürerken save_fact
+
+        assert cache.put("u1", "identity", ["eski"], generation) is False
+        assert cache.get("u1", "identity") is None
+
+    def test_lru_bound_and_clear(self):
+        cache = UserFactCache(ttl_seconds=60, max_users=2)
+        for uid in ("a", "b", "c"):
+            cache.put(uid, "identity", [uid], cache.generation(uid))
+
+        assert cache.get("a", "identity") is None
+        assert cache.get("c", "identity") == ["c"]
+
+        generation = cache.generation("c")
+        cache.clear()
+        assert cache.put("c", "identity", ["c"], generation) is False
+
+    @pytest.mark.asyncio
+    async def test_save_and_forget_fact_invalidate(self, monkeypatch):
+        from app.services.memory import manager
+        from app.services.memory.mwg import Decision, MWGResult
+
+        graph = _FakeGraph()
+        await build_context("u1", "kahve", graph_repo=graph)
+        assert user_fact_cache.get("u1", "identity") is not None
+
+        async def decide(user_id, triplet, policy):
+            return MWGResult(decision=Decision.LONG_TERM)
+
+        monkeypatch.setattr(manager.mwg, "decide", decide)
+        monkeypatch.setattr(manager.graph_repo, "query", graph.query)
+
+        assert await manager.memory_manager.save_fact("u1", {"predicate": "ISIM", "object": "Veli"})
+        assert user_fact_cache.get("u1", "identity") is None
+
+        await build_context("u1", "kahve", graph_repo=graph)
+        assert await manager.memory_manager.forget_fact("u1", "ISIM")
+        assert user_fact_cache.get("u1", "identity") is None
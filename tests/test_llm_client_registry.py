@@ -0,0 +1,116 @@
+"""
+LLM Client Registry - Unit Tests
+================================
+
+(provider, api_key) başına paylaşılan provider örnekleri, tek keep-alive
+HTTP havuzu, bağlantı yeniden kullanım metrikleri ve kapanış.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.core.metrics import llm_http_connections_counter, llm_http_requests_counter
+from app.providers.llm.registry import ProviderRegistry
+
+COMPLETION = {
+    "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "stub-model",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "merhaba"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+}
+
+
+async def _handle(reader, writer):
+    """Keep-alive destekli minimal OpenAI uyumlu chat completions stub'ı."""
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.decode().split("\r\n"):
+                if line.lower().startswith("content-length:"):
+                    length = int(line.split(":", 1)[1])
+            await reader.readexactly(length)
+            body = json.dumps(COMPLETION).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+@pytest.fixture
+async def stub_url(monkeypatch):
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    monkeypatch.setenv("GROQ_BASE_URL", f"http://127.0.0.1:{port}")
+    yield f"http://127.0.0.1:{port}"
+    server.close()
+    await server.wait_closed()
+
+
+def _value(counter):
+    return counter.labels(provider="groq")._value.get()
+
+
+class TestProviderRegistry:
+
+    @pytest.mark.asyncio
+    async def test_instances_keyed_by_provider_and_key(self):
+        registry = ProviderRegistry()
+
+        first = registry.get("groq", "gsk_a")
+        assert registry.get("groq", "gsk_a") is first
+        other = registry.get("groq", "gsk_b")
+
+        assert other is not first
+        assert first.client._client is other.client._client  # tek HTTP havuzu
+        with pytest.raises(ValueError):
+            registry.get("unknown", "k")
+        await registry.aclose()
+
+    @pytest.mark.asyncio
+    async def test_calls_reuse_one_connection(self, stub_url):
+        registry = ProviderRegistry()
+        requests_before = _value(llm_http_requests_counter)
+        connections_before = _value(llm_http_connections_counter)
+
+        for key in ("gsk_a", "gsk_b", "gsk_a"):
+            text = await registry.get("groq", key).generate(prompt="selam", model="stub-model")
+            assert text == "merhaba"
+
+        assert _value(llm_http_requests_counter) - requests_before == 3
+        assert _value(llm_http_connections_counter) - connections_before == 1
+        await registry.aclose()
+
+    @pytest.mark.asyncio
+    async def test_aclose_releases_pool(self):
+        registry = ProviderRegistry()
+        client = registry.get("groq", "gsk_a").client._client
+
+        await registry.aclose()
+
+        assert client.is_closed
+        assert registry.get("groq", "gsk_a").client._client is not client
+        await registry.aclose()
+
+    @pytest.mark.asyncio
+    async def test_groq_adapter_uses_shared_registry(self, stub_url):
+        from app.core.llm.adapters import groq_adapter
+        from app.core.llm.generator import LLMRequest
+        from app.providers.llm.registry import provider_registry
+
+        request = LLMRequest(role="chat", prompt="selam")
+        try:
+            await groq_adapter("stub-model", "gsk_adapter", request)
+            provider = provider_registry.get("groq", "gsk_adapter")
+            result = await groq_adapter("stub-model", "gsk_adapter", request)
+        finally:
+            await provider_registry.aclose()
+
+        assert result.text == "merhaba"
+        assert provider_registry.get("groq", "gsk_adapter") is not provider  # aclose sonrası yeni havuz
@@ -0,0 +1,171 @@
+"""
+LLM Key Scheduler - Unit Tests
+==============================
+
+Anahtar başına RPM/TPM token bucket'ları, kalan kapasiteye göre heap
+seçimi, rezervasyon düzeltme, 429 sonrası boşaltma, key-hash indeksi ve
+stub sağlayıcıya karşı simüle yük altında 429 üretmeme.
+"""
+
+import random
+
+import pytest
+
+from app.core.llm import key_manager
+from app.core.llm.key_manager import key_hash
+from app.core.llm.key_scheduler import KeyLimits, KeyScheduler
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scheduler(clock, keys=("a", "b", "c"), rpm=30, tpm=6000):
+    scheduler = KeyScheduler(limits_for=lambda provider, model: KeyLimits(rpm=rpm, tpm=tpm), clock=clock)
+    scheduler.register("groq", list(keys))
+    return scheduler
+
+
+class TestKeyScheduler:
+
+    def test_picks_key_with_most_remaining_capacity(self):
+        clock = _Clock()
+        scheduler = _scheduler(clock)
+
+        assert scheduler.select("groq", "m", tokens=3000) == "a"
+        assert scheduler.select("groq", "m", tokens=1000) == "b"
+        assert scheduler.select("groq", "m", tokens=100) == "c"
+        # c (5900) > b (5000) > a (3000)
+        assert scheduler.select("groq", "m", tokens=100) == "c"
+
+    def test_throttles_until_buckets_refill(self):
+        clock = _Clock()
+        scheduler = _scheduler(clock, keys=("a",), tpm=6000)
+
+        assert scheduler.select("groq", "m", tokens=5000) == "a"
+        assert scheduler.select("groq", "m", tokens=2000) is None
+
+        clock.now += 10  # 1000 token dolar
+        assert scheduler.select("groq", "m", tokens=2000) == "a"
+
+    def test_request_bucket_limits_rpm(self):
+        clock = _Clock()
+        scheduler = _scheduler(clock, keys=("a",), rpm=2)
+
+        assert scheduler.select("groq", "m") == "a"
+        assert scheduler.select("groq", "m") == "a"
+        assert scheduler.select("groq", "m") is None
+        clock.now += 30
+        assert scheduler.select("groq", "m") == "a"
+
+    def test_scans_past_keys_short_on_the_needed_lane(self):
+        clock = _Clock()
+        scheduler = _scheduler(clock, keys=("a", "b"), rpm=10, tpm=1000)
+
+        # a: token lane yarı dolu (öncelik 30s); b: istek lane'inde tek istek kaldı (öncelik 54s)
+        assert scheduler.select("groq", "m", tokens=500) == "a"
+        for _ in range(9):
+            assert scheduler.select("groq", "m", is_available=lambda key_id: key_id == "b") == "b"
+
+        # Heap'in tepesi a, ama 800 token yalnızca b'ye sığar
+        assert scheduler.select("groq", "m", tokens=800) == "b"
+        # Artık b'nin istek lane'i, a'nın token lane'i yetersiz
+        assert scheduler.select("groq", "m", tokens=800) is None
+        assert scheduler.select("groq", "m", tokens=100) == "a"
+
+    def test_settle_refunds_overestimate_and_drain_empties(self):
+        clock = _Clock()
+        scheduler = _scheduler(clock, keys=("a",))
+
+        scheduler.select("groq", "m", tokens=6000)
+        scheduler.settle("a", "m", -5000)
+        assert scheduler.snapshot("a", "m")["tokens"] == pytest.approx(5000, abs=1)
+
+        scheduler.drain("a", "m")
+        assert scheduler.select("groq", "m", tokens=10) is None
+
+    def test_unavailable_keys_are_skipped(self):
+        clock = _Clock()
+        scheduler = _scheduler(clock)
+
+        assert scheduler.select("groq", "m", is_available=lambda key_id: key_id == "c") == "c"
+        assert scheduler.select("groq", "m", is_available=lambda key_id: False) is None
+        assert scheduler.select("groq", "m") == "a"
+
+
+class TestKeyManagerIntegration:
+
+    @pytest.fixture(autouse=True)
+    def _keys(self):
+        key_manager.reset()
+        key_manager.initialize(groq_keys=["gsk_one", "gsk_two"], gemini_keys=None)
+        yield
+        key_manager.reset()
+
+    def test_reports_go_through_key_hash_index(self):
+        key = key_manager.get_best_key(model_id="llama-3.1-8b-instant", tokens=100)
+        key_manager.report_success(key, model_id="llama-3.1-8b-instant", tokens=80, reserved=100)
+
+        stats = key_manager._index[key_hash(key)]
+        assert stats.successful_requests == 1
+        assert key_manager._find("gsk_unknown") is None
+
+    def test_rate_limit_drains_key_and_next_key_is_used(self):
+        first = key_manager.get_best_key(model_id="llama-3.1-8b-instant")
+        key_manager.report_error(first, status_code=429, model_id="llama-3.1-8b-instant")
+
+        for _ in range(3):
+            assert key_manager.get_best_key(model_id="llama-3.1-8b-instant") != first
+
+
+class _BucketProvider:
+    """Groq gibi sürekli dolan bucket'larla limit uygulayan stub; aşımda 429."""
+
+    def __init__(self, clock, rpm, tpm):
+        self.clock, self.rpm, self.tpm = clock, rpm, tpm
+        self.state = {}
+
+    def call(self, key, tokens):
+        requests, budget, last = self.state.get(key, (self.rpm, self.tpm, self.clock()))
+        elapsed = self.clock() - last
+        requests = min(self.rpm, requests + elapsed * self.rpm / 60)
+        budget = min(self.tpm, budget + elapsed * self.tpm / 60)
+        if requests < 1 or budget < tokens:
+            self.state[key] = (requests, budget, self.clock())
+            return 429
+        self.state[key] = (requests - 1, budget - tokens, self.clock())
+        return 200
+
+
+def test_simulated_load_produces_no_rate_limits():
+    """Kapasitenin ~2.5 katı sürekli yük: fazlası önceden reddedilir, 429 alınmaz."""
+    rng = random.Random(7)
+    clock = _Clock()
+    rpm, tpm = 30, 6000
+    keys = [f"k{i}" for i in range(4)]
+    scheduler = KeyScheduler(limits_for=lambda p, m: KeyLimits(rpm=rpm * 0.9, tpm=tpm * 0.9), clock=clock)
+    scheduler.register("groq", keys)
+    provider = _BucketProvider(clock, rpm, tpm)
+
+    served = rejected = rate_limited = 0
+    for _ in range(3000):  # ~3000 istek / ~10 dakika
+        clock.now += rng.expovariate(5.0)
+        estimated = rng.randint(100, 400)
+        key = scheduler.select("groq", "m", tokens=estimated)
+        if key is None:
+            rejected += 1
+            continue
+        actual = int(estimated * rng.uniform(0.8, 1.05))
+        if provider.call(key, actual) == 429:
+            rate_limited += 1
+            scheduler.drain(key, "m")
+            continue
+        scheduler.settle(key, "m", actual - estimated)
+        served += 1
+
+    assert rate_limited == 0
+    assert served > 900 and rejected > 0
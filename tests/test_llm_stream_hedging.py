@@ -0,0 +1,174 @@
+"""
+LLM Stream Hedging - Unit Tests
+===============================
+
+generate_stream: rol bazlı ilk token (TTFT) süre sınırı, sınır aşılınca
+zincirdeki sonraki modelle hedge, kaybeden stream'in iptali, hedge
+kapalıyken doğrudan fallback, zincirin son denemesinin sert sınıra kadar
+beklenmesi ve iptal edilen denemelerin anahtar rezervasyonunun iadesi.
+"""
+
+import asyncio
+
+import pytest
+
+from app.config import get_settings
+from app.core.llm import budget_tracker, key_manager
+from app.core.llm.generator import LLMGenerator, LLMRequest
+from app.core.metrics import llm_stream_hedges_counter, llm_ttft_timeouts_counter
+
+
+@pytest.fixture(autouse=True)
+def _chain(monkeypatch):
+    monkeypatch.setenv("ROLE_MODEL_CHAINS", '{"chat": ["slow-model", "fast-model", "spare-model"]}')
+    monkeypatch.setenv("LLM_TTFT_DEADLINES", '{"default": 0.05}')
+    monkeypatch.delenv("LLM_STREAM_HEDGING_ENABLED", raising=False)
+    get_settings.cache_clear()
+    key_manager.reset()
+    budget_tracker.reset()
+    key_manager.initialize(groq_keys=["key-a"], gemini_keys=None)
+    yield
+    get_settings.cache_clear()
+    key_manager.reset()
+    budget_tracker.reset()
+
+
+class _Adapter:
+    """Model başına ilk token gecikmesi; iptal edilen stream'leri kaydeder."""
+
+    def __init__(self, delays, fail=()):
+        self.delays = delays
+        self.fail = set(fail)
+        self.started = []
+        self.cancelled = []
+
+    def __call__(self, model_id, api_key, request, stream=False):
+        return self._stream(model_id)
+
+    async def _stream(self, model_id):
+        self.started.append(model_id)
+        try:
+            await asyncio.sleep(self.delays.get(model_id, 0))
+            if model_id in self.fail:
+                raise RuntimeError("upstream 500")
+            for token in ("mer", "haba"):
+                yield f"{model_id}:{token}"
+        except asyncio.CancelledError:
+            self.cancelled.append(model_id)
+            raise
+
+
+async def _collect(generator):
+    return [chunk async for chunk in generator.generate_stream(LLMRequest(role="chat", prompt="selam"))]
+
+
+def _hedges(model, result):
+    return llm_stream_hedges_counter.labels(model=model, result=result)._value.get()
+
+
+class TestStreamHedging:
+
+    @pytest.mark.asyncio
+    async def test_fast_first_token_needs_no_hedge(self):
+        adapter = _Adapter({"slow-model": 0})
+
+        chunks = await _collect(LLMGenerator({"groq": adapter}))
+
+        assert chunks == ["slow-model:mer", "slow-model:haba"]
+        assert adapter.started == ["slow-model"]
+
+    @pytest.mark.asyncio
+    async def test_stalled_stream_is_hedged_and_loser_cancelled(self):
+        adapter = _Adapter({"slow-model": 5, "fast-model": 0})
+        won_before = _hedges("fast-model", "won")
+
+        chunks = await _collect(LLMGenerator({"groq": adapter}))
+
+        assert chunks == ["fast-model:mer", "fast-model:haba"]
+        assert adapter.started == ["slow-model", "fast-model"]
+        assert adapter.cancelled == ["slow-model"]
+        assert _hedges("fast-model", "won") - won_before == 1
+
+    @pytest.mark.asyncio
+    async def test_original_wins_when_it_answers_before_hedge(self):
+        adapter = _Adapter({"slow-model": 0.08, "fast-model": 5})
+        lost_before = _hedges("fast-model", "lost")
+
+        chunks = await _collect(LLMGenerator({"groq": adapter}))
+
+        assert chunks[0] == "slow-model:mer"
+        assert adapter.cancelled == ["fast-model"]
+        assert _hedges("fast-model", "lost") - lost_before == 1
+
+    @pytest.mark.asyncio
+    async def test_without_hedging_stalled_stream_falls_back(self, monkeypatch):
+        monkeypatch.setenv("LLM_STREAM_HEDGING_ENABLED", "false")
+        get_settings.cache_clear()
+        adapter = _Adapter({"slow-model": 5, "fast-model": 0})
+        timeouts_before = llm_ttft_timeouts_counter.labels(model="slow-model")._value.get()
+
+        chunks = await _collect(LLMGenerator({"groq": adapter}))
+
+        assert chunks == ["fast-model:mer", "fast-model:haba"]
+        assert adapter.cancelled == ["slow-model"]
+        assert llm_ttft_timeouts_counter.labels(model="slow-model")._value.get() - timeouts_before == 1
+
+    @pytest.mark.asyncio
+    async def test_error_before_first_token_falls_back(self):
+        adapter = _Adapter({}, fail={"slow-model"})
+
+        chunks = await _collect(LLMGenerator({"groq": adapter}))
+
+        assert chunks == ["fast-model:mer", "fast-model:haba"]
+
+    @pytest.mark.asyncio
+    async def test_all_models_stalled_reports_error(self, monkeypatch):
+        monkeypatch.setenv("LLM_STREAM_HEDGING_ENABLED", "false")
+        monkeypatch.setenv("LLM_STREAM_FIRST_TOKEN_TIMEOUT", "0.2")
+        get_settings.cache_clear()
+        adapter = _Adapter({"slow-model": 5, "fast-model": 5, "spare-model": 5})
+
+        chunks = await _collect(LLMGenerator({"groq": adapter}))
+
+        assert len(chunks) == 1
+        assert chunks[0].startswith("error:") and "spare-model: no first token within 0.2s" in chunks[0]
+        assert sorted(adapter.cancelled) == ["fast-model", "slow-model", "spare-model"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("hedging", ["true", "false"])
+    async def test_last_model_is_not_cancelled_at_ttft_deadline(self, monkeypatch, hedging):
+        monkeypatch.setenv("ROLE_MODEL_CHAINS", '{"chat": ["slow-model"]}')
+        monkeypatch.setenv("LLM_STREAM_HEDGING_ENABLED", hedging)
+        get_settings.cache_clear()
+        adapter = _Adapter({"slow-model": 0.2})
+
+        chunks = await _collect(LLMGenerator({"groq": adapter}))
+
+        assert chunks == ["slow-model:mer", "slow-model:haba"]
+        assert adapter.cancelled == []
+
+    @pytest.mark.asyncio
+    async def test_cancelled_attempts_release_key_reservation(self, monkeypatch):
+        adapter = _Adapter({"slow-model": 5, "fast-model": 0})
+        released = []
+        monkeypatch.setattr(
+            key_manager, "release",
+            lambda api_key, model_id, reserved, used=0: released.append((model_id, reserved, used)),
+        )
+
+        await _collect(LLMGenerator({"groq": adapter}))
+
+        # Kaybeden deneme: rezervasyon sağlayıcıya giden prompt kadarına iner
+        ((model_id, reserved, used),) = released
+        assert model_id == "slow-model"
+        assert 0 < used <= reserved
+
+    @pytest.mark.asyncio
+    async def test_consumer_stopping_early_closes_pending_streams(self):
+        adapter = _Adapter({"slow-model": 5, "fast-model": 0})
+        stream = LLMGenerator({"groq": adapter}).generate_stream(LLMRequest(role="chat", prompt="selam"))
+
+        assert await stream.__anext__() == "fast-model:mer"
+        await stream.aclose()
+
+        assert adapter.cancelled == ["slow-model"]
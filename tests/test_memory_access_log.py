@@ -0,0 +1,205 @@
+"""
+Memory Access Log - Unit Tests
+==============================
+
+last_accessed write-behind: erişim birleştirme, toplu Chroma yazımı,
+hata sonrası yeniden deneme, Redis sorted set okuması, retrieval yolunun
+yazım yapmaması ve ImportanceDecay'in erişim verisini kullanması.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.memory.memory_access_log import MemoryAccessLog, to_datetime
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.zset = {}
+
+    async def zadd(self, key, mapping, gt=False):
+        for member, score in mapping.items():
+            if not gt or score > self.zset.get(member, float("-inf")):
+                self.zset[member] = score
+
+    async def zmscore(self, key, members):
+        return [self.zset.get(m) for m in members]
+
+    async def zremrangebyrank(self, key, start, end):
+        ranked = sorted(self.zset, key=self.zset.get)
+        for member in ranked[start:len(ranked) + end + 1]:
+            del self.zset[member]
+
+
+class _Writer:
+    def __init__(self, fail_times=0):
+        self.batches = []
+        self.fail_times = fail_times
+
+    async def __call__(self, batch):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("chroma down")
+        self.batches.append(dict(batch))
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = _FakeRedis()
+
+    async def _get():
+        return client
+
+    monkeypatch.setattr("app.core.redis_client.get_redis", _get)
+    return client
+
+
+class TestBuffering:
+
+    @pytest.mark.asyncio
+    async def test_accesses_coalesce_and_flush_in_one_batch(self, redis):
+        writer = _Writer()
+        log = MemoryAccessLog(flush_interval_s=60, max_batch=100, writer=writer)
+
+        log.record(["a", "b"], ts=100.0)
+        log.record(["a"], ts=200.0)
+        log.record(["b"], ts=50.0)  # eski erişim yeniyi ezmez
+        await log.close()
+
+        assert writer.batches == [{"a": 200.0, "b": 100.0}]
+        assert redis.zset == {"a": 200.0, "b": 100.0}
+
+    @pytest.mark.asyncio
+    async def test_background_flush_after_interval(self, redis):
+        writer = _Writer()
+        log = MemoryAccessLog(flush_interval_s=0.01, max_batch=100, writer=writer)
+
+        log.record(["a"], ts=1.0)
+        for _ in range(100):
+            if writer.batches:
+                break
+            await asyncio.sleep(0.01)
+        await log.close()
+
+        assert writer.batches == [{"a": 1.0}]
+
+    @pytest.mark.asyncio
+    async def test_batches_are_capped(self, redis):
+        writer = _Writer()
+        log = MemoryAccessLog(flush_interval_s=60, max_batch=2, writer=writer)
+
+        log.record([f"m{i}" for i in range(5)], ts=1.0)
+        await log.close()
+
+        assert [len(b) for b in writer.batches] == [2, 2, 1]
+
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_before_interval(self, redis):
+        writer = _Writer()
+        log = MemoryAccessLog(flush_interval_s=60, max_batch=3, writer=writer)
+
+        log.record(["a"], ts=1.0)
+        await asyncio.sleep(0.01)  # flusher aralığı beklemeye başladı
+        log.record(["b", "c"], ts=2.0)
+        for _ in range(100):
+            if writer.batches:
+                break
+            await asyncio.sleep(0.01)
+
+        assert writer.batches == [{"a": 1.0, "b": 2.0, "c": 2.0}]
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_redis_set_keeps_newest_entries(self, redis, monkeypatch):
+        from app.memory import memory_access_log as module
+
+        monkeypatch.setattr(module, "REDIS_MAX_ENTRIES", 2)
+        log = MemoryAccessLog(flush_interval_s=60, max_batch=100, writer=_Writer())
+
+        log.record(["old"], ts=1.0)
+        log.record(["mid"], ts=2.0)
+        log.record(["new"], ts=3.0)
+        await log.close()
+
+        assert redis.zset == {"mid": 2.0, "new": 3.0}
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried_with_newer_accesses(self, redis):
+        writer = _Writer(fail_times=1)
+        log = MemoryAccessLog(flush_interval_s=60, max_batch=100, writer=writer)
+
+        log.record(["a"], ts=1.0)
+        await log.flush()
+        assert writer.batches == [] and log.pending == 1
+
+        log.record(["a"], ts=5.0)
+        await log.close()
+        assert writer.batches == [{"a": 5.0}]
+
+    @pytest.mark.asyncio
+    async def test_last_accessed_merges_buffer_and_redis(self, redis):
+        log = MemoryAccessLog(flush_interval_s=60, max_batch=100, writer=_Writer())
+        redis.zset = {"a": 100.0, "b": 300.0}
+
+        log.record(["a"], ts=200.0)
+        times = await log.last_accessed_many(["a", "b", "c"])
+        await log.close()
+
+        assert times == {"a": to_datetime(200.0), "b": to_datetime(300.0)}
+
+
+class TestIntegration:
+
+    @pytest.mark.asyncio
+    async def test_retrieval_does_not_write_until_flush(self, monkeypatch, redis):
+        chromadb = pytest.importorskip("chromadb")
+        from app.memory import memory_access_log as module
+        from app.services.memory_service import MemoryService
+
+        coll = chromadb.EphemeralClient().create_collection(
+            name=f"mem_{uuid.uuid4().hex[:8]}", embedding_function=None, metadata={"hnsw:space": "cosine"}
+        )
+        old = "2025-01-01T00:00:00"
+        coll.add(
+            ids=["m1"], embeddings=[[1.0, 0.0]], documents=["Kullanıcı çay sever."],
+            metadatas=[{"user_id": 1, "is_active": True, "importance": 0.9, "created_at": old, "last_accessed": old}],
+        )
+        real_query = coll.query
+        monkeypatch.setattr(coll, "query", lambda query_texts, **kw: real_query(query_embeddings=[[1.0, 0.0]], **kw))
+        monkeypatch.setattr(MemoryService, "_get_collection", staticmethod(lambda: coll))
+        log = MemoryAccessLog(flush_interval_s=60, max_batch=100)
+        monkeypatch.setattr(module, "memory_access_log", log)
+
+        records = await MemoryService.retrieve_relevant_memories(1, "çay", limit=1)
+        assert [r.id for r in records] == ["m1"]
+        assert coll.get(ids=["m1"])["metadatas"][0]["last_accessed"] == old
+
+        await log.close()
+        meta = coll.get(ids=["m1"])["metadatas"][0]
+        assert meta["last_accessed"] > old
+        assert meta["importance"] == 0.9  # diğer anahtarlar korunur
+
+    @pytest.mark.asyncio
+    async def test_importance_decay_uses_access_data(self, monkeypatch, redis):
+        from app.memory import memory_access_log as module
+        from app.services.semantic_memory_enhancer import SemanticMemoryEnhancer
+
+        log = MemoryAccessLog(flush_interval_s=60, max_batch=100, writer=_Writer())
+        monkeypatch.setattr(module, "memory_access_log", log)
+        created = (datetime.utcnow() - timedelta(days=400)).isoformat()
+        memories = [
+            {"id": "used", "importance": 0.5, "created_at": created, "last_accessed": created},
+            {"id": "stale", "importance": 0.5, "created_at": created, "last_accessed": created},
+        ]
+        log.record(["used"])
+
+        updated, stats = await SemanticMemoryEnhancer.apply_importance_decay(1, memories)
+        await log.close()
+
+        by_id = {m["id"]: m for m in updated}
+        assert by_id["used"]["decayed_importance"] == 0.5
+        assert by_id["stale"]["decayed_importance"] < 0.5
+        assert stats.memories_decayed == 1
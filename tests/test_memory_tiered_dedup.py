@@ -0,0 +1,136 @@
+"""
+Memory Tiered Dedup - Unit Tests
+================================
+
+MemoryService.add_memory katmanlı duplicate kontrolü: hash → simhash/LSH →
+semantik sorgu, embedding'in insert'te yeniden kullanımı ve katman sayaçları.
+Gerçek (ephemeral) ChromaDB koleksiyonu, deterministik embedding ile.
+"""
+
+import uuid
+
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings  # noqa: E402
+
+from app.core.metrics import memory_dedup_checks_counter  # noqa: E402
+from app.services import semantic_memory_enhancer as sme  # noqa: E402
+from app.services.memory_service import MemoryService  # noqa: E402
+from app.services.semantic_memory_enhancer import SimhashStore  # noqa: E402
+
+
+class _CountingEmbedding(EmbeddingFunction[Documents]):
+    """Karakter histogramı embedding'i; çağrı sayısını tutar."""
+
+    calls = 0
+
+    def __init__(self):
+        pass
+
+    def __call__(self, input: Documents) -> Embeddings:
+        type(self).calls += len(input)
+        vectors = []
+        for text in input:
+            vec = [0.0] * 32
+            for ch in text.lower():
+                vec[ord(ch) % 32] += 1.0
+            vectors.append(vec)
+        return vectors
+
+    @staticmethod
+    def name() -> str:
+        return "counting-test"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return _CountingEmbedding()
+
+
+def _tier(tier, result):
+    return memory_dedup_checks_counter.labels(tier=tier, result=result)._value.get()
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    client = chromadb.EphemeralClient()
+    coll = client.create_collection(
+        name=f"memories_{uuid.uuid4().hex[:8]}",
+        embedding_function=_CountingEmbedding(),
+        metadata={"hnsw:space": "cosine"},
+    )
+    monkeypatch.setattr(MemoryService, "_get_collection", staticmethod(lambda: coll))
+
+    async def _no_redis():
+        return None
+
+    monkeypatch.setattr("app.core.redis_client.get_redis", _no_redis)
+    monkeypatch.setattr(SimhashStore, "_local", sme._LocalSimhashIndex(SimhashStore.BANDS, SimhashStore.BAND_BITS))
+    _CountingEmbedding.calls = 0
+    yield coll
+    client.delete_collection(coll.name)
+
+
+@pytest.mark.asyncio
+async def test_new_memory_embeds_once(collection):
+    record = await MemoryService.add_memory(1, "Kullanıcı İstanbul'da yaşıyor.")
+
+    assert _CountingEmbedding.calls == 1
+    stored = collection.get(ids=[record.id], include=["embeddings", "metadatas"])
+    assert len(stored["embeddings"][0]) == 32
+    assert stored["metadatas"][0]["content_hash"] == MemoryService._content_hash("Kullanıcı İstanbul'da yaşıyor.")
+
+
+@pytest.mark.asyncio
+async def test_exact_repeat_short_circuits_on_hash(collection):
+    first = await MemoryService.add_memory(1, "Kullanıcının kedisinin adı Pamuk.")
+    calls = _CountingEmbedding.calls
+    before = _tier("hash", "duplicate")
+
+    again = await MemoryService.add_memory(1, "  kullanıcının   KEDİSİNİN adı Pamuk!")
+
+    assert again.id == first.id
+    assert _tier("hash", "duplicate") - before == 1
+    assert _CountingEmbedding.calls == calls  # embedding yok
+    assert collection.count() == 1
+
+
+@pytest.mark.asyncio
+async def test_near_repeat_short_circuits_on_simhash(collection):
+    text = "Kullanıcı her sabah yedide koşuya çıkıyor, ardından kahvaltıda iki fincan Türk kahvesi içiyor"
+    first = await MemoryService.add_memory(1, text)
+    calls = _CountingEmbedding.calls
+    before = _tier("simhash", "duplicate")
+
+    again = await MemoryService.add_memory(1, text.replace("fincan", "fincn"))  # yazım hatası
+
+    assert again.id == first.id
+    assert _tier("simhash", "duplicate") - before == 1
+    assert _CountingEmbedding.calls == calls
+
+
+@pytest.mark.asyncio
+async def test_other_users_and_deleted_memories_are_not_matched(collection):
+    first = await MemoryService.add_memory(1, "Kullanıcı vejetaryen beslenir.")
+    other_user = await MemoryService.add_memory(2, "Kullanıcı vejetaryen beslenir.")
+    assert other_user.id != first.id
+
+    assert await MemoryService.soft_delete_memory(1, first.id)
+    again = await MemoryService.add_memory(1, "Kullanıcı vejetaryen beslenir.")
+
+    assert again.id != first.id
+    assert collection.count() == 3
+
+
+@pytest.mark.asyncio
+async def test_update_refreshes_hash_tier(collection):
+    record = await MemoryService.add_memory(1, "Kullanıcı Ankara'da yaşıyor.")
+    await MemoryService.update_memory(1, record.id, "Kullanıcı İzmir'e taşındı.")
+
+    again = await MemoryService.add_memory(1, "Kullanıcı İzmir'e taşındı.")
+
+    assert again.id == record.id
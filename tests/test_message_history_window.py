@@ -0,0 +1,98 @@
+"""
+Message History Window - Unit Tests
+===================================
+
+Son N mesaj (ORDER BY created_at DESC LIMIT N), keyset sayfalama ve
+(conversation_id, created_at, id) indeks kullanımı.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import SQLModel, create_engine
+
+from app.core import database
+from app.core.models import Message  # noqa: F401  (tabloların metadata'ya kaydı)
+from app.memory import conversation
+
+BASE_TIME = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+async def history_db(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    monkeypatch.setattr(database, "get_db_url", lambda: url)
+    monkeypatch.setattr(database, "_engine", None)
+    monkeypatch.setattr(database, "_async_engine", None)
+
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    # Ham SQL ile doldur: naive UTC zaman damgaları uygulamanın yazdığı biçimde
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (id, username, password_hash, role, is_banned, selected_model, bela_unlocked, "
+            "active_persona, limits, permissions, created_at) "
+            "VALUES (1, 'alice', 'x', 'user', 0, 'groq', 0, 'friendly', '{}', '{}', :ts), "
+            "(2, 'bob', 'x', 'user', 0, 'groq', 0, 'friendly', '{}', '{}', :ts)"
+        ), {"ts": BASE_TIME.isoformat(sep=" ")})
+        for conv_id in ("conv-1", "conv-2"):
+            conn.execute(text(
+                "INSERT INTO conversations (id, user_id, title, created_at, updated_at) VALUES (:id, 1, 't', :ts, :ts)"
+            ), {"id": conv_id, "ts": BASE_TIME.isoformat(sep=" ")})
+        rows = [
+            {"conv": "conv-1", "role": "user" if i % 2 == 0 else "bot", "content": f"m{i}",
+             "ts": (BASE_TIME + timedelta(seconds=i // 2)).isoformat(sep=" ")}
+            for i in range(30)
+        ]
+        rows.append({"conv": "conv-2", "role": "user", "content": "other", "ts": BASE_TIME.isoformat(sep=" ")})
+        conn.execute(text(
+            "INSERT INTO messages (conversation_id, role, content, extra_metadata, created_at) "
+            "VALUES (:conv, :role, :content, '{}', :ts)"
+        ), rows)
+    engine.dispose()
+
+    yield url
+    await database.dispose_async_engine()
+    if database._engine is not None:
+        database._engine.dispose()
+
+
+class TestRecentMessages:
+
+    def test_sync_tail_is_chronological(self, history_db):
+        messages = conversation.load_recent_messages("conv-1", limit=5)
+        assert [m.content for m in messages] == ["m25", "m26", "m27", "m28", "m29"]
+
+    @pytest.mark.asyncio
+    async def test_async_tail_breaks_timestamp_ties_by_id(self, history_db):
+        # m28 ve m29 aynı created_at'e sahip; id sırası korunur
+        messages = await conversation.load_recent_messages_async("conv-1", limit=3)
+        assert [m.content for m in messages] == ["m27", "m28", "m29"]
+
+    @pytest.mark.asyncio
+    async def test_keyset_pages_cover_conversation_once(self, history_db):
+        seen = []
+        before = None
+        while True:
+            page, before = await conversation.load_messages_page_async("alice", "conv-1", limit=7, before_id=before)
+            seen = [m.content for m in page] + seen
+            if before is None:
+                break
+        assert seen == [f"m{i}" for i in range(30)]
+
+    @pytest.mark.asyncio
+    async def test_page_requires_ownership(self, history_db):
+        assert await conversation.load_messages_page_async("bob", "conv-1") == ([], None)
+
+    def test_tail_query_uses_composite_index(self, history_db):
+        engine = create_engine(history_db)
+        compiled = conversation._tail_messages_stmt("conv-1", 10, before_id=12).compile(
+            engine, compile_kwargs={"literal_binds": True}
+        )
+        with engine.connect() as conn:
+            plan = " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}"))
+        engine.dispose()
+
+        assert "ix_messages_conversation_created" in plan
+        assert "TEMP B-TREE" not in plan
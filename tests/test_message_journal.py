@@ -0,0 +1,268 @@
+"""
+Message Journal - Unit Tests
+============================
+
+Write-behind mesaj journal'ı: group commit, sohbet içi sıra, güncelleme
+birleştirme, read-your-writes overlay ve shutdown flush.
+"""
+
+import asyncio
+import itertools
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.memory.message_journal import MessageJournal
+
+
+class _RecordingWriter:
+    """Batch'leri kaydeden, ID veren sahte veritabanı yazıcısı."""
+
+    def __init__(self, owners=None, fail_times=0):
+        self.batches = []
+        self.rows = {}
+        self.owners = owners or {("alice", "conv-1"), ("alice", "conv-2")}
+        self.fail_times = fail_times
+        self._ids = itertools.count(1)
+
+    async def __call__(self, appends, updates, journal):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("db down")
+        self.batches.append(([(a.conv_id, a.text) for a in appends], dict(updates)))
+        results = []
+        for item in appends:
+            if (item.username, item.conv_id) not in self.owners:
+                results.append(ValueError("yetki yok"))
+                continue
+            msg = SimpleNamespace(id=next(self._ids), conversation_id=item.conv_id, content=item.text,
+                                  extra_metadata=dict(item.extra_metadata))
+            self.rows[msg.id] = msg
+            results.append(msg)
+        for message_id, pending in updates.items():
+            if message_id in self.rows:
+                pending.apply(self.rows[message_id])
+        return results
+
+
+@pytest.fixture
+def writer():
+    return _RecordingWriter()
+
+
+@pytest.fixture
+async def journal(writer):
+    journal = MessageJournal(flush_interval_ms=5, max_batch=50, writer=writer)
+    yield journal
+    await journal.close()
+
+
+class TestMessageJournal:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_appends_share_one_commit_in_order(self, journal, writer):
+        messages = await asyncio.gather(*(
+            journal.append("alice", "conv-1" if i % 2 else "conv-2", "user", f"m{i}") for i in range(10)
+        ))
+
+        assert len(writer.batches) == 1
+        appended, _ = writer.batches[0]
+        assert [text for _, text in appended] == [f"m{i}" for i in range(10)]
+        conv1 = [text for conv, text in appended if conv == "conv-1"]
+        assert conv1 == ["m1", "m3", "m5", "m7", "m9"]
+        assert [m.id for m in messages] == sorted(m.id for m in messages)
+
+    @pytest.mark.asyncio
+    async def test_max_batch_triggers_split(self, writer):
+        journal = MessageJournal(flush_interval_ms=1000, max_batch=4, writer=writer)
+        await asyncio.wait_for(
+            asyncio.gather(*(journal.append("alice", "conv-1", "user", f"m{i}") for i in range(8))), timeout=2
+        )
+        await journal.close()
+
+        assert [len(appends) for appends, _ in writer.batches] == [4, 4]
+
+    @pytest.mark.asyncio
+    async def test_updates_coalesce_and_reads_see_them(self, journal, writer):
+        msg = await journal.append("alice", "conv-1", "bot", "", {"status": "streaming"})
+
+        journal.update(msg.id, None, {"status": "queued", "job_id": "j1"})
+        journal.update(msg.id, "Merhaba", {"status": "complete"})
+
+        # Henüz flush edilmedi: DB'den okunan eski nesneye overlay uygulanır
+        stale = SimpleNamespace(id=msg.id, content="", extra_metadata={"status": "streaming"})
+        journal.overlay([stale])
+        assert stale.content == "Merhaba"
+        assert stale.extra_metadata == {"status": "complete", "job_id": "j1"}
+
+        await journal.flush()
+        _, updates = writer.batches[-1]
+        assert list(updates) == [msg.id]
+        assert writer.rows[msg.id].extra_metadata == {"status": "complete", "job_id": "j1"}
+
+    @pytest.mark.asyncio
+    async def test_ownership_failure_only_affects_its_append(self, journal):
+        ok, denied = await asyncio.gather(
+            journal.append("alice", "conv-1", "user", "ok"),
+            journal.append("bob", "conv-1", "user", "izinsiz"),
+            return_exceptions=True,
+        )
+
+        assert ok.content == "ok"
+        assert isinstance(denied, ValueError)
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_requeues_updates(self, journal, writer):
+        msg = await journal.append("alice", "conv-1", "bot", "")
+        writer.fail_times = 1
+
+        journal.update(msg.id, "ilk")
+        await journal.flush()  # başarısız → yeniden kuyruğa
+        journal.update(msg.id, None, {"status": "complete"})
+        await journal.flush()
+
+        assert writer.rows[msg.id].content == "ilk"
+        assert writer.rows[msg.id].extra_metadata == {"status": "complete"}
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending_updates(self, writer):
+        journal = MessageJournal(flush_interval_ms=10_000, max_batch=50, writer=writer)
+        msg = await asyncio.wait_for(_append_and_flush(journal), timeout=2)
+
+        journal.update(msg.id, "son")
+        assert journal.pending == 1
+        await journal.close()
+
+        assert journal.pending == 0
+        assert writer.rows[msg.id].content == "son"
+
+
+async def _append_and_flush(journal):
+    task = asyncio.ensure_future(journal.append("alice", "conv-1", "bot", ""))
+    await asyncio.sleep(0)
+    await journal.flush()
+    return await task
+
+
+class TestSqlWriter:
+
+    @pytest.mark.asyncio
+    async def test_batch_commit_against_sqlite(self, tmp_path, monkeypatch, naive_utc_datetimes):
+        from sqlmodel import Session, SQLModel, create_engine
+
+        from app.core import database
+        from app.core.models import Conversation, User
+        from app.memory import conversation
+
+        url = f"sqlite:///{tmp_path / 'app.db'}"
+        monkeypatch.setattr(database, "get_db_url", lambda: url)
+        monkeypatch.setattr(database, "_async_engine", None)
+        engine = create_engine(url)
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            user = User(username="alice", password_hash="x")
+            session.add(user)
+            session.commit()
+            session.add(Conversation(id="conv-1", user_id=user.id))
+            session.commit()
+        engine.dispose()
+
+        journal = MessageJournal(flush_interval_ms=2, max_batch=50)
+        monkeypatch.setattr("app.memory.message_journal.message_journal", journal)
+        try:
+            first, second = await asyncio.gather(
+                journal.append("alice", "conv-1", "user", "soru"),
+                journal.append("alice", "conv-1", "bot", "", {"status": "streaming"}),
+            )
+            with pytest.raises(ValueError):
+                await journal.append("bob", "conv-1", "user", "izinsiz")
+            journal.update(second.id, "cevap", {"status": "complete"})
+
+            # Flush öncesi okuma kendi yazımını görür
+            unflushed = await conversation.load_messages_async("alice", "conv-1")
+            assert [m.content for m in unflushed] == ["soru", "cevap"]
+
+            await journal.close()
+            persisted = await conversation.load_messages_async("alice", "conv-1")
+            assert [(m.id, m.content) for m in persisted] == [(first.id, "soru"), (second.id, "cevap")]
+            assert persisted[1].extra_metadata == {"status": "complete"}
+            conv = await conversation.get_conversation_async("alice", "conv-1")
+            assert conv.message_count == 2
+        finally:
+            await database.dispose_async_engine()
+
+    @pytest.mark.asyncio
+    async def test_bad_conversation_does_not_roll_back_others(self, tmp_path, monkeypatch, naive_utc_datetimes):
+        from sqlalchemy import text
+        from sqlalchemy.exc import IntegrityError
+        from sqlmodel import Session, SQLModel, create_engine
+
+        from app.core import database
+        from app.core.models import Conversation, User
+        from app.memory import conversation
+
+        url = f"sqlite:///{tmp_path / 'app.db'}"
+        monkeypatch.setattr(database, "get_db_url", lambda: url)
+        monkeypatch.setattr(database, "_async_engine", None)
+        engine = create_engine(url)
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            user = User(username="alice", password_hash="x")
+            session.add(user)
+            session.commit()
+            session.add(Conversation(id="conv-1", user_id=user.id))
+            session.add(Conversation(id="conv-2", user_id=user.id))
+            session.commit()
+
+        journal = MessageJournal(flush_interval_ms=2, max_batch=50)
+        try:
+            await asyncio.gather(
+                journal.append("alice", "conv-1", "user", "ilk"),
+                journal.append("alice", "conv-2", "user", "ilk"),
+            )
+            # Sohbet silindi ama sahiplik önbelleği hâlâ "sahip" diyor → FK ihlali
+            with engine.begin() as conn:
+                conn.execute(text("DELETE FROM messages WHERE conversation_id = 'conv-2'"))
+                conn.execute(text("DELETE FROM conversations WHERE id = 'conv-2'"))
+
+            kept, dropped = await asyncio.gather(
+                journal.append("alice", "conv-1", "bot", "cevap"),
+                journal.append("alice", "conv-2", "bot", "cevap"),
+                return_exceptions=True,
+            )
+
+            assert kept.content == "cevap"
+            assert isinstance(dropped, IntegrityError)
+            assert journal.is_owned("alice", "conv-2") is None
+            persisted = await conversation.load_messages_async("alice", "conv-1")
+            assert [m.content for m in persisted] == ["ilk", "cevap"]
+        finally:
+            await journal.close()
+            engine.dispose()
+            await database.dispose_async_engine()
+
+
+class TestLoopBinding:
+
+    @pytest.mark.asyncio
+    async def test_second_running_loop_is_rejected(self, writer):
+        journal = MessageJournal(flush_interval_ms=10_000, max_batch=50, writer=writer)
+        other = asyncio.new_event_loop()
+        thread = threading.Thread(target=other.run_forever, daemon=True)
+        thread.start()
+
+        async def start():
+            journal._ensure_started()
+
+        try:
+            asyncio.run_coroutine_threadsafe(start(), other).result(timeout=2)
+            # Flusher diğer loop'ta çalışırken kuyruk sessizce yeniden kurulmaz
+            with pytest.raises(RuntimeError):
+                await journal.append("alice", "conv-1", "user", "m")
+            assert journal.pending == 0
+        finally:
+            asyncio.run_coroutine_threadsafe(journal.close(), other).result(timeout=2)
+            other.call_soon_threadsafe(other.stop)
+            thread.join(timeout=2)
+            other.close()
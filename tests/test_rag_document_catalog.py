@@ -0,0 +1,139 @@
+"""
+RAG v2 Document Catalog - Unit Tests
+====================================
+
+Upload başına tek satırlık doküman catalog'u: ingestion/silme ile bakım,
+sayfalı listeleme, lexical tablodan backfill ve catalog destekli doküman seçimi.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.memory import rag_v2, rag_v2_docs, rag_v2_lexical
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_v2_docs, "CATALOG_DB_PATH", str(tmp_path / "catalog.db"))
+    index = rag_v2_lexical.LexicalIndex(str(tmp_path / "fts.db"))
+    monkeypatch.setattr(rag_v2_lexical, "_index", index)
+    yield index
+    index.close()
+
+
+def _add(owner, upload_id, filename, created_at, pages=3, chunks=10):
+    rag_v2_docs.upsert_document(owner, upload_id, filename, pages, chunks, 1024, created_at=created_at)
+
+
+class TestCatalogMaintenance:
+
+    def test_upsert_keeps_created_at_and_updates_counts(self, catalog):
+        _add("alice", "up-1", "a.pdf", "2024-01-01T00:00:00", chunks=0)
+        rag_v2_docs.upsert_document("alice", "up-1", "a.pdf", 3, 25, created_at="2024-06-01T00:00:00")
+
+        (doc,) = rag_v2_docs.list_documents("alice")
+        assert doc["chunk_count"] == 25
+        assert doc["created_at"] == "2024-01-01T00:00:00"
+        # byte_size=0 güncellemesi bilinen boyutu silmez
+        assert doc["byte_size"] == 1024
+
+    def test_same_upload_id_of_other_owner_is_not_overwritten(self, catalog):
+        _add("alice", "up-1", "a.pdf", "2024-01-01T00:00:00", chunks=10)
+        _add("bob", "up-1", "b.pdf", "2024-01-02T00:00:00", chunks=3)
+
+        assert [(d["filename"], d["chunk_count"]) for d in rag_v2_docs.list_documents("alice")] == [("a.pdf", 10)]
+        assert [(d["filename"], d["chunk_count"]) for d in rag_v2_docs.list_documents("bob")] == [("b.pdf", 3)]
+
+    def test_pagination_newest_first(self, catalog):
+        for i in range(5):
+            _add("alice", f"up-{i}", f"{i}.pdf", f"2024-01-0{i + 1}T00:00:00")
+        _add("bob", "up-bob", "b.pdf", "2024-02-01T00:00:00")
+
+        first = rag_v2_docs.list_documents("alice", limit=2)
+        second = rag_v2_docs.list_documents("alice", limit=2, offset=2)
+
+        assert [d["upload_id"] for d in first] == ["up-4", "up-3"]
+        assert [d["upload_id"] for d in second] == ["up-2", "up-1"]
+        assert rag_v2_docs.count_documents("alice") == 5
+
+    def test_remove_by_upload_and_filename(self, catalog):
+        _add("alice", "up-1", "a.pdf", "2024-01-01")
+        _add("alice", "up-2", "a.pdf", "2024-01-02")
+        _add("alice", "up-3", "b.pdf", "2024-01-03")
+        _add("bob", "up-4", "a.pdf", "2024-01-04")
+
+        rag_v2_docs.remove_document("up-3", "bob")  # başka kullanıcının satırı silinmez
+        assert rag_v2_docs.count_documents("alice") == 3
+
+        assert sorted(rag_v2_docs.remove_documents_by_filename("a.pdf", "alice")) == ["up-1", "up-2"]
+        rag_v2_docs.remove_document("up-3", "alice")
+        assert rag_v2_docs.count_documents("alice") == 0
+        assert rag_v2_docs.count_documents("bob") == 1
+
+    def test_listing_uses_owner_index(self, catalog):
+        with rag_v2_docs._catalog_connection() as conn:
+            plan = " ".join(
+                row[-1] for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT upload_id FROM rag_v2_documents WHERE owner = ? "
+                    "ORDER BY created_at DESC, upload_id LIMIT 10", ("alice",)
+                )
+            )
+        assert "idx_rag_v2_documents_owner_created" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_backfill_from_lexical_chunks(self, catalog):
+        ids, docs, metas = [], [], []
+        for page in (1, 2):
+            for idx in range(3):
+                ids.append(rag_v2_lexical.make_chunk_id("alice", "old.pdf", "up-old", page, idx))
+                docs.append("eski içerik")
+                metas.append({"owner": "alice", "scope": "user", "filename": "old.pdf", "upload_id": "up-old",
+                              "page_number": page, "chunk_index": idx})
+        catalog.add_chunks(ids, docs, metas)
+
+        (doc,) = rag_v2_docs.list_documents("alice")
+        assert doc["upload_id"] == "up-old"
+        assert doc["page_count"] == 2
+        assert doc["chunk_count"] == 6
+
+
+class TestCatalogIntegration:
+
+    def test_txt_ingest_and_delete_maintain_catalog(self, catalog):
+        coll = MagicMock()
+        coll.get.return_value = {"ids": ["x"], "metadatas": [{"upload_id": "up-txt"}]}
+        with patch.object(rag_v2, "_get_rag_v2_collection", return_value=coll), \
+             patch("app.memory.rag_v2_lexical.add_chunks_to_fts"):
+            count = rag_v2.add_txt_document("Madde 1. Teslim süresi on gündür.", "notes.txt", "alice",
+                                             upload_id="up-txt")
+            listed = rag_v2.list_documents("alice")
+            rag_v2.delete_by_upload_id("up-txt", "alice")
+
+        assert listed[0]["upload_id"] == "up-txt"
+        assert listed[0]["chunk_count"] == count
+        assert listed[0]["byte_size"] > 0
+        assert rag_v2.list_documents("alice") == []
+
+    def test_selection_ignores_deleted_uploads_and_counts_catalog(self, catalog):
+        _add("alice", "up-1", "a.pdf", "2024-01-01")
+        _add("alice", "up-2", "b.pdf", "2024-01-02")
+        _add("alice", "up-3", "c.pdf", "2024-01-03")
+        seeds = [
+            {"upload_id": "up-gone", "score": 0.05},
+            {"upload_id": "up-2", "score": 0.1},
+            {"upload_id": "up-1", "score": 0.3},
+        ]
+
+        selected, total = rag_v2_docs.select_documents("alice", seeds, top_k_docs=5)
+
+        assert selected == ["up-2", "up-1"]
+        assert total == 3
+
+    def test_selection_falls_back_to_seeds_when_catalog_empty(self, catalog):
+        seeds = [{"upload_id": "up-1", "score": 0.2}, {"upload_id": "up-2", "score": 0.1}]
+
+        selected, total = rag_v2_docs.select_documents("alice", seeds, top_k_docs=5)
+
+        assert selected == ["up-2", "up-1"]
+        assert total == 2
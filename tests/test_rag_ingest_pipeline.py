@@ -0,0 +1,191 @@
+"""
+RAG v2 Ingestion Pipeline - Unit Tests
+======================================
+
+Aşamalı PDF ingestion hattı: sayfalar arası batch yazımı,
+checkpoint üzerinden devam ve süreç havuzu ile sıralı çıkarım.
+"""
+
+import asyncio
+import os
+import socket
+import sqlite3
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.memory import rag_v2_docs, rag_v2_ingest, rag_v2_lexical
+
+PAGE_TEXT = "Madde 157/1 kapsamında teslim süresi on iş günüdür. " * 3
+
+
+@pytest.fixture
+def state_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_v2_ingest, "STATE_DB_PATH", str(tmp_path / "ingest.db"))
+    monkeypatch.setattr(rag_v2_docs, "CATALOG_DB_PATH", str(tmp_path / "catalog.db"))
+    monkeypatch.setattr(rag_v2_lexical, "_index", rag_v2_lexical.LexicalIndex(str(tmp_path / "fts.db")))
+    return tmp_path
+
+
+def _fake_extract(file_path, start, end):
+    return [(idx + 1, PAGE_TEXT) for idx in range(start, end)]
+
+
+def _run(collection, total_pages=10, batch=4, upload_id="up-1", callback=None, owner="alice", file_hash="h1"):
+    settings = MagicMock(RAG_INGEST_WORKERS=1, RAG_INGEST_PAGES_PER_TASK=3, RAG_INGEST_BATCH_CHUNKS=batch)
+    with patch("app.config.get_settings", return_value=settings), \
+         patch.object(rag_v2_ingest, "_count_pages", return_value=total_pages), \
+         patch.object(rag_v2_ingest, "_file_sha256", return_value=file_hash), \
+         patch.object(rag_v2_ingest, "_extract_page_range", side_effect=_fake_extract), \
+         patch("app.memory.rag_v2._get_rag_v2_collection", return_value=collection), \
+         patch("app.memory.rag_v2_lexical.add_chunks_to_fts", return_value=True) as fts, \
+         patch("app.memory.rag_v2_lexical.delete_pages_after") as cleanup, \
+         patch("app.memory.rag_v2.delete_by_upload_id") as purge:
+        count = rag_v2_ingest.ingest_pdf("doc.pdf", "doc.pdf", owner, upload_id=upload_id, progress_callback=callback)
+    return count, fts, cleanup, purge
+
+
+class TestIngestPipeline:
+    """ingest_pdf davranışı."""
+
+    def test_chunks_batched_across_pages(self, state_db):
+        collection = MagicMock()
+        progress = []
+        count, fts, _, _ = _run(collection, callback=lambda *a: progress.append(a))
+
+        assert count == 10
+        # 10 sayfa, batch=4 → 3 yazım (4 + 4 + 2), sayfa başına değil
+        assert collection.upsert.call_count == 3
+        assert fts.call_count == 3
+        first_ids = collection.upsert.call_args_list[0].kwargs["ids"]
+        assert first_ids[0] == "alice:doc.pdf:up-1:p1:c0"
+        assert progress[-1] == (10, 10, 10)
+
+        job = rag_v2_ingest.get_job("up-1", "alice")
+        assert job["status"] == "complete"
+        assert job["last_page"] == 10
+
+    def test_resume_from_checkpoint(self, state_db):
+        collection = MagicMock()
+        # İkinci batch yazımında crash simülasyonu
+        collection.upsert.side_effect = [None, RuntimeError("chroma down")]
+        with pytest.raises(RuntimeError):
+            _run(collection)
+
+        job = rag_v2_ingest.get_job("up-1", "alice")
+        assert job["status"] == "failed"
+        assert job["last_page"] == 4
+        # Yarım kalan yükleme doküman listesinde görünmez
+        assert rag_v2_docs.count_documents("alice") == 0
+
+        collection = MagicMock()
+        count, _, cleanup, _ = _run(collection)
+        assert count == 10
+        cleanup.assert_called_once_with("up-1", "alice", 4)
+        written = [i for c in collection.upsert.call_args_list for i in c.kwargs["ids"]]
+        assert written[0].endswith(":p5:c0")
+        assert len(written) == 6
+        (doc,) = rag_v2_docs.list_documents("alice")
+        assert (doc["upload_id"], doc["page_count"], doc["chunk_count"]) == ("up-1", 10, 10)
+
+    def test_completed_upload_is_not_reprocessed(self, state_db):
+        _run(MagicMock())
+        collection = MagicMock()
+        count, _, _, _ = _run(collection)
+        assert count == 10
+        collection.upsert.assert_not_called()
+
+    def test_upload_id_is_scoped_to_owner(self, state_db):
+        collection = MagicMock()
+        collection.upsert.side_effect = [None, RuntimeError("chroma down")]
+        with pytest.raises(RuntimeError):
+            _run(collection)
+
+        # Başka kullanıcı aynı upload_id'yi gönderir: alice'in işini görmez, devam etmez
+        assert rag_v2_ingest.get_job("up-1", "bob") is None
+        collection = MagicMock()
+        count, _, cleanup, _ = _run(collection, owner="bob")
+        assert count == 10
+        cleanup.assert_not_called()
+        assert collection.upsert.call_args_list[0].kwargs["ids"][0] == "bob:doc.pdf:up-1:p1:c0"
+        assert rag_v2_ingest.get_job("up-1", "alice")["status"] == "failed"
+
+    def test_different_file_under_same_id_starts_fresh(self, state_db):
+        _run(MagicMock())
+        collection = MagicMock()
+        count, _, cleanup, purge = _run(collection, file_hash="h2")
+
+        assert count == 10
+        assert collection.upsert.call_count == 3
+        purge.assert_called_once_with("up-1", "alice")
+        cleanup.assert_not_called()
+        assert rag_v2_ingest.get_job("up-1", "alice")["file_hash"] == "h2"
+
+
+def _set_owner(state_db, worker_id, age=0.0):
+    with sqlite3.connect(state_db / "ingest.db") as conn:
+        conn.execute(
+            "UPDATE rag_v2_ingest_jobs SET worker_id = ?, updated_at = ?", (worker_id, time.time() - age)
+        )
+
+
+class TestResumeScan:
+    """Açılışta yarım kalan işlerin sahiplenilmesi."""
+
+    def _interrupted_job(self, state_db):
+        rag_v2_ingest._start_job("up-1", "alice", "doc.pdf", "private", "doc.pdf", "h1", 10, resume=False)
+
+    def test_quick_restart_claims_previous_boot_immediately(self, state_db):
+        self._interrupted_job(state_db)
+        # Aynı pid, farklı boot (container yeniden başlatması): heartbeat taze olsa da sahiplenilir
+        _set_owner(state_db, f"{socket.gethostname()}:{os.getpid()}:deadbeef")
+
+        claimed, waiting = rag_v2_ingest._claim_stale_jobs()
+        assert [job["upload_id"] for job in claimed] == ["up-1"]
+        assert waiting == 0
+        assert rag_v2_ingest.get_job("up-1", "alice")["worker_id"] == rag_v2_ingest.WORKER_ID
+        # Artık bu sürecin işi: tekrar sahiplenilmez
+        assert rag_v2_ingest._claim_stale_jobs() == ([], 0)
+
+    def test_dead_local_worker_claimed_immediately(self, state_db):
+        self._interrupted_job(state_db)
+        _set_owner(state_db, f"{socket.gethostname()}:999999:cafe")
+
+        with patch.object(rag_v2_ingest.os, "kill", side_effect=ProcessLookupError):
+            claimed, waiting = rag_v2_ingest._claim_stale_jobs()
+        assert len(claimed) == 1 and waiting == 0
+
+    def test_live_foreign_worker_waits_for_stale_heartbeat(self, state_db):
+        self._interrupted_job(state_db)
+        _set_owner(state_db, "other-host:42:abcd")
+
+        assert rag_v2_ingest._claim_stale_jobs() == ([], 1)
+
+        _set_owner(state_db, "other-host:42:abcd", age=rag_v2_ingest.STALE_JOB_SECONDS + 1)
+        claimed, waiting = rag_v2_ingest._claim_stale_jobs()
+        assert len(claimed) == 1 and waiting == 0
+
+    def test_resume_rescans_while_foreign_jobs_run(self, monkeypatch):
+        monkeypatch.setattr(rag_v2_ingest, "RESCAN_SECONDS", 0)
+        scans = MagicMock(side_effect=[([], 1), ([], 1), ([], 0)])
+        with patch.object(rag_v2_ingest, "_claim_stale_jobs", scans):
+            assert asyncio.run(rag_v2_ingest.resume_pending_ingestions()) == 0
+        assert scans.call_count == 3
+
+
+class TestPageBlocks:
+    """Süreç havuzu ile sayfa çıkarımı."""
+
+    def test_process_pool_preserves_page_order(self, tmp_path):
+        PyPDF2 = pytest.importorskip("PyPDF2")
+        writer = PyPDF2.PdfWriter()
+        for _ in range(7):
+            writer.add_blank_page(width=200, height=200)
+        pdf_path = tmp_path / "blank.pdf"
+        with open(pdf_path, "wb") as f:
+            writer.write(f)
+
+        blocks = list(rag_v2_ingest._iter_page_blocks(str(pdf_path), 2, 7, workers=2, pages_per_task=2))
+        pages = [page for block in blocks for page, _ in block]
+        assert pages == [3, 4, 5, 6, 7]
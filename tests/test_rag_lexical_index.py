@@ -0,0 +1,157 @@
+"""
+RAG v2 Lexical Index - Unit Tests
+=================================
+
+Pooled FTS5 servisi: WAL modu, bağlantı yeniden kullanımı ve
+AND araması, sonuç yoksa OR geri dönüşü.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.memory import rag_v2_lexical
+from app.memory.rag_v2_lexical import LexicalIndex
+
+
+def _meta(page, chunk, upload_id="up-1"):
+    return {"owner": "alice", "scope": "user", "filename": "doc.pdf", "upload_id": upload_id,
+            "page_number": page, "chunk_index": chunk}
+
+
+def _chunk_id(page, chunk, upload_id="up-1"):
+    return rag_v2_lexical.make_chunk_id("alice", "doc.pdf", upload_id, page, chunk)
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = LexicalIndex(str(tmp_path / "fts.db"), pool_size=2)
+    idx.add_chunks(
+        [_chunk_id(1, 0), _chunk_id(1, 1), _chunk_id(2, 0)],
+        [
+            "Teslim süresi sözleşmede on iş günü olarak belirlenmiştir.",
+            "Teslim adresi değiştirilebilir.",
+            "Ödeme koşulları ayrıca düzenlenir.",
+        ],
+        [_meta(1, 0), _meta(1, 1), _meta(2, 0)],
+    )
+    yield idx
+    idx.close()
+
+
+class TestLexicalIndex:
+
+    def test_uses_wal_journal(self, index):
+        with index.reader() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_all_terms_match_before_partial_fallback(self, index):
+        results = index.search("teslim süresi", owner="alice", scope="user")
+        assert [r["text"][:13] for r in results] == ["Teslim süresi"]
+        assert results[0]["all_terms_matched"] is True
+
+        # Hiçbir chunk tüm kelimeleri içermiyorsa OR sonuçları döner
+        results = index.search("teslim adresi ödeme", owner="alice", scope="user")
+        assert len(results) == 3
+        assert results[0]["text"].startswith("Teslim adresi")
+        assert results[0]["matched_terms"] == 2
+        assert not any(r["all_terms_matched"] for r in results)
+
+    @pytest.mark.parametrize("query", ["teslim süresi", "teslim adresi ödeme"])
+    def test_search_is_single_round_trip(self, index, query):
+        statements = []
+        with index.reader() as conn:
+            conn.set_trace_callback(statements.append)
+        try:
+            assert index.search(query, owner="alice", scope="user")
+        finally:
+            conn.set_trace_callback(None)
+        # FTS5'in gölge tablolara attığı iç sorgular hariç
+        assert len([sql for sql in statements if "MATCH" in sql]) == 1
+
+    def test_owner_scope_isolation(self, index):
+        assert index.search("teslim", owner="bob", scope="user") == []
+
+    def test_reader_connections_are_reused(self, index):
+        with index.reader() as first:
+            pass
+        with index.reader() as second:
+            assert second is first
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: index.search("teslim", "alice", "user"), range(32)))
+        assert all(len(r) == 2 for r in results)
+        assert index._reader_count <= index.pool_size
+
+    def test_upsert_and_delete_upload(self, index):
+        index.upsert("alice", "user", "doc.pdf", "up-1", 2, 0, "Ödeme vadesi otuz gündür.")
+        assert index.search("vadesi", "alice", "user")[0]["page_number"] == 2
+        assert index.search("koşulları", "alice", "user") == []
+
+        assert index.delete_upload("up-1", "alice") == 3
+        assert index.search("teslim", "alice", "user") == []
+
+    @pytest.mark.asyncio
+    async def test_async_search(self, index, monkeypatch):
+        monkeypatch.setattr(rag_v2_lexical, "_index", index)
+        results = await rag_v2_lexical.lexical_search_async("ödeme", owner="alice", scope="user")
+        assert results[0]["page_number"] == 2
+
+
+class TestChunkIdentity:
+
+    def test_upsert_replaces_by_chunk_id(self, index):
+        chunk_id = _chunk_id(1, 0)
+        index.upsert("alice", "user", "doc.pdf", "up-1", 1, 0, "Teslim süresi yirmi gündür.", chunk_id=chunk_id)
+        index.upsert("alice", "user", "doc.pdf", "up-1", 1, 0, "Teslim süresi otuz gündür.", chunk_id=chunk_id)
+
+        results = index.search("süresi", "alice", "user")
+        assert [r["chunk_id"] for r in results] == [chunk_id]
+        assert "otuz" in results[0]["text"]
+        assert index.search("yirmi", "alice", "user") == []
+
+    def test_deletes_use_side_table_indexes(self, index):
+        with index.reader() as conn:
+            plans = [
+                " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+                for sql, params in (
+                    (rag_v2_lexical._DELETE_UPLOAD_SQL, ("up-1", "alice")),
+                    (rag_v2_lexical._DELETE_FILENAME_SQL, ("alice", "doc.pdf")),
+                    (rag_v2_lexical._DELETE_PAGES_AFTER_SQL, ("up-1", "alice", 1)),
+                )
+            ]
+        assert plans[0].startswith("SEARCH rag_v2_chunks USING INDEX idx_rag_v2_chunks_upload")
+        assert all(plan.startswith("SEARCH rag_v2_chunks") for plan in plans)
+
+        index.delete_pages_after("up-1", "alice", 1)
+        assert index.search("ödeme", "alice", "user") == []
+        assert len(index.search("teslim", "alice", "user")) == 2
+
+    def test_legacy_index_is_migrated_in_place(self, tmp_path):
+        import sqlite3
+
+        db_path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE VIRTUAL TABLE rag_v2_fts USING fts5(content, owner, scope, filename, upload_id, "
+            "page_number UNINDEXED, chunk_index UNINDEXED, tokenize='unicode61')"
+        )
+        row = ("Teslim süresi on gündür.", "alice", "user", "my doc.pdf", "up-9", 3, 1)
+        # Eski upsert append-only olduğu için aynı chunk iki kez bulunabilir
+        conn.executemany("INSERT INTO rag_v2_fts VALUES (?, ?, ?, ?, ?, ?, ?)", [row, row])
+        conn.commit()
+        conn.close()
+
+        idx = LexicalIndex(db_path)
+        try:
+            results = idx.search("teslim", "alice", "user")
+            assert len(results) == 1
+            assert results[0]["chunk_id"] == "alice:my_doc.pdf:up-9:p3:c1"
+            assert results[0]["page_number"] == 3
+
+            assert idx.delete_upload("up-9", "alice") == 1
+            assert idx.search("teslim", "alice", "user") == []
+            with idx.reader() as c:
+                assert c.execute("PRAGMA user_version").fetchone()[0] == rag_v2_lexical.SCHEMA_VERSION
+        finally:
+            idx.close()
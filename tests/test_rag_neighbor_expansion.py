@@ -0,0 +1,108 @@
+"""
+RAG v2 Neighbor Expansion - Unit Tests
+======================================
+
+Deterministik chunk ID'leriyle toplu komşu getirme, (owner, scope,
+upload_id, page) LRU cache'i ve silmede invalidation.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.memory import rag_v2
+
+
+def _store(owner="alice", upload_id="up-1", filename="my doc.pdf", pages=(1, 2), chunks=4):
+    store = {}
+    for page in pages:
+        for idx in range(chunks):
+            store[rag_v2._chunk_id(owner, filename, upload_id, page, idx)] = (
+                f"p{page}c{idx}",
+                {"owner": owner, "scope": "user", "filename": filename, "upload_id": upload_id,
+                 "page_number": page, "chunk_index": idx},
+            )
+    return store
+
+
+def _collection(store):
+    coll = MagicMock()
+
+    def get(ids=None, include=None, **kwargs):
+        found = [i for i in ids if i in store]
+        return {"ids": found, "documents": [store[i][0] for i in found], "metadatas": [store[i][1] for i in found]}
+
+    coll.get.side_effect = get
+    return coll
+
+
+def _hit(page, idx, upload_id="up-1"):
+    return {"upload_id": upload_id, "filename": "my doc.pdf", "page_number": page, "chunk_index": idx}
+
+
+@pytest.fixture
+def coll():
+    coll = _collection(_store())
+    with patch.object(rag_v2, "_get_rag_v2_collection", return_value=coll):
+        rag_v2._neighbor_page_cache.clear()
+        yield coll
+    rag_v2._neighbor_page_cache.clear()
+
+
+class TestNeighborExpansion:
+
+    def test_batch_fetches_only_needed_ids_in_one_call(self, coll):
+        result = rag_v2.expand_neighbors_batch("alice", "user", [_hit(1, 0), _hit(2, 2)], radius=1)
+
+        assert coll.get.call_count == 1
+        requested = coll.get.call_args.kwargs["ids"]
+        assert sorted(requested) == sorted(
+            rag_v2._chunk_id("alice", "my doc.pdf", "up-1", p, c) for p, c in [(1, 0), (1, 1), (2, 1), (2, 2), (2, 3)]
+        )
+        assert [[n["text"] for n in ns] for ns in result] == [["p1c0", "p1c1"], ["p2c1", "p2c2", "p2c3"]]
+
+    def test_page_cache_serves_repeat_turns(self, coll):
+        rag_v2.expand_neighbors_batch("alice", "user", [_hit(1, 3)])
+        # Sayfa sonu (c4 yok) da cache'lenir: tekrar sorulmaz
+        again = rag_v2.expand_neighbors_batch("alice", "user", [_hit(1, 3)])
+
+        assert coll.get.call_count == 1
+        assert [n["text"] for n in again[0]] == ["p1c2", "p1c3"]
+
+    def test_delete_invalidates_upload_pages(self, coll):
+        rag_v2.expand_neighbors_batch("alice", "user", [_hit(1, 1)])
+        coll.get.side_effect = None
+        coll.get.return_value = {"ids": ["x"], "metadatas": [{"upload_id": "up-1"}]}
+        with patch("app.memory.rag_v2_lexical.delete_by_upload_id"):
+            rag_v2.delete_by_upload_id("up-1", "alice")
+
+        assert not any(key[2] == "up-1" for key in rag_v2._neighbor_page_cache)
+
+    def test_other_owner_chunks_are_not_returned(self, coll):
+        assert rag_v2.expand_neighbors_batch("bob", "user", [_hit(1, 1)]) == [[]]
+
+    def test_page_cache_is_scoped_to_owner(self, coll):
+        store = {**_store(), **_store(owner="bob")}
+        store = {k: (f"{v[1]['owner']}-{v[0]}", v[1]) for k, v in store.items()}
+        coll.get.side_effect = _collection(store).get.side_effect
+
+        alice = rag_v2.expand_neighbors_batch("alice", "user", [_hit(1, 1)])
+        # Aynı upload_id'yi kullanan başka kullanıcı alice'in cache'lenmiş sayfasını görmez
+        bob = rag_v2.expand_neighbors_batch("bob", "user", [_hit(1, 1)])
+
+        assert coll.get.call_count == 2
+        assert [n["text"] for n in alice[0]] == ["alice-p1c0", "alice-p1c1", "alice-p1c2"]
+        assert [n["text"] for n in bob[0]] == ["bob-p1c0", "bob-p1c1", "bob-p1c2"]
+
+    def test_top_n_hits_are_expanded_in_place(self, coll):
+        candidates = [
+            {**_hit(1, 1), "text": "p1c1", "hybrid_score": 0.0},
+            {**_hit(2, 2), "text": "p2c2", "hybrid_score": 0.1},
+            {**_hit(1, 3), "text": "p1c3", "hybrid_score": 0.5},
+        ]
+
+        expanded = rag_v2._expand_top_hits("alice", "user", candidates)
+
+        assert [c["text"] for c in expanded] == ["p1c1", "p1c0", "p1c2", "p2c2", "p2c1", "p2c3", "p1c3"]
+        assert expanded[1]["score_type"] == "neighbor"
+        assert expanded[4]["hybrid_score"] == pytest.approx(0.11)
@@ -0,0 +1,63 @@
+"""
+RAG v2 Ranking - Unit Tests
+===========================
+
+NumPy RRF çekirdeği: eski dict tabanlı merge ile birebir aynı sıra,
+ağırlıklı çoklu retriever füzyonu ve LLM rerank'in aday kopyalamaması.
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from app.memory import rag_v2
+from app.memory.rag_v2_ranking import RankedList, rrf_fuse
+from scripts.bench_rrf_fusion import legacy_merge, make_candidates
+
+
+class TestRRFFusion:
+
+    @pytest.mark.parametrize("seed,overlap", [(1, 0.0), (2, 0.5), (3, 1.0)])
+    def test_matches_legacy_merge(self, seed, overlap):
+        dense, lexical = make_candidates(200, 200, overlap=overlap, seed=seed)
+
+        old = legacy_merge([dict(c) for c in dense], [dict(c) for c in lexical])
+        new = rag_v2._fuse_hybrid([dict(c) for c in dense], [dict(c) for c in lexical])
+
+        assert [c["text"] for c in new] == [c["text"] for c in old]
+        assert [c["fts_matched"] for c in new] == [c["fts_matched"] for c in old]
+        np.testing.assert_allclose([c["hybrid_score"] for c in new], [c["hybrid_score"] for c in old])
+
+    def test_weighted_fusion_of_three_retrievers(self):
+        fused = rrf_fuse([
+            RankedList("dense", ["a", "b", "c"], np.array([0.1, 0.2, 0.3])),
+            RankedList("lexical", ["c", "d"], np.array([-9.0, -1.0]), weight=1.5),
+            RankedList("archive", ["d", "c"], np.array([0.9, 0.4]), weight=2.0, higher_is_better=True),
+        ], k=1)
+
+        # c: 1/4 + 1.5/2 + 2/3, d: 1.5/3 + 2/2, a: 1/2, b: 1/3
+        assert fused.keys == ["c", "d", "a", "b"]
+        np.testing.assert_allclose(fused.rrf, [1 / 4 + 1.5 / 2 + 2 / 3, 1.5 / 3 + 1.0, 0.5, 1 / 3])
+        assert fused.hybrid[0] == 0.0
+        assert fused.matched("archive").tolist() == [True, True, False, False]
+        assert fused.positions[0].tolist() == [2, -1, 0, 1]
+
+    def test_empty_inputs(self):
+        fused = rrf_fuse([RankedList("dense", [], np.array([])), RankedList("lexical", [], np.array([]))])
+        assert len(fused) == 0
+        assert [p.tolist() for p in fused.positions] == [[], []]
+
+
+class TestRerankOrder:
+
+    @pytest.mark.asyncio
+    async def test_rerank_reorders_without_copying(self):
+        results = [{"text": "same"}, {"text": "same"}, {"text": "other"}]
+        provider = AsyncMock()
+        provider.generate.return_value = "[2, 0, 2]"
+
+        with patch("app.providers.llm.groq.GroqProvider", return_value=provider):
+            reranked = await rag_v2._rerank_with_llm("soru", results)
+
+        assert [id(r) for r in reranked] == [id(results[2]), id(results[0]), id(results[1])]
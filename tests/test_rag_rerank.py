@@ -0,0 +1,82 @@
+"""
+RAG v2 Reranker - Unit Tests
+============================
+
+Yerel lexical-feature reranker, süre bütçesi ve düşük güvende LLM'e düşen
+cascade.
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.memory.rag_v2_rerank import (
+    CascadeReranker,
+    LexicalFeatureReranker,
+    LLMReranker,
+    RerankResult,
+)
+
+
+def _cand(text, hybrid=0.5):
+    return {"text": text, "hybrid_score": hybrid, "score_type": "hybrid_distance"}
+
+
+class TestLexicalFeatureReranker:
+
+    @pytest.mark.asyncio
+    async def test_identifier_and_phrase_match_rank_first(self):
+        candidates = [
+            _cand("Genel hükümler ve tanımlar.", hybrid=0.0),
+            _cand("Madde 157/1 uyarınca teslim süresi on gündür.", hybrid=0.4),
+            _cand("Süre uzatımı teslim tarafından talep edilir.", hybrid=0.2),
+        ]
+
+        result = await LexicalFeatureReranker().rerank("157/1 teslim süresi", candidates)
+
+        assert result.candidates[0] is candidates[1]
+        assert result.scored == 3
+        assert result.confidence > 0.55
+        assert result.candidates[0]["rerank_score"] > result.candidates[1]["rerank_score"]
+
+    @pytest.mark.asyncio
+    async def test_budget_keeps_unscored_tail_in_order(self):
+        candidates = [_cand(f"parça {i}") for i in range(5)]
+        with patch("app.memory.rag_v2_rerank.time.perf_counter", side_effect=[0.0] + [10.0] * 20):
+            result = await LexicalFeatureReranker(latency_budget_ms=1).rerank("parça", candidates)
+
+        assert result.scored == 1
+        assert result.candidates == candidates
+
+    @pytest.mark.asyncio
+    async def test_no_query_terms_gives_zero_confidence(self):
+        candidates = [_cand("a"), _cand("b")]
+        result = await LexicalFeatureReranker().rerank("?", candidates)
+        assert result.confidence == 0.0
+        assert result.candidates == candidates
+
+
+class TestCascadeReranker:
+
+    @pytest.mark.asyncio
+    async def test_confident_local_skips_llm(self):
+        llm = AsyncMock(spec=LLMReranker)
+        cascade = CascadeReranker(LexicalFeatureReranker(), llm, min_confidence=0.3)
+
+        result = await cascade.rerank("teslim süresi", [_cand("teslim süresi on gün"), _cand("ödeme")])
+
+        llm.rerank.assert_not_called()
+        assert result.reranker == "local"
+
+    @pytest.mark.asyncio
+    async def test_low_confidence_falls_back_to_llm(self):
+        candidates = [_cand("ödeme koşulları"), _cand("fatura adresi")]
+        with patch("app.memory.rag_v2._rerank_with_llm", AsyncMock(side_effect=lambda q, c: list(reversed(c)))) as llm:
+            result = await CascadeReranker(LexicalFeatureReranker(), LLMReranker(), min_confidence=0.55).rerank(
+                "teslim süresi", candidates
+            )
+
+        llm.assert_awaited_once()
+        assert result.reranker == "local+llm"
+        assert isinstance(result, RerankResult)
+        assert len(result.candidates) == 2
@@ -0,0 +1,109 @@
+"""
+RAG v2 Retrieval Planner - Unit Tests
+=====================================
+
+Deep mode'da sorgunun tek sefer embed edilmesi, seed pass sonuçlarının
+ana sonuç kümesine taşınması ve return_stats ile aşama sürelerinin dönmesi.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.memory import rag_v2, rag_v2_docs, rag_v2_lexical
+
+
+def _chroma_result(hits):
+    """hits: [(id, upload_id, distance)]"""
+    return {
+        "ids": [[h[0] for h in hits]],
+        "metadatas": [[{"upload_id": h[1], "filename": f"{h[1]}.pdf", "page_number": 1, "chunk_index": i}
+                       for i, h in enumerate(hits)]],
+        "documents": [[f"text {h[0]}" for h in hits]],
+        "distances": [[h[2] for h in hits]],
+    }
+
+
+async def _passthrough(query, results):
+    return results
+
+
+@pytest.fixture
+def search_env(tmp_path, monkeypatch):
+    from app.core import embedding_cache
+
+    monkeypatch.setattr(embedding_cache, "_store", embedding_cache._EmbeddingStore(str(tmp_path / "emb.db")))
+    monkeypatch.setattr(embedding_cache, "_caches", {})
+    monkeypatch.setattr(rag_v2_docs, "CATALOG_DB_PATH", str(tmp_path / "catalog.db"))
+    monkeypatch.setattr(rag_v2_lexical, "_index", rag_v2_lexical.LexicalIndex(str(tmp_path / "fts.db")))
+    ef = MagicMock(return_value=[[0.1, 0.2, 0.3]])
+    coll = MagicMock()
+    with patch.object(rag_v2, "_get_rag_v2_collection", return_value=coll), \
+         patch.object(rag_v2, "_get_embedding_function", return_value=ef), \
+         patch.object(rag_v2, "_rerank_with_llm", side_effect=_passthrough), \
+         patch("app.memory.rag_v2_lexical.lexical_search", return_value=[]):
+        yield ef, coll
+
+
+class TestRetrievalPlanner:
+
+    @pytest.mark.asyncio
+    async def test_deep_mode_embeds_once_and_carries_seed(self, search_env):
+        ef, coll = search_env
+        seed = [(f"s{i}", "docA" if i % 2 else "docB", 0.1 + i * 0.01) for i in range(rag_v2.SEED_RESULTS)]
+        # Ana pass seed'deki en iyi sonucu (s0) içermiyor → taşınmalı
+        main = [(f"s{i}", "docA" if i % 2 else "docB", 0.1 + i * 0.01) for i in range(1, 60)]
+        coll.query.side_effect = [_chroma_result(seed), _chroma_result(main)]
+
+        results, stats = await rag_v2.search_documents_v2(
+            "teslim süresi", owner="alice", scope="user", mode="deep", return_stats=True
+        )
+
+        ef.assert_called_once_with(["teslim süresi"])
+        assert coll.query.call_count == 2
+        for call in coll.query.call_args_list:
+            assert call.kwargs["query_embeddings"] == [[0.1, 0.2, 0.3]]
+            assert "query_texts" not in call.kwargs
+        assert results[0]["id"] == "s0"
+        assert stats.dense_passes == 2
+        assert stats.query_embedded_once is True
+        assert stats.doc_selection_used is True
+        assert stats.latency_ms_total >= stats.latency_ms_dense
+
+    @pytest.mark.asyncio
+    async def test_exhausted_seed_skips_main_pass(self, search_env):
+        _, coll = search_env
+        coll.query.return_value = _chroma_result([("a1", "docA", 0.2), ("a2", "docA", 0.3)])
+
+        results, stats = await rag_v2.search_documents_v2(
+            "teslim süresi", owner="alice", scope="user", mode="deep", return_stats=True
+        )
+
+        assert coll.query.call_count == 1
+        assert [r["id"] for r in results] == ["a1", "a2"]
+        assert stats.dense_passes == 1
+        assert stats.dense_count == 2
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_query_texts_without_embedding(self, search_env):
+        ef, coll = search_env
+        ef.side_effect = RuntimeError("model unavailable")
+        coll.query.return_value = _chroma_result([("a1", "docA", 0.2)])
+
+        results = await rag_v2.search_documents_v2("soru", owner="alice", scope="user", mode="fast")
+
+        assert coll.query.call_args.kwargs["query_texts"] == ["soru"]
+        assert results[0]["id"] == "a1"
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_embedding_comes_from_cache(self, search_env, monkeypatch):
+        ef, coll = search_env
+        vector = [0.5] * rag_v2.EMBEDDING_DIMENSION
+        ef.return_value = [vector]
+        coll.query.return_value = _chroma_result([("a1", "docA", 0.2)])
+
+        await rag_v2.search_documents_v2("teslim süresi", owner="alice", scope="user", mode="fast")
+        await rag_v2.search_documents_v2("teslim süresi", owner="alice", scope="user", mode="fast")
+
+        ef.assert_called_once_with(["teslim süresi"])
+        assert coll.query.call_args.kwargs["query_embeddings"] == [vector]
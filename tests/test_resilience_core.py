@@ -0,0 +1,338 @@
+"""
+Resilience Core - Unit Tests
+============================
+
+Ortak durum deposu (memory / Redis aynası), tek devre kesici uygulaması ve
+eski modüllerin ona bağlanması, anahtar cooldown'u ile günlük bütçenin
+depoda tutulması, model devre kesicisi ve admin durum özeti.
+"""
+
+import time
+
+import pytest
+
+from app.core.llm import budget_tracker, key_manager
+from app.core.resilience import (
+    CircuitManager,
+    CircuitState,
+    MemoryStateBackend,
+    RedisStateBackend,
+    set_state_backend,
+    status_snapshot,
+)
+from app.core.resilience.circuit_breaker import NAMESPACE as CIRCUIT_NAMESPACE
+
+
+@pytest.fixture(autouse=True)
+def _backend():
+    backend = MemoryStateBackend()
+    set_state_backend(backend)
+    circuits = dict(CircuitManager._circuits)
+    key_manager.reset()
+    budget_tracker.reset()
+    yield backend
+    key_manager.reset()
+    budget_tracker.reset()
+    CircuitManager._circuits = circuits
+    set_state_backend(None)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    def __len__(self):
+        return len(self.commands)
+
+    async def execute(self, raise_on_error=True):
+        if self.redis.down:
+            raise ConnectionError("redis down")
+        results = []
+        for name, args in self.commands:
+            try:
+                results.append(getattr(self.redis, name)(*args))
+            except Exception as e:  # noqa: BLE001
+                if raise_on_error:
+                    raise
+                results.append(e)
+        return results
+
+
+class _FakeRedis:
+    """Worker'ların paylaştığı Redis hash'leri (yalnızca kullanılan komutlar)."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.down = False
+        self.rejected_keys = set()
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+    def hincrbyfloat(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field] = str(float(values.get(field, 0)) + amount)
+        return float(values[field])
+
+    def hset(self, key, field, value):
+        if key in self.rejected_keys:
+            raise RuntimeError("WRONGTYPE")
+        self.hashes.setdefault(key, {})[field] = str(value)
+
+    def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(field, None)
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def expire(self, key, ttl):
+        return True
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+
+def _worker(redis, clock=time.time):
+    async def client():
+        return redis
+
+    return RedisStateBackend(prefix="test", sync_interval=3600, client_factory=client, clock=clock)
+
+
+class TestStateBackend:
+
+    def test_counters_and_namespace_ttl(self):
+        clock = _Clock()
+        backend = MemoryStateBackend(clock=clock)
+
+        backend.incr("budget:x", "m:tokens", 5, ttl=60)
+        backend.incr("budget:x", "m:tokens", 7, ttl=60)
+        backend.set("keys", "k1", 42.0)
+        assert backend.get("budget:x", "m:tokens") == 12
+        assert backend.get_all("keys") == {"k1": 42.0}
+
+        clock.now += 61
+        assert backend.get("budget:x", "m:tokens") == 0
+        assert backend.get("keys", "k1") == 42.0
+
+    @pytest.mark.asyncio
+    async def test_redis_mirrors_converge_across_workers(self):
+        redis = _FakeRedis()
+        first, second = _worker(redis), _worker(redis)
+
+        first.incr("budget:x", "m:requests", 2)
+        first.get("keys", "k1")  # okunan namespace'ler senkronizasyonda tazelenir
+        second.incr("budget:x", "m:requests", 3)
+        second.set("keys", "k1", 99.0)
+        assert await first.sync() and await second.sync()
+        await first.sync()
+
+        for worker in (first, second):
+            assert worker.get("budget:x", "m:requests") == 5
+        assert first.get("keys", "k1") == 99.0
+
+        # Yeniden başlatılan worker durumu Redis'ten alır
+        restarted = _worker(redis)
+        restarted.get("budget:x", "m:requests")
+        await restarted.sync()
+        assert restarted.get("budget:x", "m:requests") == 5
+
+    @pytest.mark.asyncio
+    async def test_redis_outage_is_fail_open_and_retried(self):
+        redis = _FakeRedis()
+        worker = _worker(redis)
+        redis.down = True
+
+        worker.incr("circuit", "svc:failures")
+        assert not await worker.sync()
+        assert worker.get("circuit", "svc:failures") == 1
+        assert worker.describe()["pending_writes"] == 1
+
+        redis.down = False
+        assert await worker.sync()
+        assert redis.hashes["test:circuit"]["svc:failures"] == "1.0"
+        assert worker.describe()["connected"]
+
+    @pytest.mark.asyncio
+    async def test_partial_pipeline_failure_retries_only_failed_writes(self):
+        redis = _FakeRedis()
+        worker = _worker(redis)
+        redis.rejected_keys.add("test:keys")
+
+        worker.incr("budget:x", "m:requests", 2)
+        worker.set("keys", "k1", 42.0)
+        await worker.sync()
+        assert worker.describe()["pending_writes"] == 1
+
+        redis.rejected_keys.clear()
+        await worker.sync()
+
+        assert redis.hashes["test:budget:x"]["m:requests"] == "2.0"  # incr bir kez uygulandı
+        assert redis.hashes["test:keys"]["k1"] == "42.0"
+        assert worker.get("keys", "k1") == 42.0
+
+    @pytest.mark.asyncio
+    async def test_local_expiry_does_not_delete_shared_state(self):
+        redis = _FakeRedis()
+        clock = _Clock()
+        first, second = _worker(redis, clock), _worker(redis)
+
+        first.incr("budget:x", "m:requests", 2, ttl=60)
+        await first.sync()
+        second.incr("budget:x", "m:requests", 3, ttl=60)
+        await second.sync()
+
+        clock.now += 61
+        assert first.get("budget:x", "m:requests") == 0
+        assert first.describe()["pending_writes"] == 0
+        await first.sync()
+        # Redis'teki (ikinci worker'ın tazelediği) hash yerinde; mirror ondan dolar
+        assert redis.hashes["test:budget:x"]["m:requests"] == "5.0"
+        assert first.get("budget:x", "m:requests") == 5
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_consecutive_failures_and_recovers(self, _backend):
+        breaker = CircuitManager.get_breaker("svc", fail_threshold=3, reset_timeout=60)
+
+        breaker.record_failure()
+        breaker.record_success()  # ardışık sayaç sıfırlanır
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.can_execute()
+        breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN and not breaker.can_execute()
+
+        _backend.set(CIRCUIT_NAMESPACE, "svc:opened_at", time.time() - 61)
+        assert breaker.state == CircuitState.HALF_OPEN and breaker.can_execute()
+        breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.get_status()["total_calls"] == 6
+
+    def test_half_open_failure_reopens(self, _backend):
+        breaker = CircuitManager.get_breaker("svc", fail_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        _backend.set(CIRCUIT_NAMESPACE, "svc:opened_at", time.time() - 61)
+
+        breaker.record_failure(RuntimeError("boom"))
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.get_status()["retry_after"] > 0
+
+    @pytest.mark.asyncio
+    async def test_legacy_modules_share_the_same_state(self):
+        from app.core.circuit_breaker import CircuitBreaker, CircuitBreakerConfig
+        from app.core.exceptions import ExternalServiceError
+        from app.image.circuit_breaker import forge_circuit_breaker
+
+        assert CircuitManager.get_breaker("forge") is forge_circuit_breaker
+
+        legacy = CircuitBreaker("redis", CircuitBreakerConfig(failure_threshold=1, expected_exception=ValueError))
+
+        def fail():
+            raise ValueError("down")
+
+        with pytest.raises(ValueError):
+            await legacy.call(fail)
+        with pytest.raises(ExternalServiceError):
+            await legacy.call(lambda: "ok")
+        assert not CircuitManager.get_breaker("redis").can_execute()
+
+
+class TestKeysAndBudget:
+
+    def test_model_circuit_opens_on_provider_failures(self):
+        key_manager.initialize(groq_keys=["gsk_one"], gemini_keys=None)
+        model = "llama-3.1-8b-instant"
+
+        for _ in range(5):
+            key_manager.report_error("gsk_one", error_msg="ConnectError: connection reset", model_id=model)
+
+        assert key_manager.get_best_key(model_id=model) is None
+        assert key_manager.get_best_key(model_id="llama-3.3-70b-versatile") == "gsk_one"
+
+    @pytest.mark.parametrize("kwargs", [
+        {"status_code": 400, "error_msg": "BadRequestError: context_length_exceeded"},
+        {"status_code": 413, "error_msg": "Request too large"},
+        {"error_msg": "ValueError: invalid prompt"},
+    ])
+    def test_request_errors_do_not_trip_model_circuit(self, kwargs):
+        key_manager.initialize(groq_keys=["gsk_one"], gemini_keys=None)
+        model = "llama-3.1-8b-instant"
+
+        for _ in range(6):
+            key_manager.report_error("gsk_one", model_id=model, **kwargs)
+
+        assert CircuitManager.get_breaker(f"llm:{model}").state == CircuitState.CLOSED
+
+    def test_provider_status_code_is_read_from_exceptions(self):
+        import httpx
+
+        from app.core.llm.key_manager import provider_status_code
+
+        class APIStatusError(Exception):
+            status_code = 400
+
+        request = httpx.Request("POST", "https://api.example/v1")
+        http_error = httpx.HTTPStatusError("boom", request=request, response=httpx.Response(503, request=request))
+
+        assert provider_status_code(APIStatusError("context_length_exceeded")) == 400
+        assert provider_status_code(http_error) == 503
+        assert provider_status_code(TimeoutError()) is None
+
+    def test_rate_limits_do_not_trip_model_circuit(self):
+        key_manager.initialize(groq_keys=["gsk_one"], gemini_keys=None)
+        model = "llama-3.1-8b-instant"
+
+        for _ in range(6):
+            key_manager.report_error("gsk_one", error_msg="Error code: 429 - rate limit", model_id=model)
+
+        assert CircuitManager.get_breaker(f"llm:{model}").state == CircuitState.CLOSED
+
+    def test_cooldown_survives_reinitialisation(self):
+        key_manager.initialize(groq_keys=["gsk_one", "gsk_two"], gemini_keys=None)
+        key_manager.report_error("gsk_one", status_code=429, model_id="m")
+
+        # Aynı depoyu okuyan başka bir worker / yeniden başlatma
+        key_manager.initialize(groq_keys=["gsk_one", "gsk_two"], gemini_keys=None)
+        for _ in range(3):
+            assert key_manager.get_best_key(model_id="m") == "gsk_two"
+
+    def test_budget_counters_live_in_backend(self, _backend):
+        budget_tracker.record_usage("m1", tokens=120)
+        budget_tracker.record_usage("m1", tokens=30)
+
+        assert budget_tracker.get_usage("m1").requests == 2
+        namespace = budget_tracker._namespace()
+        assert _backend.get(namespace, "m1:tokens") == 150
+
+        _backend.incr(namespace, "m1:tokens", 1000)  # başka worker'ın kullanımı
+        assert budget_tracker.get_usage("m1").tokens == 1150
+
+    @pytest.mark.asyncio
+    async def test_status_snapshot_covers_keys_budget_and_circuits(self):
+        key_manager.initialize(groq_keys=["gsk_one"], gemini_keys=None)
+        key_manager.report_error("gsk_one", status_code=429, model_id="m")
+        budget_tracker.record_usage("m", tokens=10)
+        CircuitManager.get_breaker("serper").record_failure()
+
+        snapshot = await status_snapshot()
+
+        assert snapshot["backend"]["backend"] == "memory"
+        assert snapshot["keys"][0]["status"] == "cooldown"
+        assert snapshot["budget"]["models"]["m"]["tokens"] == 10
+        serper = next(c for c in snapshot["circuits"] if c["service"] == "serper")
+        assert serper["fail_count"] == 1
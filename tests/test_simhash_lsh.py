@@ -0,0 +1,250 @@
+"""
+Simhash LSH - Unit Tests
+========================
+
+Bantlı simhash indeksi: pigeonhole garantisi (brute-force ile aynı sonuç),
+yalnızca aday kovalara erişim, eski kullanıcılar için backfill, Redis
+kesintisinde süreç içi indeks ve vektörel popcount.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from app.services import semantic_memory_enhancer as sme
+from app.services.semantic_memory_enhancer import Simhash, SimhashStore
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class _FakeRedis:
+    """hash/set/string komutlarını destekleyen bellek içi async Redis."""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    async def hset(self, key, field, value):
+        self.commands.append("hset")
+        self.data.setdefault(key, {})[field] = value
+        return 1
+
+    async def hget(self, key, field):
+        self.commands.append("hget")
+        return self.data.get(key, {}).get(field)
+
+    async def hgetall(self, key):
+        self.commands.append("hgetall")
+        return dict(self.data.get(key, {}))
+
+    async def hdel(self, key, field):
+        self.commands.append("hdel")
+        return 1 if self.data.get(key, {}).pop(field, None) is not None else 0
+
+    async def sadd(self, key, member):
+        self.commands.append("sadd")
+        self.data.setdefault(key, set()).add(member)
+        return 1
+
+    async def srem(self, key, member):
+        self.commands.append("srem")
+        bucket = self.data.get(key, set())
+        bucket.discard(member)
+        if not bucket:
+            self.data.pop(key, None)
+        return 1
+
+    async def sunion(self, *keys):
+        self.commands.append("sunion")
+        out = set()
+        for key in keys:
+            out |= self.data.get(key, set())
+        return out
+
+    async def set(self, key, value):
+        self.commands.append("set")
+        self.data[key] = value
+
+    async def exists(self, key):
+        self.commands.append("exists")
+        return int(key in self.data)
+
+    async def delete(self, *keys):
+        self.commands.append("delete")
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    async def scan_iter(self, match=None, count=None):
+        prefix = match.rstrip("*")
+        for key in list(self.data):
+            if key.startswith(prefix):
+                yield key
+
+
+@pytest.fixture
+def hex_simhash(monkeypatch):
+    """Metin = 16 haneli hex parmak izi; testler değeri doğrudan seçer."""
+    monkeypatch.setattr(Simhash, "_compute", lambda self, text: int(text, 16))
+    monkeypatch.setattr(SimhashStore, "_local", sme._LocalSimhashIndex(SimhashStore.BANDS, SimhashStore.BAND_BITS))
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = _FakeRedis()
+
+    async def _get():
+        return client
+
+    monkeypatch.setattr("app.core.redis_client.get_redis", _get)
+    return client
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    async def _none():
+        return None
+
+    monkeypatch.setattr("app.core.redis_client.get_redis", _none)
+
+
+def _flip(value, bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def _hex(value):
+    return f"{value:016x}"
+
+
+class TestBandedIndex:
+
+    @pytest.mark.asyncio
+    async def test_matches_brute_force(self, hex_simhash, redis):
+        rng = random.Random(11)
+        stored = {f"m{i}": rng.getrandbits(64) for i in range(300)}
+        for memory_id, value in stored.items():
+            await SimhashStore.add(1, memory_id, _hex(value))
+
+        for _ in range(200):
+            base = rng.choice(list(stored.values()))
+            query = _flip(base, rng.sample(range(64), rng.randint(0, 6)))
+            brute = min(bin(query ^ v).count("1") for v in stored.values())
+
+            result = await SimhashStore.find_similar(1, _hex(query))
+
+            assert result.is_duplicate == (brute <= SimhashStore.HAMMING_THRESHOLD)
+            if result.is_duplicate:
+                assert result.hamming_distance == brute
+
+    @pytest.mark.asyncio
+    async def test_lookup_reads_only_candidate_buckets(self, hex_simhash, redis):
+        for i in range(50):
+            await SimhashStore.add(1, f"m{i}", _hex(random.Random(i).getrandbits(64)))
+        redis.commands.clear()
+
+        await SimhashStore.find_similar(1, _hex(0x0123456789ABCDEF))
+
+        assert redis.commands == ["exists", "sunion"]
+
+    @pytest.mark.asyncio
+    async def test_update_and_remove_drop_stale_buckets(self, hex_simhash, redis):
+        old, new = 0x1111222233334444, 0xAAAABBBBCCCCDDDD
+        await SimhashStore.add(1, "m1", _hex(old))
+        await SimhashStore.add(1, "m1", _hex(new))
+
+        assert not (await SimhashStore.find_similar(1, _hex(old))).is_duplicate
+        assert (await SimhashStore.find_similar(1, _hex(new))).existing_id == "m1"
+
+        assert await SimhashStore.remove(1, "m1")
+        assert not (await SimhashStore.find_similar(1, _hex(new))).is_duplicate
+        assert [k for k in redis.data if ":b" in k] == []
+
+    @pytest.mark.asyncio
+    async def test_clear_user_deletes_buckets(self, hex_simhash, redis):
+        await SimhashStore.add(1, "m1", _hex(0x1))
+        await SimhashStore.add(2, "m2", _hex(0x2))
+
+        assert await SimhashStore.clear_user(1) == 1
+        assert all(not k.startswith("simhash:1") for k in redis.data)
+        assert (await SimhashStore.find_similar(2, _hex(0x2))).is_duplicate
+
+
+class TestBackfill:
+
+    @pytest.mark.asyncio
+    async def test_legacy_user_indexed_on_first_lookup(self, hex_simhash, redis):
+        value = 0x0F0F0F0F0F0F0F0F
+        redis.data["simhash:7"] = {"legacy": str(value)}
+
+        result = await SimhashStore.find_similar(7, _hex(_flip(value, [3, 40])))
+
+        assert result.is_duplicate and result.existing_id == "legacy"
+        assert redis.data["simhash:7:lsh"] == "1"
+
+    @pytest.mark.asyncio
+    async def test_backfill_all_skips_bucket_keys(self, hex_simhash, redis):
+        redis.data["simhash:1"] = {"a": str(0x1), "b": str(0x2)}
+        redis.data["simhash:2"] = {"c": str(0x3)}
+
+        assert await SimhashStore.backfill_all() == {"1": 2, "2": 1}
+        # İkinci tur yeni kova anahtarlarını kullanıcı sanmamalı
+        assert await SimhashStore.backfill_all() == {"1": 2, "2": 1}
+
+
+class TestFallback:
+
+    @pytest.mark.asyncio
+    async def test_local_index_when_redis_down(self, hex_simhash, no_redis):
+        value = 0x123456789ABCDEF0
+        await SimhashStore.add(3, "m1", _hex(value))
+
+        hit = await SimhashStore.find_similar(3, _hex(_flip(value, [0, 17, 63])))
+        miss = await SimhashStore.find_similar(3, _hex(_flip(value, [0, 17, 33, 63])))
+
+        assert hit.is_duplicate and hit.hamming_distance == 3
+        assert not miss.is_duplicate
+        assert await SimhashStore.remove(3, "m1")
+        assert not (await SimhashStore.find_similar(3, _hex(value))).is_duplicate
+
+
+def test_vectorized_popcount_matches_python():
+    rng = random.Random(5)
+    values = [rng.getrandbits(64) for _ in range(1000)] + [0, 2**64 - 1]
+
+    counts = sme._popcount64(np.array(values, dtype=np.uint64))
+
+    assert counts.tolist() == [bin(v).count("1") for v in values]
+
+
+@pytest.mark.asyncio
+async def test_real_text_round_trip(redis, monkeypatch):
+    monkeypatch.setattr(SimhashStore, "_local", sme._LocalSimhashIndex(SimhashStore.BANDS, SimhashStore.BAND_BITS))
+    text = "Kullanıcının kedisinin adı Pamuk, üç yaşında beyaz tüylü bir Van kedisi."
+    await SimhashStore.add(9, "cat", text)
+
+    result = await SimhashStore.find_similar(9, f"  {text}  ")
+
+    assert result.is_duplicate and result.existing_id == "cat"